@@ -0,0 +1,53 @@
+"""Add materialized view with heatmap grid aggregates
+
+Revision ID: 2026_10_16_geo_heatmap_grid
+Revises: 2026_10_16_geo_spatial_index
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2026_10_16_geo_heatmap_grid'
+down_revision = '2026_10_16_geo_spatial_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Create the heatmap grid materialized view."""
+
+    # Grid sizes must match app.utils.geo.HEATMAP_GRID_SIZES
+    op.execute("""
+        CREATE MATERIALIZED VIEW IF NOT EXISTS mv_geo_heatmap_grid AS
+        SELECT
+            g.grid_size,
+            floor(p.latitude / g.grid_size)::bigint as lat_cell,
+            floor(p.longitude / g.grid_size)::bigint as lon_cell,
+            COUNT(*) as property_count,
+            AVG(p.price) as avg_price
+        FROM properties p
+        CROSS JOIN (VALUES
+            (0.005::double precision), (0.01::double precision),
+            (0.02::double precision), (0.05::double precision)
+        ) AS g(grid_size)
+        WHERE p.is_active = true
+          AND p.latitude IS NOT NULL
+          AND p.longitude IS NOT NULL
+        GROUP BY g.grid_size, lat_cell, lon_cell
+        WITH DATA;
+    """)
+
+    # Unique index is required for REFRESH MATERIALIZED VIEW CONCURRENTLY
+    op.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_geo_heatmap_grid_cell
+        ON mv_geo_heatmap_grid(grid_size, lat_cell, lon_cell);
+    """)
+
+
+def downgrade() -> None:
+    """Drop the heatmap grid materialized view."""
+
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_geo_heatmap_grid;")
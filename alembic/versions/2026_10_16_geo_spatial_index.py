@@ -0,0 +1,37 @@
+"""Add spatial indexes for /geo nearby queries
+
+Revision ID: 2026_10_16_geo_spatial_index
+Revises: 2026_03_10_materialized_views, 2026_03_20_add_2fa_indexes
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2026_10_16_geo_spatial_index'
+down_revision = ('2026_03_10_materialized_views', '2026_03_20_add_2fa_indexes')
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Create the bounding box index and the grid-cell expression index."""
+
+    op.create_index('ix_latitude_longitude', 'properties', ['latitude', 'longitude'], unique=False)
+
+    # Grid cell of 0.01 degrees; must match app.utils.geo.GEO_CELL_SQL exactly,
+    # otherwise the planner will not use the index
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_properties_geo_cell ON properties
+        ((floor((latitude + 90) * 100)::bigint * 36001 + floor((longitude + 180) * 100)::bigint))
+        WHERE latitude IS NOT NULL AND longitude IS NOT NULL AND is_active = true;
+    """)
+
+
+def downgrade() -> None:
+    """Drop spatial indexes."""
+
+    op.execute("DROP INDEX IF EXISTS ix_properties_geo_cell;")
+    op.drop_index('ix_latitude_longitude', table_name='properties')
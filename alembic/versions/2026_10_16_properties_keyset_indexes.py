@@ -0,0 +1,146 @@
+"""Review properties indexes: partial keyset indexes over active listings
+
+Revision ID: 2026_10_16_properties_keyset_indexes
+Revises: 2026_10_16_geo_heatmap_grid
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2026_10_16_properties_keyset_indexes'
+down_revision = '2026_10_16_geo_heatmap_grid'
+branch_labels = None
+depends_on = None
+
+
+ACTIVE = sa.text('is_active = true')
+
+# Indexes superseded by the partial ones below or duplicating a prefix of
+# another index (the primary key already covers id)
+REDUNDANT_INDEXES = (
+    'ix_properties_id',
+    'ix_properties_source',
+    'ix_properties_price',
+    'ix_properties_city',
+    'ix_properties_is_active',
+    'ix_properties_rooms',
+    'ix_properties_area',
+    'ix_properties_floor',
+    'ix_properties_is_verified',
+    'ix_properties_last_updated',
+    'ix_properties_verified_active',
+    'ix_city_price',
+    'ix_active_price',
+    'idx_properties_city_price',
+    'idx_properties_city_active',
+    'idx_properties_source_first_seen',
+    'idx_properties_location',
+    'ix_latitude_longitude',
+)
+
+# Declared only in the model (databases created with metadata.create_all).
+# ix_price_per_sqm is not listed: ml_price_history has an index with that name
+MODEL_ONLY_INDEXES = (
+    'ix_created_at',
+    'ix_last_seen',
+    'ix_is_active_created',
+    'ix_source_is_active',
+    'ix_district',
+    'ix_price_area',
+    'ix_verified_active',
+)
+
+# (name, columns) to restore on downgrade
+RESTORED_INDEXES = (
+    ('ix_properties_id', ['id']),
+    ('ix_properties_source', ['source']),
+    ('ix_properties_price', ['price']),
+    ('ix_properties_city', ['city']),
+    ('ix_properties_is_active', ['is_active']),
+    ('ix_properties_rooms', ['rooms']),
+    ('ix_properties_area', ['area']),
+    ('ix_properties_floor', ['floor']),
+    ('ix_properties_is_verified', ['is_verified']),
+    ('ix_properties_last_updated', ['last_updated']),
+    ('ix_properties_verified_active', ['is_verified', 'is_active']),
+    ('ix_city_price', ['city', 'price']),
+    ('ix_active_price', ['is_active', 'price']),
+    ('idx_properties_city_price', ['city', 'price']),
+    ('idx_properties_city_active', ['city', 'is_active']),
+    ('idx_properties_source_first_seen', ['source', 'first_seen']),
+    ('idx_properties_location', ['latitude', 'longitude']),
+    ('ix_latitude_longitude', ['latitude', 'longitude']),
+)
+
+PARTIAL_INDEXES = (
+    'ix_properties_active_created',
+    'ix_properties_active_city_created',
+    'ix_properties_active_price',
+    'ix_properties_active_city_price',
+    'ix_properties_active_price_per_sqm',
+    'ix_properties_active_source_last_seen',
+    'ix_properties_active_city_stats',
+    'ix_properties_active_geo',
+)
+
+
+def upgrade() -> None:
+    """Create partial indexes for active listings and drop redundant ones."""
+
+    # Keyset pagination: ORDER BY (column, id), see app.db.keyset
+    op.create_index(
+        'ix_properties_active_created', 'properties', ['created_at', 'id'],
+        postgresql_where=ACTIVE, if_not_exists=True,
+    )
+    op.create_index(
+        'ix_properties_active_city_created', 'properties', ['city', 'created_at', 'id'],
+        postgresql_where=ACTIVE, if_not_exists=True,
+    )
+    op.create_index(
+        'ix_properties_active_price', 'properties', ['price', 'id'],
+        postgresql_where=ACTIVE, if_not_exists=True,
+    )
+    op.create_index(
+        'ix_properties_active_city_price', 'properties', ['city', 'price', 'id'],
+        postgresql_include=['rooms', 'area'], postgresql_where=ACTIVE, if_not_exists=True,
+    )
+    # Expression must match app.db.keyset.PRICE_PER_SQM exactly
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_properties_active_price_per_sqm ON properties
+        ((price / area), id)
+        WHERE is_active = true AND area > 0;
+    """)
+
+    # deactivate_old_properties: source + last_seen among active listings
+    op.create_index(
+        'ix_properties_active_source_last_seen', 'properties', ['source', 'last_seen'],
+        postgresql_where=ACTIVE, if_not_exists=True,
+    )
+    # Per-city statistics as an index-only scan
+    op.create_index(
+        'ix_properties_active_city_stats', 'properties', ['city'],
+        postgresql_include=['price', 'area', 'rooms'], postgresql_where=ACTIVE, if_not_exists=True,
+    )
+    # /geo bounding box prefilter reads (id, latitude, longitude) from the index
+    op.create_index(
+        'ix_properties_active_geo', 'properties', ['latitude', 'longitude'],
+        postgresql_include=['id', 'price'], postgresql_where=ACTIVE, if_not_exists=True,
+    )
+
+    for name in REDUNDANT_INDEXES + MODEL_ONLY_INDEXES:
+        op.drop_index(name, table_name='properties', if_exists=True)
+
+    op.execute("ANALYZE properties;")
+
+
+def downgrade() -> None:
+    """Restore the previous index set."""
+
+    for name, columns in RESTORED_INDEXES:
+        op.create_index(name, 'properties', columns, unique=False, if_not_exists=True)
+
+    for name in PARTIAL_INDEXES:
+        op.drop_index(name, table_name='properties', if_exists=True)
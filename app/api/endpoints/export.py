@@ -3,11 +3,15 @@ Export endpoints for property data.
 
 Provides streaming export capabilities with multiple formats support.
 """
+from datetime import datetime
+
 from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_db
-from app.services.async_export import AsyncExportService
+from app.db.models.session import AsyncSessionLocal
+from app.services.async_export import MEDIA_TYPES, PYARROW_AVAILABLE, AsyncExportService
 from app.utils.logger import logger
 from app.utils.error_handler import retry_advanced, RetryStrategy
 
@@ -16,60 +20,54 @@ router = APIRouter()
 
 @router.get("/export/properties")
 async def export_properties(
-    format: str = Query("json", pattern=r"^(json|jsonl|csv)$"),
+    format: str = Query("json", pattern=r"^(json|jsonl|csv|parquet)$"),
     city: str = Query(None),
-    limit: int = Query(None),
-    db: AsyncSession = Depends(get_db),
-):
+    limit: int = Query(None, ge=1),
+) -> StreamingResponse:
     """
     Export properties with streaming support.
 
+    Сессия открывается внутри генератора тела ответа и живёт, пока идёт
+    выгрузка: сессия из зависимости ``get_db`` может закрыться раньше, чем
+    ``StreamingResponse`` дочитает серверный курсор.
+
     Query Parameters:
-        format: Export format (json, jsonl, csv)
+        format: Export format (json, jsonl, csv, parquet)
         city: Filter by city
         limit: Maximum number of items
 
     Returns:
         Streaming response with export data
     """
-    try:
-        # Validate format
-        if format not in AsyncExportService.EXPORT_FORMATS:
-            raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
-
-        # Log export request
-        logger.info(
-            f"Export request: format={format}, city={city}, limit={limit}",
-            extra={
-                "export_format": format,
-                "city": city,
-                "limit": limit,
-            }
-        )
-
-        # Generate streaming response based on format
-        if format == "csv":
-            return {
-                "status": "streaming",
-                "format": format,
-                "message": "Use FastAPI StreamingResponse wrapper in main.py"
-            }
-        elif format == "json":
-            return {
-                "status": "streaming",
-                "format": format,
-                "message": "Use FastAPI StreamingResponse wrapper in main.py"
-            }
-        else:  # jsonl
-            return {
-                "status": "streaming",
-                "format": format,
-                "message": "Use FastAPI StreamingResponse wrapper in main.py"
-            }
-
-    except Exception as e:
-        logger.error(f"Export error: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=str(e))
+    # Validate format
+    if format not in MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+    if format == "parquet" and not PYARROW_AVAILABLE:
+        raise HTTPException(status_code=501, detail="Parquet export requires pyarrow")
+
+    # Log export request
+    logger.info(
+        f"Export request: format={format}, city={city}, limit={limit}",
+        extra={
+            "export_format": format,
+            "city": city,
+            "limit": limit,
+        }
+    )
+
+    async def body():
+        async with AsyncSessionLocal() as session:
+            async for chunk in AsyncExportService.export_properties_streaming(
+                session, format=format, city=city, limit=limit
+            ):
+                yield chunk
+
+    filename = f"properties_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{format}"
+    return StreamingResponse(
+        body(),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 
 @router.get("/export/properties/progress")
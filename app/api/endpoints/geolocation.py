@@ -15,9 +15,11 @@ from datetime import datetime, timezone
 
 from app.db.session import get_db
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.repositories import materialized_views as materialized_views_repository
 from app.db.repositories import property as property_repository
 from app.dependencies.auth import get_current_user, TokenData, get_optional_current_user
 from app.services.advanced_cache import cached
+from app.utils.geo import HEATMAP_GRID_SIZES
 
 router = APIRouter(prefix="/geo", tags=["geolocation"])
 
@@ -163,52 +165,29 @@ async def get_nearby_properties(
     ### Возвращает:
     Список объектов с расстоянием от центра
     """
-    # Получаем все объекты из БД (в production нужен spatial index)
+    # Кандидаты — по ячейкам сетки и bounding box в SQL, ранжирование — в NumPy
     try:
-        properties = await property_repository.get_all_properties(db, limit=500)
+        nearby, total = await property_repository.find_properties_within_radius(
+            db,
+            request.location.latitude,
+            request.location.longitude,
+            request.radius_km,
+            limit=request.limit,
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Ошибка получения объектов: {str(e)}"
         )
     
-    # Фильтруем по расстоянию
-    nearby = []
-    for prop in properties:
-        if prop.latitude and prop.longitude:
-            distance = haversine_distance(
-                request.location.latitude,
-                request.location.longitude,
-                prop.latitude,
-                prop.longitude
-            )
-            
-            if distance <= request.radius_km:
-                nearby.append({
-                    "id": prop.id,
-                    "title": prop.title,
-                    "price": prop.price,
-                    "area": prop.area,
-                    "rooms": prop.rooms,
-                    "floor": prop.floor,
-                    "latitude": prop.latitude,
-                    "longitude": prop.longitude,
-                    "address": prop.address,
-                    "distance_km": round(distance, 2),
-                    "link": prop.link,
-                })
-    
-    # Сортируем по расстоянию
-    nearby.sort(key=lambda x: x["distance_km"])
-    
-    # Ограничиваем результат
-    limited = nearby[:request.limit]
-    
     return NearbyPropertiesResponse(
         center=request.location,
         radius_km=request.radius_km,
-        total=len(nearby),
-        properties=[PropertyLocationItem(**p) for p in limited]
+        total=total,
+        properties=[
+            PropertyLocationItem(**{**p, "distance_km": round(p["distance_km"], 2)})
+            for p in nearby
+        ]
     )
 
 
@@ -248,48 +227,30 @@ async def get_heatmap(
     
     bounds = city_bounds.get(city, city_bounds["Москва"])
     
+    # Ходовые размеры сетки предрассчитаны в mv_geo_heatmap_grid (обновляет
+    # Celery beat), остальные агрегируются в БД на лету
     try:
-        properties = await property_repository.get_all_properties(db, limit=1000)
+        if grid_size in HEATMAP_GRID_SIZES:
+            cells = await materialized_views_repository.get_geo_heatmap(db, grid_size, **bounds)
+        else:
+            cells = await property_repository.get_heatmap_grid(db, grid_size, **bounds)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Ошибка получения объектов: {str(e)}"
         )
     
-    # Создаём сетку
-    grid: Dict[tuple, List[dict]] = {}
-    
-    for prop in properties:
-        if prop.latitude and prop.longitude:
-            # Округляем координаты до размера сетки
-            lat_key = round(prop.latitude / grid_size) * grid_size
-            lon_key = round(prop.longitude / grid_size) * grid_size
-            
-            key = (lat_key, lon_key)
-            if key not in grid:
-                grid[key] = []
-            grid[key].append({
-                "price": prop.price,
-                "latitude": prop.latitude,
-                "longitude": prop.longitude
-            })
-    
-    # Формируем точки heatmap
-    points = []
-    for (lat, lon), props in grid.items():
-        count = len(props)
-        avg_price = sum(p["price"] for p in props) / count if count > 0 else 0
-        
-        points.append(HeatmapPoint(
-            latitude=lat,
-            longitude=lon,
-            count=count,
-            avg_price=round(avg_price, 2),
-            density=get_density_label(count)
-        ))
-    
-    # Сортируем по плотности
-    points.sort(key=lambda x: x.count, reverse=True)
+    # Формируем точки heatmap (ячейки уже отсортированы по плотности)
+    points = [
+        HeatmapPoint(
+            latitude=round(cell["latitude"], 6),
+            longitude=round(cell["longitude"], 6),
+            count=cell["count"],
+            avg_price=round(cell["avg_price"], 2),
+            density=get_density_label(cell["count"])
+        )
+        for cell in cells
+    ]
     
     return HeatmapResponse(
         bounds={
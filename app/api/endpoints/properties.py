@@ -1,13 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, Path
+from fastapi.encoders import jsonable_encoder
 from fastapi.responses import StreamingResponse
 from typing import List, Optional
 import io
+import json
 import time
 
 from app.dependencies.parsers import get_parsers
 from app.models.schemas import Property, PropertyCreate, PaginatedProperties
 from app.services.advanced_cache import cached
 from app.services.filter import PropertyFilter
+from app.services.listing_snapshot import listing_snapshots
+from app.services.pagination import CursorError, decode_cursor
 from app.services.search import SearchService
 from app.services.optimized_search import OptimizedSearchService
 from app.services.export import ExportService
@@ -76,6 +80,7 @@ async def get_properties(
     sort_order: str = Query("asc", pattern="^(asc|desc)$", description="Порядок сортировки (asc или desc)"),
     skip: int = Query(0, ge=0, description="Количество записей для пропуска"),
     limit: int = Query(50, ge=1, le=100, description="Максимальное количество записей в ответе (1-100)"),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы из next_cursor (вместо skip)"),
     parsers: list = Depends(get_parsers),
 ) -> PaginatedProperties:
     """
@@ -108,14 +113,22 @@ async def get_properties(
         sort_order: Порядок сортировки (asc или desc)
         skip: Количество записей для пропуска (пагинация)
         limit: Максимальное количество записей (1-100)
+        cursor: Курсор keyset-пагинации из предыдущего ответа
         parsers: Зависимость парсеров
 
     Returns:
         Пагинированный список свойств, отфильтрованных по заданным критериям
 
     Raises:
-        HTTPException: Если поиск не удался после всех повторных попыток
+        HTTPException: Если курсор некорректен или поиск не удался после всех повторных попыток
     """
+    page_cursor = None
+    if cursor:
+        try:
+            page_cursor = decode_cursor(cursor, sort_by, sort_order)
+        except CursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
     try:
         # Используем вспомогательную функцию с retry логикой
         all_properties = await _search_properties(city, property_type)
@@ -150,12 +163,22 @@ async def get_properties(
             sort_order=sort_order,
         )
 
-        filtered_properties, total_count = property_filter.filter(all_properties, skip=skip, limit=limit)
+        result_page = property_filter.filter_page(
+            all_properties,
+            skip=skip,
+            limit=limit,
+            cursor=page_cursor,
+            snapshot=listing_snapshots.find(all_properties),
+        )
+        filtered_properties, total_count = result_page.items, result_page.total
 
         # Вычисляем значения для пагинации
+        if page_cursor is not None:
+            # Позиция страницы определяется числом записей, оставшихся после курсора
+            skip = max(total_count - result_page.remaining, 0)
         page = (skip // limit) + 1
         pages = (total_count + limit - 1) // limit if total_count > 0 else 1
-        has_next = (skip + limit) < total_count
+        has_next = result_page.has_next
         has_prev = skip > 0
 
         # Записываем метрики пагинации
@@ -177,6 +200,7 @@ async def get_properties(
             pages=pages,
             has_next=has_next,
             has_prev=has_prev,
+            next_cursor=result_page.next_cursor,
         )
 
     except Exception as e:
@@ -215,6 +239,51 @@ async def get_properties(
             )
 
 
+@router.get(
+    "/properties/stream",
+    summary="Потоковый онлайн-поиск (NDJSON по источникам)",
+    response_description="Строки NDJSON: пакет результатов каждого источника по мере готовности",
+)
+async def stream_properties(
+    city: str = Query(default="Москва", min_length=2),
+    property_type: str = Query("Квартира"),
+    timeout: Optional[float] = Query(None, gt=0, le=120, description="Общий таймаут поиска в секундах"),
+) -> StreamingResponse:
+    """
+    Потоковый поиск: результаты быстрых источников отдаются сразу, не дожидаясь медленных.
+
+    Каждая строка ответа — JSON-объект ``{"source", "count", "elapsed", "error", "items"}``;
+    последняя строка — ``{"done": true, "total": N}``.
+
+    Args:
+        city: Город для поиска
+        property_type: Тип недвижимости
+        timeout: Общий таймаут поиска (по умолчанию SEARCH_TIMEOUT)
+
+    Returns:
+        StreamingResponse с NDJSON
+    """
+    search_service = OptimizedSearchService()
+
+    async def generate():
+        total = 0
+        async for batch in search_service.search_stream(city, property_type, timeout=timeout):
+            total += len(batch.properties)
+            yield json.dumps(
+                {
+                    "source": batch.parser_name,
+                    "count": len(batch.properties),
+                    "elapsed": round(batch.elapsed, 3),
+                    "error": None if batch.ok else type(batch.error).__name__,
+                    "items": jsonable_encoder(batch.properties),
+                },
+                ensure_ascii=False,
+            ) + "\n"
+        yield json.dumps({"done": True, "total": total}) + "\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
 @router.get(
     "/properties/export/{format}",
     summary="Экспортировать результаты поиска",
@@ -291,7 +360,12 @@ async def export_properties(
         
         # Ограничиваем максимальное количество экспортируемых записей (защита от перегрузки)
         MAX_EXPORT_ITEMS = 10000
-        filtered_properties, total = property_filter.filter(all_properties, skip=0, limit=MAX_EXPORT_ITEMS)
+        filtered_properties, total = property_filter.filter(
+            all_properties,
+            skip=0,
+            limit=MAX_EXPORT_ITEMS,
+            snapshot=listing_snapshots.find(all_properties),
+        )
         
         # Предупреждаем если записей больше лимита
         if total > MAX_EXPORT_ITEMS:
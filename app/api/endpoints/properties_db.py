@@ -4,12 +4,20 @@ API endpoints for property management with PostgreSQL persistence.
 from datetime import datetime
 from typing import List, Optional, Dict, Any
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models.session import get_db
 from app.db import repositories
+from app.db.keyset import (
+    PRICE_PER_SQM_SORT,
+    KeysetCursor,
+    decode_keyset_cursor,
+    next_cursor,
+    normalize_sort,
+    price_per_sqm_of,
+)
 from app.db.repositories import property as property_repo
 from app.utils.metrics import metrics_collector
 from app.models.schemas import (
@@ -23,10 +31,28 @@ from app.models.schemas import (
     OperationStatus,
     DeactivateResult,
 )
+from app.services.pagination import CursorError
 from app.utils.logger import logger
 
 router = APIRouter(prefix="/properties", tags=["properties"])
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _decode_cursor(cursor: Optional[str], sort_by: str, sort_order: str) -> Optional[KeysetCursor]:
+    """Keyset-курсор из query-параметра; некорректный курсор — 400."""
+    if not cursor:
+        return None
+    try:
+        return decode_keyset_cursor(cursor, sort_by, sort_order)
+    except CursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _set_next_cursor(response: Optional[Response], cursor: Optional[str]) -> None:
+    if response is not None and cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+
 
 async def get_alerts_db():
     """Упрощенная зависимость для алертов в тестах: всегда возвращает None (in-memory)."""
@@ -510,9 +536,11 @@ async def search_properties(
     sort_by: str = Query("created_at", description="Sort by field (created_at, price, area, rooms)"),
     sort_order: str = Query("desc", description="Sort order (asc or desc)"),
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of results"),
-    offset: int = Query(0, ge=0, description="Number of results to skip"),
+    offset: int = Query(0, ge=0, description="Number of results to skip (deprecated, use cursor)"),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы из заголовка X-Next-Cursor (вместо offset)"),
     db: AsyncSession = Depends(get_db),
-    request: Request = None
+    request: Request = None,
+    response: Response = None
 ):
     """
     Search properties with various filters.
@@ -524,7 +552,13 @@ async def search_properties(
     - Number of rooms
     - Area
     - Active status
+
+    Keyset-пагинация: если страница полная, заголовок ``X-Next-Cursor``
+    содержит курсор следующей; передайте его в ``cursor``.
     """
+    sort_by, sort_order = normalize_sort(sort_by, sort_order)
+    page_cursor = _decode_cursor(cursor, sort_by, sort_order)
+
     try:
         properties = await property_repo.search_properties(
             db=db,
@@ -541,8 +575,10 @@ async def search_properties(
             sort_by=sort_by,
             sort_order=sort_order,
             limit=limit,
-            offset=offset
+            offset=offset,
+            cursor=page_cursor
         )
+        _set_next_cursor(response, next_cursor(properties, limit, sort_by, sort_order))
         
         # Track search query for analytics
         if request:
@@ -660,15 +696,20 @@ async def search_properties_by_price_per_sqm(
     max_price_per_sqm: Optional[float] = Query(None, description="Maximum price per square meter"),
     is_active: Optional[bool] = Query(True, description="Filter by active status"),
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of results"),
-    offset: int = Query(0, ge=0, description="Number of results to skip"),
+    offset: int = Query(0, ge=0, description="Number of results to skip (deprecated, use cursor)"),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы из заголовка X-Next-Cursor (вместо offset)"),
     db: AsyncSession = Depends(get_db),
-    request: Request = None
+    request: Request = None,
+    response: Response = None
 ):
     """
     Search properties sorted by price per square meter.
     
     This endpoint is optimized for finding the best value properties.
+    Keyset-пагинация через ``cursor`` / ``X-Next-Cursor``, как в поиске.
     """
+    page_cursor = _decode_cursor(cursor, PRICE_PER_SQM_SORT, "asc")
+
     try:
         properties = await property_repo.search_properties_by_price_per_sqm(
             db=db,
@@ -678,7 +719,12 @@ async def search_properties_by_price_per_sqm(
             max_price_per_sqm=max_price_per_sqm,
             is_active=is_active,
             limit=limit,
-            offset=offset
+            offset=offset,
+            cursor=page_cursor
+        )
+        _set_next_cursor(
+            response,
+            next_cursor(properties, limit, PRICE_PER_SQM_SORT, "asc", value_of=price_per_sqm_of),
         )
         
         # Track search query for analytics
@@ -3,17 +3,55 @@ GraphQL API для RentScout.
 
 Предоставляет гибкий интерфейс для запросов данных о недвижимости.
 
+Запросы читают БД через ``app.db.repositories.property``. Объявления по id,
+история цен и счётчики просмотров загружаются DataLoader'ами одного
+HTTP-запроса: ключи, запрошенные на одном шаге выполнения, уходят в БД
+одним ``WHERE id = ANY(...)``, поэтому вложенный запрос на N объявлений
+стоит постоянное число обращений к БД, а не N + 1.
+
+Перед выполнением операция проходит:
+- automatic persisted queries (``PersistedQueries``): клиент может прислать
+  только sha256 текста запроса;
+- кэши разбора и валидации документов (``ParserCache``/``ValidationCache``);
+- ограничения глубины (``MAX_QUERY_DEPTH``) и стоимости (``MAX_QUERY_COMPLEXITY``).
+
 Установка зависимостей:
     pip install strawberry-graphql fastapi
 """
 
-from typing import Optional, List, Any
+import asyncio
+import dataclasses
+import hashlib
+from functools import partial
+from typing import Optional, List, Any, Dict, FrozenSet, Sequence
 from datetime import datetime
 
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
 # Пытаемся импортировать strawberry
 try:
     import strawberry
-    from strawberry.fastapi import GraphQLRouter
+    from graphql import (
+        FieldNode,
+        FragmentSpreadNode,
+        GraphQLError,
+        InlineFragmentNode,
+        IntValueNode,
+        ValidationRule,
+        get_named_type,
+        is_object_type,
+    )
+    from strawberry.dataloader import DataLoader
+    from strawberry.extensions import (
+        AddValidationRules,
+        ParserCache,
+        SchemaExtension,
+        ValidationCache,
+    )
+    from strawberry.extensions.query_depth_limiter import create_validator as create_depth_validator
+    from strawberry.fastapi import BaseContext, GraphQLRouter
+    from strawberry.types import Info
     STRAWBERRY_AVAILABLE = True
 except ImportError:
     STRAWBERRY_AVAILABLE = False
@@ -43,14 +81,60 @@ except ImportError:
             self.on_shutdown = []
             self.lifespan_context = None
 
+    DataLoader = None
+    GraphQLError = Exception
+    Info = Any
+    AddValidationRules = ParserCache = SchemaExtension = ValidationCache = object
+    BaseContext = ValidationRule = object
+
+from app.db.models.session import get_db
+from app.db.read_models import PropertyListItem
+from app.db.repositories import property as property_repo
 from app.models.schemas import Property as PropertySchema
 from app.schemas.db_responses import PropertyStatistics
+from app.services.l1_cache import L1Cache
+
+# Объявлений в одном списке (``properties``, ``price_history``) не больше
+MAX_PAGE_SIZE = 100
+# Вложенность полей операции
+MAX_QUERY_DEPTH = 6
+# Стоимость операции (см. ``QueryComplexityRule``): 100 объявлений с
+# историей цен по умолчанию укладываются с запасом
+MAX_QUERY_COMPLEXITY = 10000
+
+# Automatic persisted queries: sha256 -> текст запроса (LRU в памяти процесса)
+PERSISTED_QUERIES_MAX_ENTRIES = 1000
+PERSISTED_QUERY_TTL = 24 * 3600
+persisted_queries = L1Cache(max_entries=PERSISTED_QUERIES_MAX_ENTRIES, max_bytes=8 * 2 ** 20)
+
+
+def page_size(limit: int) -> int:
+    """Размер страницы в пределах ``1..MAX_PAGE_SIZE``."""
+    return max(1, min(limit, MAX_PAGE_SIZE))
 
 
 # ============================================================================
 # GraphQL Types
 # ============================================================================
 
+@strawberry.type
+class PriceHistoryType:
+    """GraphQL тип для изменения цены."""
+    old_price: Optional[float]
+    new_price: float
+    price_change: Optional[float]
+    changed_at: datetime
+
+    @classmethod
+    def from_model(cls, change: Any) -> "PriceHistoryType":
+        return cls(
+            old_price=change.old_price,
+            new_price=change.new_price,
+            price_change=change.price_change,
+            changed_at=change.changed_at,
+        )
+
+
 @strawberry.type
 class PropertyType:
     """GraphQL тип для недвижимости."""
@@ -73,6 +157,45 @@ class PropertyType:
     created_at: Optional[datetime]
     last_seen: Optional[datetime]
 
+    @strawberry.field
+    async def price_history(self, info: Info, limit: int = 10) -> List[PriceHistoryType]:
+        """Последние изменения цены, новые первыми."""
+        if self.id is None:
+            return []
+        history = await info.context.loaders.price_history(page_size(limit)).load(self.id)
+        return [PriceHistoryType.from_model(change) for change in history]
+
+    @strawberry.field
+    async def views_count(self, info: Info, days: int = 30) -> int:
+        """Число просмотров за последние ``days`` дней."""
+        if self.id is None:
+            return 0
+        return await info.context.loaders.views_count(days).load(self.id)
+
+    @classmethod
+    def from_item(cls, item: Any) -> "PropertyType":
+        """Из ``PropertyListItem`` (или ORM ``Property`` — атрибуты те же)."""
+        return cls(
+            id=item.id,
+            source=item.source,
+            external_id=item.external_id,
+            title=item.title,
+            description=item.description,
+            price=item.price,
+            rooms=item.rooms,
+            area=item.area,
+            floor=item.floor,
+            city=item.city,
+            district=item.district,
+            address=item.address,
+            latitude=item.latitude,
+            longitude=item.longitude,
+            photos=list(item.photos or []),
+            is_active=bool(item.is_active),
+            created_at=item.created_at,
+            last_seen=item.last_seen,
+        )
+
 
 @strawberry.type
 class PropertyStatisticsType:
@@ -111,6 +234,200 @@ class PropertyFilter:
     is_active: Optional[bool] = True
 
 
+# ============================================================================
+# Request context and DataLoaders
+# ============================================================================
+
+class GraphQLLoaders:
+    """
+    DataLoader'ы одного GraphQL-запроса.
+
+    Создаются на каждый HTTP-запрос: кэш загрузчиков не переживает запрос.
+    Все обращения к БД идут через ``fetch``: резолверы выполняются
+    конкурентно, а ``AsyncSession`` не допускает параллельных запросов,
+    поэтому пачки разных загрузчиков уходят в БД по очереди.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self._lock = asyncio.Lock()
+        self.property = DataLoader(load_fn=self._load_properties)
+        self._price_history: Dict[int, DataLoader] = {}
+        self._views_count: Dict[int, DataLoader] = {}
+
+    async def fetch(self, query, *args: Any, **kwargs: Any) -> Any:
+        """Вызывает функцию репозитория ``query(db, ...)`` под блокировкой сессии."""
+        async with self._lock:
+            return await query(self.db, *args, **kwargs)
+
+    def price_history(self, limit: int) -> DataLoader:
+        """Загрузчик ``limit`` последних изменений цены по id объявления."""
+        if limit not in self._price_history:
+            self._price_history[limit] = DataLoader(load_fn=partial(self._load_price_history, limit=limit))
+        return self._price_history[limit]
+
+    def views_count(self, days: int) -> DataLoader:
+        """Загрузчик числа просмотров за ``days`` дней по id объявления."""
+        if days not in self._views_count:
+            self._views_count[days] = DataLoader(load_fn=partial(self._load_views_count, days=days))
+        return self._views_count[days]
+
+    async def _load_properties(self, ids: Sequence[int]) -> List[Optional[PropertyListItem]]:
+        found = await self.fetch(property_repo.get_properties_by_ids, ids)
+        return [found.get(property_id) for property_id in ids]
+
+    async def _load_price_history(self, ids: Sequence[int], limit: int) -> List[List[Any]]:
+        found = await self.fetch(property_repo.get_price_history_by_property_ids, ids, limit)
+        return [found.get(property_id, []) for property_id in ids]
+
+    async def _load_views_count(self, ids: Sequence[int], days: int) -> List[int]:
+        found = await self.fetch(property_repo.get_view_counts_by_property_ids, ids, days)
+        return [found.get(property_id, 0) for property_id in ids]
+
+
+class GraphQLContext(BaseContext):
+    """Контекст GraphQL-запроса: сессия БД и DataLoader'ы."""
+
+    def __init__(self, db: AsyncSession):
+        super().__init__()
+        self.db = db
+        self.loaders = GraphQLLoaders(db)
+
+
+async def get_context(db: AsyncSession = Depends(get_db)) -> GraphQLContext:
+    """``context_getter`` роутера: новый контекст на каждый HTTP-запрос."""
+    return GraphQLContext(db)
+
+
+# ============================================================================
+# Query limits and persisted queries
+# ============================================================================
+
+def _list_size(field: Any, node: Any) -> int:
+    """Множитель стоимости поля: значение аргумента ``limit`` (если он есть)."""
+    if "limit" not in field.args:
+        return 1
+    for argument in node.arguments or ():
+        if argument.name.value == "limit":
+            if isinstance(argument.value, IntValueNode):
+                return page_size(int(argument.value.value))
+            # Значение переменной на этапе валидации неизвестно
+            return MAX_PAGE_SIZE
+    default = field.args["limit"].default_value
+    return page_size(default) if isinstance(default, int) else MAX_PAGE_SIZE
+
+
+def _selection_cost(context: Any, parent_type: Any, selection_set: Any, fragments: FrozenSet[str]) -> int:
+    cost = 0
+    for selection in selection_set.selections:
+        if isinstance(selection, FieldNode):
+            field = parent_type.fields.get(selection.name.value) if is_object_type(parent_type) else None
+            if field is None:
+                # __typename и неизвестные поля (о них сообщат другие правила)
+                continue
+            children = 0
+            if selection.selection_set is not None:
+                children = _selection_cost(
+                    context, get_named_type(field.type), selection.selection_set, fragments
+                )
+            cost += 1 + _list_size(field, selection) * children
+        elif isinstance(selection, InlineFragmentNode):
+            type_ = parent_type
+            if selection.type_condition is not None:
+                type_ = context.schema.get_type(selection.type_condition.name.value)
+            cost += _selection_cost(context, type_, selection.selection_set, fragments)
+        elif isinstance(selection, FragmentSpreadNode):
+            name = selection.name.value
+            fragment = context.get_fragment(name)
+            # Циклы фрагментов отклоняет NoFragmentCyclesRule
+            if fragment is not None and name not in fragments:
+                type_ = context.schema.get_type(fragment.type_condition.name.value)
+                cost += _selection_cost(context, type_, fragment.selection_set, fragments | {name})
+    return cost
+
+
+class QueryComplexityRule(ValidationRule):
+    """
+    Отклоняет операции дороже ``max_complexity``.
+
+    Стоимость — число запрошенных полей; поля внутри поля с аргументом
+    ``limit`` считаются ``limit`` раз (для переменной — ``MAX_PAGE_SIZE``),
+    так что ``properties(limit: 100) { priceHistory { ... } }`` стоит
+    столько, сколько строк может вернуть.
+    """
+
+    max_complexity = MAX_QUERY_COMPLEXITY
+
+    def enter_operation_definition(self, node, *_args):
+        root = self.context.schema.get_root_type(node.operation)
+        if root is None:
+            return
+        cost = _selection_cost(self.context, root, node.selection_set, frozenset())
+        if cost > self.max_complexity:
+            name = node.name.value if node.name else "anonymous"
+            self.report_error(GraphQLError(
+                f"'{name}' exceeds maximum operation complexity of {self.max_complexity} ({cost})",
+                node,
+            ))
+
+
+# Классы правил создаются один раз: ValidationCache кэширует результат
+# валидации по документу и набору правил
+QUERY_LIMIT_RULES = (
+    [create_depth_validator(MAX_QUERY_DEPTH, None), QueryComplexityRule] if STRAWBERRY_AVAILABLE else []
+)
+
+
+class QueryLimits(AddValidationRules):
+    """Ограничения глубины (``MAX_QUERY_DEPTH``) и стоимости (``QueryComplexityRule``)."""
+
+    def __init__(self):
+        super().__init__(QUERY_LIMIT_RULES)
+
+
+def resolve_persisted_query(query: Optional[str], persisted: Dict[str, Any], store: L1Cache = persisted_queries) -> str:
+    """
+    Текст запроса по расширению ``persistedQuery`` (протокол Apollo APQ).
+
+    Без текста запрос ищется в ``store`` по sha256; неизвестный хэш —
+    ошибка ``PersistedQueryNotFound``, после которой клиент повторяет
+    запрос с текстом. Текст с хэшем проверяется и запоминается.
+    """
+    if persisted.get("version") != 1:
+        raise GraphQLError(
+            "Unsupported persisted query version",
+            extensions={"code": "PERSISTED_QUERY_NOT_SUPPORTED"},
+        )
+    digest = persisted.get("sha256Hash")
+    if not isinstance(digest, str):
+        raise GraphQLError("persistedQuery.sha256Hash is required", extensions={"code": "BAD_USER_INPUT"})
+
+    if query:
+        if hashlib.sha256(query.encode("utf-8")).hexdigest() != digest:
+            raise GraphQLError("provided sha does not match query", extensions={"code": "BAD_USER_INPUT"})
+        store.set(digest, query, ttl=PERSISTED_QUERY_TTL)
+        return query
+
+    query = store.get(digest)
+    if query is None:
+        raise GraphQLError("PersistedQueryNotFound", extensions={"code": "PERSISTED_QUERY_NOT_FOUND"})
+    return query
+
+
+class PersistedQueries(SchemaExtension):
+    """
+    Automatic persisted queries: мобильный клиент отправляет хэш вместо
+    текста запроса (короткие GET-запросы, которые можно кэшировать на CDN).
+    """
+
+    def on_operation(self):
+        context = self.execution_context
+        persisted = (context.operation_extensions or {}).get("persistedQuery")
+        if persisted:
+            context.query = resolve_persisted_query(context.query, persisted)
+        yield
+
+
 # ============================================================================
 # GraphQL Query Resolvers
 # ============================================================================
@@ -136,93 +453,46 @@ class Query:
         )
 
     @strawberry.field
-    def property(self, id: int) -> Optional[PropertyType]:
+    async def property(self, info: Info, id: int) -> Optional[PropertyType]:
         """Получить недвижимость по ID."""
-        # Mock data - в production использовать CRUD
-        return PropertyType(
-            id=id,
-            source="avito",
-            external_id=f"ext_{id}",
-            title=f"Property #{id}",
-            description="Nice apartment",
-            price=50000 + id * 1000,
-            rooms=2,
-            area=54.5,
-            floor=5,
-            city="Москва",
-            district="Центральный",
-            address="Тверская, 1",
-            latitude=55.7558,
-            longitude=37.6173,
-            photos=["https://example.com/photo1.jpg"],
-            is_active=True,
-            created_at=datetime.utcnow(),
-            last_seen=datetime.utcnow()
-        )
+        item = await info.context.loaders.property.load(id)
+        return PropertyType.from_item(item) if item is not None else None
 
     @strawberry.field
-    def properties(
+    async def properties(
         self,
+        info: Info,
         filter: Optional[PropertyFilter] = None,
         limit: int = 10,
         offset: int = 0
     ) -> List[PropertyType]:
-        """Поиск недвижимости с фильтрами."""
-        # Mock data - в production использовать CRUD
-        results = []
-        for i in range(offset, offset + limit):
-            prop = PropertyType(
-                id=i + 1,
-                source="avito" if i % 2 == 0 else "cian",
-                external_id=f"ext_{i}",
-                title=f"Property #{i + 1}",
-                description="Apartment for rent",
-                price=50000 + i * 1000,
-                rooms=(i % 3) + 1,
-                area=30 + i * 5,
-                floor=(i % 10) + 1,
-                city=filter.city if filter and filter.city else "Москва",
-                district=filter.district if filter and filter.district else None,
-                address=f"Street {i}",
-                latitude=55.7558,
-                longitude=37.6173,
-                photos=[],
-                is_active=True,
-                created_at=datetime.utcnow(),
-                last_seen=datetime.utcnow()
-            )
-            
-            # Apply filters
-            if filter:
-                if filter.min_price and prop.price < filter.min_price:
-                    continue
-                if filter.max_price and prop.price > filter.max_price:
-                    continue
-                if filter.min_rooms and (prop.rooms or 0) < filter.min_rooms:
-                    continue
-                if filter.max_rooms and (prop.rooms or 0) > filter.max_rooms:
-                    continue
-            
-            results.append(prop)
-        
-        return results
+        """Поиск недвижимости с фильтрами (не больше ``MAX_PAGE_SIZE`` за запрос)."""
+        filters = dataclasses.asdict(filter) if filter else {}
+        loaders = info.context.loaders
+        items = await loaders.fetch(
+            property_repo.search_properties, **filters, limit=page_size(limit), offset=max(offset, 0)
+        )
+        # Повторный property(id) по найденным объявлениям не идёт в БД
+        loaders.property.prime_many({item.id: item for item in items})
+        return [PropertyType.from_item(item) for item in items]
 
     @strawberry.field
-    def statistics(
+    async def statistics(
         self,
+        info: Info,
         city: Optional[str] = None,
-        days: int = 30
+        days: Optional[int] = None
     ) -> PropertyStatisticsType:
-        """Статистика по недвижимости."""
-        # Mock data - в production использовать CRUD
+        """Статистика по активным объявлениям (``days`` — созданным за последние N дней)."""
+        stats = await info.context.loaders.fetch(property_repo.get_property_statistics, city=city, days=days)
         return PropertyStatisticsType(
-            total=15234,
-            avg_price=65000,
-            min_price=30000,
-            max_price=150000,
-            avg_area=55.5,
-            min_area=20,
-            max_area=200
+            total=stats["total"],
+            avg_price=stats["avg_price"],
+            min_price=stats["min_price"],
+            max_price=stats["max_price"],
+            avg_area=stats["avg_area"],
+            min_area=stats["min_area"],
+            max_area=stats["max_area"],
         )
 
 
@@ -312,17 +582,31 @@ class Mutation:
 schema = strawberry.Schema(
     query=Query,
     mutation=Mutation,
+    # Классы, а не экземпляры: strawberry создаёт расширения на каждый запрос.
+    # PersistedQueries идёт первым — подставляет текст до разбора.
+    extensions=[
+        PersistedQueries,
+        QueryLimits,
+        ParserCache,
+        ValidationCache,
+    ],
 )
 
 # GraphQL router для FastAPI
-graphql_app = GraphQLRouter(schema)
+graphql_app = GraphQLRouter(schema, context_getter=get_context)
 
 
 __all__ = [
     "schema",
     "graphql_app",
     "PropertyType",
+    "PriceHistoryType",
     "PropertyFilter",
     "Query",
     "Mutation",
+    "GraphQLContext",
+    "GraphQLLoaders",
+    "QueryComplexityRule",
+    "PersistedQueries",
+    "resolve_persisted_query",
 ]
@@ -101,12 +101,13 @@ def register_versioned_routers(app: FastAPI, versions: list[str] = None) -> None
 # Deprecation Middleware
 # =============================================================================
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
+from starlette.datastructures import MutableHeaders
+from starlette.types import Scope
 
+from app.middleware.pipeline import PipelineStage
 
-class DeprecationMiddleware(BaseHTTPMiddleware):
+
+class DeprecationMiddleware(PipelineStage):
     """
     Middleware для добавления заголовков депрекации.
     
@@ -119,22 +120,18 @@ class DeprecationMiddleware(BaseHTTPMiddleware):
     DEPRECATED_VERSIONS = []  # Список устаревших версий
     SUNSET_DATES = {}  # Даты отключения версий
     
-    async def dispatch(self, request: Request, call_next) -> Response:
-        response = await call_next(request)
-        
+    def on_response_start(self, scope: Scope, state: dict, status: int, headers: MutableHeaders) -> None:
         # Проверка версии в пути
-        path = request.url.path
+        path = scope["path"]
         for version in self.DEPRECATED_VERSIONS:
             if f"/api/{version}/" in path:
-                response.headers["Deprecation"] = "true"
+                headers["Deprecation"] = "true"
                 
                 if version in self.SUNSET_DATES:
-                    response.headers["Sunset"] = self.SUNSET_DATES[version]
+                    headers["Sunset"] = self.SUNSET_DATES[version]
                 
                 # Ссылка на новую версию
-                response.headers["Link"] = f'</api/v2/{path.split(f"/api/{version}/")[1]}>; rel="successor-version"'
-        
-        return response
+                headers["Link"] = f'</api/v2/{path.split(f"/api/{version}/")[1]}>; rel="successor-version"'
 
 
 # =============================================================================
@@ -18,6 +18,7 @@ import asyncio
 import click
 import json
 import sys
+import time
 from datetime import datetime, timezone
 from typing import Optional
 from pathlib import Path
@@ -267,6 +268,54 @@ def recent(ctx, limit: int):
         click.echo()
 
 
+@db.command('export')
+@click.option('--format', '-f', 'export_format', default='parquet',
+              type=click.Choice(['csv', 'json', 'jsonl', 'parquet']), help='Export format')
+@click.option('--city', '-c', default=None, help='Filter by city')
+@click.option('--limit', '-l', default=None, type=int, help='Maximum number of records')
+@click.option('--output', '-o', required=True, type=click.Path(dir_okay=False, path_type=Path), help='Output file')
+@click.pass_context
+def export(ctx, export_format: str, city: Optional[str], limit: Optional[int], output: Path):
+    """Выгрузка объявлений в файл (потоково, память не растёт с объёмом)."""
+    started = time.perf_counter()
+    try:
+        size = asyncio.run(export_properties_to_file(output, export_format, city, limit))
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    result = {
+        'action': 'export',
+        'format': export_format,
+        'city': city,
+        'output': str(output),
+        'bytes': size,
+        'duration_seconds': round(time.perf_counter() - started, 2),
+        'status': 'success'
+    }
+
+    if ctx.obj['json_output']:
+        click.echo(json.dumps(result, indent=2, ensure_ascii=False))
+    else:
+        click.echo(f"✅ Exported to {output}")
+        click.echo(f"   Size: {size / 2 ** 20:.1f} MiB in {result['duration_seconds']}s")
+
+
+async def export_properties_to_file(output: Path, export_format: str, city: Optional[str], limit: Optional[int]) -> int:
+    """Пишет чанки выгрузки в файл и возвращает его размер."""
+    from app.db.models.session import AsyncSessionLocal
+    from app.services.async_export import AsyncExportService
+
+    size = 0
+    async with AsyncSessionLocal() as session:
+        with open(output, 'wb') as file:
+            async for chunk in AsyncExportService.export_properties_streaming(
+                session, format=export_format, city=city, limit=limit
+            ):
+                file.write(chunk)
+                size += len(chunk)
+    return size
+
+
 # ============================================================================
 # Parser Commands
 # ============================================================================
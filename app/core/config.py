@@ -66,6 +66,26 @@ class Settings(BaseSettings):
     CIAN_MAX_RETRIES: int = Field(default=3, ge=1, le=10, description="Макс повторы для Cian")
     AVITO_RATE_LIMIT: int = Field(default=5, ge=1, le=100, description="Rate limit для Avito")
     RATE_LIMIT_WINDOW: int = Field(default=60, ge=1, le=3600, description="Окно rate limit в секундах")
+    PARSER_RATE_LIMIT_REDIS_SHARED: bool = Field(
+        default=False, description="Хранить ведро rate limit парсеров в Redis, общее для всех воркеров"
+    )
+    PARSER_HOST_MAX_CONNECTIONS: int = Field(
+        default=10, ge=1, le=100, description="Максимум HTTP соединений парсеров на один хост"
+    )
+    PARSER_HTTP2: bool = Field(default=True, description="Использовать HTTP/2 для запросов парсеров")
+    PARSER_PARSE_EXECUTOR: str = Field(
+        default="process", pattern="^(process|thread|inline)$", description="Где разбирать HTML: process, thread или inline"
+    )
+    PARSER_PARSE_WORKERS: int = Field(default=2, ge=1, le=32, description="Размер пула разбора HTML")
+    PARSER_PARSE_INLINE_BYTES: int = Field(
+        default=32768, ge=0, description="Страницы меньше N символов разбирать в event loop без пула"
+    )
+    PARSER_MAX_PAGES: int = Field(
+        default=1, ge=1, le=50, description="Страниц выдачи на поиск по умолчанию (params.max_pages переопределяет)"
+    )
+    PARSER_PAGE_CONCURRENCY: int = Field(
+        default=3, ge=1, le=20, description="Сколько страниц выдачи одного поиска запрашивать одновременно"
+    )
     
     # Timeout settings
     REQUEST_TIMEOUT: int = Field(default=30, ge=5, le=300, description="Timeout для HTTP запросов")
@@ -78,6 +98,43 @@ class Settings(BaseSettings):
     
     # Cache settings
     CACHE_TTL: int = Field(default=300, ge=0, le=86400, description="TTL кэша в секундах")
+    CACHE_STALE_TTL: int = Field(
+        default=600, ge=0, le=86400, description="Окно выдачи устаревшего значения после TTL с обновлением в фоне (сек)"
+    )
+    CACHE_SERIALIZER: str = Field(
+        default="auto", pattern="^(auto|pickle|orjson|msgpack)$", description="Формат значений в Redis-кэше"
+    )
+    CACHE_COMPRESSION: str = Field(
+        default="auto", pattern="^(auto|none|zlib|lz4|zstd)$", description="Сжатие крупных значений Redis-кэша"
+    )
+    CACHE_COMPRESS_THRESHOLD: int = Field(default=1024, ge=0, description="Сжимать значения больше N байт")
+    CACHE_L1_MAX_ENTRIES: int = Field(default=1000, ge=1, le=1_000_000, description="Макс записей в L1 кэше")
+    CACHE_L1_MAX_BYTES: int = Field(default=0, ge=0, description="Бюджет памяти L1 кэша в байтах (0 — без лимита)")
+    CACHE_L1_POLICY: str = Field(
+        default="lru", pattern="^(lru|tinylfu)$", description="Политика вытеснения L1: lru или tinylfu (W-TinyLFU)"
+    )
+    SINGLE_FLIGHT_REDIS_LOCK: bool = Field(
+        default=False, description="Объединять одинаковые промахи кэша между воркерами через Redis-блокировку"
+    )
+    SINGLE_FLIGHT_LOCK_TTL: int = Field(default=60, ge=1, le=600, description="TTL Redis-блокировки single-flight (сек)")
+    SINGLE_FLIGHT_WAIT_TIMEOUT: float = Field(
+        default=45.0, ge=0.1, le=600.0, description="Сколько ждать результат чужого воркера (сек)"
+    )
+
+    # Duplicate filter settings
+    DEDUP_WINDOW_SECONDS: int = Field(
+        default=900, ge=10, le=7 * 86400, description="Сколько секунд объявление считается уже виденным в поиске"
+    )
+    DEDUP_GENERATIONS: int = Field(default=3, ge=1, le=48, description="На сколько поколений делится окно дедупликации")
+    DEDUP_EXPECTED_ITEMS: int = Field(
+        default=100000, ge=1000, description="Ожидаемое число объявлений в одном поколении города"
+    )
+    DEDUP_FALSE_POSITIVE_RATE: float = Field(
+        default=0.001, gt=0, lt=0.5, description="Доля ложных срабатываний Bloom filter дедупликации"
+    )
+    DEDUP_REDIS_SHARED: bool = Field(
+        default=False, description="Хранить фильтр дубликатов в Redis, общий для API- и Celery-воркеров"
+    )
 
     # HTTPS/SSL settings
     HTTPS_ENABLED: bool = Field(default=False, description="Включить HTTPS")
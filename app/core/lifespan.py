@@ -13,7 +13,9 @@ from app.core.cache import cache_manager
 from app.core.config import settings
 from app.core.monitoring import monitoring_system
 from app.db.models.session import close_db, init_db
+from app.parsers.parse_executor import parse_executor
 from app.services.advanced_cache import advanced_cache_manager
+from app.services.notifications import register_price_drop_subscribers
 from app.services.search import SearchService
 from app.tasks.cache_maintenance import cache_maintenance, cache_warmer
 from app.utils.app_cache import app_cache
@@ -69,6 +71,9 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
     except Exception as e:
         logger.warning(f"Cache manager initialization failed: {e}")
 
+    # Уведомления о снижении цен после сохранения результатов поиска
+    register_price_drop_subscribers()
+
     # Запуск monitoring system
     try:
         await monitoring_system.start(check_interval_seconds=60)
@@ -144,6 +149,12 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
     except Exception:
         pass
 
+    # Остановка пула разбора HTML
+    try:
+        parse_executor.shutdown()
+    except Exception:
+        pass
+
     # Закрытие PostgreSQL
     try:
         await close_db()
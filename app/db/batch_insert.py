@@ -3,26 +3,83 @@
 
 Использует:
 - Asyncpg для асинхронных операций
-- COPY для массовой загрузки данных
+- COPY в staging-таблицу для массовой загрузки данных
 - ON CONFLICT для deduplication
 - Connection pooling для эффективности
 """
 
 import asyncio
+import json
 import time
+from dataclasses import dataclass, field
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 
-from sqlalchemy import select, and_
+from sqlalchemy import case, select, and_, text, tuple_, literal_column
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.dialects.postgresql import insert
 from asyncpg import Connection, exceptions
 
-from app.db.models.property import Property
+from app.db.models.property import Property, PropertyPriceHistory
 from app.models.schemas import PropertyCreate
 from app.utils.logger import logger
 from app.utils.metrics import metrics_collector
 
+# Core-таблица: запросам upsert не нужна конфигурация ORM-мапперов
+PROPERTIES = Property.__table__
+
+
+@dataclass
+class PriceChange:
+    """Изменение цены существующего объявления, обнаруженное при upsert."""
+
+    property_id: int
+    source: str
+    external_id: str
+    old_price: float
+    new_price: float
+    city: Optional[str] = None
+    rooms: Optional[int] = None
+    area: Optional[float] = None
+
+    @property
+    def is_drop(self) -> bool:
+        return self.new_price < self.old_price
+
+    @property
+    def change_percent(self) -> float:
+        if not self.old_price:
+            return 0.0
+        return (self.new_price - self.old_price) / self.old_price * 100
+
+    def history_row(self) -> Dict[str, Any]:
+        """Строка для ``PropertyPriceHistory``."""
+        return {
+            'property_id': self.property_id,
+            'old_price': self.old_price,
+            'new_price': self.new_price,
+            'price_change': self.new_price - self.old_price,
+            'price_change_percent': self.change_percent,
+        }
+
+
+@dataclass
+class UpsertResult:
+    """Итог массового upsert."""
+
+    inserted: int = 0
+    updated: int = 0
+    price_changes: List[PriceChange] = field(default_factory=list)
+
+    @property
+    def price_drops(self) -> List[PriceChange]:
+        return [change for change in self.price_changes if change.is_drop]
+
+    def merge(self, other: "UpsertResult") -> None:
+        self.inserted += other.inserted
+        self.updated += other.updated
+        self.price_changes.extend(other.price_changes)
+
 
 class BatchPropertyInserter:
     """
@@ -71,25 +128,40 @@ class BatchPropertyInserter:
         Returns:
             Кортеж (вставлено, обновлено)
         """
+        result = await self.upsert(properties, conflict_columns)
+        return result.inserted, result.updated
+    
+    async def upsert(
+        self,
+        properties: List[PropertyCreate],
+        conflict_columns: List[str] = None
+    ) -> UpsertResult:
+        """
+        Массовый upsert с фиксацией изменений цен.
+        
+        История цен всего батча пишется одним multi-row INSERT в той же транзакции.
+        
+        Args:
+            properties: Список свойств для вставки
+            conflict_columns: Колонки для проверки конфликта
+            
+        Returns:
+            Счётчики и изменения цен
+        """
         start_time = time.time()
         conflict_columns = conflict_columns or ['source', 'external_id']
         
+        result = UpsertResult()
         if not properties:
-            return 0, 0
-        
-        total_inserted = 0
-        total_updated = 0
+            return result
         
         # Разбиваем на чанки для лучшей производительности
         chunks = self._chunkify(properties, self.chunk_size)
         
         for chunk in chunks:
-            inserted, updated = await self._process_chunk(
-                chunk,
-                conflict_columns
-            )
-            total_inserted += inserted
-            total_updated += updated
+            result.merge(await self._process_chunk(chunk, conflict_columns))
+        
+        await record_price_history(self.db, result.price_changes)
         
         duration = time.time() - start_time
         
@@ -97,22 +169,21 @@ class BatchPropertyInserter:
         metrics_collector.record_db_query(
             "BULK_UPSERT",
             "properties",
-            duration,
-            rows_affected=total_inserted + total_updated
+            duration
         )
         
         logger.info(
-            f"Batch upsert completed: {total_inserted} inserted, "
-            f"{total_updated} updated in {duration:.2f}s"
+            f"Batch upsert completed: {result.inserted} inserted, "
+            f"{result.updated} updated, {len(result.price_changes)} price changes in {duration:.2f}s"
         )
         
-        return total_inserted, total_updated
+        return result
     
     async def _process_chunk(
         self,
         chunk: List[PropertyCreate],
         conflict_columns: List[str]
-    ) -> Tuple[int, int]:
+    ) -> UpsertResult:
         """
         Обрабатывает чанк свойств с retry логикой.
         
@@ -121,7 +192,7 @@ class BatchPropertyInserter:
             conflict_columns: Колонки для конфликта
             
         Returns:
-            Кортеж (вставлено, обновлено)
+            Итог upsert чанка
         """
         for attempt in range(self.max_retries):
             try:
@@ -138,54 +209,95 @@ class BatchPropertyInserter:
                 )
                 await asyncio.sleep(self.retry_delay * (attempt + 1))
         
-        return 0, 0  # Should not reach here
+        return UpsertResult()  # Should not reach here
     
     async def _insert_chunk(
         self,
         chunk: List[PropertyCreate],
         conflict_columns: List[str]
-    ) -> Tuple[int, int]:
+    ) -> UpsertResult:
         """
-        Вставляет чанк свойств используя INSERT ... ON CONFLICT.
+        Вставляет чанк свойств используя INSERT ... ON CONFLICT ... RETURNING.
+        
+        Старые цены читаются одним запросом до upsert; RETURNING отдаёт
+        вставленные (xmax = 0) и обновлённые строки с новыми ценами.
+        Семантика совпадает с ``_MERGE_SQL``: каждая существующая строка
+        считается обновлённой и получает свежий ``last_seen``, а
+        ``last_updated`` меняется только вместе с ценой.
         
         Args:
             chunk: Чанк свойств
             conflict_columns: Колонки для проверки конфликта
             
         Returns:
-            Кортеж (вставлено, обновлено)
+            Итог upsert чанка
         """
         # Конвертируем в словари
         properties_dicts = [self._prepare_property_dict(prop) for prop in chunk]
         
+        # Снимок текущих цен для строк чанка
+        keys = [(d['source'], d['external_id']) for d in properties_dicts]
+        columns = PROPERTIES.c
+        previous = await self.db.execute(
+            select(columns.id, columns.price)
+            .where(tuple_(columns.source, columns.external_id).in_(keys))
+        )
+        old_prices = {row.id: row.price for row in previous}
+        
         # Создаём INSERT statement
-        stmt = insert(Property).values(properties_dicts)
+        stmt = insert(PROPERTIES).values(properties_dicts)
         
-        # ON CONFLICT DO UPDATE для обновления существующих
+        # ON CONFLICT DO UPDATE для обновления существующих; без WHERE, как в _MERGE_SQL:
+        # объявление, увиденное снова, продлевает last_seen (deactivate_old_properties)
         update_dict = {
             'price': stmt.excluded.price,
             'title': stmt.excluded.title,
             'description': stmt.excluded.description,
-            'last_updated': datetime.utcnow(),
+            'last_seen': stmt.excluded.last_seen,
+            'last_updated': case(
+                (columns.price.is_distinct_from(stmt.excluded.price), datetime.utcnow()),
+                else_=columns.last_updated,
+            ),
         }
         
         stmt = stmt.on_conflict_do_update(
             index_elements=conflict_columns,
             set_=update_dict,
-            where=(Property.price != stmt.excluded.price)  # Обновляем только если цена изменилась
+        ).returning(
+            columns.id,
+            columns.source,
+            columns.external_id,
+            columns.price,
+            columns.city,
+            columns.rooms,
+            columns.area,
+            literal_column('xmax = 0').label('inserted'),
         )
         
         # Выполняем вставку
-        result = await self.db.execute(stmt)
+        rows = (await self.db.execute(stmt)).all()
         await self.db.flush()
         
-        # Считаем вставленные и обновлённые строки
-        # Примечание: PostgreSQL не возвращает точное количество в ON CONFLICT
-        # Поэтому оцениваем по количеству записей в чанке
-        inserted = len(chunk)
-        updated = 0
+        result = UpsertResult()
+        for row in rows:
+            if row.inserted:
+                result.inserted += 1
+                continue
+            result.updated += 1
+            old_price = old_prices.get(row.id)
+            if old_price is not None and old_price != row.price:
+                result.price_changes.append(PriceChange(
+                    property_id=row.id,
+                    source=row.source,
+                    external_id=row.external_id,
+                    old_price=old_price,
+                    new_price=row.price,
+                    city=row.city,
+                    rooms=row.rooms,
+                    area=row.area,
+                ))
         
-        return inserted, updated
+        return result
     
     def _prepare_property_dict(self, prop: PropertyCreate) -> Dict[str, Any]:
         """
@@ -284,11 +396,7 @@ async def _batch_insert_with_copy(
     properties: List[PropertyCreate]
 ) -> int:
     """
-    Массовая вставка используя COPY команду.
-
-    COPY намного быстрее INSERT для больших объёмов данных,
-    но требует прямого подключения к asyncpg и не поддерживает
-    ON CONFLICT.
+    Массовая вставка через COPY в staging-таблицу.
 
     Args:
         db: Database session
@@ -297,59 +405,282 @@ async def _batch_insert_with_copy(
     Returns:
         Количество вставленных записей
     """
-    # Получаем raw connection из SQLAlchemy
-    async with db.connection() as connection:
+    result = await copy_upsert_properties(db, properties)
+    return result.inserted
+
+
+# Колонки staging-таблицы: COPY пишет их в этом порядке
+STAGING_COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ('source', 'text'),
+    ('external_id', 'text'),
+    ('title', 'text'),
+    ('description', 'text'),
+    ('link', 'text'),
+    ('price', 'double precision'),
+    ('currency', 'text'),
+    ('price_per_sqm', 'double precision'),
+    ('rooms', 'integer'),
+    ('area', 'double precision'),
+    ('floor', 'integer'),
+    ('total_floors', 'integer'),
+    ('city', 'text'),
+    ('district', 'text'),
+    ('address', 'text'),
+    ('latitude', 'double precision'),
+    ('longitude', 'double precision'),
+    ('location', 'json'),
+    ('photos', 'json'),
+    ('features', 'json'),
+    ('contact_name', 'text'),
+    ('contact_phone', 'text'),
+    ('is_active', 'boolean'),
+    ('is_verified', 'boolean'),
+)
+
+# Колонки, которые перезаписываются у существующего объявления
+_MERGE_UPDATE_COLUMNS = (
+    'title', 'description', 'link', 'price', 'currency', 'price_per_sqm',
+    'rooms', 'area', 'floor', 'total_floors', 'city', 'district', 'address',
+    'latitude', 'longitude', 'location', 'photos', 'features',
+    'contact_name', 'contact_phone', 'is_active',
+)
+
+STAGING_TABLE = 'properties_staging'
+
+# 5 параметров на строку истории; asyncpg ограничивает запрос 32767 параметрами
+HISTORY_ROWS_PER_STATEMENT = 5000
+
+_CREATE_STAGING_SQL = (
+    f"CREATE TEMP TABLE {STAGING_TABLE} ("
+    + ", ".join(f"{name} {type_}" for name, type_ in STAGING_COLUMNS)
+    + ") ON COMMIT DROP"
+)
+
+_STAGING_COLUMN_LIST = ", ".join(name for name, _ in STAGING_COLUMNS)
+
+# Один запрос: снимок старых цен, merge, история цен и итоговые счётчики.
+# Все CTE видят один снимок, поэтому previous содержит цены до merge.
+# xmax = 0 только у строк, вставленных этим запросом.
+_MERGE_SQL = f"""
+WITH previous AS (
+    SELECT p.id, p.price
+    FROM properties AS p
+    JOIN {STAGING_TABLE} AS s USING (source, external_id)
+),
+merged AS (
+    INSERT INTO properties ({_STAGING_COLUMN_LIST}, first_seen, last_seen, last_updated, created_at)
+    SELECT {_STAGING_COLUMN_LIST}, now(), now(), now(), now()
+    FROM {STAGING_TABLE}
+    ON CONFLICT (source, external_id) DO UPDATE SET
+        {", ".join(f"{name} = EXCLUDED.{name}" for name in _MERGE_UPDATE_COLUMNS)},
+        last_seen = EXCLUDED.last_seen,
+        last_updated = CASE
+            WHEN properties.price IS DISTINCT FROM EXCLUDED.price THEN EXCLUDED.last_updated
+            ELSE properties.last_updated
+        END
+    RETURNING id, source, external_id, price, city, rooms, area, (xmax = 0) AS inserted
+),
+changes AS (
+    SELECT
+        m.id AS property_id, m.source, m.external_id, p.price AS old_price, m.price AS new_price,
+        m.city, m.rooms, m.area
+    FROM merged AS m
+    JOIN previous AS p ON p.id = m.id
+    WHERE p.price IS DISTINCT FROM m.price
+),
+history AS (
+    INSERT INTO property_price_history
+        (property_id, old_price, new_price, price_change, price_change_percent, changed_at)
+    SELECT
+        property_id, old_price, new_price, new_price - old_price,
+        CASE WHEN old_price > 0 THEN (new_price - old_price) / old_price * 100 ELSE 0 END,
+        now()
+    FROM changes
+)
+SELECT
+    (SELECT count(*) FROM merged WHERE inserted) AS inserted,
+    (SELECT count(*) FROM merged WHERE NOT inserted) AS updated,
+    (SELECT coalesce(json_agg(c), '[]') FROM changes AS c) AS changes
+"""
+
+
+class StagingCopyUpserter:
+    """
+    Upsert через COPY во временную staging-таблицу.
+
+    Каждый прогон парсинга загружается одним COPY (binary протокол asyncpg)
+    и сливается в ``properties`` одним ``INSERT ... SELECT ... ON CONFLICT``.
+    Тот же запрос возвращает точные счётчики вставок/обновлений и пишет
+    ``PropertyPriceHistory`` для изменившихся цен. Всё выполняется в
+    транзакции сессии; коммит остаётся за вызывающим кодом.
+    """
+
+    def __init__(self, db_session: AsyncSession):
+        """
+        Args:
+            db_session: SQLAlchemy async сессия (драйвер asyncpg)
+        """
+        self.db = db_session
+
+    async def driver_connection(self) -> Optional[Connection]:
+        """
+        Возвращает asyncpg соединение сессии или None для других драйверов.
+        """
+        connection = await self.db.connection()
         raw_connection = await connection.get_raw_connection()
-        asyncpg_conn = raw_connection._connection
+        driver_connection = raw_connection.driver_connection
+        if not hasattr(driver_connection, 'copy_records_to_table'):
+            return None
+        return driver_connection
 
-        # Подготавливаем данные для COPY
-        records = []
-        for prop in properties:
-            location = prop.location or {}
-            prop_dict = prop.model_dump()
-
-            records.append((
-                prop_dict['source'],
-                prop_dict['external_id'],
-                prop_dict['title'],
-                prop_dict.get('description'),
-                prop_dict.get('link'),
-                prop_dict['price'],
-                prop_dict.get('rooms'),
-                prop_dict.get('area'),
-                prop_dict.get('floor'),
-                prop_dict.get('total_floors'),
-                location.get('city'),
-                location.get('district'),
-                location.get('address'),
-                location.get('latitude'),
-                location.get('longitude'),
-                location,
-                prop_dict.get('photos', []),
-                datetime.utcnow(),
-                datetime.utcnow(),
-            ))
-
-        # Используем COPY для быстрой вставки
+    async def upsert(self, properties: List[PropertyCreate]) -> UpsertResult:
+        """
+        Загружает объявления через staging-таблицу.
+
+        Args:
+            properties: Объявления; при повторе source + external_id побеждает последнее
+
+        Returns:
+            Счётчики и изменения цен
+        """
+        if not properties:
+            return UpsertResult()
+
+        start_time = time.time()
+        driver_connection = await self.driver_connection()
+        if driver_connection is None:
+            raise RuntimeError("COPY upsert requires the asyncpg driver")
+
+        records = self._staging_records(properties)
         try:
-            await asyncpg_conn.copy_records_to_table(
-                'properties',
+            # CREATE через сессию открывает транзакцию SQLAlchemy; COPY идёт уже внутри неё
+            await self.db.execute(text(_CREATE_STAGING_SQL))
+            await driver_connection.copy_records_to_table(
+                STAGING_TABLE,
                 records=records,
-                columns=[
-                    'source', 'external_id', 'title', 'description', 'link',
-                    'price', 'rooms', 'area', 'floor', 'total_floors',
-                    'city', 'district', 'address', 'latitude', 'longitude',
-                    'location', 'photos', 'first_seen', 'last_seen'
-                ]
+                columns=[name for name, _ in STAGING_COLUMNS],
             )
+            row = (await self.db.execute(text(_MERGE_SQL))).one()
+            # ON COMMIT DROP не спасает от повторного вызова в той же транзакции
+            await self.db.execute(text(f"DROP TABLE {STAGING_TABLE}"))
+        except Exception:
+            metrics_collector.record_db_query("COPY_UPSERT", "properties", time.time() - start_time, error=True)
+            raise
+
+        changes = row.changes
+        if isinstance(changes, str):
+            changes = json.loads(changes)
+        result = UpsertResult(
+            inserted=row.inserted,
+            updated=row.updated,
+            price_changes=[PriceChange(**change) for change in changes],
+        )
+
+        duration = time.time() - start_time
+        metrics_collector.record_db_query("COPY_UPSERT", "properties", duration)
+        logger.info(
+            f"COPY upsert completed: {result.inserted} inserted, {result.updated} updated, "
+            f"{len(result.price_changes)} price changes in {duration:.2f}s"
+        )
+        return result
+
+    @staticmethod
+    def _staging_records(properties: List[PropertyCreate]) -> List[Tuple[Any, ...]]:
+        """
+        Готовит кортежи для COPY в порядке ``STAGING_COLUMNS``.
+
+        Повторы по source + external_id схлопываются: ON CONFLICT не может
+        обновить одну строку дважды в одном запросе.
+        """
+        rows: Dict[Tuple[str, str], Tuple[Any, ...]] = {}
+        for prop in properties:
+            location = prop.location or {}
+            price_per_sqm = prop.price_per_sqm
+            if price_per_sqm is None and prop.area:
+                price_per_sqm = prop.price / prop.area
+            rows[(prop.source, prop.external_id)] = (
+                prop.source,
+                prop.external_id,
+                prop.title,
+                prop.description,
+                prop.link,
+                prop.price,
+                prop.currency or 'RUB',
+                price_per_sqm,
+                prop.rooms,
+                prop.area,
+                prop.floor,
+                prop.total_floors,
+                prop.city or location.get('city'),
+                prop.district or location.get('district'),
+                prop.address or location.get('address'),
+                prop.latitude if prop.latitude is not None else location.get('latitude'),
+                prop.longitude if prop.longitude is not None else location.get('longitude'),
+                _json(location),
+                _json(prop.photos or []),
+                _json(prop.features) if prop.features is not None else None,
+                prop.contact_name,
+                prop.contact_phone,
+                True if prop.is_active is None else prop.is_active,
+                bool(prop.is_verified),
+            )
+        return list(rows.values())
+
 
-            logger.info(f"COPY inserted {len(records)} properties")
-            return len(records)
+def _json(value: Any) -> str:
+    # asyncpg передаёт колонки json текстом
+    return json.dumps(value, ensure_ascii=False, default=str)
 
-        except Exception as e:
-            logger.error(f"COPY failed, falling back to batch insert: {e}")
-            # Fallback к стандартному batch insert
-            return await batch_insert_properties(db, properties, use_copy=False)
+
+async def record_price_history(db: AsyncSession, changes: List[PriceChange]) -> int:
+    """
+    Пишет историю цен батча multi-row INSERT'ами.
+
+    Args:
+        db: Database session
+        changes: Изменения цен
+
+    Returns:
+        Количество записанных строк
+    """
+    if not changes:
+        return 0
+    start_time = time.time()
+    rows = [change.history_row() for change in changes]
+    for i in range(0, len(rows), HISTORY_ROWS_PER_STATEMENT):
+        await db.execute(insert(PropertyPriceHistory.__table__).values(rows[i:i + HISTORY_ROWS_PER_STATEMENT]))
+    metrics_collector.record_db_query("BULK_INSERT", "price_history", time.time() - start_time)
+    return len(changes)
+
+
+async def copy_upsert_properties(
+    db: AsyncSession,
+    properties: List[PropertyCreate],
+    chunk_size: int = 1000
+) -> UpsertResult:
+    """
+    Массовый upsert с выбором пути по драйверу.
+
+    На asyncpg используется ``StagingCopyUpserter``; для остальных драйверов —
+    ``BatchPropertyInserter``. Оба пути пишут историю цен в той же транзакции.
+
+    Args:
+        db: Database session
+        properties: Список свойств
+        chunk_size: Размер чанка для fallback-пути
+
+    Returns:
+        Итог upsert
+    """
+    if not properties:
+        return UpsertResult()
+
+    upserter = StagingCopyUpserter(db)
+    if await upserter.driver_connection() is not None:
+        return await upserter.upsert(properties)
+
+    inserter = BatchPropertyInserter(db, chunk_size=chunk_size)
+    return await inserter.upsert(properties)
 
 
 async def deduplicate_properties(
@@ -392,7 +723,7 @@ async def bulk_upsert_with_deduplication(
     db: AsyncSession,
     properties: List[PropertyCreate],
     chunk_size: int = 1000
-) -> Dict[str, int]:
+) -> Dict[str, Any]:
     """
     Комбинированная операция: deduplication + batch upsert.
     
@@ -402,7 +733,7 @@ async def bulk_upsert_with_deduplication(
         chunk_size: Размер чанка для batch операций
         
     Returns:
-        Статистика операции
+        Статистика операции; ``price_changes`` — изменения цен для публикации после коммита
     """
     start_time = time.time()
     
@@ -410,9 +741,8 @@ async def bulk_upsert_with_deduplication(
     unique_properties = await deduplicate_properties(db, properties)
     duplicates_removed = len(properties) - len(unique_properties)
     
-    # Шаг 2: Batch upsert в БД
-    inserter = BatchPropertyInserter(db, chunk_size=chunk_size)
-    inserted, updated = await inserter.insert_with_upsert(unique_properties)
+    # Шаг 2: COPY в staging-таблицу и merge в БД
+    result = await copy_upsert_properties(db, unique_properties, chunk_size=chunk_size)
     
     duration = time.time() - start_time
     
@@ -420,8 +750,10 @@ async def bulk_upsert_with_deduplication(
         'total_input': len(properties),
         'duplicates_removed': duplicates_removed,
         'unique_properties': len(unique_properties),
-        'inserted': inserted,
-        'updated': updated,
+        'inserted': result.inserted,
+        'updated': result.updated,
+        'price_changed': len(result.price_changes),
+        'price_changes': result.price_changes,
         'duration_seconds': duration,
     }
     
@@ -436,6 +768,11 @@ async def bulk_upsert_with_deduplication(
 
 __all__ = [
     "BatchPropertyInserter",
+    "StagingCopyUpserter",
+    "UpsertResult",
+    "PriceChange",
+    "copy_upsert_properties",
+    "record_price_history",
     "batch_insert_properties",
     "deduplicate_properties",
     "bulk_upsert_with_deduplication",
@@ -0,0 +1,185 @@
+"""
+Keyset-пагинация списочных запросов к ``properties``.
+
+Вместо ``LIMIT/OFFSET`` (Postgres читает и отбрасывает все пропущенные строки,
+глубокие страницы и выгрузки становятся квадратичными) следующая страница
+начинается строго после последней строки предыдущей:
+``WHERE (sort_column, id) > (:value, :id) ORDER BY sort_column, id``.
+Такой запрос читает ровно ``limit`` строк из индекса ``(sort_column, id)``
+(см. частичные индексы ``ix_properties_active_*``).
+
+Курсор непрозрачный, как и в ``app.services.pagination``: base64 от
+``[sort_by, sort_order, value, id]``; некорректный курсор — ``CursorError``.
+
+NULL в сортируемых колонках (``area``, ``rooms``) идут в конце при ``asc`` и в
+начале при ``desc`` — так же, как по умолчанию упорядочивает Postgres, поэтому
+обратный проход по тому же индексу обслуживает обе сортировки.
+"""
+
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import and_, literal_column, or_, tuple_
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.db.models.property import Property
+from app.services.pagination import CursorError
+
+# Поля сортировки поиска и их колонки
+SEARCH_SORT_COLUMNS: Dict[str, Any] = {
+    "created_at": Property.created_at,
+    "price": Property.price,
+    "area": Property.area,
+    "rooms": Property.rooms,
+}
+
+DEFAULT_SORT_BY = "created_at"
+
+# Сортировка подбора по цене за м²: выражение совпадает с индексом
+# ix_properties_active_price_per_sqm, поэтому Postgres читает его по порядку
+PRICE_PER_SQM_SORT = "price_per_sqm"
+PRICE_PER_SQM = Property.price / Property.area
+# Условие индекса ``area > 0`` литералом: с bind-параметром планировщик
+# не сопоставит запрос с частичным индексом
+HAS_AREA = Property.area > literal_column("0")
+
+# Колонки, где значение сортировки может быть NULL
+NULLABLE_SORT_FIELDS = frozenset({"area", "rooms"})
+
+# Значения этих полей передаются в курсоре как ISO-строки
+DATETIME_SORT_FIELDS = frozenset({"created_at"})
+
+
+@dataclass(frozen=True)
+class KeysetCursor:
+    """Последняя строка страницы: значение сортировки и ``id``."""
+
+    sort_by: str
+    sort_order: str
+    value: Any
+    last_id: int
+
+
+def normalize_sort(sort_by: str, sort_order: str) -> tuple:
+    """Неизвестное поле сортировки — ``created_at``, как и раньше в ``search_properties``."""
+    sort_by = sort_by if sort_by in SEARCH_SORT_COLUMNS else DEFAULT_SORT_BY
+    return sort_by, "desc" if sort_order.lower() == "desc" else "asc"
+
+
+def encode_keyset_cursor(cursor: KeysetCursor) -> str:
+    """Кодирует курсор в непрозрачную URL-безопасную строку."""
+    value = cursor.value.isoformat() if isinstance(cursor.value, datetime) else cursor.value
+    payload = json.dumps(
+        [cursor.sort_by, cursor.sort_order, value, cursor.last_id],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).rstrip(b"=").decode("ascii")
+
+
+def decode_keyset_cursor(token: str, sort_by: str, sort_order: str) -> KeysetCursor:
+    """
+    Декодирует курсор и проверяет, что он выдан для той же сортировки.
+
+    Args:
+        token: Курсор из предыдущего ответа
+        sort_by: Поле сортировки запроса (уже нормализованное)
+        sort_order: Направление запроса (``asc``/``desc``)
+
+    Raises:
+        CursorError: Если курсор повреждён или относится к другой сортировке
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        cursor_sort_by, cursor_order, value, last_id = json.loads(
+            base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        )
+        if value is not None:
+            value = datetime.fromisoformat(value) if cursor_sort_by in DATETIME_SORT_FIELDS else float(value)
+        cursor = KeysetCursor(str(cursor_sort_by), str(cursor_order), value, int(last_id))
+    except (ValueError, TypeError, UnicodeError) as e:
+        raise CursorError("Invalid pagination cursor") from e
+
+    if cursor.sort_by != sort_by or cursor.sort_order != sort_order:
+        raise CursorError("Pagination cursor does not match sort parameters")
+    return cursor
+
+
+def keyset_order_by(column: Any, sort_order: str, nullable: bool = False) -> List[ColumnElement]:
+    """
+    ``ORDER BY column, id`` в одном направлении.
+
+    Для ``nullable`` порядок NULL задаётся явно (как в Postgres по умолчанию);
+    для NOT NULL колонок его не указываем, иначе SQLite не читает индекс по порядку.
+    """
+    if sort_order == "asc":
+        key = column.asc().nulls_last() if nullable else column.asc()
+        return [key, Property.id.asc()]
+    key = column.desc().nulls_first() if nullable else column.desc()
+    return [key, Property.id.desc()]
+
+
+def keyset_after(column: Any, cursor: KeysetCursor, nullable: bool = False) -> ColumnElement:
+    """Условие «строго после курсора» для порядка ``keyset_order_by``."""
+    key = tuple_(column, Property.id)
+    if cursor.sort_order == "asc":
+        if cursor.value is None:
+            # Уже в хвосте из NULL: дальше только по id
+            return and_(column.is_(None), Property.id > cursor.last_id)
+        after = key > tuple_(cursor.value, cursor.last_id)
+        return or_(after, column.is_(None)) if nullable else after
+
+    if cursor.value is None:
+        # NULL идут первыми: после них — все строки со значением
+        return or_(and_(column.is_(None), Property.id < cursor.last_id), column.isnot(None))
+    return key < tuple_(cursor.value, cursor.last_id)
+
+
+def price_per_sqm_of(item: Any) -> float:
+    """Значение сортировки ``PRICE_PER_SQM`` для строки страницы."""
+    return item.price / item.area
+
+
+def next_cursor(
+    items: Sequence[Any],
+    limit: int,
+    sort_by: str,
+    sort_order: str,
+    value_of: Optional[Any] = None,
+) -> Optional[str]:
+    """
+    Курсор следующей страницы или ``None``, если страница неполная.
+
+    Args:
+        items: Строки страницы (атрибуты ``id`` и поле сортировки)
+        limit: Размер страницы
+        sort_by: Поле сортировки
+        sort_order: Направление
+        value_of: Функция значения сортировки строки (по умолчанию ``getattr(item, sort_by)``)
+    """
+    if not items or len(items) < limit:
+        return None
+    last = items[-1]
+    value = value_of(last) if value_of is not None else getattr(last, sort_by)
+    return encode_keyset_cursor(KeysetCursor(sort_by, sort_order, value, last.id))
+
+
+__all__ = [
+    "DEFAULT_SORT_BY",
+    "HAS_AREA",
+    "KeysetCursor",
+    "NULLABLE_SORT_FIELDS",
+    "PRICE_PER_SQM",
+    "PRICE_PER_SQM_SORT",
+    "SEARCH_SORT_COLUMNS",
+    "decode_keyset_cursor",
+    "encode_keyset_cursor",
+    "keyset_after",
+    "keyset_order_by",
+    "next_cursor",
+    "normalize_sort",
+    "price_per_sqm_of",
+]
@@ -6,10 +6,18 @@ from typing import Optional, List
 
 from sqlalchemy import Column, String, Float, Integer, DateTime, Boolean, JSON, Index, UniqueConstraint, Text, ForeignKey
 from sqlalchemy.orm import declarative_base, relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 
 Base = declarative_base()
 
+# Предикат частичных индексов по активным объявлениям. Запросы должны
+# сравнивать is_active с литералом (``Property.is_active == True``), а не с
+# bind-параметром, иначе планировщик не докажет условие индекса.
+ACTIVE_ONLY = dict(
+    postgresql_where=text("is_active = true"),
+    sqlite_where=text("is_active = 1"),
+)
+
 
 class Property(Base):
     """Property model for storing parsed property data."""
@@ -17,10 +25,10 @@ class Property(Base):
     __tablename__ = "properties"
     
     # Primary key
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     
     # External identifiers
-    source = Column(String(50), nullable=False, index=True)  # avito, cian, etc.
+    source = Column(String(50), nullable=False)  # avito, cian, etc.
     external_id = Column(String(255), nullable=False)  # ID from source
     
     # Basic information
@@ -29,18 +37,18 @@ class Property(Base):
     link = Column(String(1000))
     
     # Price information
-    price = Column(Float, nullable=False, index=True)
+    price = Column(Float, nullable=False)
     currency = Column(String(10), default="RUB")
     price_per_sqm = Column(Float, index=True)  # Price per square meter - indexed for faster queries
     
     # Property characteristics
-    rooms = Column(Integer, index=True)  # Indexed for room-based queries
-    area = Column(Float, index=True)  # Total area in square meters - indexed
-    floor = Column(Integer, index=True)  # Indexed for floor-based queries
+    rooms = Column(Integer)
+    area = Column(Float)  # Total area in square meters
+    floor = Column(Integer)
     total_floors = Column(Integer)
     
     # Location
-    city = Column(String(100), index=True)
+    city = Column(String(100))
     district = Column(String(100), index=True)  # Indexed for district-based queries
     address = Column(String(500))
     latitude = Column(Float)
@@ -58,64 +66,74 @@ class Property(Base):
     contact_phone = Column(String(50))
     
     # Status tracking
-    is_active = Column(Boolean, default=True, index=True)
-    is_verified = Column(Boolean, default=False, index=True)  # Indexed for verification-based queries
+    is_active = Column(Boolean, default=True)
+    is_verified = Column(Boolean, default=False)
     
     # Timestamps
     first_seen = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)  # Indexed
     last_seen = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False, index=True)  # Indexed
-    last_updated = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True)  # Indexed
+    last_updated = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
     
-    # Indexes for performance
+    # Indexes for performance.
+    # Одноколоночные индексы, совпадающие с префиксом составных, и индексы
+    # с ведущим is_active убраны: списки и аналитика читают только активные
+    # объявления, поэтому им служат частичные индексы WHERE is_active = true
+    # (меньше, дешевле на запись). Ключ (колонка, id) — порядок keyset-пагинации
+    # (app.db.keyset), INCLUDE даёт index-only scan в Postgres.
     __table_args__ = (
         # Unique constraint for source + external_id
         UniqueConstraint('source', 'external_id', name='uix_source_external_id'),
         
         # Composite indexes for common queries
-        Index('ix_city_price', 'city', 'price'),
         Index('ix_source_city', 'source', 'city'),
-        Index('ix_active_price', 'is_active', 'price'),
         Index('ix_rooms_area', 'rooms', 'area'),
-        
-        # Additional indexes for performance optimization
-        Index('ix_created_at', 'created_at'),
-        Index('ix_last_seen', 'last_seen'),
-        Index('ix_is_active_created', 'is_active', 'created_at'),
-        Index('ix_source_is_active', 'source', 'is_active'),
-        Index('ix_district', 'district'),
-        Index('ix_price_area', 'price', 'area'),
         Index('ix_source_price', 'source', 'price'),
-        
-        # New indexes for enhanced query performance
-        Index('ix_price_per_sqm', 'price_per_sqm'),  # For price per square meter queries
         Index('ix_rooms_price', 'rooms', 'price'),  # For room and price combination queries
         Index('ix_city_district', 'city', 'district'),  # For city and district combination queries
-        Index('ix_verified_active', 'is_verified', 'is_active'),  # For verified and active properties
         Index('ix_area_price_per_sqm', 'area', 'price_per_sqm'),  # For area and price per sqm queries
         Index('ix_source_first_seen', 'source', 'first_seen'),  # For source and first seen queries
         Index('ix_floor_total_floors', 'floor', 'total_floors'),  # For floor-related queries
+
+        # Partial indexes over active listings (search, keyset pagination, stats)
+        Index('ix_properties_active_created', 'created_at', 'id', **ACTIVE_ONLY),
+        Index('ix_properties_active_city_created', 'city', 'created_at', 'id', **ACTIVE_ONLY),
+        Index('ix_properties_active_price', 'price', 'id', **ACTIVE_ONLY),
+        Index(
+            'ix_properties_active_city_price', 'city', 'price', 'id',
+            postgresql_include=['rooms', 'area'], **ACTIVE_ONLY,
+        ),
+        Index('ix_properties_active_source_last_seen', 'source', 'last_seen', **ACTIVE_ONLY),  # deactivate_old_properties
+        Index('ix_properties_active_city_stats', 'city', postgresql_include=['price', 'area', 'rooms'], **ACTIVE_ONLY),
+        # Bounding box prefilter for /geo; the grid-cell expression index
+        # (app.utils.geo.GEO_CELL_SQL) is Postgres-only and lives in the migration
+        Index(
+            'ix_properties_active_geo', 'latitude', 'longitude',
+            postgresql_include=['id', 'price'], **ACTIVE_ONLY,
+        ),
     )
 
     # Foreign key to User (owner who added the property)
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)
 
-    # Relationships for eager loading (prevents N+1 queries)
+    # Relationships are loaded explicitly with selectinload() where a detail
+    # view needs them; list queries use app.db.read_models projections.
+    # raise_on_sql turns an accidental lazy load (N+1) into an error.
     owner = relationship(
         "User",
         back_populates="properties",
-        lazy="selectin"
+        lazy="raise_on_sql"
     )
     price_history = relationship(
         "PropertyPriceHistory",
         back_populates="property",
-        lazy="selectin",  # Eager load with selectinload
+        lazy="raise_on_sql",
         order_by="desc(PropertyPriceHistory.changed_at)"
     )
     views = relationship(
         "PropertyView",
         back_populates="property",
-        lazy="selectin"
+        lazy="raise_on_sql"
     )
 
     def __repr__(self):
@@ -156,6 +174,16 @@ class Property(Base):
         }
 
 
+# Keyset order of search_properties_by_price_per_sqm. The expression must match
+# app.db.keyset.PRICE_PER_SQM as compiled by each dialect (SQLite renders the
+# division as price / (area + 0.0)), so it is built from the same columns
+Index(
+    'ix_properties_active_price_per_sqm', Property.price / Property.area, Property.id,
+    postgresql_where=text('is_active = true AND area > 0'),
+    sqlite_where=text('is_active = 1 AND area > 0'),
+)
+
+
 class PropertyPriceHistory(Base):
     """Track price changes over time."""
 
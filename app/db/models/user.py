@@ -49,7 +49,8 @@ class User(Base):
     )
 
     # Relationships
-    properties = relationship("Property", back_populates="owner", lazy="selectin")
+    # Не selectin: иначе каждый User тянет все свои объявления
+    properties = relationship("Property", back_populates="owner", lazy="select")
     bookmarks = relationship("Bookmark", back_populates="user", lazy="selectin", cascade="all, delete-orphan")
     alerts = relationship("PropertyAlert", back_populates="user", lazy="selectin", cascade="all, delete-orphan")
 
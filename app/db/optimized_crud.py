@@ -6,13 +6,15 @@ Optimized CRUD operations with N+1 query prevention.
 import logging
 import time
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any, Tuple
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
 
-from sqlalchemy import select, update, delete, and_, or_, func, desc
+from sqlalchemy import Select, select, update, delete, and_, or_, func, desc
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import selectinload, joinedload
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models.property import Property, PropertyPriceHistory, PropertyView, SearchQuery
+from app.db.read_models import LIST_COLUMNS, PROPERTIES
 from app.models.schemas import PropertyCreate
 from app.utils.metrics import metrics_collector
 
@@ -402,24 +404,61 @@ async def get_statistics_optimized(
 
 # ==================== Export helpers ====================
 
-async def stream_properties_query(
-    db: AsyncSession,
+def properties_stream_query(
+    columns: Sequence[Any],
     city: Optional[str] = None,
     source: Optional[str] = None,
-    is_active: bool = True
-):
+    is_active: Optional[bool] = True,
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> Select:
     """
-    Create streaming query for large exports.
+    Build the export query: selected columns ordered by id.
 
-    Uses server-side cursor for memory-efficient streaming.
+    ``is_active=None`` disables the status filter.
     """
-    filters = [Property.is_active == is_active]
-
+    filters = []
+    if is_active is not None:
+        filters.append(Property.is_active == is_active)
     if city:
         filters.append(Property.city == city)
     if source:
         filters.append(Property.source == source)
 
-    query = select(Property).where(and_(*filters))
-
+    query = select(*columns).where(*filters).order_by(Property.id)
+    if limit:
+        query = query.limit(limit)
+    if offset:
+        query = query.offset(offset)
     return query
+
+
+async def stream_properties_query(
+    db: AsyncSession,
+    columns: Optional[Sequence[Any]] = None,
+    city: Optional[str] = None,
+    source: Optional[str] = None,
+    is_active: Optional[bool] = True,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    batch_size: int = 1000,
+) -> AsyncIterator[Sequence[Row]]:
+    """
+    Stream properties for large exports in partitions of ``batch_size`` rows.
+
+    Строки читаются серверным курсором (``AsyncSession.stream`` с
+    ``yield_per``): в памяти не больше одной пачки, ORM-объекты и
+    identity map не создаются. По умолчанию — колонки ``LIST_COLUMNS``.
+    """
+    if columns is None:
+        columns = [PROPERTIES.c[name] for name in LIST_COLUMNS]
+    query = properties_stream_query(columns, city, source, is_active, limit, offset)
+
+    start_time = time.time()
+    result = await db.stream(query.execution_options(yield_per=batch_size))
+    try:
+        async for partition in result.partitions():
+            yield partition
+    finally:
+        await result.close()
+        metrics_collector.record_db_query("STREAM", "properties", time.time() - start_time)
@@ -0,0 +1,92 @@
+"""
+Read-модели объявлений для списков.
+
+Списочные запросы (поиск, подбор по цене за м²) читают только колонки
+таблицы через Core ``select`` и собирают лёгкие объекты со ``__slots__``:
+ни identity map, ни отслеживания изменений, ни загрузки связей
+``price_history``/``views``/``owner``. Связи подгружаются явно
+(``selectinload``) только там, где они нужны карточке объявления, а
+счётчики просмотров считаются агрегатом по ``property_views``.
+"""
+
+from typing import Any, Iterable, List
+
+from sqlalchemy import Select, select
+from sqlalchemy.engine import Row
+
+from app.db.models.property import Property
+
+# Core-таблица: проекция не требует конфигурации ORM-мапперов
+PROPERTIES = Property.__table__
+
+# Колонки, которые отдаёт схема ответа ``app.models.schemas.Property``
+LIST_COLUMNS = (
+    "id",
+    "source",
+    "external_id",
+    "title",
+    "description",
+    "link",
+    "price",
+    "currency",
+    "price_per_sqm",
+    "rooms",
+    "area",
+    "floor",
+    "total_floors",
+    "city",
+    "district",
+    "address",
+    "latitude",
+    "longitude",
+    "location",
+    "photos",
+    "features",
+    "contact_name",
+    "contact_phone",
+    "is_active",
+    "is_verified",
+    "first_seen",
+    "last_seen",
+    "created_at",
+    "last_updated",
+)
+
+
+class PropertyListItem:
+    """Строка списка объявлений: атрибуты как у ``Property``, без связей."""
+
+    __slots__ = LIST_COLUMNS
+
+    def __init__(self, **values: Any):
+        for name in LIST_COLUMNS:
+            setattr(self, name, values.get(name))
+
+    @classmethod
+    def from_row(cls, row: Row) -> "PropertyListItem":
+        item = cls.__new__(cls)
+        for name, value in zip(LIST_COLUMNS, row):
+            setattr(item, name, value)
+        return item
+
+    def __repr__(self) -> str:
+        return f"<PropertyListItem(id={self.id}, source={self.source}, external_id={self.external_id})>"
+
+
+def select_list_items() -> Select:
+    """``SELECT`` колонок ``LIST_COLUMNS`` в порядке слотов ``PropertyListItem``."""
+    return select(*(PROPERTIES.c[name] for name in LIST_COLUMNS))
+
+
+def to_list_items(rows: Iterable[Row]) -> List[PropertyListItem]:
+    """Строки ``select_list_items()`` в ``PropertyListItem``."""
+    return [PropertyListItem.from_row(row) for row in rows]
+
+
+__all__ = [
+    "LIST_COLUMNS",
+    "PROPERTIES",
+    "PropertyListItem",
+    "select_list_items",
+    "to_list_items",
+]
@@ -3,6 +3,7 @@ Repository for materialized views.
 
 Provides optimized queries using pre-computed aggregations.
 """
+import math
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 from sqlalchemy import select, text, bindparam
@@ -224,6 +225,54 @@ async def get_property_view_stats(
     ]
 
 
+async def get_geo_heatmap(
+    db: AsyncSession,
+    grid_size: float,
+    south: float,
+    west: float,
+    north: float,
+    east: float,
+) -> List[Dict[str, Any]]:
+    """
+    Get heatmap grid cells from materialized view.
+
+    Only grid sizes from ``app.utils.geo.HEATMAP_GRID_SIZES`` are precomputed.
+    Returns cell centers, most dense cells first.
+    """
+    query = text("""
+        SELECT
+            lat_cell,
+            lon_cell,
+            property_count,
+            avg_price
+        FROM mv_geo_heatmap_grid
+        WHERE grid_size = :grid_size
+          AND lat_cell BETWEEN :lat_from AND :lat_to
+          AND lon_cell BETWEEN :lon_from AND :lon_to
+        ORDER BY property_count DESC
+    """)
+    params = {
+        "grid_size": grid_size,
+        "lat_from": math.floor(south / grid_size),
+        "lat_to": math.floor(north / grid_size),
+        "lon_from": math.floor(west / grid_size),
+        "lon_to": math.floor(east / grid_size),
+    }
+
+    result = await db.execute(query, params)
+    rows = result.all()
+
+    return [
+        {
+            "latitude": (row.lat_cell + 0.5) * grid_size,
+            "longitude": (row.lon_cell + 0.5) * grid_size,
+            "count": row.property_count,
+            "avg_price": float(row.avg_price) if row.avg_price else 0.0,
+        }
+        for row in rows
+    ]
+
+
 async def refresh_materialized_view(
     db: AsyncSession,
     view_name: str,
@@ -247,6 +296,7 @@ async def refresh_materialized_view(
             "mv_price_trends_daily",
             "mv_popular_searches",
             "mv_property_views_daily",
+            "mv_geo_heatmap_grid",
         }
         
         if view_name not in ALLOWED_VIEWS:
@@ -4,14 +4,31 @@ CRUD operations for Property model.
 import logging
 import time
 from datetime import datetime, timedelta, timezone
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Sequence, Tuple
 
-from sqlalchemy import select, update, delete, and_, or_, func, desc, text
+import numpy as np
+from sqlalchemy import (
+    BigInteger, Float, Integer, any_, bindparam, select, update, delete, and_, or_, func, desc, literal_column, text,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.dialects.postgresql import ARRAY, insert
 
+from app.db.batch_insert import copy_upsert_properties
 from app.db.models.property import Property, PropertyPriceHistory, PropertyView, SearchQuery
+from app.db.keyset import (
+    HAS_AREA,
+    NULLABLE_SORT_FIELDS,
+    PRICE_PER_SQM,
+    SEARCH_SORT_COLUMNS,
+    KeysetCursor,
+    keyset_after,
+    keyset_order_by,
+    normalize_sort,
+)
+from app.db.read_models import PropertyListItem, select_list_items, to_list_items
 from app.models.schemas import PropertyCreate
+from app.services.price_changes import price_change_publisher
+from app.utils.geo import GEO_CELL_SQL, BoundingBox, bounding_box, haversine_km, nearest_within
 from app.utils.metrics import metrics_collector
 
 logger = logging.getLogger(__name__)
@@ -183,6 +200,40 @@ async def get_property_by_external_id(
     return result.scalar_one_or_none()
 
 
+def _id_in(db: AsyncSession, column, ids: Sequence[int]):
+    """
+    Фильтр ``column`` по списку id для пакетных выборок.
+
+    В Postgres — ``column = ANY(:ids)`` с одним параметром-массивом: один
+    подготовленный запрос на пачку любого размера вместо ``IN ($1, ..., $n)``
+    под каждую длину списка. В остальных СУБД — обычный ``IN``.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        return column == any_(bindparam("ids", list(ids), type_=ARRAY(Integer), unique=True))
+    return column.in_(ids)
+
+
+async def get_properties_by_ids(db: AsyncSession, property_ids: Sequence[int]) -> Dict[int, PropertyListItem]:
+    """
+    Get properties by a batch of IDs in one query (read-модель ``PropertyListItem``).
+
+    Returns a mapping ``id -> item``; missing IDs are absent. Used by GraphQL
+    DataLoaders so nested queries do not fetch listings one by one.
+    """
+    if not property_ids:
+        return {}
+    start_time = time.time()
+
+    result = await db.execute(select_list_items().where(_id_in(db, Property.id, property_ids)))
+    items = {item.id: item for item in to_list_items(result.all())}
+
+    # Record metrics
+    duration = time.time() - start_time
+    metrics_collector.record_db_query("SELECT", "properties", duration)
+
+    return items
+
+
 async def update_property(
     db: AsyncSession,
     property_id: int,
@@ -320,22 +371,24 @@ async def search_properties(
     sort_by: str = "created_at",
     sort_order: str = "desc",
     limit: int = 100,
-    offset: int = 0
-) -> List[Property]:
+    offset: int = 0,
+    cursor: Optional[KeysetCursor] = None,
+) -> List[PropertyListItem]:
     """
     Search properties with filters - optimized version.
 
-    Uses selectinload для предотвращения N+1 запросов при загрузке связанных данных.
+    Читает только колонки (read-модель ``PropertyListItem``): связи
+    price_history/views/owner для списка не загружаются.
+
+    Порядок всегда ``(sort_by, id)``. С ``cursor`` (keyset, см. ``app.db.keyset``)
+    страница начинается после последней строки предыдущей и ``offset``
+    игнорируется; ``offset`` оставлен для старых клиентов.
     """
     start_time = time.time()
+    sort_by, sort_order = normalize_sort(sort_by, sort_order)
+    sort_column = SEARCH_SORT_COLUMNS[sort_by]
 
-    # Import optimized query builder
-    from sqlalchemy.orm import selectinload
-
-    # Build query with eager loading
-    query = select(Property).options(
-        selectinload(Property.price_history)  # Prevent N+1 for price history
-    )
+    query = select_list_items()
 
     # Build filters
     filters = [Property.is_active == is_active] if is_active is not None else []
@@ -359,30 +412,16 @@ async def search_properties(
     if max_area is not None:
         filters.append(Property.area <= max_area)
 
-    query = query.where(and_(*filters))
+    nullable = sort_by in NULLABLE_SORT_FIELDS
+    if cursor is not None:
+        filters.append(keyset_after(sort_column, cursor, nullable=nullable))
 
-    # Apply sorting
-    if sort_order == "desc":
-        if sort_by == "price":
-            query = query.order_by(desc(Property.price))
-        elif sort_by == "area":
-            query = query.order_by(desc(Property.area))
-        elif sort_by == "rooms":
-            query = query.order_by(desc(Property.rooms))
-        else:  # default to created_at
-            query = query.order_by(desc(Property.created_at))
-    else:  # asc
-        if sort_by == "price":
-            query = query.order_by(Property.price)
-        elif sort_by == "area":
-            query = query.order_by(Property.area)
-        elif sort_by == "rooms":
-            query = query.order_by(Property.rooms)
-        else:  # default to created_at
-            query = query.order_by(Property.created_at)
+    query = query.where(and_(*filters)).order_by(*keyset_order_by(sort_column, sort_order, nullable=nullable))
 
     # Apply pagination
-    query = query.limit(limit).offset(offset)
+    query = query.limit(limit)
+    if cursor is None and offset:
+        query = query.offset(offset)
 
     result = await db.execute(query)
 
@@ -390,16 +429,17 @@ async def search_properties(
     duration = time.time() - start_time
     metrics_collector.record_db_query("SELECT", "properties", duration)
 
-    return list(result.scalars().all())
+    return to_list_items(result.all())
 
 
 async def get_property_statistics(
     db: AsyncSession,
     city: Optional[str] = None,
     source: Optional[str] = None,
-    district: Optional[str] = None
+    district: Optional[str] = None,
+    days: Optional[int] = None
 ) -> Dict[str, Any]:
-    """Get statistics for properties."""
+    """Get statistics for properties (optionally only those created in the last N days)."""
     start_time = time.time()
     
     filters = [Property.is_active == True]
@@ -410,6 +450,8 @@ async def get_property_statistics(
         filters.append(Property.source == source)
     if district:
         filters.append(Property.district == district)
+    if days is not None:
+        filters.append(Property.created_at >= datetime.now(timezone.utc) - timedelta(days=days))
     
     # Use a single query with all aggregations
     result = await db.execute(
@@ -451,15 +493,22 @@ async def search_properties_by_price_per_sqm(
     max_price_per_sqm: Optional[float] = None,
     is_active: bool = True,
     limit: int = 100,
-    offset: int = 0
-) -> List[Property]:
-    """Search properties with price per square meter filter."""
+    offset: int = 0,
+    cursor: Optional[KeysetCursor] = None,
+) -> List[PropertyListItem]:
+    """
+    Search properties with price per square meter filter.
+
+    Только объявления с площадью: порядок ``(price / area, id)`` по возрастанию,
+    ``cursor`` — keyset-курсор с ``sort_by="price_per_sqm"``.
+    """
     start_time = time.time()
     
-    query = select(Property)
+    query = select_list_items()
     
-    # Build filters
+    # Build filters (only for properties with valid area)
     filters = [Property.is_active == is_active] if is_active is not None else []
+    filters.append(HAS_AREA)
     
     if city:
         filters.append(Property.city == city)
@@ -468,16 +517,17 @@ async def search_properties_by_price_per_sqm(
     if district:
         filters.append(Property.district == district)
     
-    # Filter by price per square meter (only for properties with valid area)
+    # Filter by price per square meter
     if max_price_per_sqm is not None:
-        filters.append(and_(
-            Property.area > 0,
-            (Property.price / Property.area) <= max_price_per_sqm
-        ))
+        filters.append(PRICE_PER_SQM <= max_price_per_sqm)
+    if cursor is not None:
+        filters.append(keyset_after(PRICE_PER_SQM, cursor))
     
     query = query.where(and_(*filters))
-    query = query.order_by(Property.price / Property.area)  # Sort by price per sqm ascending
-    query = query.limit(limit).offset(offset)
+    query = query.order_by(*keyset_order_by(PRICE_PER_SQM, "asc"))  # Sort by price per sqm ascending
+    query = query.limit(limit)
+    if cursor is None and offset:
+        query = query.offset(offset)
     
     result = await db.execute(query)
     
@@ -485,7 +535,7 @@ async def search_properties_by_price_per_sqm(
     duration = time.time() - start_time
     metrics_collector.record_db_query("SELECT", "properties", duration)
     
-    return list(result.scalars().all())
+    return to_list_items(result.all())
 
 
 # ==================== Price History CRUD ====================
@@ -552,6 +602,52 @@ async def get_property_price_history(
     return await get_price_history(db, property_id, limit)
 
 
+async def get_price_history_by_property_ids(
+    db: AsyncSession,
+    property_ids: Sequence[int],
+    limit: int = 10
+) -> Dict[int, List[PropertyPriceHistory]]:
+    """
+    Get the latest ``limit`` price changes for each of the properties in one query.
+
+    Оконная ``row_number()`` по ``property_id`` ограничивает историю каждого
+    объявления, как ``get_price_history`` для одного. Returns a mapping
+    ``property_id -> history`` (newest first); properties without changes
+    are absent.
+    """
+    if not property_ids:
+        return {}
+    start_time = time.time()
+
+    ranked = (
+        select(
+            PropertyPriceHistory.id,
+            func.row_number().over(
+                partition_by=PropertyPriceHistory.property_id,
+                order_by=(desc(PropertyPriceHistory.changed_at), desc(PropertyPriceHistory.id)),
+            ).label("position"),
+        )
+        .where(_id_in(db, PropertyPriceHistory.property_id, property_ids))
+        .subquery()
+    )
+    result = await db.execute(
+        select(PropertyPriceHistory)
+        .join(ranked, ranked.c.id == PropertyPriceHistory.id)
+        .where(ranked.c.position <= limit)
+        .order_by(PropertyPriceHistory.property_id, ranked.c.position)
+    )
+
+    history: Dict[int, List[PropertyPriceHistory]] = {}
+    for change in result.scalars():
+        history.setdefault(change.property_id, []).append(change)
+
+    # Record metrics
+    duration = time.time() - start_time
+    metrics_collector.record_db_query("SELECT", "price_history", duration)
+
+    return history
+
+
 async def get_price_trends(db: AsyncSession, city: str, days: int = 30) -> List[Dict[str, Any]]:
     """
     Get price trends for properties in a city over a period of days.
@@ -674,6 +770,40 @@ async def get_property_view_count(
     return result.scalar_one()
 
 
+async def get_view_counts_by_property_ids(
+    db: AsyncSession,
+    property_ids: Sequence[int],
+    days: int = 30
+) -> Dict[int, int]:
+    """
+    Get view counts for the last N days for a batch of properties in one query.
+
+    Returns a mapping ``property_id -> count``; properties without views are absent.
+    """
+    if not property_ids:
+        return {}
+    start_time = time.time()
+
+    threshold = datetime.now(timezone.utc) - timedelta(days=days)
+
+    result = await db.execute(
+        select(PropertyView.property_id, func.count(PropertyView.id))
+        .where(
+            and_(
+                _id_in(db, PropertyView.property_id, property_ids),
+                PropertyView.viewed_at >= threshold
+            )
+        )
+        .group_by(PropertyView.property_id)
+    )
+
+    # Record metrics
+    duration = time.time() - start_time
+    metrics_collector.record_db_query("SELECT", "property_views", duration)
+
+    return {property_id: count for property_id, count in result.all()}
+
+
 async def get_popular_properties(
     db: AsyncSession,
     limit: int = 10,
@@ -790,78 +920,38 @@ async def bulk_upsert_properties(
     properties: List[PropertyCreate]
 ) -> Dict[str, int]:
     """
-    Bulk insert or update properties using efficient PostgreSQL UPSERT.
+    Bulk insert or update properties.
+
+    Rows are COPYed into a staging table and merged with a single
+    INSERT ... ON CONFLICT, which also records price history for changed prices.
+    Price drops are published once per batch after the commit.
     Returns dict with counts of created and updated properties.
     """
     start_time = time.time()
     
     if not properties:
-        return {"created": 0, "updated": 0, "errors": 0}
+        return {"created": 0, "updated": 0, "errors": 0, "price_changed": 0}
     
     try:
-        # Convert PropertyCreate objects to dictionaries
-        properties_dicts = []
-        for prop_data in properties:
-            location = prop_data.location or {}
-            prop_dict = prop_data.model_dump()
-            
-            properties_dicts.append({
-                "source": prop_dict["source"],
-                "external_id": prop_dict["external_id"],
-                "title": prop_dict["title"],
-                "description": prop_dict.get("description"),
-                "link": prop_dict.get("link"),
-                "price": prop_dict["price"],
-                "rooms": prop_dict.get("rooms"),
-                "area": prop_dict.get("area"),
-                "city": location.get("city"),
-                "district": location.get("district"),
-                "address": location.get("address"),
-                "latitude": location.get("latitude"),
-                "longitude": location.get("longitude"),
-                "location": location,
-                "photos": prop_dict.get("photos", []),
-                "last_seen": datetime.now(timezone.utc),
-            })
-        
-        # Use PostgreSQL's INSERT ... ON CONFLICT DO UPDATE
-        stmt = insert(Property).values(properties_dicts)
-        stmt = stmt.on_conflict_do_update(
-            index_elements=['source', 'external_id'],
-            set_={
-                'title': stmt.excluded.title,
-                'description': stmt.excluded.description,
-                'price': stmt.excluded.price,
-                'rooms': stmt.excluded.rooms,
-                'area': stmt.excluded.area,
-                'city': stmt.excluded.city,
-                'district': stmt.excluded.district,
-                'address': stmt.excluded.address,
-                'latitude': stmt.excluded.latitude,
-                'longitude': stmt.excluded.longitude,
-                'location': stmt.excluded.location,
-                'photos': stmt.excluded.photos,
-                'last_seen': stmt.excluded.last_seen,
-                'last_updated': datetime.now(timezone.utc),
-            }
-        )
-        
-        await db.execute(stmt)
+        result = await copy_upsert_properties(db, properties)
         await db.commit()
+        await price_change_publisher.publish(result.price_changes)
         
         # Record metrics
         duration = time.time() - start_time
         metrics_collector.record_db_query("BULK_UPSERT", "properties", duration)
         metrics_collector.record_task_processed("bulk_upsert", "success")
         
-        # Note: We can't easily distinguish created vs updated in bulk upsert
-        # Return total count as created for simplicity
-        logger.info(f"Bulk upsert completed: {len(properties)} properties processed")
+        logger.info(
+            f"Bulk upsert completed: {result.inserted} created, {result.updated} updated, "
+            f"{len(result.price_changes)} price changes"
+        )
         
         return {
-            "created": len(properties),
-            "updated": 0,
-            "errors": 0
+            "created": result.inserted,
+            "updated": result.updated,
+            "errors": 0,
+            "price_changed": len(result.price_changes),
         }
         
     except Exception as e:
@@ -874,5 +964,152 @@ async def bulk_upsert_properties(
         return {
             "created": 0,
             "updated": 0,
-            "errors": len(properties)
+            "errors": len(properties),
+            "price_changed": 0,
         }
+
+
+# ==================== Geo Queries ====================
+
+# Колонки карточки на карте: ORM-объекты и их связи не строятся
+_GEO_ITEM_COLUMNS = (
+    Property.id,
+    Property.title,
+    Property.price,
+    Property.area,
+    Property.rooms,
+    Property.floor,
+    Property.latitude,
+    Property.longitude,
+    Property.address,
+    Property.link,
+)
+
+
+def _geo_filters(db: AsyncSession, box: BoundingBox) -> List[Any]:
+    """Предфильтр: ячейки сетки (индекс по выражению в Postgres) и точный bounding box."""
+    filters = [
+        Property.is_active == True,  # noqa: E712
+        Property.latitude.between(box.south, box.north),
+        Property.longitude.between(box.west, box.east),
+    ]
+    ranges = box.cell_ranges()
+    if ranges and db.get_bind().dialect.name == "postgresql":
+        cell = literal_column(GEO_CELL_SQL, BigInteger)
+        filters.append(or_(*(cell.between(first, last) for first, last in ranges)))
+    return filters
+
+
+async def find_properties_within_radius(
+    db: AsyncSession,
+    latitude: float,
+    longitude: float,
+    radius_km: float,
+    limit: int = 20,
+) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Ближайшие активные объявления в радиусе.
+
+    Кандидаты отбираются в SQL по ячейкам сетки и bounding box (читаются только
+    id и координаты), расстояния считаются векторно в NumPy, полные карточки
+    загружаются только для top-``limit``.
+
+    Returns:
+        (карточки с ``distance_km`` по возрастанию расстояния, всего объявлений в радиусе)
+    """
+    start_time = time.time()
+    box = bounding_box(latitude, longitude, radius_km)
+    try:
+        result = await db.execute(
+            select(Property.id, Property.latitude, Property.longitude).where(and_(*_geo_filters(db, box)))
+        )
+        rows = result.all()
+        if not rows:
+            return [], 0
+
+        candidates = np.array(rows, dtype=np.float64)
+        distances = haversine_km(latitude, longitude, candidates[:, 1], candidates[:, 2])
+        nearest, total = nearest_within(distances, radius_km, limit)
+        if not nearest.size:
+            return [], total
+
+        ids = [int(candidates[i, 0]) for i in nearest]
+        distance_by_id = {pid: float(distances[i]) for pid, i in zip(ids, nearest)}
+        result = await db.execute(select(*_GEO_ITEM_COLUMNS).where(Property.id.in_(ids)))
+        items = [dict(row._mapping, distance_km=distance_by_id[row.id]) for row in result.all()]
+        items.sort(key=lambda item: item["distance_km"])
+        return items, total
+    finally:
+        metrics_collector.record_db_query("SELECT", "properties", time.time() - start_time)
+
+
+async def find_nearest_properties(
+    db: AsyncSession,
+    latitude: float,
+    longitude: float,
+    k: int = 20,
+    max_radius_km: float = 50.0,
+    initial_radius_km: float = 1.0,
+) -> List[Dict[str, Any]]:
+    """
+    k ближайших активных объявлений (не дальше ``max_radius_km``).
+
+    Радиус удваивается, пока в круге меньше ``k`` объявлений: в плотном
+    городе хватает первого запроса по нескольким ячейкам.
+    """
+    radius = min(initial_radius_km, max_radius_km)
+    while True:
+        items, total = await find_properties_within_radius(db, latitude, longitude, radius, limit=k)
+        if total >= k or radius >= max_radius_km:
+            return items
+        radius = min(radius * 2, max_radius_km)
+
+
+async def get_heatmap_grid(
+    db: AsyncSession,
+    grid_size: float,
+    south: float,
+    west: float,
+    north: float,
+    east: float,
+) -> List[Dict[str, Any]]:
+    """
+    Агрегаты heatmap по ячейкам сетки, посчитанные в БД.
+
+    ``GROUP BY floor(lat / grid), floor(lon / grid)`` с COUNT и AVG(price)
+    по активным объявлениям внутри границ; ORM-объекты не создаются.
+    Используется для размеров сетки, которых нет в ``mv_geo_heatmap_grid``.
+
+    Returns:
+        Центры ячеек с ``count`` и ``avg_price``, самые плотные первыми
+    """
+    start_time = time.time()
+    # Значение подставляется в текст запроса: иначе выражения в SELECT и
+    # GROUP BY получат разные параметры и Postgres не сочтёт их одинаковыми
+    grid = bindparam("grid_size", grid_size, type_=Float, literal_execute=True)
+    lat_cell = func.floor(Property.latitude / grid).label("lat_cell")
+    lon_cell = func.floor(Property.longitude / grid).label("lon_cell")
+    count = func.count().label("property_count")
+    query = (
+        select(lat_cell, lon_cell, count, func.avg(Property.price).label("avg_price"))
+        .where(
+            Property.is_active == True,  # noqa: E712
+            Property.latitude.between(south, north),
+            Property.longitude.between(west, east),
+        )
+        .group_by(lat_cell, lon_cell)
+        .order_by(desc(count))
+    )
+    try:
+        result = await db.execute(query)
+        return [
+            {
+                "latitude": (row.lat_cell + 0.5) * grid_size,
+                "longitude": (row.lon_cell + 0.5) * grid_size,
+                "count": row.property_count,
+                "avg_price": float(row.avg_price) if row.avg_price else 0.0,
+            }
+            for row in result.all()
+        ]
+    finally:
+        metrics_collector.record_db_query("SELECT", "properties", time.time() - start_time)
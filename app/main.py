@@ -15,8 +15,9 @@ from app.core.cache import cache_manager
 from app.core.config import settings
 from app.core.lifespan import lifespan
 from app.core.monitoring import monitoring_system
-from app.middleware.compression import GZipMiddleware
+from app.middleware.compression import CompressionMiddleware
 from app.middleware.exception_handler import setup_exception_handlers
+from app.middleware.pipeline import HTTPPipelineMiddleware
 from app.middleware.security import (
     CORSMiddlewareConfig,
     HTTPSRedirectMiddleware,
@@ -88,18 +89,20 @@ app = FastAPI(
 
 
 
-# Добавление middleware для correlation IDs (добавляем первым)
-app.add_middleware(CorrelationIDMiddleware)
+# Добавление response compression (zstd/br/gzip, в том числе потоковых экспортов)
+app.add_middleware(CompressionMiddleware, minimum_size=1000, compression_level=6)
 
-# Добавление response compression для больших ответов
-app.add_middleware(GZipMiddleware, minimum_size=1000, compression_level=6)
-
-# Добавление middleware для HTTPS redirects и security headers
-app.add_middleware(HTTPSRedirectMiddleware)
-app.add_middleware(SecurityHeadersMiddleware)
-
-# Добавление middleware для rate limiting по IP
-app.add_middleware(RateLimitMiddleware)
+# Correlation IDs, security headers, HTTPS redirects и rate limiting по IP —
+# один чистый ASGI-слой; стадии от внешней к внутренней
+app.add_middleware(
+    HTTPPipelineMiddleware,
+    stages=[
+        CorrelationIDMiddleware(),
+        SecurityHeadersMiddleware(),
+        HTTPSRedirectMiddleware(),
+        RateLimitMiddleware(),
+    ],
+)
 
 # Добавление middleware для сбора метрик
 app.add_middleware(MetricsMiddleware)
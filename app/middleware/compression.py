@@ -1,27 +1,197 @@
-"""Response compression middleware для оптимизации размера ответов."""
+"""
+Response compression middleware для оптимизации размера ответов.
 
-import gzip
-from typing import Callable, List
+Чистый ASGI (без ``BaseHTTPMiddleware``): тело не собирается целиком, каждый
+чанк сжимается по мере прихода, поэтому ``StreamingResponse`` (экспорт
+CSV/JSONL) тоже уходит сжатым; клиенту данные сбрасываются каждые
+``flush_size`` байт, а построчные потоки (``STREAMING_CONTENT_TYPES``,
+например NDJSON ``/properties/stream``) — после каждого чанка. ``text/event-stream`` и уже сжатые форматы (Parquet,
+архивы, изображения — ``PRECOMPRESSED_CONTENT_TYPES``) не сжимаются.
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response, StreamingResponse
-from starlette.datastructures import MutableHeaders
+Кодировка выбирается по ``Accept-Encoding`` (q-значения учитываются):
+zstd → br → gzip. ``zstandard`` и ``brotli`` — необязательные зависимости;
+без них доступен только gzip. Большие чанки потокового ответа сжимаются в
+потоке, чтобы не блокировать event loop; тело обычного ответа сжимается
+сразу — переход в поток на каждый ответ поиска поднимал p99.
+"""
 
+import asyncio
+import importlib.util
+import zlib
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional, Sequence
 
-class GZipMiddleware(BaseHTTPMiddleware):
-    """Middleware для сжатия ответов с помощью gzip."""
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-    def __init__(self, app, minimum_size: int = 500, compression_level: int = 6):
+BROTLI_AVAILABLE = importlib.util.find_spec("brotli") is not None
+ZSTD_AVAILABLE = importlib.util.find_spec("zstandard") is not None
+
+# Предпочтение сервера при равных q: zstd и br сжимают лучше gzip при той же скорости
+ENCODING_PREFERENCE = ("zstd", "br", "gzip")
+
+# Форматы, уже сжатые внутри (Parquet с zstd, архивы, растровые изображения):
+# повторное сжатие тратит CPU на каждый чанк без выигрыша в размере
+PRECOMPRESSED_CONTENT_TYPES = (
+    "application/vnd.apache.parquet",
+    "application/zip",
+    "application/gzip",
+    "application/x-gzip",
+    "application/zstd",
+    "image/",
+)
+
+# Потоки, которые клиент разбирает по мере прихода: каждый чанк (пакет NDJSON)
+# сбрасывается сразу, иначе он ждёт в буфере компрессора до конца ответа
+STREAMING_CONTENT_TYPES = (
+    "application/x-ndjson",
+    "application/jsonl",
+    "application/stream+json",
+    "application/json-seq",
+)
+
+
+class Compressor(ABC):
+    """Потоковый компрессор одного ответа."""
+
+    @abstractmethod
+    def compress(self, data: bytes, flush: bool = True) -> bytes:
+        """Сжать чанк; ``flush`` — выдать всё накопленное, чтобы клиент мог его разобрать."""
+
+    @abstractmethod
+    def finish(self) -> bytes:
+        """Завершить поток."""
+
+
+class GZipCompressor(Compressor):
+    def __init__(self, level: int):
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, flush: bool = True) -> bytes:
+        out = self._obj.compress(data)
+        return out + self._obj.flush(zlib.Z_SYNC_FLUSH) if flush else out
+
+    def finish(self) -> bytes:
+        return self._obj.flush(zlib.Z_FINISH)
+
+
+class BrotliCompressor(Compressor):
+    def __init__(self, quality: int):
+        import brotli
+
+        self._obj = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes, flush: bool = True) -> bytes:
+        out = self._obj.process(data)
+        return out + self._obj.flush() if flush else out
+
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+
+class ZstdCompressor(Compressor):
+    def __init__(self, level: int):
+        import zstandard
+
+        self._flush_block = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes, flush: bool = True) -> bytes:
+        out = self._obj.compress(data)
+        return out + self._obj.flush(self._flush_block) if flush else out
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+def available_encodings() -> List[str]:
+    """Кодировки, которые можно отдать в этом окружении (по убыванию предпочтения)."""
+    available = {"gzip": True, "br": BROTLI_AVAILABLE, "zstd": ZSTD_AVAILABLE}
+    return [name for name in ENCODING_PREFERENCE if available[name]]
+
+
+def negotiate_encoding(accept_encoding: str, supported: Sequence[str]) -> Optional[str]:
+    """
+    Выбор кодировки по ``Accept-Encoding``.
+
+    Args:
+        accept_encoding: Значение заголовка
+        supported: Кодировки сервера по убыванию предпочтения
+
+    Returns:
+        Кодировка с наибольшим q (при равных — по порядку ``supported``) или None
+    """
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip()] = q
+
+    best: Optional[str] = None
+    best_q = 0.0
+    for name in supported:
+        q = weights.get(name, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def is_precompressed(content_type: str) -> bool:
+    """Тип ответа уже сжат (``image/svg+xml`` — текст и сжимается)."""
+    media_type = content_type.partition(";")[0].strip().lower()
+    if media_type == "image/svg+xml":
+        return False
+    return media_type.startswith(PRECOMPRESSED_CONTENT_TYPES)
+
+
+def is_streaming(content_type: str) -> bool:
+    """Тип ответа разбирается клиентом по мере прихода чанков."""
+    return content_type.partition(";")[0].strip().lower() in STREAMING_CONTENT_TYPES
+
+
+class CompressionMiddleware:
+    """Потоковое сжатие ответов (zstd/br/gzip)."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 500,
+        compression_level: int = 6,
+        brotli_quality: int = 4,
+        zstd_level: int = 3,
+        thread_threshold: int = 256 * 1024,
+        flush_size: int = 16 * 1024,
+        encodings: Optional[Sequence[str]] = None,
+    ):
         """
         Args:
             app: ASGI приложение
             minimum_size: Минимальный размер ответа для сжатия (байты)
             compression_level: Уровень сжатия gzip (1-9, где 9 - максимальное сжатие)
+            brotli_quality: Качество brotli (0-11)
+            zstd_level: Уровень zstd (1-22)
+            thread_threshold: Чанки потокового ответа от N байт сжимаются в потоке, а не в event loop
+            flush_size: Потоковый ответ сбрасывается клиенту после каждых N несжатых байт
+                (``STREAMING_CONTENT_TYPES`` — после каждого чанка)
+            encodings: Разрешённые кодировки по убыванию предпочтения (по умолчанию все доступные)
         """
-        super().__init__(app)
+        self.app = app
         self.minimum_size = minimum_size
         self.compression_level = compression_level
+        self.brotli_quality = brotli_quality
+        self.zstd_level = zstd_level
+        self.thread_threshold = thread_threshold
+        self.flush_size = flush_size
+        supported = available_encodings()
+        self.encodings = [name for name in (encodings or supported) if name in supported]
         self._excluded_paths: List[str] = [
             "/docs",
             "/redoc",
@@ -29,54 +199,106 @@ class GZipMiddleware(BaseHTTPMiddleware):
             "/favicon.ico",
         ]
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        """Обработка запроса с возможным сжатием ответа."""
-        # Проверяем, поддерживает ли клиент gzip
-        accept_encoding = request.headers.get("accept-encoding", "")
-        if "gzip" not in accept_encoding.lower():
-            return await call_next(request)
+    def _compressor(self, encoding: str) -> Compressor:
+        if encoding == "zstd":
+            return ZstdCompressor(self.zstd_level)
+        if encoding == "br":
+            return BrotliCompressor(self.brotli_quality)
+        return GZipCompressor(self.compression_level)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
         # Не сжимаем excluded paths
-        if any(request.url.path.startswith(path) for path in self._excluded_paths):
-            return await call_next(request)
-
-        # Получаем ответ
-        response = await call_next(request)
-
-        # Не сжимаем уже сжатые ответы
-        if response.headers.get("content-encoding"):
-            return response
-
-        # Не сжимаем streaming responses
-        if isinstance(response, StreamingResponse):
-            return response
-
-        # Получаем тело ответа
-        body = b""
-        async for chunk in response.body_iterator:
-            body += chunk
-
-        # Проверяем размер
-        if len(body) < self.minimum_size:
-            return Response(
-                content=body,
-                status_code=response.status_code,
-                headers=dict(response.headers),
-                media_type=response.media_type,
-            )
-
-        # Сжимаем
-        compressed_body = gzip.compress(body, compresslevel=self.compression_level)
-
-        # Создаем новый ответ с сжатым телом
-        headers = MutableHeaders(response.headers)
-        headers["content-encoding"] = "gzip"
-        headers["content-length"] = str(len(compressed_body))
-        headers.append("vary", "Accept-Encoding")
-
-        return Response(
-            content=compressed_body,
-            status_code=response.status_code,
-            headers=dict(headers),
-            media_type=response.media_type,
-        )
+        path = scope.get("path", "")
+        if any(path.startswith(excluded) for excluded in self._excluded_paths):
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """Состояние сжатия одного ответа."""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self.start_message: Optional[Message] = None
+        self.compressor: Optional[Compressor] = None
+        self.passthrough = False
+        self.flush_every_chunk = False
+        self.pending = 0
+
+    async def _run(self, func: Callable[..., bytes], data: bytes, *args: Any) -> bytes:
+        if len(data) >= self.middleware.thread_threshold:
+            return await asyncio.to_thread(func, data, *args)
+        return func(data, *args)
+
+    async def send(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            # Заголовки отправляются вместе с первым чанком тела
+            self.start_message = message
+            return
+        if message_type != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            headers = Headers(raw=self.start_message["headers"])
+            # Не сжимаем уже сжатые ответы и форматы, SSE и маленькие ответы целиком
+            content_type = headers.get("content-type", "")
+            if (
+                headers.get("content-encoding")
+                or content_type.startswith("text/event-stream")
+                or is_precompressed(content_type)
+                or (not more_body and len(body) < self.middleware.minimum_size)
+            ):
+                self.passthrough = True
+                await self._send(self.start_message)
+                await self._send(message)
+                return
+
+            self.compressor = self.middleware._compressor(self.encoding)
+            self.flush_every_chunk = is_streaming(content_type)
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            headers["content-encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                # Потоковый ответ: длина заранее неизвестна
+                del headers["content-length"]
+            else:
+                compressed = self.compressor.compress(body, False) + self.compressor.finish()
+                headers["content-length"] = str(len(compressed))
+                await self._send(self.start_message)
+                await self._send({"type": "http.response.body", "body": compressed})
+                return
+            await self._send(self.start_message)
+
+        # Сброс не на каждый мелкий чанк: sync flush на строках CSV съедает степень сжатия
+        self.pending += len(body)
+        flush = self.flush_every_chunk or self.pending >= self.middleware.flush_size
+        if flush:
+            self.pending = 0
+        chunk = await self._run(self.compressor.compress, body, flush) if body else b""
+        if not more_body:
+            chunk += self.compressor.finish()
+        if chunk or not more_body:
+            await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+
+# Имя сохранено для обратной совместимости: middleware больше не только gzip
+GZipMiddleware = CompressionMiddleware
@@ -0,0 +1,129 @@
+"""
+Конвейер HTTP-middleware на чистом ASGI.
+
+``BaseHTTPMiddleware`` на каждый запрос и каждый слой создаёт задачу и
+memory stream для тела ответа, а ``StreamingResponse`` через него теряет
+backpressure. Здесь middleware — стадии ``PipelineStage`` с хуками:
+
+- ``on_request`` — до приложения; может вернуть готовый ответ (редирект, 429),
+  тогда приложение не вызывается;
+- ``on_response_start`` — правка заголовков ответа в сообщении
+  ``http.response.start``, тело идёт к клиенту без копирования;
+- ``on_complete`` — после отправки ответа или ошибки (логи, очистка контекста).
+
+Каждая стадия сама по себе ASGI middleware (``app.add_middleware(Stage)``),
+а ``HTTPPipelineMiddleware`` выполняет несколько стадий за один слой: одна
+обёртка ``send`` на запрос вместо цепочки вложенных.
+"""
+
+import time
+from typing import Any, Dict, Optional, Sequence
+
+from starlette.datastructures import MutableHeaders
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class PipelineStage:
+    """Стадия HTTP-конвейера."""
+
+    def __init__(self, app: Optional[ASGIApp] = None):
+        """
+        Args:
+            app: ASGI приложение (None — стадия используется внутри ``HTTPPipelineMiddleware``)
+        """
+        self.app = app
+
+    async def on_request(self, scope: Scope, state: Dict[str, Any]) -> Optional[Response]:
+        """Обработка запроса до приложения; ответ прерывает конвейер."""
+        return None
+
+    def on_response_start(self, scope: Scope, state: Dict[str, Any], status: int, headers: MutableHeaders) -> None:
+        """Правка заголовков ответа."""
+
+    def on_complete(
+        self,
+        scope: Scope,
+        state: Dict[str, Any],
+        status: Optional[int],
+        error: Optional[BaseException],
+        duration: float,
+    ) -> None:
+        """Завершение запроса (``status`` — None, если ответ не начат)."""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await run_pipeline((self,), self.app, scope, receive, send)
+
+
+async def run_pipeline(
+    stages: Sequence[PipelineStage],
+    app: ASGIApp,
+    scope: Scope,
+    receive: Receive,
+    send: Send,
+) -> None:
+    """
+    Выполнить стадии вокруг приложения.
+
+    Стадии идут по порядку, как вложенные middleware от внешней к внутренней:
+    ``on_request`` — в прямом порядке, ``on_response_start`` и ``on_complete`` —
+    в обратном, и только для стадий, до которых дошёл запрос.
+    """
+    if scope["type"] != "http":
+        await app(scope, receive, send)
+        return
+
+    state: Dict[str, Any] = {}
+    entered: list = []
+    status: Optional[int] = None
+    error: Optional[BaseException] = None
+    started = time.perf_counter()
+
+    async def send_wrapper(message: Message) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            message["headers"] = list(message.get("headers", ()))
+            headers = MutableHeaders(raw=message["headers"])
+            for stage in reversed(entered):
+                stage.on_response_start(scope, state, status, headers)
+        await send(message)
+
+    try:
+        for stage in stages:
+            entered.append(stage)
+            response = await stage.on_request(scope, state)
+            if response is not None:
+                await response(scope, receive, send_wrapper)
+                return
+        await app(scope, receive, send_wrapper)
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        duration = time.perf_counter() - started
+        for stage in reversed(entered):
+            stage.on_complete(scope, state, status, error, duration)
+
+
+class HTTPPipelineMiddleware:
+    """Несколько стадий ``PipelineStage`` одним ASGI-слоем."""
+
+    def __init__(self, app: ASGIApp, stages: Sequence[PipelineStage]):
+        """
+        Args:
+            app: ASGI приложение
+            stages: Стадии от внешней к внутренней
+        """
+        self.app = app
+        self.stages = tuple(stages)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await run_pipeline(self.stages, self.app, scope, receive, send)
+
+
+__all__ = [
+    "HTTPPipelineMiddleware",
+    "PipelineStage",
+    "run_pipeline",
+]
@@ -2,16 +2,19 @@
 Middleware для HTTPS redirects и security headers.
 """
 
-from fastapi import Request, Response
+from typing import Any, Dict, Optional
+
 from fastapi.responses import RedirectResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-from typing import Callable, Awaitable
+from starlette.datastructures import URL, Headers, MutableHeaders
+from starlette.responses import Response
+from starlette.types import Scope
 
 from app.core.config import settings
+from app.middleware.pipeline import PipelineStage
 from app.utils.logger import logger
 
 
-class HTTPSRedirectMiddleware(BaseHTTPMiddleware):
+class HTTPSRedirectMiddleware(PipelineStage):
     """
     Middleware для перенаправления HTTP на HTTPS.
     
@@ -21,35 +24,75 @@ class HTTPSRedirectMiddleware(BaseHTTPMiddleware):
     - Запрос уже не HTTPS
     """
 
-    async def dispatch(
-        self,
-        request: Request,
-        call_next: Callable[[Request], Awaitable[Response]]
-    ) -> Response:
+    async def on_request(self, scope: Scope, state: Dict[str, Any]) -> Optional[Response]:
+        if not settings.HTTPS_ENABLED:
+            return None
+
         # Пропускаем localhost в development режиме
-        host = request.headers.get("host", "")
+        headers = Headers(scope=scope)
+        host = headers.get("host", "")
         is_localhost = host.startswith("localhost") or host.startswith("127.0.0.1")
         
         # Проверяем схему
-        scheme = request.headers.get("x-forwarded-proto", request.url.scheme)
+        scheme = headers.get("x-forwarded-proto", scope.get("scheme", "http"))
         is_https = scheme == "https"
         
-        # Если HTTPS не включён или это localhost или уже HTTPS - пропускаем
-        if not settings.HTTPS_ENABLED or is_localhost or is_https:
-            return await call_next(request)
+        # Если это localhost или уже HTTPS - пропускаем
+        if is_localhost or is_https:
+            return None
         
         # Перенаправляем на HTTPS
-        https_url = str(request.url).replace("http://", "https://", 1)
+        https_url = str(URL(scope=scope)).replace("http://", "https://", 1)
         logger.info(f"Redirecting HTTP to HTTPS: {https_url}")
         
         return RedirectResponse(
             url=https_url,
             status_code=301,  # Permanent redirect
-            headers=request.headers
         )
 
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
+# Заголовки, одинаковые для всех ответов
+_SECURITY_HEADERS = {
+    # Запрет MIME sniffing
+    "X-Content-Type-Options": "nosniff",
+    # Защита от clickjacking
+    "X-Frame-Options": "DENY",
+    # XSS protection (для старых браузеров)
+    "X-XSS-Protection": "1; mode=block",
+    # Content Security Policy
+    "Content-Security-Policy": (
+        "default-src 'self'; "
+        "script-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net; "
+        "style-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net; "
+        "img-src 'self' data: https:; "
+        "font-src 'self' data: https://cdn.jsdelivr.net; "
+        "connect-src 'self' https:; "
+        "frame-ancestors 'none';"
+    ),
+    # Referrer Policy
+    "Referrer-Policy": "strict-origin-when-cross-origin",
+    # Permissions Policy (бывший Feature-Policy)
+    "Permissions-Policy": (
+        "accelerometer=(), "
+        "camera=(), "
+        "geolocation=(), "
+        "gyroscope=(), "
+        "magnetometer=(), "
+        "microphone=(), "
+        "payment=(), "
+        "usb=()"
+    ),
+}
+
+# Cache-Control для чувствительных данных
+_NO_STORE_HEADERS = {
+    "Cache-Control": "no-store, no-cache, must-revalidate, proxy-revalidate",
+    "Pragma": "no-cache",
+    "Expires": "0",
+}
+
+
+class SecurityHeadersMiddleware(PipelineStage):
     """
     Middleware для добавления security headers.
     
@@ -62,63 +105,17 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
     - Referrer-Policy
     """
 
-    async def dispatch(
-        self,
-        request: Request,
-        call_next: Callable[[Request], Awaitable[Response]]
-    ) -> Response:
-        response = await call_next(request)
-        
+    def on_response_start(self, scope: Scope, state: Dict[str, Any], status: int, headers: MutableHeaders) -> None:
         # HSTS (только для HTTPS или когда включён)
-        if settings.HSTS_ENABLED and (settings.HTTPS_ENABLED or request.url.scheme == "https"):
-            response.headers["Strict-Transport-Security"] = (
-                "max-age=31536000; includeSubDomains; preload"
-            )
-        
-        # Запрет MIME sniffing
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        
-        # Защита от clickjacking
-        response.headers["X-Frame-Options"] = "DENY"
-        
-        # XSS protection (для старых браузеров)
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        
-        # Content Security Policy
-        response.headers["Content-Security-Policy"] = (
-            "default-src 'self'; "
-            "script-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net; "
-            "style-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net; "
-            "img-src 'self' data: https:; "
-            "font-src 'self' data: https://cdn.jsdelivr.net; "
-            "connect-src 'self' https:; "
-            "frame-ancestors 'none';"
-        )
-        
-        # Referrer Policy
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        
-        # Permissions Policy (бывший Feature-Policy)
-        response.headers["Permissions-Policy"] = (
-            "accelerometer=(), "
-            "camera=(), "
-            "geolocation=(), "
-            "gyroscope=(), "
-            "magnetometer=(), "
-            "microphone=(), "
-            "payment=(), "
-            "usb=()"
-        )
-        
-        # Cache-Control для чувствительных данных
-        if request.url.path.startswith("/api/auth"):
-            response.headers["Cache-Control"] = (
-                "no-store, no-cache, must-revalidate, proxy-revalidate"
-            )
-            response.headers["Pragma"] = "no-cache"
-            response.headers["Expires"] = "0"
-        
-        return response
+        if settings.HSTS_ENABLED and (settings.HTTPS_ENABLED or scope.get("scheme") == "https"):
+            headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains; preload"
+
+        for name, value in _SECURITY_HEADERS.items():
+            headers[name] = value
+
+        if scope["path"].startswith("/api/auth"):
+            for name, value in _NO_STORE_HEADERS.items():
+                headers[name] = value
 
 
 class CORSMiddlewareConfig:
@@ -170,6 +167,7 @@ class CORSMiddlewareConfig:
                 "X-RateLimit-Limit",
                 "X-RateLimit-Remaining",
                 "X-RateLimit-Reset",
+                "X-Next-Cursor",
             ],
             "max_age": 600,  # 10 минут
         }
@@ -121,5 +121,8 @@ class PaginatedProperties(BaseModel):
     pages: int = Field(..., description="Общее количество страниц")
     has_next: bool = Field(..., description="Есть ли следующая страница")
     has_prev: bool = Field(..., description="Есть ли предыдущая страница")
+    next_cursor: Optional[str] = Field(
+        None, description="Курсор следующей страницы (передаётся в параметре cursor)"
+    )
 
     model_config = ConfigDict(from_attributes=True)
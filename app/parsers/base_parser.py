@@ -2,9 +2,16 @@ from abc import ABC, abstractmethod
 
 import functools
 import time
-from typing import Any, Dict, List, Optional, Type
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Type
 
 from app.models.schemas import PropertyCreate
+from app.parsers.extraction import ListingSpec, as_element
+from app.parsers.paginator import Paginator
+from app.parsers.parse_executor import build_properties, parse_executor
+from app.parsers.patterns import extract_area, extract_rooms
+from app.parsers.transport import ParserTransport, parser_transport
+from app.utils.circuit_breaker import get_circuit_breaker
+from app.utils.ratelimiter import rate_limiter
 from app.utils.metrics import metrics_collector
 from app.utils.parser_errors import ErrorClassifier
 from app.schemas.parser_params import ParserParams, BaseParserParams
@@ -16,8 +23,22 @@ class BaseParser(ABC):
     # Класс схемы параметров для переопределения в подклассах
     params_schema: Type[BaseParserParams] = ParserParams
 
-    def __init__(self):
+    # Спецификация страницы выдачи для парсеров HTML (см. ``app.parsers.extraction``)
+    listing_spec: Optional[ListingSpec] = None
+
+    # Параметр запроса с номером страницы выдачи; None — запрашивается только первая
+    page_param: Optional[str] = None
+
+    # Ключ ведра ``rate_limiter`` источника; статусы ответов уходят в его AdaptiveRateLimiter
+    rate_limit_key: Optional[str] = None
+
+    def __init__(self, transport: Optional[ParserTransport] = None):
+        """
+        Args:
+            transport: HTTP-транспорт (по умолчанию общий ``parser_transport``)
+        """
         self.name = self.__class__.__name__
+        self.transport = transport or parser_transport
 
     @abstractmethod
     async def parse(self, location: str, params: Optional[Dict[str, Any]] = None) -> List[PropertyCreate]:
@@ -33,6 +54,129 @@ class BaseParser(ABC):
         """
         pass
 
+    def _extract_listings(self, html: str, *args: Any) -> List[Dict[str, Any]]:
+        """
+        Синхронный разбор страницы выдачи в словари полей ``PropertyCreate``.
+
+        Выполняется в пуле ``parse_executor`` (в процессе пула — у экземпляра,
+        созданного конструктором по умолчанию). По умолчанию страница
+        разбирается по ``listing_spec``.
+        """
+        if self.listing_spec is None:
+            raise NotImplementedError(f"{self.name} does not parse HTML pages")
+        return self.listing_spec.extract(html)
+
+    def _parse_html(self, html: str, *args: Any) -> List[PropertyCreate]:
+        """Разбор страницы прямо в вызывающем потоке."""
+        return build_properties(self._extract_listings(html, *args), self.name)
+
+    async def parse_html(self, html: str, *args: Any) -> List[PropertyCreate]:
+        """
+        Разбор страницы вне event loop.
+
+        Args:
+            html: HTML страницы выдачи
+            *args: Дополнительные аргументы ``_extract_listings``
+
+        Returns:
+            Список PropertyCreate
+        """
+        return await parse_executor.parse(self, html, *args)
+
+    def _extract_rooms_from_title(self, title: str) -> Optional[int]:
+        """Количество комнат из заголовка ("2-к квартира")."""
+        return extract_rooms(title)
+
+    def _extract_area_from_title(self, title: str) -> Optional[float]:
+        """Площадь из заголовка ("45 м²", "50 кв. м")."""
+        return extract_area(title)
+
+    def _extract_external_id(self, link: str) -> str:
+        """ID объявления из ссылки по шаблонам ``listing_spec``."""
+        return self.listing_spec.external_id(link) if self.listing_spec else ""
+
+    def _extract_location(self, item: Any) -> Optional[Dict[str, str]]:
+        """Район и адрес карточки (элемент lxml или BeautifulSoup)."""
+        return self.listing_spec.extract_card(as_element(item), partial=True)["location"]
+
+    def _extract_description(self, item: Any) -> Optional[str]:
+        """Описание карточки (элемент lxml или BeautifulSoup)."""
+        return self.listing_spec.extract_card(as_element(item), partial=True)["description"]
+
+    async def paginator(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        max_pages: Optional[int] = None,
+        rate_limit: Optional[Callable[[], Awaitable[Any]]] = None,
+    ) -> Paginator:
+        """
+        ``Paginator`` страниц выдачи: конкурентно, каждая страница — под
+        ``rate_limit`` и circuit breaker страниц источника.
+
+        Первая страница запрашивается с ``params`` как есть, следующие — с
+        номером в ``page_param``. ``async for`` по результату отдаёт
+        объявления по мере прихода страниц; ошибка первой страницы (в том
+        числе ``httpx.HTTPStatusError``) пробрасывается.
+
+        Args:
+            url: URL выдачи
+            params: Параметры запроса
+            max_pages: Глубина выдачи (по умолчанию ``PARSER_MAX_PAGES``)
+            rate_limit: Ожидание rate limiter источника перед каждой страницей
+
+        Returns:
+            Paginator, ещё не запрашивавший страниц
+        """
+        async def fetch_page(page: int) -> List[PropertyCreate]:
+            query = dict(params or {})
+            if page > 1:
+                query[self.page_param] = str(page)
+            if query:
+                response = await self.transport.get(url, params=query)
+            else:
+                response = await self.transport.get(url)
+            if self.rate_limit_key:
+                # 429/403/503 замедляют общее ведро источника
+                await rate_limiter.record_response(self.rate_limit_key, response.status_code)
+            response.raise_for_status()
+            return await self.parse_html(response.text)
+
+        return Paginator(
+            fetch_page,
+            name=self.name,
+            max_pages=max_pages if self.page_param else 1,
+            rate_limit=rate_limit,
+            # Отдельный от ParserCircuitBreaker (весь парсинг) breaker отдельных страниц
+            circuit_breaker=await get_circuit_breaker(f"{self.name}.pages"),
+        )
+
+    async def stream_pages(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        max_pages: Optional[int] = None,
+        rate_limit: Optional[Callable[[], Awaitable[Any]]] = None,
+    ) -> AsyncIterator[PropertyCreate]:
+        """Объявления страниц выдачи по мере прихода страниц (аргументы — как у ``paginator``)."""
+        async for item in await self.paginator(url, params, max_pages, rate_limit):
+            yield item
+
+    async def fetch_pages(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        max_pages: Optional[int] = None,
+        rate_limit: Optional[Callable[[], Awaitable[Any]]] = None,
+    ) -> List[PropertyCreate]:
+        """
+        Все объявления страниц выдачи в порядке номеров страниц (см. ``paginator``).
+
+        Returns:
+            Объявления всех страниц без повторов
+        """
+        return await (await self.paginator(url, params, max_pages, rate_limit)).collect()
+
     async def validate_params(self, params: Dict[str, Any]) -> bool:
         """
         Валидация параметров с использованием Pydantic схемы.
@@ -12,16 +12,40 @@ URL: https://www.cian.ru/kommercheskaya-nedvizhimost/
 """
 
 import asyncio
+import json
 from typing import Any, Dict, List, Optional
 from datetime import datetime
 
 import httpx
-from bs4 import BeautifulSoup
+from lxml import etree
+from lxml import html as lxml_html
 
 from app.models.schemas import PropertyCreate
+from app.parsers.extraction import FieldSpec, ListingSpec
 from app.parsers.optimized_base_parser import OptimizedBaseParser, ParserConfig
+from app.parsers.transport import ParserTransport
 from app.utils.logger import logger
-from app.utils.enhanced_http import EnhancedHTTPClient
+
+_JSON_LD_XPATH = etree.XPath("//script[@type='application/ld+json']/text()")
+
+# Резервный разбор HTML, когда на странице нет JSON-LD
+CIAN_COMMERCIAL_LISTING_SPEC = ListingSpec(
+    source="cian_commercial",
+    base_url="https://www.cian.ru",
+    card=("div[data-name='ListingItem']", "div._9344497d00"),
+    fields={
+        "title": FieldSpec(("a._9344497d00", "a[href]")),
+        "link": FieldSpec(("a._9344497d00", "a[href]"), attr="href"),
+        "price": FieldSpec("div._9344497d01"),
+        # Строка вида "100 м² • 1 этаж из 5"
+        "area": FieldSpec("div._9344497d02"),
+        "floor": FieldSpec("div._9344497d02"),
+        "photos": FieldSpec("img", attr=("src", "data-src"), many=True, limit=1),
+    },
+    required=("title",),
+    # ID в slug ссылки, иначе сама ссылка
+    id_patterns=(r"-(\d+)/", r"^(.+)$"),
+)
 
 
 class CianCommercialParser(OptimizedBaseParser):
@@ -34,7 +58,7 @@ class CianCommercialParser(OptimizedBaseParser):
     - Обход базовой защиты через ротацию User-Agent
     """
 
-    def __init__(self):
+    def __init__(self, transport: Optional[ParserTransport] = None):
         super().__init__(ParserConfig(
             name="CianCommercialParser",
             base_url="https://www.cian.ru",
@@ -49,7 +73,7 @@ class CianCommercialParser(OptimizedBaseParser):
                 "Connection": "keep-alive",
                 "Upgrade-Insecure-Requests": "1",
             }
-        ))
+        ), transport)
 
     async def _parse_impl(self, location: str, params: Dict[str, Any]) -> List[PropertyCreate]:
         """
@@ -68,50 +92,30 @@ class CianCommercialParser(OptimizedBaseParser):
         property_type = params.get('property_type', 'office')
         category_url = self._get_category_url(property_type, location)
         
+        # Пагинация: max_pages можно передать в params (максимум 3 страницы)
+        max_pages = min(params.get('max_pages', 2), 3)
+        
         try:
-            async with EnhancedHTTPClient(
-                timeout=self.config.timeout,
-                headers=self.config.headers
+            async with self.transport.session(
+                headers=self.config.headers,
+                timeout=self.config.timeout
             ) as client:
-                # Получаем первую страницу
-                response = await client.get(category_url)
-                
-                if response.status_code != 200:
-                    logger.warning(f"Cian Commercial parser: non-200 status {response.status_code}")
-                    # Cian может возвращать 403 при блокировке
-                    if response.status_code == 403:
-                        logger.error("Cian Commercial: possible bot detection (403)")
-                    return results
+                async def fetch_page(page: int) -> List[PropertyCreate]:
+                    response = await client.get(category_url, params={"p": page} if page > 1 else None)
+                    if response.status_code != 200:
+                        logger.warning(
+                            f"Cian Commercial parser: non-200 status {response.status_code} on page {page}"
+                        )
+                        # Cian может возвращать 403 при блокировке
+                        if response.status_code == 403:
+                            logger.error("Cian Commercial: possible bot detection (403)")
+                        return []
+                    # Разбираем HTML вне event loop
+                    # Cian использует динамическую загрузку, парсим initial data
+                    return await self.parse_html(response.text, location)
                 
-                # Парсим HTML
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # Находим все объявления на странице
-                # Cian использует динамическую загрузку, парсим initial data
-                listings = self._parse_listings_from_script(soup, location)
-                
-                if listings:
-                    results.extend(listings)
-                
-                # Пагинация (опционально)
-                max_pages = params.get('max_pages', 2)
-                for page in range(2, min(max_pages + 1, 4)):  # Максимум 3 страницы
-                    next_url = f"{category_url}&p={page}"
-                    try:
-                        response = await client.get(next_url)
-                        if response.status_code != 200:
-                            break
-                        
-                        soup = BeautifulSoup(response.text, 'html.parser')
-                        page_listings = self._parse_listings_from_script(soup, location)
-                        
-                        if page_listings:
-                            results.extend(page_listings)
-                        else:
-                            break
-                    except Exception as e:
-                        logger.error(f"Error on page {page}: {e}")
-                        break
+                paginator = await self.paginate(fetch_page, max_pages=max_pages)
+                results = await paginator.collect()
                 
         except Exception as e:
             logger.error(f"Cian Commercial parser error: {e}")
@@ -158,7 +162,22 @@ class CianCommercialParser(OptimizedBaseParser):
         # Добавляем параметры (можно расширить)
         return base_url
 
-    def _parse_listings_from_script(self, soup: BeautifulSoup, location: str) -> List[PropertyCreate]:
+    def _extract_listings(self, html: str, location: str) -> List[Dict[str, Any]]:
+        """
+        Разбор страницы выдачи (выполняется в пуле ``parse_executor``).
+        
+        Args:
+            html: HTML страницы
+            location: Город
+            
+        Returns:
+            Словари полей PropertyCreate
+        """
+        if not html or not html.strip():
+            return []
+        return self._parse_listings_from_script(lxml_html.document_fromstring(html), location)
+
+    def _parse_listings_from_script(self, root: Any, location: str) -> List[Dict[str, Any]]:
         """
         Парсинг объявлений из JSON-LD или script данных Cian.
         
@@ -166,21 +185,18 @@ class CianCommercialParser(OptimizedBaseParser):
         поэтому данные могут быть в script тегах.
         
         Args:
-            soup: BeautifulSoup объект
+            root: Дерево lxml страницы
             location: Город
             
         Returns:
-            Список PropertyCreate
+            Словари полей PropertyCreate
         """
         results = []
         
         # Пробуем найти JSON-LD данные
-        script_tags = soup.find_all('script', type='application/ld+json')
-        
-        for script in script_tags:
+        for script in _JSON_LD_XPATH(root):
             try:
-                import json
-                data = json.loads(script.string)
+                data = json.loads(script)
                 
                 # Обработка различных форматов
                 if isinstance(data, list):
@@ -204,11 +220,13 @@ class CianCommercialParser(OptimizedBaseParser):
         
         # Если не нашли в JSON-LD, пробуем обычный HTML парсинг
         if not results:
-            results = self._parse_listings_html(soup, location)
+            results = CIAN_COMMERCIAL_LISTING_SPEC.extract_tree(
+                root, city=location, is_active=True, is_verified=False
+            )
         
         return results
 
-    def _parse_json_ld_item(self, item: dict, location: str) -> Optional[PropertyCreate]:
+    def _parse_json_ld_item(self, item: dict, location: str) -> Optional[Dict[str, Any]]:
         """
         Парсинг элемента JSON-LD.
         
@@ -217,7 +235,7 @@ class CianCommercialParser(OptimizedBaseParser):
             location: Город
             
         Returns:
-            PropertyCreate или None
+            Поля PropertyCreate или None
         """
         try:
             # Проверяем тип
@@ -284,138 +302,30 @@ class CianCommercialParser(OptimizedBaseParser):
                                 except (ValueError, TypeError):
                                     pass
             
-            return PropertyCreate(
-                source="cian_commercial",
-                external_id=self._extract_external_id(url),
-                title=title,
-                description=description,
-                link=url,
-                price=price,
-                rooms=rooms,
-                area=area,
-                city=location,
-                address=address,
-                photos=photos,
-                is_active=True,
-                is_verified=False,
-            )
+            return {
+                "source": "cian_commercial",
+                "external_id": self._extract_external_id(url),
+                "title": title,
+                "description": description,
+                "link": url,
+                "price": price,
+                "rooms": rooms,
+                "area": area,
+                "city": location,
+                "address": address,
+                "photos": photos,
+                "is_active": True,
+                "is_verified": False,
+            }
             
         except Exception as e:
             logger.debug(f"Error parsing JSON-LD item: {e}")
             return None
 
-    def _parse_listings_html(self, soup: BeautifulSoup, location: str) -> List[PropertyCreate]:
-        """
-        Резервный метод парсинга через HTML.
-        
-        Args:
-            soup: BeautifulSoup объект
-            location: Город
-            
-        Returns:
-            Список PropertyCreate
-        """
-        results = []
-        
-        # Ищем карточки объявлений
-        # Cian использует различные классы, пробуем несколько вариантов
-        listing_containers = soup.find_all('div', {'data-name': 'ListingItem'})
-        
-        if not listing_containers:
-            listing_containers = soup.find_all('div', class_='_9344497d00')
-        
-        for listing in listing_containers:
-            try:
-                property_data = self._parse_html_listing(listing, location)
-                if property_data:
-                    results.append(property_data)
-            except Exception as e:
-                logger.debug(f"Error parsing HTML listing: {e}")
-                continue
-        
-        return results
-
-    def _parse_html_listing(self, listing, location: str) -> Optional[PropertyCreate]:
-        """
-        Парсинг отдельного объявления из HTML.
-        
-        Args:
-            listing: BeautifulSoup элемент
-            location: Город
-            
-        Returns:
-            PropertyCreate или None
-        """
-        try:
-            # Заголовок
-            title_elem = listing.find('a', class_='_9344497d00')
-            if not title_elem:
-                title_elem = listing.find('a', href=True)
-            
-            if not title_elem:
-                return None
-            
-            title = title_elem.get_text(strip=True)
-            link = title_elem.get('href', '')
-            if link and not link.startswith('http'):
-                link = f"{self.config.base_url}{link}"
-            
-            # Цена
-            price_elem = listing.find('div', class_='_9344497d01')
-            price = 0
-            if price_elem:
-                price_text = price_elem.get_text(strip=True)
-                price_str = ''.join(filter(str.isdigit, price_text))
-                if price_str:
-                    price = int(price_str)
-            
-            # Площадь и параметры
-            params_elem = listing.find('div', class_='_9344497d02')
-            area = None
-            rooms = None
-            
-            if params_elem:
-                params_text = params_elem.get_text(strip=True)
-                # Парсинг строки вида "100 м² • 1 этаж из 5"
-                import re
-                area_match = re.search(r'(\d+(?:\.\d+)?)\s*м²', params_text)
-                if area_match:
-                    area = float(area_match.group(1))
-            
-            # Фото
-            photos = []
-            img_elem = listing.find('img')
-            if img_elem:
-                img_src = img_elem.get('src') or img_elem.get('data-src')
-                if img_src:
-                    photos.append(img_src if img_src.startswith('http') else f"https:{img_src}")
-            
-            return PropertyCreate(
-                source="cian_commercial",
-                external_id=self._extract_external_id(link),
-                title=title,
-                description=None,
-                link=link,
-                price=price,
-                rooms=rooms,
-                area=area,
-                city=location,
-                address=None,
-                photos=photos,
-                is_active=True,
-                is_verified=False,
-            )
-            
-        except Exception as e:
-            logger.debug(f"Error parsing HTML listing element: {e}")
-            return None
-
     def _extract_external_id(self, url: str) -> str:
         """Извлекает ID объявления из URL."""
         # Пример URL: https://www.cian.ru/snyat-kommercheskoe-pomeschenie-12345678/
-        import re
-        match = re.search(r'-(\d+)/', url)
-        return match.group(1) if match else url
+        return CIAN_COMMERCIAL_LISTING_SPEC.external_id(url)
 
 
 # Фабричная функция
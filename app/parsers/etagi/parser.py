@@ -17,9 +17,30 @@ import httpx
 from bs4 import BeautifulSoup
 
 from app.models.schemas import PropertyCreate
+from app.parsers.extraction import FieldSpec, ListingSpec
 from app.parsers.optimized_base_parser import OptimizedBaseParser, ParserConfig
+from app.parsers.transport import ParserTransport
 from app.utils.logger import logger
-from app.utils.enhanced_http import EnhancedHTTPClient
+
+# Карточки выдачи: новая вёрстка (div.listing-item) или старая (article.card)
+ETAGI_LISTING_SPEC = ListingSpec(
+    source="etagi",
+    base_url="https://etagi.com",
+    card=("div.listing-item", "article.card"),
+    fields={
+        "title": FieldSpec("a.listing-title"),
+        "link": FieldSpec("a.listing-title", attr="href"),
+        "price": FieldSpec("div.listing-price"),
+        "rooms": FieldSpec("div.param-item[data-param='rooms']"),
+        "area": FieldSpec("div.param-item[data-param='area']"),
+        "floor": FieldSpec("div.param-item[data-param='floor']"),
+        "photos": FieldSpec("img.listing-image", attr=("src", "data-src"), many=True, limit=1),
+        "address": FieldSpec("div.listing-address"),
+        "description": FieldSpec("div.listing-description"),
+    },
+    required=("title",),
+    id_patterns=(r"/([^/]+)/?$",),
+)
 
 
 class EtagiParser(OptimizedBaseParser):
@@ -28,11 +49,11 @@ class EtagiParser(OptimizedBaseParser):
     
     Особенности:
     - Использует антибот-обход через ротацию User-Agent
-    - Парсинг через BeautifulSoup
+    - Разбор выдачи по декларативной спецификации (lxml)
     - Поддержка пагинации
     """
 
-    def __init__(self):
+    def __init__(self, transport: Optional[ParserTransport] = None):
         super().__init__(ParserConfig(
             name="EtagiParser",
             base_url="https://etagi.com",
@@ -46,7 +67,7 @@ class EtagiParser(OptimizedBaseParser):
                 "Accept-Language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
                 "Connection": "keep-alive",
             }
-        ))
+        ), transport)
 
     async def _parse_impl(self, location: str, params: Dict[str, Any]) -> List[PropertyCreate]:
         """
@@ -63,58 +84,27 @@ class EtagiParser(OptimizedBaseParser):
         
         # Формируем URL для поиска
         search_url = self._build_search_url(location, params)
+        # Глубина выдачи: max_pages можно передать в params (максимум 5 страниц)
+        max_pages = min(params.get('max_pages', 3), 5)
         
         try:
-            async with EnhancedHTTPClient(
-                timeout=self.config.timeout,
-                headers=self.config.headers
+            async with self.transport.session(
+                headers=self.config.headers,
+                timeout=self.config.timeout
             ) as client:
-                # Получаем первую страницу
-                response = await client.get(search_url)
-                
-                if response.status_code != 200:
-                    logger.warning(f"Etagi parser: non-200 status {response.status_code}")
-                    return results
-                
-                # Парсим HTML
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # Находим все объявления на странице
-                listings = soup.find_all('div', class_='listing-item')
-                
-                if not listings:
-                    # Пробуем альтернативный селектор
-                    listings = soup.find_all('article', class_='card')
-                
-                for listing in listings:
-                    try:
-                        property_data = self._parse_listing(listing, location)
-                        if property_data:
-                            results.append(property_data)
-                    except Exception as e:
-                        logger.error(f"Error parsing listing: {e}")
-                        continue
-                
-                # Пагинация - получаем следующие страницы (опционально)
-                # max_pages можно передать в params
-                max_pages = params.get('max_pages', 3)
-                for page in range(2, min(max_pages + 1, 6)):  # Максимум 5 страниц
-                    next_url = f"{search_url}&page={page}"
-                    try:
-                        response = await client.get(next_url)
-                        if response.status_code != 200:
-                            break
-                        
-                        soup = BeautifulSoup(response.text, 'html.parser')
-                        listings = soup.find_all('div', class_='listing-item')
-                        
-                        for listing in listings:
-                            property_data = self._parse_listing(listing, location)
-                            if property_data:
-                                results.append(property_data)
-                    except Exception as e:
-                        logger.error(f"Error on page {page}: {e}")
-                        break
+                async def fetch_page(page: int) -> List[PropertyCreate]:
+                    url = search_url if page == 1 else f"{search_url}&page={page}"
+                    response = await client.get(url)
+                    if response.status_code != 200:
+                        # Пустая страница останавливает пагинацию
+                        logger.warning(f"Etagi parser: non-200 status {response.status_code} on page {page}")
+                        return []
+                    # Разбираем HTML вне event loop
+                    return await self.parse_html(response.text, location)
+                
+                # Страницы 2..N запрашиваются одновременно с первой
+                paginator = await self.paginate(fetch_page, max_pages=max_pages)
+                results = await paginator.collect()
                 
         except Exception as e:
             logger.error(f"Etagi parser error: {e}")
@@ -170,99 +160,18 @@ class EtagiParser(OptimizedBaseParser):
         
         return url + "&".join(query_params)
 
-    def _parse_listing(self, listing, location: str) -> Optional[PropertyCreate]:
+    def _extract_listings(self, html: str, location: str) -> List[Dict[str, Any]]:
         """
-        Парсинг отдельного объявления.
+        Разбор страницы выдачи (выполняется в пуле ``parse_executor``).
         
         Args:
-            listing: BeautifulSoup элемент объявления
+            html: HTML страницы
             location: Город
             
         Returns:
-            PropertyCreate или None
+            Словари полей PropertyCreate
         """
-        try:
-            # Извлекаем данные
-            title_elem = listing.find('a', class_='listing-title')
-            if not title_elem:
-                return None
-            
-            title = title_elem.get_text(strip=True)
-            link = title_elem.get('href', '')
-            if link and not link.startswith('http'):
-                link = f"{self.config.base_url}{link}"
-            
-            # Цена
-            price_elem = listing.find('div', class_='listing-price')
-            price = 0
-            if price_elem:
-                price_text = price_elem.get_text(strip=True)
-                # Очищаем от символов валюты и пробелов
-                price_str = ''.join(filter(str.isdigit, price_text))
-                if price_str:
-                    price = int(price_str)
-            
-            # Комнаты, площадь, этаж
-            params_elem = listing.find('div', class_='listing-params')
-            rooms = None
-            area = None
-            floor = None
-            total_floors = None
-            
-            if params_elem:
-                param_items = params_elem.find_all('div', class_='param-item')
-                for item in param_items:
-                    param_name = item.get('data-param', '')
-                    param_value = item.get_text(strip=True)
-                    
-                    if 'rooms' in param_name.lower():
-                        rooms = int(''.join(filter(str.isdigit, param_value))) if param_value else None
-                    elif 'area' in param_name.lower():
-                        area_str = ''.join(filter(lambda c: c.isdigit() or c == '.', param_value))
-                        area = float(area_str) if area_str else None
-                    elif 'floor' in param_name.lower():
-                        floor_parts = param_value.split('/')
-                        if len(floor_parts) >= 2:
-                            floor = int(floor_parts[0].strip())
-                            total_floors = int(floor_parts[1].strip())
-            
-            # Фотографии
-            photos = []
-            img_elem = listing.find('img', class_='listing-image')
-            if img_elem:
-                img_src = img_elem.get('src') or img_elem.get('data-src')
-                if img_src:
-                    photos.append(img_src if img_src.startswith('http') else f"{self.config.base_url}{img_src}")
-            
-            # Описание (если есть на странице списка)
-            description_elem = listing.find('div', class_='listing-description')
-            description = description_elem.get_text(strip=True) if description_elem else None
-            
-            # Адрес/район
-            address_elem = listing.find('div', class_='listing-address')
-            address = address_elem.get_text(strip=True) if address_elem else None
-            
-            return PropertyCreate(
-                source="etagi",
-                external_id=self._extract_external_id(link),
-                title=title,
-                description=description,
-                link=link,
-                price=price,
-                rooms=rooms,
-                area=area,
-                floor=floor,
-                total_floors=total_floors,
-                city=location,
-                address=address,
-                photos=photos,
-                is_active=True,
-                is_verified=False,
-            )
-            
-        except Exception as e:
-            logger.error(f"Error parsing listing element: {e}")
-            return None
+        return ETAGI_LISTING_SPEC.extract(html, city=location, is_active=True, is_verified=False)
 
     def _extract_external_id(self, url: str) -> str:
         """Извлекает ID объявления из URL."""
@@ -281,9 +190,9 @@ class EtagiParser(OptimizedBaseParser):
             Dict с дополнительной информацией
         """
         try:
-            async with EnhancedHTTPClient(
-                timeout=self.config.timeout,
-                headers=self.config.headers
+            async with self.transport.session(
+                headers=self.config.headers,
+                timeout=self.config.timeout
             ) as client:
                 response = await client.get(property_url)
                 
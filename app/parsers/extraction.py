@@ -0,0 +1,415 @@
+"""
+Декларативное извлечение объявлений из страниц выдачи.
+
+Парсер описывает источник спецификацией ``ListingSpec``: селектор карточки и
+селекторы полей. Селекторы компилируются один раз при импорте модуля
+парсера, страница разбирается lxml, а каждая карточка обходится за один
+проход: элемент сверяется сразу со всеми селекторами полей, обход
+прекращается, как только все поля найдены. Числа, комнаты, площадь, этаж и
+район разбираются общими шаблонами ``app.parsers.patterns``.
+
+Селекторы полей — подмножество CSS без комбинаторов (``tag``, ``.class``,
+``#id``, ``[attr]``, ``[attr='value']`` в любых сочетаниях) либо XPath
+относительно карточки (начинается с ``./``, ``/`` или ``(``). Кортеж
+селекторов задаёт альтернативы по приоритету: берётся первое совпадение
+самого приоритетного из найденных.
+
+Имена полей определяют преобразование значения:
+``price`` — число, ``link``/``photos`` — абсолютные URL, ``rooms``, ``area``,
+``floor`` — общими шаблонами; остальные поля — текст. Если комнат, площади
+или этажа нет в отдельных полях, они ищутся в заголовке.
+"""
+
+import re
+import sys
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+from urllib.parse import urljoin
+
+from lxml import etree
+from lxml import html as lxml_html
+
+from app.parsers.patterns import (
+    TRAILING_ID_RE,
+    extract_area,
+    extract_floor,
+    extract_rooms,
+    find_district,
+    match_id,
+    parse_number,
+    parse_price,
+)
+from app.utils.logger import logger
+
+Selector = Union[str, Tuple[str, ...]]
+
+# Токены простого селектора: тег, .class, #id, [attr], [attr='value']
+_SELECTOR_TOKEN_RE = re.compile(
+    r"""(?:
+        (?P<tag>[a-zA-Z][\w-]*|\*)
+      | \.(?P<cls>[\w-]+)
+      | \#(?P<id>[\w-]+)
+      | \[\s*(?P<attr>[\w:-]+)\s*(?:=\s*(?:'(?P<sq>[^']*)'|"(?P<dq>[^"]*)"|(?P<bare>[^\]\s]+)))?\s*\]
+    )""",
+    re.VERBOSE,
+)
+
+# Слова, по которым резервное описание отличается от цены и параметров
+_DESCRIPTION_STOP_WORDS = ("руб", "м²", "комнат", "этаж")
+
+
+def _xpath_literal(value: str) -> str:
+    return f'"{value}"' if "'" in value else f"'{value}'"
+
+
+class SimpleSelector:
+    """Скомпилированный CSS-селектор одного элемента (без комбинаторов)."""
+
+    __slots__ = ("source", "tag", "classes", "attrs", "xpath")
+
+    def __init__(self, source: str):
+        self.source = source
+        self.tag: Optional[str] = None
+        classes: List[str] = []
+        attrs: List[Tuple[str, Optional[str]]] = []
+        text = source.strip()
+        pos = 0
+        while pos < len(text):
+            match = _SELECTOR_TOKEN_RE.match(text, pos)
+            # Пробел, запятая или >/+/~ — комбинаторы и группы не поддерживаются
+            if not match or (match.group("tag") and pos):
+                raise ValueError(f"Unsupported selector {source!r} at position {pos}")
+            if match.group("tag"):
+                self.tag = None if match.group("tag") == "*" else match.group("tag").lower()
+            elif match.group("cls"):
+                classes.append(match.group("cls"))
+            elif match.group("id"):
+                attrs.append(("id", match.group("id")))
+            else:
+                value = next((v for v in match.group("sq", "dq", "bare") if v is not None), None)
+                attrs.append((match.group("attr"), value))
+            pos = match.end()
+        if self.tag is None and not classes and not attrs:
+            raise ValueError(f"Empty selector: {source!r}")
+        self.classes = frozenset(classes)
+        self.attrs = tuple(attrs)
+
+        conditions = [f"contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')" for cls in classes]
+        conditions += [f"@{name}" if value is None else f"@{name}={_xpath_literal(value)}" for name, value in attrs]
+        self.xpath = f"{self.tag or '*'}" + "".join(f"[{condition}]" for condition in conditions)
+
+    def matches(self, element: Any) -> bool:
+        """Проверяет элемент lxml без обхода дерева."""
+        if self.tag is not None and element.tag != self.tag:
+            return False
+        for name, value in self.attrs:
+            actual = element.get(name)
+            if actual is None or (value is not None and actual != value):
+                return False
+        if self.classes:
+            cls = element.get("class")
+            if not cls or not self.classes.issubset(cls.split()):
+                return False
+        return True
+
+
+def _is_xpath(selector: str) -> bool:
+    return selector.lstrip().startswith(("/", "(", "./", "../"))
+
+
+def _alternatives(selector: Selector) -> Tuple[str, ...]:
+    return (selector,) if isinstance(selector, str) else tuple(selector)
+
+
+def element_text(element: Any) -> str:
+    """Текст элемента с потомками, пробелы схлопнуты."""
+    return " ".join("".join(element.itertext()).split())
+
+
+def as_element(node: Any) -> Any:
+    """Элемент lxml из элемента lxml или узла BeautifulSoup."""
+    if isinstance(node, etree._Element):
+        return node
+    return lxml_html.fragment_fromstring(str(node))
+
+
+@dataclass(frozen=True)
+class FieldSpec:
+    """
+    Селектор поля карточки.
+
+    Attributes:
+        selector: Селектор или кортеж альтернатив по приоритету
+        attr: Атрибут со значением (кортеж — первый непустой); None — текст элемента
+        many: Поле-список: собрать значения всех совпадений (фотографии)
+        limit: Сколько значений поля-списка собрать (None — все)
+    """
+
+    selector: Selector
+    attr: Union[None, str, Tuple[str, ...]] = None
+    many: bool = False
+    limit: Optional[int] = None
+
+
+class ListingSpec:
+    """Скомпилированная спецификация страницы выдачи одного источника."""
+
+    def __init__(
+        self,
+        source: str,
+        base_url: str,
+        card: Selector,
+        fields: Dict[str, FieldSpec],
+        required: Sequence[str] = ("title", "price"),
+        id_attr: Optional[str] = None,
+        id_patterns: Sequence[Union[str, "re.Pattern[str]"]] = (TRAILING_ID_RE,),
+        description_fallback: bool = False,
+    ):
+        """
+        Args:
+            source: Значение поля ``source`` объявлений
+            base_url: База для относительных ссылок и фотографий
+            card: Селектор карточки (кортеж — первая альтернатива с результатами)
+            fields: Поля карточки по именам полей ``PropertyCreate``
+            required: Поля, без элемента которых карточка пропускается
+            id_attr: Атрибут карточки с ID объявления; иначе ID ищется в ссылке
+            id_patterns: Шаблоны ID в ссылке (первая группа первого совпадения)
+            description_fallback: Брать описанием первый длинный ``div`` без цены и параметров
+        """
+        self.source = source
+        self.base_url = base_url
+        self.fields = dict(fields)
+        self.required = tuple(required)
+        self.id_attr = id_attr
+        self.id_patterns = tuple(re.compile(p) if isinstance(p, str) else p for p in id_patterns)
+        self.description_fallback = description_fallback
+
+        self._card_xpaths = tuple(
+            etree.XPath(alt if _is_xpath(alt) else f"descendant-or-self::{SimpleSelector(alt).xpath}")
+            for alt in _alternatives(card)
+        )
+
+        self._names: Tuple[str, ...] = tuple(self.fields)
+        # 0 — одиночное поле, иначе сколько значений собрать в список
+        self._limits = tuple(
+            (spec.limit or sys.maxsize) if spec.many else 0 for spec in self.fields.values()
+        )
+        self._attrs = tuple(
+            (spec.attr,) if isinstance(spec.attr, str) else spec.attr for spec in self.fields.values()
+        )
+        # Матчеры по тегу: (слот, приоритет, селектор); "*" — для любого тега
+        matchers: Dict[Optional[str], List[Tuple[int, int, SimpleSelector]]] = {}
+        self._xpath_fields: List[Tuple[int, Tuple[Callable[..., Any], ...]]] = []
+        for slot, spec in enumerate(self.fields.values()):
+            alternatives = _alternatives(spec.selector)
+            if all(_is_xpath(alt) for alt in alternatives):
+                self._xpath_fields.append((slot, tuple(etree.XPath(alt) for alt in alternatives)))
+                continue
+            for rank, alt in enumerate(alternatives):
+                if _is_xpath(alt):
+                    raise ValueError(f"{source}.{self._names[slot]}: do not mix CSS and XPath alternatives")
+                selector = SimpleSelector(alt)
+                matchers.setdefault(selector.tag, []).append((slot, rank, selector))
+        wildcard = matchers.pop(None, [])
+        order = lambda matcher: matcher[:2]  # noqa: E731
+        self._by_tag = {tag: sorted(found + wildcard, key=order) for tag, found in matchers.items()}
+        self._wildcard = sorted(wildcard, key=order)
+        self._ranks = tuple(len(_alternatives(spec.selector)) for spec in self.fields.values())
+        self._css_slots = len(self.fields) - len(self._xpath_fields)
+
+    # --- Разбор -----------------------------------------------------------
+
+    def extract(self, html: str, **extra: Any) -> List[Dict[str, Any]]:
+        """
+        Разбирает страницу выдачи.
+
+        Args:
+            html: HTML страницы
+            **extra: Постоянные поля всех объявлений (например, ``city``)
+
+        Returns:
+            Словари полей ``PropertyCreate``
+        """
+        if not html or not html.strip():
+            return []
+        return self.extract_tree(lxml_html.document_fromstring(html), **extra)
+
+    def extract_tree(self, root: Any, **extra: Any) -> List[Dict[str, Any]]:
+        """Разбирает уже построенное дерево lxml."""
+        results = []
+        for card in self.cards(root):
+            try:
+                row = self.extract_card(card, **extra)
+            except Exception as e:
+                logger.error(f"{self.source}: error parsing listing card: {e}")
+                continue
+            if row is not None:
+                results.append(row)
+        return results
+
+    def cards(self, root: Any) -> List[Any]:
+        """Карточки первой альтернативы селектора, давшей результаты."""
+        for xpath in self._card_xpaths:
+            found = xpath(root)
+            if found:
+                return found
+        return []
+
+    def extract_card(self, card: Any, partial: bool = False, **extra: Any) -> Optional[Dict[str, Any]]:
+        """
+        Поля одной карточки.
+
+        Args:
+            card: Элемент карточки
+            partial: Не пропускать карточку без обязательных полей
+            **extra: Постоянные поля объявления
+
+        Returns:
+            Словарь полей ``PropertyCreate`` или None, если нет обязательного поля
+        """
+        values = self._walk(card)
+        if not partial and any(values.get(name) is None for name in self.required):
+            return None
+
+        title = values.get("title") or ""
+        link = values.get("link")
+        link = urljoin(self.base_url, link) if link else None
+
+        if values.get("rooms") is not None:
+            rooms = extract_rooms(values["rooms"])
+            if rooms is None:
+                number = parse_number(values["rooms"])
+                rooms = int(number) if number is not None else None
+        else:
+            rooms = extract_rooms(title)
+        if values.get("area") is not None:
+            area = extract_area(values["area"])
+            if area is None:
+                area = parse_number(values["area"])
+        else:
+            area = extract_area(title)
+        if values.get("floor") is not None:
+            floor, total_floors = extract_floor(values["floor"], strict=False)
+        else:
+            floor, total_floors = extract_floor(title)
+
+        address = values.get("address")
+        district = find_district(title)
+        location = {}
+        if district:
+            location["district"] = district
+        if address:
+            location["address"] = address
+
+        description = values.get("description")
+        if description is None and self.description_fallback:
+            description = self._fallback_description(card)
+
+        if self.id_attr:
+            external_id = card.get(self.id_attr) or ""
+        else:
+            external_id = match_id(link, self.id_patterns)
+
+        row = {
+            "source": self.source,
+            "external_id": external_id,
+            "title": title,
+            "price": parse_price(values.get("price")) or 0.0,
+            "link": link,
+            "rooms": rooms,
+            "area": area,
+            "floor": floor,
+            "total_floors": total_floors,
+            "photos": [urljoin(self.base_url, src) for src in values.get("photos") or ()],
+            "address": address,
+            "district": district,
+            "location": location or None,
+            "description": description,
+        }
+        for name, value in values.items():
+            row.setdefault(name, value)
+        row.update(extra)
+        return row
+
+    def external_id(self, link: Optional[str]) -> str:
+        """ID объявления из ссылки по шаблонам спецификации."""
+        return match_id(link, self.id_patterns)
+
+    def _walk(self, card: Any) -> Dict[str, Any]:
+        """Один проход по потомкам карточки: значения всех полей сразу."""
+        names, limits, attrs = self._names, self._limits, self._attrs
+        best = list(self._ranks)
+        found: List[Any] = [None] * len(names)
+        remaining = self._css_slots
+        by_tag, wildcard = self._by_tag, self._wildcard
+
+        for element in card.iterdescendants(etree.Element):
+            for slot, rank, selector in by_tag.get(element.tag, wildcard):
+                if rank >= best[slot] or not selector.matches(element):
+                    continue
+                if limits[slot]:
+                    value = self._value(element, attrs[slot])
+                    if not value:
+                        continue
+                    if found[slot] is None:
+                        found[slot] = []
+                    found[slot].append(value)
+                    if len(found[slot]) >= limits[slot]:
+                        best[slot] = 0
+                        remaining -= 1
+                    continue
+                found[slot] = element
+                if rank == 0:
+                    remaining -= 1
+                best[slot] = rank
+            if not remaining:
+                break
+
+        for slot, xpaths in self._xpath_fields:
+            for xpath in xpaths:
+                hits = xpath(card)
+                if hits:
+                    found[slot] = hits[:limits[slot]] if limits[slot] else hits[0]
+                    break
+
+        values: Dict[str, Any] = {}
+        for slot, name in enumerate(names):
+            hit = found[slot]
+            if hit is None:
+                continue
+            if limits[slot]:
+                values[name] = [
+                    v for v in (h if isinstance(h, str) else self._value(h, attrs[slot]) for h in hit) if v
+                ]
+            elif isinstance(hit, str):
+                values[name] = hit
+            else:
+                values[name] = self._value(hit, attrs[slot])
+        return values
+
+    @staticmethod
+    def _value(element: Any, attrs: Optional[Tuple[str, ...]]) -> Optional[str]:
+        if attrs is None:
+            return element_text(element)
+        for attr in attrs:
+            value = element.get(attr)
+            if value:
+                return value.strip()
+        return None
+
+    @staticmethod
+    def _fallback_description(card: Any) -> Optional[str]:
+        for div in card.iterdescendants("div"):
+            text = element_text(div)
+            if len(text) > 20 and not any(word in text.lower() for word in _DESCRIPTION_STOP_WORDS):
+                return text
+        return None
+
+
+__all__ = [
+    "FieldSpec",
+    "ListingSpec",
+    "SimpleSelector",
+    "as_element",
+    "element_text",
+]
@@ -7,7 +7,6 @@ from typing import Any, Dict, List, Optional
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 import httpx
-from app.utils.enhanced_http import EnhancedHTTPClient
 from tenacity import (
     retry,
     stop_after_attempt,
@@ -16,6 +15,10 @@ from tenacity import (
 )
 
 from app.models.schemas import PropertyCreate
+from app.parsers.paginator import PageFetcher, Paginator
+from app.parsers.parse_executor import parse_executor
+from app.parsers.transport import ParserTransport, parser_transport
+from app.utils.circuit_breaker import get_circuit_breaker
 from app.utils.performance import track_performance, PerformanceMonitor
 
 
@@ -29,6 +32,7 @@ class ParserConfig:
     rate_limit: int = 10  # requests per second
     max_concurrent: int = 5
     cache_ttl: int = 300  # seconds
+    headers: Optional[Dict[str, str]] = None
 
 
 class OptimizedBaseParser(ABC):
@@ -36,7 +40,7 @@ class OptimizedBaseParser(ABC):
     Оптимизированный базовый класс для всех парсеров.
     
     Особенности:
-    - Connection pooling через httpx.AsyncClient
+    - Connection pooling через общий ParserTransport (клиент на хост)
     - Автоматический retry с экспоненциальной задержкой
     - Rate limiting для соблюдения лимитов API
     - Конкурентная обработка с ограничением
@@ -44,16 +48,17 @@ class OptimizedBaseParser(ABC):
     - Кеширование результатов
     """
     
-    def __init__(self, config: ParserConfig):
+    def __init__(self, config: ParserConfig, transport: Optional[ParserTransport] = None):
         """
         Инициализация парсера.
         
         Args:
             config: Конфигурация парсера
+            transport: HTTP-транспорт (по умолчанию общий ``parser_transport``)
         """
         self.config = config
         self.name = config.name
-        self._client: Optional[EnhancedHTTPClient] = None
+        self.transport = transport or parser_transport
         self._semaphore = asyncio.Semaphore(config.max_concurrent)
         self._rate_limiter = asyncio.Semaphore(config.rate_limit)
         self._last_request_time = 0.0
@@ -62,36 +67,22 @@ class OptimizedBaseParser(ABC):
         
     async def __aenter__(self):
         """Контекстный менеджер - вход."""
-        await self._initialize_client()
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Контекстный менеджер - выход."""
-        await self._close_client()
-        
-    async def _initialize_client(self):
-        """Инициализация улучшенного HTTP клиента."""
-        if self._client is None:
-            self._client = EnhancedHTTPClient()
-            # Создаём внутреннюю сессию
-            await self._client.create_session()
-            
-    async def _close_client(self):
-        """Закрытие HTTP клиента."""
-        if self._client is not None:
-            await self._client.close()
-            self._client = None
-            
+        """Контекстный менеджер - выход (соединения остаются в общем пуле)."""
+        
     async def _rate_limit_wait(self):
         """Ожидание для соблюдения rate limit."""
         current_time = asyncio.get_event_loop().time()
-        time_since_last = current_time - self._last_request_time
         min_interval = 1.0 / self.config.rate_limit
         
-        if time_since_last < min_interval:
-            await asyncio.sleep(min_interval - time_since_last)
-            
-        self._last_request_time = asyncio.get_event_loop().time()
+        # Слот резервируется до сна: одновременные запросы (пагинация)
+        # расходятся по интервалам, а не просыпаются разом
+        slot = max(current_time, self._last_request_time + min_interval)
+        self._last_request_time = slot
+        if slot > current_time:
+            await asyncio.sleep(slot - current_time)
         
     @retry(
         stop=stop_after_attempt(3),
@@ -118,21 +109,43 @@ class OptimizedBaseParser(ABC):
         async with self._semaphore:
             await self._rate_limit_wait()
             
-            if self._client is None:
-                await self._initialize_client()
-
-            # Используем методы enhanced клиента
-            method_upper = method.upper()
-            if method_upper == "GET":
-                response = await self._client.get(url, **kwargs)
-            elif method_upper == "POST":
-                response = await self._client.post(url, **kwargs)
-            else:
-                # Для других методов, пробуем напрямую через внутреннюю сессию
-                response = await self._client.session.request(method_upper, url, **kwargs)
+            async with self.transport.session(
+                headers=self.config.headers, timeout=self.config.timeout
+            ) as client:
+                if method.upper() == "GET":
+                    response = await client.get(url, **kwargs)
+                else:
+                    response = await client.request(method, url, **kwargs)
             response.raise_for_status()
             return response
             
+    async def paginate(
+        self,
+        fetch_page: PageFetcher,
+        max_pages: Optional[int] = None,
+        start_page: int = 1,
+    ) -> Paginator:
+        """
+        Конкурентная пагинация под rate limit и circuit breaker парсера.
+        
+        Args:
+            fetch_page: Корутина ``page -> объявления страницы``
+            max_pages: Сколько страниц запрашивать (по умолчанию ``PARSER_MAX_PAGES``)
+            start_page: Номер первой страницы
+            
+        Returns:
+            Paginator: ``collect()`` — все объявления, ``async for`` — по мере прихода
+        """
+        return Paginator(
+            fetch_page,
+            name=self.name,
+            max_pages=max_pages,
+            concurrency=self.config.max_concurrent,
+            start_page=start_page,
+            rate_limit=self._rate_limit_wait,
+            circuit_breaker=await get_circuit_breaker(self.name),
+        )
+            
     def _get_cache_key(self, location: str, params: Dict[str, Any]) -> str:
         """Генерация ключа кеша."""
         params_str = "_".join(f"{k}={v}" for k, v in sorted(params.items()))
@@ -221,6 +234,27 @@ class OptimizedBaseParser(ABC):
         """
         pass
         
+    def _extract_listings(self, html: str, *args: Any) -> List[Dict[str, Any]]:
+        """
+        Синхронный разбор страницы в словари полей ``PropertyCreate``.
+        
+        Выполняется в пуле ``parse_executor`` (см. ``BaseParser._extract_listings``).
+        """
+        raise NotImplementedError(f"{self.name} does not parse HTML pages")
+        
+    async def parse_html(self, html: str, *args: Any) -> List[PropertyCreate]:
+        """
+        Разбор страницы вне event loop.
+        
+        Args:
+            html: HTML страницы
+            *args: Дополнительные аргументы ``_extract_listings``
+            
+        Returns:
+            Список PropertyCreate
+        """
+        return await parse_executor.parse(self, html, *args)
+        
     async def validate_params(self, params: Dict[str, Any]) -> bool:
         """
         Валидация параметров (может быть переопределена).
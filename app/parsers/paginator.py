@@ -0,0 +1,163 @@
+"""
+Конкурентная пагинация страниц выдачи.
+
+``Paginator`` держит в работе до ``concurrency`` страниц одновременно
+(N+1..N+k), каждую — под rate limiter и circuit breaker источника, и отдаёт
+объявления по мере прихода страниц, не дожидаясь остальных. Повторы
+``external_id`` между страницами отбрасываются (площадки дублируют
+продвигаемые карточки).
+
+Остановка:
+- страница без новых ``external_id`` — выдача закончилась или пошла по
+  кругу: страницы после неё отменяются и больше не запрашиваются;
+- ошибка страницы после первой — дальше не идём, уже полученное остаётся;
+  ошибка первой страницы пробрасывается вызывающему.
+"""
+
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.utils.circuit_breaker import CircuitBreaker, CircuitState
+from app.utils.logger import logger
+from app.utils.metrics import metrics_collector
+
+PageFetcher = Callable[[int], Awaitable[List[Any]]]
+
+
+class Paginator:
+    """Конкурентная выборка страниц выдачи одного поиска."""
+
+    def __init__(
+        self,
+        fetch_page: PageFetcher,
+        name: str,
+        max_pages: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        start_page: int = 1,
+        rate_limit: Optional[Callable[[], Awaitable[Any]]] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+    ):
+        """
+        Args:
+            fetch_page: Корутина ``page -> объявления страницы``
+            name: Имя парсера (логи и метрики)
+            max_pages: Сколько страниц запрашивать (по умолчанию ``PARSER_MAX_PAGES``)
+            concurrency: Страниц в работе одновременно (по умолчанию ``PARSER_PAGE_CONCURRENCY``)
+            start_page: Номер первой страницы
+            rate_limit: Корутина ожидания rate limiter источника перед каждым запросом
+            circuit_breaker: Circuit breaker источника; в состоянии OPEN новые страницы не запрашиваются
+        """
+        self.fetch_page = fetch_page
+        self.name = name
+        self.max_pages = max(1, max_pages or settings.PARSER_MAX_PAGES)
+        self.concurrency = max(1, concurrency or settings.PARSER_PAGE_CONCURRENCY)
+        self.start_page = start_page
+        self.rate_limit = rate_limit
+        self.circuit_breaker = circuit_breaker
+        self.pages_fetched = 0
+
+    async def _fetch(self, page: int) -> List[Any]:
+        if self.rate_limit is not None:
+            await self.rate_limit()
+        if self.circuit_breaker is not None:
+            return await self.circuit_breaker.call(self.fetch_page, page)
+        return await self.fetch_page(page)
+
+    def _breaker_open(self) -> bool:
+        breaker = self.circuit_breaker
+        return (
+            breaker is not None
+            and breaker.state == CircuitState.OPEN
+            and breaker._time_until_retry() > 0
+        )
+
+    @staticmethod
+    def _key(item: Any) -> Optional[str]:
+        external_id = item.get("external_id") if isinstance(item, dict) else getattr(item, "external_id", None)
+        return str(external_id) if external_id else None
+
+    async def pages(self) -> AsyncIterator[Tuple[int, List[Any]]]:
+        """
+        Страницы по мере готовности (не обязательно по порядку номеров).
+
+        Yields:
+            (номер страницы, новые объявления страницы)
+        """
+        seen: Set[str] = set()
+        stop_at = self.start_page + self.max_pages  # первая страница, которую не запрашиваем
+        next_page = self.start_page
+        running: Dict["asyncio.Task[List[Any]]", int] = {}
+
+        def cancel_from(page: int) -> None:
+            for task, task_page in running.items():
+                if task_page >= page and not task.done():
+                    task.cancel()
+                    metrics_collector.record_parser_page(self.name, "cancelled")
+
+        try:
+            while True:
+                while next_page < stop_at and len(running) < self.concurrency:
+                    if next_page > self.start_page and self._breaker_open():
+                        stop_at = next_page
+                        break
+                    running[asyncio.ensure_future(self._fetch(next_page))] = next_page
+                    next_page += 1
+                if not running:
+                    return
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in sorted(done, key=running.__getitem__):
+                    page = running.pop(task)
+                    if page >= stop_at or task.cancelled():
+                        continue
+                    try:
+                        items = task.result()
+                    except Exception as e:
+                        metrics_collector.record_parser_page(self.name, "error")
+                        if page == self.start_page:
+                            raise
+                        logger.warning(f"{self.name}: page {page} failed, stopping pagination: {e}")
+                        stop_at = page
+                        cancel_from(stop_at)
+                        continue
+
+                    self.pages_fetched += 1
+                    fresh = []
+                    for item in items or ():
+                        key = self._key(item)
+                        if key is None:
+                            fresh.append(item)
+                        elif key not in seen:
+                            seen.add(key)
+                            fresh.append(item)
+                    if not fresh:
+                        metrics_collector.record_parser_page(self.name, "exhausted")
+                        stop_at = min(stop_at, page + 1)
+                        cancel_from(stop_at)
+                        continue
+                    metrics_collector.record_parser_page(self.name, "new")
+                    yield page, fresh
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+    async def __aiter__(self) -> AsyncIterator[Any]:
+        """Объявления по мере прихода страниц."""
+        async for _, items in self.pages():
+            for item in items:
+                yield item
+
+    async def collect(self) -> List[Any]:
+        """Все объявления в порядке номеров страниц."""
+        by_page: List[Tuple[int, List[Any]]] = [page async for page in self.pages()]
+        by_page.sort(key=lambda page: page[0])
+        return [item for _, items in by_page for item in items]
+
+
+__all__ = [
+    "PageFetcher",
+    "Paginator",
+]
@@ -0,0 +1,167 @@
+"""
+Разбор HTML вне event loop.
+
+BeautifulSoup строит дерево на чистом Python: разбор большой страницы выдачи
+занимает сотни миллисекунд, и всё это время event loop воркера FastAPI не
+обслуживает другие запросы. ``ParseExecutor`` отправляет HTML в ограниченный
+пул процессов, где синхронный метод ``_extract_listings`` парсера возвращает
+лёгкие словари; ``PropertyCreate`` из них собираются уже в event loop.
+
+Режимы (``PARSER_PARSE_EXECUTOR``):
+- ``process`` — ``ProcessPoolExecutor`` (spawn); разбор не держит GIL воркера
+- ``thread`` — пул потоков; lxml отпускает GIL только на время разбора
+  документа, построение дерева BeautifulSoup его держит
+- ``inline`` — разбор прямо в event loop (как раньше)
+
+Страницы меньше ``PARSER_PARSE_INLINE_BYTES`` разбираются на месте: передача
+в процесс стоит дороже их разбора.
+"""
+
+import asyncio
+import multiprocessing
+import time
+import weakref
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Type
+
+from app.core.config import settings
+from app.models.schemas import PropertyCreate
+from app.utils.logger import logger
+from app.utils.metrics import metrics_collector
+
+# Экземпляры парсеров внутри процесса пула (по одному на класс)
+_WORKER_PARSERS: Dict[type, Any] = {}
+
+
+def _extract_in_worker(parser_cls: Type[Any], html: str, args: tuple) -> List[Dict[str, Any]]:
+    """Точка входа процесса пула: разбор HTML экземпляром парсера этого процесса."""
+    parser = _WORKER_PARSERS.get(parser_cls)
+    if parser is None:
+        parser = _WORKER_PARSERS[parser_cls] = parser_cls()
+    return parser._extract_listings(html, *args)
+
+
+def build_properties(rows: List[Dict[str, Any]], parser_name: str = "") -> List[PropertyCreate]:
+    """
+    Собирает ``PropertyCreate`` из словарей ``_extract_listings``.
+
+    Невалидное объявление пропускается и не мешает остальным.
+    """
+    properties = []
+    for row in rows:
+        try:
+            properties.append(PropertyCreate(**row))
+        except Exception as e:
+            logger.error(f"{parser_name}: invalid listing {row.get('external_id')!r}: {e}")
+    return properties
+
+
+class ParseExecutor:
+    """Ограниченный пул для разбора HTML парсерами."""
+
+    def __init__(
+        self,
+        mode: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        inline_bytes: Optional[int] = None,
+    ) -> None:
+        """
+        Args:
+            mode: ``process``, ``thread`` или ``inline`` (по умолчанию ``PARSER_PARSE_EXECUTOR``)
+            max_workers: Размер пула (по умолчанию ``PARSER_PARSE_WORKERS``)
+            inline_bytes: Порог размера страницы для разбора на месте (по умолчанию ``PARSER_PARSE_INLINE_BYTES``)
+        """
+        self.mode = mode or settings.PARSER_PARSE_EXECUTOR
+        self.max_workers = max_workers or settings.PARSER_PARSE_WORKERS
+        self.inline_bytes = settings.PARSER_PARSE_INLINE_BYTES if inline_bytes is None else inline_bytes
+        self._pool: Optional[Executor] = None
+        # Семафор привязан к event loop, а Celery запускает asyncio.run на каждую задачу;
+        # WeakKeyDictionary не держит закрытые loop'ы
+        self._slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    @property
+    def pool_mode(self) -> str:
+        """Фактический режим: демонические процессы (prefork-воркеры Celery) не могут порождать процессы."""
+        if self.mode == "process" and multiprocessing.current_process().daemon:
+            return "thread"
+        return self.mode
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.pool_mode == "process":
+                # spawn: форк процесса с живым event loop и потоками httpx/redis небезопасен
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="html-parse")
+        return self._pool
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        # Не больше двух страниц на воркер в очереди: остальные ждут в event loop,
+        # а не копятся в памяти пула
+        loop = asyncio.get_running_loop()
+        slots = self._slots.get(loop)
+        if slots is None:
+            slots = self._slots[loop] = asyncio.Semaphore(self.max_workers * 2)
+        return slots
+
+    async def extract(self, parser: Any, html: str, *args: Any) -> List[Dict[str, Any]]:
+        """
+        Выполняет ``parser._extract_listings(html, *args)`` в пуле.
+
+        Для ``process`` метод вызывается у экземпляра того же класса в процессе
+        пула, поэтому он не должен зависеть от состояния, заданного после
+        конструктора по умолчанию.
+
+        Returns:
+            Словари полей ``PropertyCreate``
+        """
+        mode = "inline" if len(html) < self.inline_bytes else self.pool_mode
+        start = time.perf_counter()
+        try:
+            if mode == "inline":
+                return parser._extract_listings(html, *args)
+            async with self._get_slots():
+                loop = asyncio.get_running_loop()
+                if mode == "process":
+                    try:
+                        return await loop.run_in_executor(
+                            self._get_pool(), _extract_in_worker, type(parser), html, args
+                        )
+                    except BrokenProcessPool as e:
+                        logger.error(f"HTML parse pool is broken, parsing {parser.name} inline: {e}")
+                        self._reset_pool()
+                        mode = "inline"
+                        return parser._extract_listings(html, *args)
+                return await loop.run_in_executor(self._get_pool(), parser._extract_listings, html, *args)
+        finally:
+            metrics_collector.record_html_parse(parser.name, mode, time.perf_counter() - start)
+
+    async def parse(self, parser: Any, html: str, *args: Any) -> List[PropertyCreate]:
+        """Разбирает страницу в пуле и собирает ``PropertyCreate`` в event loop."""
+        return build_properties(await self.extract(parser, html, *args), parser.name)
+
+    def _reset_pool(self) -> None:
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        """Останавливает пул (при остановке приложения)."""
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+parse_executor = ParseExecutor()
+
+
+__all__ = [
+    "ParseExecutor",
+    "build_properties",
+    "parse_executor",
+]
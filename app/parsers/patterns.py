@@ -0,0 +1,146 @@
+"""
+Общие регулярные выражения для разбора объявлений.
+
+Раньше каждый парсер держал свою копию шаблонов комнат и площади и
+компилировал их при каждом вызове ``re.search``. Здесь шаблоны собраны один
+раз при импорте; парсеры и ``app.parsers.extraction`` используют только
+функции этого модуля.
+"""
+
+import re
+from typing import Iterable, Optional, Tuple
+
+# "2-к", "2 к.", "2-комн.", "3 комнатная"; "45 кв. м" и "5 км" — не комнаты
+ROOMS_RE = re.compile(r"(\d+)[\-\s]*к(?!в\.?\s*м|м\b)", re.IGNORECASE)
+
+# "45 м²", "50м2", "55,7 кв. м"
+AREA_RE = re.compile(r"(\d+(?:[.,]\d+)?)\s*(?:м\s*[²2]|кв\.?\s*м)", re.IGNORECASE)
+
+# "3/9 эт.", "1 этаж из 5", "2-й этаж из 12"
+FLOOR_OF_RE = re.compile(
+    r"(\d+)\s*/\s*(\d+)\s*эт|(\d+)(?:-?й)?\s*этаж\s*из\s*(\d+)", re.IGNORECASE
+)
+# "3 / 9" в поле, которое заведомо содержит этаж
+FLOOR_PAIR_RE = re.compile(r"(\d+)\s*/\s*(\d+)")
+FLOOR_SINGLE_RE = re.compile(r"(\d+)(?:-?й)?\s*этаж", re.IGNORECASE)
+
+# Первое число с разделителями разрядов: "120 000 ₽/мес.", "1 500,50 руб."
+PRICE_RE = re.compile(r"\d(?:[\d\s\u00a0\u202f]*\d)?(?:[.,]\d+)?")
+NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)?")
+_SPACES_RE = re.compile(r"[\s\u00a0\u202f]+")
+
+# ID в конце пути ссылки: https://www.cian.ru/rent/flat/123456789/
+TRAILING_ID_RE = re.compile(r"/(\d+)/?$")
+
+# Порядок важен: побеждает первое вхождение в заголовок
+MOSCOW_DISTRICTS: Tuple[str, ...] = (
+    "центр", "цао", "север", "сао", "северо-восток", "свао", "восток", "вао",
+    "юго-восток", "ювао", "юг", "юао", "юго-запад", "юзао", "запад", "зао",
+    "северо-запад", "сзао", "зеленоград", "таганский", "басманный", "арбат",
+    "якиманка", "хамовники", "кунцево", "перово", "люблино",
+)
+
+
+def _to_float(value: str) -> float:
+    return float(_SPACES_RE.sub("", value).replace(",", "."))
+
+
+def extract_rooms(text: Optional[str]) -> Optional[int]:
+    """Количество комнат из строки вида "2-к квартира"."""
+    if not text:
+        return None
+    match = ROOMS_RE.search(text)
+    return int(match.group(1)) if match else None
+
+
+def extract_area(text: Optional[str]) -> Optional[float]:
+    """Площадь в кв. м из строки вида "45 м²" или "50 кв. м"."""
+    if not text:
+        return None
+    match = AREA_RE.search(text)
+    return _to_float(match.group(1)) if match else None
+
+
+def extract_floor(text: Optional[str], strict: bool = True) -> Tuple[Optional[int], Optional[int]]:
+    """
+    Этаж и этажность дома.
+
+    Args:
+        text: Строка с этажом
+        strict: Требовать слово "этаж"/"эт." (для заголовков); без него
+            понимается и голое "3 / 9" из поля параметров
+
+    Returns:
+        (этаж, всего этажей); отсутствующие значения — None
+    """
+    if not text:
+        return None, None
+    match = FLOOR_OF_RE.search(text)
+    if match:
+        floor, total = match.group(1, 2) if match.group(1) else match.group(3, 4)
+        return int(floor), int(total)
+    if not strict:
+        match = FLOOR_PAIR_RE.search(text)
+        if match:
+            return int(match.group(1)), int(match.group(2))
+    match = FLOOR_SINGLE_RE.search(text)
+    if match:
+        return int(match.group(1)), None
+    if not strict:
+        match = NUMBER_RE.search(text)
+        if match and "." not in match.group() and "," not in match.group():
+            return int(match.group()), None
+    return None, None
+
+
+def parse_price(text: Optional[str]) -> Optional[float]:
+    """Первое число строки цены с пробелами-разделителями разрядов."""
+    if not text:
+        return None
+    match = PRICE_RE.search(text)
+    return _to_float(match.group()) if match else None
+
+
+def parse_number(text: Optional[str]) -> Optional[float]:
+    """Первое число строки (целое или дробное)."""
+    if not text:
+        return None
+    match = NUMBER_RE.search(text)
+    return _to_float(match.group()) if match else None
+
+
+def find_district(text: Optional[str], districts: Iterable[str] = MOSCOW_DISTRICTS) -> Optional[str]:
+    """Первый район из списка, упомянутый в тексте."""
+    if not text:
+        return None
+    lowered = text.lower()
+    for district in districts:
+        if district in lowered:
+            return district
+    return None
+
+
+def match_id(link: Optional[str], patterns: Iterable["re.Pattern[str]"]) -> str:
+    """ID объявления из ссылки: первая группа первого сработавшего шаблона."""
+    if link:
+        for pattern in patterns:
+            match = pattern.search(link)
+            if match:
+                return match.group(1)
+    return ""
+
+
+__all__ = [
+    "AREA_RE",
+    "MOSCOW_DISTRICTS",
+    "PRICE_RE",
+    "ROOMS_RE",
+    "TRAILING_ID_RE",
+    "extract_area",
+    "extract_floor",
+    "extract_rooms",
+    "find_district",
+    "match_id",
+    "parse_number",
+    "parse_price",
+]
@@ -0,0 +1,264 @@
+"""
+Транспортный слой парсеров поверх общего пула HTTP-клиентов.
+
+Вместо создания ``httpx.AsyncClient`` на каждый вызов парсера используется
+один долгоживущий клиент на хост источника (и на прокси, если включена ротация).
+Так сохраняются TLS-сессии, DNS-кэш и keep-alive соединения между запросами.
+"""
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.core.config import settings
+from app.utils.headers import get_random_headers
+from app.utils.http_pool import HTTPClientPool, http_pool
+from app.utils.proxy import ProxyConfig, ProxyManager, proxy_manager
+
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
+}
+
+# Заголовки уровня соединения: пулом управляет httpx, а HTTP/2 их запрещает
+_HOP_BY_HOP_HEADERS = frozenset({"connection", "keep-alive", "proxy-connection", "upgrade", "transfer-encoding"})
+
+
+@dataclass(frozen=True)
+class HostLimits:
+    """Ограничения соединений и таймауты для одного хоста."""
+
+    max_connections: int = 10
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 30.0
+    connect_timeout: float = 10.0
+    read_timeout: float = 30.0
+    pool_timeout: float = 5.0
+
+    @classmethod
+    def from_settings(cls) -> "HostLimits":
+        return cls(
+            max_connections=settings.PARSER_HOST_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.PARSER_HOST_MAX_CONNECTIONS,
+            read_timeout=float(settings.REQUEST_TIMEOUT),
+        )
+
+    def to_httpx_limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    def to_httpx_timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(
+            connect=self.connect_timeout,
+            read=self.read_timeout,
+            write=self.connect_timeout,
+            pool=self.pool_timeout,
+        )
+
+
+class ParserTransport:
+    """
+    Общий HTTP-транспорт для всех парсеров.
+
+    Клиенты хранятся в ``HTTPClientPool`` под именами ``parser:<host>``
+    (``parser:<host>|<proxy>`` при ротации прокси) и не закрываются после
+    запроса; пул закрывается целиком при остановке приложения.
+    """
+
+    def __init__(
+        self,
+        pool: Optional[HTTPClientPool] = None,
+        host_limits: Optional[Dict[str, HostLimits]] = None,
+        default_limits: Optional[HostLimits] = None,
+        proxies: Optional[ProxyManager] = None,
+        use_proxies: Optional[bool] = None,
+        http2: Optional[bool] = None,
+    ) -> None:
+        """
+        Args:
+            pool: Пул клиентов (по умолчанию глобальный ``http_pool``)
+            host_limits: Переопределения лимитов для отдельных хостов
+            default_limits: Лимиты для остальных хостов
+            proxies: Менеджер прокси для ротации
+            use_proxies: Включить ротацию прокси (по умолчанию ``PROXY_ENABLED``)
+            http2: Использовать HTTP/2 (по умолчанию ``PARSER_HTTP2``)
+        """
+        self.pool = pool or http_pool
+        self.host_limits: Dict[str, HostLimits] = dict(host_limits or {})
+        self.default_limits = default_limits or HostLimits.from_settings()
+        self.proxies = proxies or proxy_manager
+        self.use_proxies = settings.PROXY_ENABLED if use_proxies is None else use_proxies
+        self.http2 = settings.PARSER_HTTP2 if http2 is None else http2
+
+    def limits_for(self, host: str) -> HostLimits:
+        """Лимиты соединений для хоста."""
+        return self.host_limits.get(host, self.default_limits)
+
+    def set_host_limits(self, host: str, limits: HostLimits) -> None:
+        """Задать лимиты для хоста (действует для клиентов, созданных после вызова)."""
+        self.host_limits[host] = limits
+
+    @staticmethod
+    def _client_name(host: str, proxy: Optional[ProxyConfig]) -> str:
+        if proxy is None:
+            return f"parser:{host}"
+        return f"parser:{host}|{proxy.host}:{proxy.port}"
+
+    async def client_for(self, host: str, proxy: Optional[ProxyConfig] = None) -> httpx.AsyncClient:
+        """
+        Получить пул-клиент для хоста (и прокси).
+
+        Args:
+            host: Хост источника (``www.avito.ru``)
+            proxy: Прокси, через который идут запросы
+
+        Returns:
+            Долгоживущий ``httpx.AsyncClient``
+        """
+        limits = self.limits_for(host)
+        client_kwargs: Dict[str, Any] = {
+            "limits": limits.to_httpx_limits(),
+            "timeout": limits.to_httpx_timeout(),
+            "http2": self.http2,
+        }
+        if proxy is not None:
+            client_kwargs["proxy"] = proxy.to_url()
+        return await self.pool.get_client(self._client_name(host, proxy), **client_kwargs)
+
+    def _pick_proxy(self) -> Optional[ProxyConfig]:
+        if not self.use_proxies:
+            return None
+        return self.proxies.get_random_proxy()
+
+    @staticmethod
+    def _default_headers() -> Dict[str, str]:
+        if settings.USE_RANDOM_HEADERS:
+            return get_random_headers()
+        return dict(DEFAULT_HEADERS)
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: Optional[Dict[str, str]] = None,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """
+        Выполнить запрос через клиент хоста.
+
+        Args:
+            method: HTTP метод
+            url: Абсолютный URL
+            headers: Дополнительные заголовки (поверх заголовков по умолчанию)
+            **kwargs: Параметры ``httpx.AsyncClient.request`` (params, timeout, ...)
+
+        Returns:
+            HTTP ответ (статус не проверяется)
+
+        Raises:
+            httpx.ProxyError: Прокси недоступен (прокси помечается как неработающий)
+        """
+        host = urlsplit(url).netloc
+        proxy = self._pick_proxy()
+        client = await self.client_for(host, proxy)
+        name = self._client_name(host, proxy)
+
+        request_headers = self._default_headers()
+        if headers:
+            request_headers.update(headers)
+        request_headers = {
+            key: value for key, value in request_headers.items() if key.lower() not in _HOP_BY_HOP_HEADERS
+        }
+
+        self.pool.record_request(name)
+        try:
+            if method.upper() == "GET":
+                return await client.get(url, headers=request_headers, **kwargs)
+            return await client.request(method.upper(), url, headers=request_headers, **kwargs)
+        except httpx.ProxyError:
+            self.pool.record_error(name)
+            if proxy is not None:
+                self.proxies.mark_as_failed(proxy)
+            raise
+        except httpx.RequestError:
+            self.pool.record_error(name)
+            raise
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        """GET запрос через клиент хоста."""
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs: Any) -> httpx.Response:
+        """POST запрос через клиент хоста."""
+        return await self.request("POST", url, **kwargs)
+
+    @asynccontextmanager
+    async def session(
+        self,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator["TransportSession"]:
+        """
+        Контекст с общими заголовками и таймаутом для серии запросов.
+
+        Выход из контекста не закрывает соединения — они остаются в пуле.
+        """
+        yield TransportSession(self, headers=headers, timeout=timeout)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика клиентов парсеров в пуле."""
+        stats = self.pool.get_stats()
+        names = [name for name in stats["client_names"] if name.startswith("parser:")]
+        return {
+            "clients": names,
+            "requests": {name: stats["request_count"].get(name, 0) for name in names},
+            "errors": {name: stats["error_count"].get(name, 0) for name in names},
+            "http2": self.http2,
+            "proxies_enabled": self.use_proxies,
+        }
+
+
+class TransportSession:
+    """Набор общих параметров запроса поверх ``ParserTransport``."""
+
+    def __init__(
+        self,
+        transport: ParserTransport,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> None:
+        self.transport = transport
+        self.headers = headers or {}
+        self.timeout = timeout
+
+    def _merge(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        headers = dict(self.headers)
+        headers.update(kwargs.pop("headers", None) or {})
+        kwargs["headers"] = headers
+        if self.timeout is not None:
+            kwargs.setdefault("timeout", self.timeout)
+        return kwargs
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.transport.get(url, **self._merge(kwargs))
+
+    async def post(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.transport.post(url, **self._merge(kwargs))
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.transport.request(method, url, **self._merge(kwargs))
+
+
+# Глобальный транспорт парсеров
+parser_transport = ParserTransport()
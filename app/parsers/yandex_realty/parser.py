@@ -1,13 +1,13 @@
 import asyncio
 import httpx
 import logging
-import re
-from bs4 import BeautifulSoup
 from typing import Any, Dict, List, Optional
 
 from app.core.config import settings
 from app.models.schemas import PropertyCreate
 from app.parsers.base_parser import BaseParser, metrics_collector_decorator
+from app.parsers.extraction import FieldSpec, ListingSpec
+from app.parsers.transport import ParserTransport
 from app.services.advanced_cache import cached_parser
 from app.utils.parser_errors import (
     ParserErrorHandler,
@@ -26,9 +26,25 @@ logger = logging.getLogger(__name__)
 
 class YandexRealtyParser(BaseParser):
     BASE_URL = "https://realty.yandex.ru"
+    listing_spec = ListingSpec(
+        source="yandex_realty",
+        base_url=BASE_URL,
+        card="[data-name='OfferCard']",
+        fields={
+            "title": FieldSpec("[data-mark='OfferTitle']"),
+            "price": FieldSpec("[data-mark='MainPrice']"),
+            "link": FieldSpec("a", attr="href"),
+            "photos": FieldSpec("img", attr="src", many=True, limit=5),
+            "address": FieldSpec("[data-mark='Address']"),
+            "description": FieldSpec("[data-mark='Description']"),
+        },
+        id_patterns=(r"/offer/(\d+)/?$",),
+    )
+    page_param = "page"
+    rate_limit_key = "yandex_realty"
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, transport: Optional[ParserTransport] = None):
+        super().__init__(transport)
         self.name = "YandexRealtyParser"
 
     @cached_parser(expire=600, source="yandex_realty")  # Кеш на 10 минут
@@ -36,7 +52,7 @@ class YandexRealtyParser(BaseParser):
     @metrics_collector_decorator
     async def parse(self, location: str, params: Dict[str, Any] = None) -> List[PropertyCreate]:
         # Проверяем circuit breaker перед попыткой
-        circuit_breaker = get_circuit_breaker("yandex_realty")
+        circuit_breaker = await get_circuit_breaker("yandex_realty")
 
         try:
             return await circuit_breaker.call_async(self._parse_internal, location, params)
@@ -53,15 +69,14 @@ class YandexRealtyParser(BaseParser):
         url = f"{self.BASE_URL}/search/"
         query_params = self._build_query_params(location, processed_params)
 
-        # Apply rate limiting
-        await rate_limiter.acquire("yandex_realty")
-
         try:
-            async with httpx.AsyncClient(timeout=settings.REQUEST_TIMEOUT) as client:
-                response = await client.get(url, params=query_params)
-                response.raise_for_status()  # Raise an exception for bad status codes
-                results = self._parse_html(response.text)
-                return await self.postprocess_results(results)
+            # Страницы выдачи конкурентно, каждая — под rate limiter источника
+            results = await self.fetch_pages(
+                url, query_params,
+                max_pages=processed_params.get("max_pages"),
+                rate_limit=lambda: rate_limiter.acquire(self.rate_limit_key),
+            )
+            return await self.postprocess_results(results)
         except asyncio.TimeoutError as e:
             parser_error = ParserTimeoutError(f"Timeout while fetching {url}: {e}")
             ParserErrorHandler.log_error(parser_error, context="YandexRealtyParser._parse_internal")
@@ -148,134 +163,3 @@ class YandexRealtyParser(BaseParser):
                 query_params["rooms"] = str(rooms)
                         
         return query_params
-        
-    def _parse_html(self, html: str) -> list[PropertyCreate]:
-        soup = BeautifulSoup(html, "lxml")
-        properties = []
-        
-        # Find property listings
-        # Note: Actual selectors would need to be updated based on Yandex Realty's current HTML structure
-        listings = soup.select("[data-name='OfferCard']")  # Placeholder selector
-        
-        for item in listings:
-            try:
-                # Extract basic information
-                title_elem = item.select_one("[data-mark='OfferTitle']")
-                price_elem = item.select_one("[data-mark='MainPrice']")
-                
-                if not all([title_elem, price_elem]):
-                    continue
-                    
-                # Extract title
-                title = title_elem.get_text(strip=True) if title_elem else ""
-                
-                # Extract price (remove non-numeric characters except decimal point)
-                price_text = price_elem.get_text(strip=True) if price_elem else ""
-                price_digits = re.findall(r'[\d\s]+', price_text)
-                price = float(''.join(price_digits).replace(' ', '')) if price_digits else 0
-                
-                # Extract link
-                link_elem = item.select_one("a")
-                link = link_elem.get("href", "") if link_elem else ""
-                if link and not link.startswith("http"):
-                    link = self.BASE_URL + link
-                    
-                # Parse title for rooms and area information
-                rooms = self._extract_rooms_from_title(title)
-                area = self._extract_area_from_title(title)
-                
-                # Extract photos
-                photos = []
-                img_elements = item.select("img")
-                for img in img_elements:
-                    if img.get("src"):
-                        photos.append(img["src"])
-                        
-                # Extract additional information
-                location = self._extract_location(item, title)
-                description = self._extract_description(item)
-                
-                props = {
-                    "source": "yandex_realty",
-                    "external_id": self._extract_external_id(link),
-                    "title": title,
-                    "price": price,
-                    "link": link,
-                    "rooms": rooms,
-                    "area": area,
-                    "photos": photos[:5],  # Limit to 5 photos
-                    "location": location,
-                    "description": description,
-                }
-                properties.append(PropertyCreate(**props))
-            except Exception as e:
-                logger.error(f"Error parsing item: {e}")
-                
-        return properties
-        
-    def _extract_rooms_from_title(self, title: str) -> int:
-        # Look for patterns like "2-к", "2 комнатная", etc.
-        room_patterns = [r'(\d+)[\-\s]*к', r'(\d+)\s*комнат', r'(\d+)\s*комн']
-        
-        for pattern in room_patterns:
-            match = re.search(pattern, title, re.IGNORECASE)
-            if match:
-                try:
-                    return int(match.group(1))
-                except ValueError:
-                    continue
-        return None
-        
-    def _extract_area_from_title(self, title: str) -> float:
-        # Look for patterns like "45 м²", "50м2", etc.
-        area_patterns = [r'(\d+(?:[\.,]\d+)?)\s*м\s*[²2]', r'(\d+(?:[\.,]\d+)?)\s*кв\.?\s*м']
-        
-        for pattern in area_patterns:
-            match = re.search(pattern, title, re.IGNORECASE)
-            if match:
-                try:
-                    return float(match.group(1).replace(',', '.'))
-                except ValueError:
-                    continue
-        return None
-        
-    def _extract_location(self, item, title: str = "") -> Optional[Dict[str, str]]:
-        """Extract location information from item."""
-        location = {}
-        
-        # Try to extract district/neighborhood from title
-        if title:
-            # Look for common Moscow districts in the title
-            moscow_districts = [
-                "центр", "цао", "север", "сао", "северо-восток", "свао", "восток", "вао",
-                "юго-восток", "ювао", "юг", "юао", "юго-запад", "юзао", "запад", "зао",
-                "северо-запад", "сзао", "зеленоград", "таганский", "басманный", "арбат",
-                "якиманка", "хамовники", "кунцево", "перово", "люблино"
-            ]
-            
-            for district in moscow_districts:
-                if district in title.lower():
-                    location["district"] = district
-                    break
-                    
-        # Try to extract address if available
-        address_elem = item.select_one("[data-mark='Address']")
-        if address_elem:
-            location["address"] = address_elem.get_text(strip=True)
-            
-        return location if location else None
-        
-    def _extract_description(self, item) -> Optional[str]:
-        """Extract description from item."""
-        # Look for description element
-        desc_elem = item.select_one("[data-mark='Description']")
-        if desc_elem:
-            return desc_elem.get_text(strip=True)
-            
-        return None
-        
-    def _extract_external_id(self, link: str) -> str:
-        """Extract external ID from link."""
-        # Extract ID from URL like https://realty.yandex.ru/offer/123456789/
-        match = re.search(r'/offer/(\d+)/?$', link)
-        return match.group(1) if match else ""
@@ -3,9 +3,7 @@
 import asyncio
 import hashlib
 import json
-import pickle
 import logging
-import zlib
 import fnmatch
 import time
 from datetime import datetime, timedelta
@@ -16,6 +14,9 @@ import redis.asyncio as redis
 
 from app.core.config import settings
 from app.models.schemas import PropertyCreate
+from app.services.cache_codec import CacheCodec, CacheCodecError, resolve_codec
+from app.services.single_flight import SingleFlight
+from app.services.stale_cache import StaleWhileRevalidate, hard_ttl, wrap
 from app.utils.metrics import metrics_collector
 
 logger = logging.getLogger(__name__)
@@ -99,9 +100,13 @@ class InMemoryAsyncRedis:
 class AdvancedCacheManager:
     """Расширенный менеджер кеша с метриками и cache warming."""
 
-    def __init__(self, redis_url: str = settings.REDIS_URL):
+    def __init__(self, redis_url: str = settings.REDIS_URL, codec: Optional[CacheCodec] = None):
         self.redis_url = redis_url
         self.redis_client: Optional[redis.Redis] = None
+        # Формат новых записей; читаются все известные форматы, включая старый pickle
+        self.codec = codec or resolve_codec(
+            settings.CACHE_SERIALIZER, settings.CACHE_COMPRESSION, settings.CACHE_COMPRESS_THRESHOLD
+        )
         
         # Метрики кеша
         self.hits = 0
@@ -170,18 +175,16 @@ class AdvancedCacheManager:
                 self.hits += 1
                 metrics_collector.record_cache_hit()
                 logger.debug(f"Cache HIT: {key[:50]}... (hit rate: {self.get_hit_rate():.2%})")
-                # Decompress if compressed
-                if value.startswith(b'COMPRESSED:'):
-                    compressed_data = value[11:]  # Remove prefix
-                    decompressed_data = zlib.decompress(compressed_data)
-                    return pickle.loads(decompressed_data)
-                else:
-                    return pickle.loads(value)
+                return self.codec.decode(value)
             else:
                 self.misses += 1
                 metrics_collector.record_cache_miss()
                 logger.debug(f"Cache MISS: {key[:50]}... (hit rate: {self.get_hit_rate():.2%})")
                 return None
+        except CacheCodecError as e:
+            # Запись другого формата или устаревшей схемы — считаем промахом, её перезапишут
+            logger.warning(f"Unreadable cache entry {key[:50]}...: {e}")
+            return None
         except Exception as e:
             self.errors += 1
             metrics_collector.record_cache_error()
@@ -201,16 +204,9 @@ class AdvancedCacheManager:
             return False
 
         try:
-            serialized_value = pickle.dumps(value)
-            
-            # Compress large values to save memory
-            if compress and len(serialized_value) > 1024:  # Compress if > 1KB
-                compressed_value = zlib.compress(serialized_value)
-                final_value = b'COMPRESSED:' + compressed_value
-                logger.debug(f"Compressed cache value from {len(serialized_value)} to {len(final_value)} bytes")
-            else:
-                final_value = serialized_value
-            
+            # Крупные значения кодек сжимает для экономии памяти
+            final_value = self.codec.encode(value, compress=compress)
+
             # Устанавливаем основное значение
             result = await self.redis_client.setex(key, expire, final_value)
             
@@ -241,12 +237,11 @@ class AdvancedCacheManager:
                 if value:
                     self.hits += 1
                     metrics_collector.record_cache_hit()
-                    if value.startswith(b'COMPRESSED:'):
-                        compressed_data = value[11:]
-                        decompressed_data = zlib.decompress(compressed_data)
-                        results.append(pickle.loads(decompressed_data))
-                    else:
-                        results.append(pickle.loads(value))
+                    try:
+                        results.append(self.codec.decode(value))
+                    except CacheCodecError as e:
+                        logger.warning(f"Unreadable cache entry in MGET: {e}")
+                        results.append(None)
                 else:
                     self.misses += 1
                     metrics_collector.record_cache_miss()
@@ -266,15 +261,7 @@ class AdvancedCacheManager:
         try:
             pipeline = self.redis_client.pipeline()
             for key, value in items.items():
-                serialized_value = pickle.dumps(value)
-                
-                if compress and len(serialized_value) > 1024:
-                    compressed_value = zlib.compress(serialized_value)
-                    final_value = b'COMPRESSED:' + compressed_value
-                else:
-                    final_value = serialized_value
-                
-                pipeline.setex(key, expire, final_value)
+                pipeline.setex(key, expire, self.codec.encode(value, compress=compress))
             
             await pipeline.execute()
             logger.debug(f"Cache MSET: {len(items)} keys (TTL: {expire}s)")
@@ -363,6 +350,15 @@ class AdvancedCacheManager:
             "hit_rate": self.get_hit_rate(),
             "total_requests": self.hits + self.misses,
             "connected": self.redis_client is not None,
+            "codec": self.codec.name,
+            "single_flight": {
+                "parser": parser_flight.get_stats(),
+                "cached": cached_flight.get_stats(),
+            },
+            "stale_while_revalidate": {
+                "parser": parser_swr.get_stats(),
+                "cached": cached_swr.get_stats(),
+            },
         }
         
         if self.redis_client:
@@ -476,6 +472,14 @@ class AdaptiveCache:
 # Глобальный экземпляр адаптивного кеша
 adaptive_cache = AdaptiveCache()
 
+# Single-flight группы для декораторов: одно вычисление на ключ кеша в процессе
+parser_flight = SingleFlight("parser", redis_getter=lambda: advanced_cache_manager.redis_client)
+cached_flight = SingleFlight("cached", redis_getter=lambda: advanced_cache_manager.redis_client)
+
+# Stale-while-revalidate поверх тех же групп: устаревшее значение отдаётся сразу, обновление — в фоне
+parser_swr = StaleWhileRevalidate("parser", parser_flight)
+cached_swr = StaleWhileRevalidate("cached", cached_flight)
+
 
 def get_cache_key(prefix: str, *args, **kwargs) -> str:
     """
@@ -496,22 +500,32 @@ def get_cache_key(prefix: str, *args, **kwargs) -> str:
     return f"{prefix}:{hash_key}"
 
 
-def cached_parser(expire: int = settings.CACHE_TTL, source: str = "unknown", compress: bool = True, adaptive: bool = False):
+def cached_parser(
+    expire: int = settings.CACHE_TTL,
+    source: str = "unknown",
+    compress: bool = True,
+    adaptive: bool = False,
+    stale_ttl: Optional[int] = None,
+):
     """
     Декоратор для кеширования результатов парсера.
 
     Args:
-        expire: Время жизни кеша в секундах
+        expire: Время свежести кеша в секундах (мягкий TTL)
         source: Название источника парсера (для тегирования)
         compress: Сжимать данные в кеше
         adaptive: Использовать адаптивное кеширование
+        stale_ttl: Сколько секунд после ``expire`` отдавать устаревшее значение,
+            обновляя его в фоне (по умолчанию ``CACHE_STALE_TTL``, 0 — отключить)
     """
 
     def decorator(func: Callable) -> Callable:
         @wraps(func)
         async def wrapper(*args, **kwargs):
-            # Генерируем ключ кеша с префиксом парсера
-            cache_key = get_cache_key(f"parser:{source}", *args, **kwargs)
+            # Экземпляр парсера (self) не входит в ключ: иначе каждый новый
+            # экземпляр получал бы свой ключ и одинаковые запросы не объединялись
+            key_args = args[1:] if args and hasattr(type(args[0]), func.__name__) else args
+            cache_key = get_cache_key(f"parser:{source}", *key_args, **kwargs)
 
             # Обеспечиваем готовность клиента кеша (lazily connect)
             if advanced_cache_manager.redis_client is None:
@@ -521,27 +535,33 @@ def cached_parser(expire: int = settings.CACHE_TTL, source: str = "unknown", com
             if adaptive:
                 adaptive_cache.record_access(cache_key)
 
-            # Пытаемся получить значение из кеша
-            cached_result = await advanced_cache_manager.get(cache_key)
-            if cached_result is not None:
-                return cached_result
-
-            # Если значения нет в кеше, вызываем функцию
-            result = await func(*args, **kwargs)
-
-            # Determine TTL for caching
-            actual_expire = expire
-            if adaptive:
-                actual_expire = adaptive_cache.get_adaptive_ttl(cache_key, expire)
-
-            # Сохраняем результат в кеш с тегами
-            tags = [f"source:{source}", f"parser"]
-            if args:
-                # Предполагаем что первый аргумент - город
-                tags.append(f"city:{args[0]}")
-            
-            await advanced_cache_manager.set(cache_key, result, actual_expire, tags=tags, compress=compress)
+            async def compute():
+                # Если значения нет в кеше (или оно устарело), вызываем функцию
+                result = await func(*args, **kwargs)
+
+                # Determine TTL for caching
+                actual_expire = expire
+                if adaptive:
+                    actual_expire = adaptive_cache.get_adaptive_ttl(cache_key, expire)
+
+                # Сохраняем результат в кеш с тегами
+                tags = [f"source:{source}", f"parser"]
+                if key_args:
+                    # Предполагаем что первый аргумент - город
+                    tags.append(f"city:{key_args[0]}")
+
+                await advanced_cache_manager.set(
+                    cache_key,
+                    wrap(result, actual_expire),
+                    hard_ttl(actual_expire, stale_ttl),
+                    tags=tags,
+                    compress=compress,
+                )
+                return result
 
+            # Одновременные промахи по одному ключу ждут одно вычисление,
+            # устаревшее значение отдаётся сразу с обновлением в фоне
+            result, _ = await parser_swr.fetch(cache_key, lambda: advanced_cache_manager.get(cache_key), compute)
             return result
 
         return wrapper
@@ -549,14 +569,21 @@ def cached_parser(expire: int = settings.CACHE_TTL, source: str = "unknown", com
     return decorator
 
 
-def cached(expire: int = settings.CACHE_TTL, prefix: str = "default", adaptive: bool = False):
+def cached(
+    expire: int = settings.CACHE_TTL,
+    prefix: str = "default",
+    adaptive: bool = False,
+    stale_ttl: Optional[int] = None,
+):
     """
     Универсальный декоратор для кеширования результатов функций.
 
     Args:
-        expire: Время жизни кеша в секундах
+        expire: Время свежести кеша в секундах (мягкий TTL)
         prefix: Префикс для ключа кеша
         adaptive: Использовать адаптивное кеширование
+        stale_ttl: Сколько секунд после ``expire`` отдавать устаревшее значение,
+            обновляя его в фоне (по умолчанию ``CACHE_STALE_TTL``, 0 — отключить)
     """
 
     def decorator(func: Callable) -> Callable:
@@ -573,22 +600,22 @@ def cached(expire: int = settings.CACHE_TTL, prefix: str = "default", adaptive:
             if adaptive:
                 adaptive_cache.record_access(cache_key)
 
-            # Пытаемся получить значение из кеша
-            cached_result = await advanced_cache_manager.get(cache_key)
-            if cached_result is not None:
-                return cached_result
+            async def compute():
+                # Если значения нет в кеше (или оно устарело), вызываем функцию
+                result = await func(*args, **kwargs)
 
-            # Если значения нет в кеше, вызываем функцию
-            result = await func(*args, **kwargs)
+                # Determine TTL for caching
+                actual_expire = expire
+                if adaptive:
+                    actual_expire = adaptive_cache.get_adaptive_ttl(cache_key, expire)
 
-            # Determine TTL for caching
-            actual_expire = expire
-            if adaptive:
-                actual_expire = adaptive_cache.get_adaptive_ttl(cache_key, expire)
-
-            # Save result to cache with appropriate TTL
-            await advanced_cache_manager.set(cache_key, result, actual_expire)
+                # Save result to cache with appropriate TTL
+                await advanced_cache_manager.set(
+                    cache_key, wrap(result, actual_expire), hard_ttl(actual_expire, stale_ttl)
+                )
+                return result
 
+            result, _ = await cached_swr.fetch(cache_key, lambda: advanced_cache_manager.get(cache_key), compute)
             return result
 
         return wrapper
@@ -2,25 +2,193 @@
 Asynchronous export service for large datasets.
 
 Provides streaming export capabilities with progress tracking for large property datasets.
+
+Строки читаются серверным курсором (``stream_properties_query``) пачками по
+``BATCH_SIZE`` и сразу кодируются в байты: память не растёт с размером
+выгрузки. CSV из PostgreSQL через asyncpg отдаётся напрямую из
+``COPY ... TO STDOUT`` без разбора строк в Python. JSON/JSONL кодируются
+``orjson``, если он установлен.
+
+Parquet (нужен ``pyarrow``): пачки курсора переводятся в Arrow record batch,
+каждые ``PARQUET_BATCH_SIZE`` строк пишутся отдельной row group со сжатием
+zstd; ``source``/``city``/``district`` кодируются словарём. Готовые байты
+row group отдаются клиенту сразу.
 """
 import asyncio
-from typing import AsyncGenerator, Dict, List, Optional, Any
-from datetime import datetime
 import csv
-import json
+import importlib.util
 import io
+import json
+from contextlib import suppress
+from datetime import date, datetime
+from typing import Any, AsyncGenerator, Callable, Dict, Optional, Sequence
 
+from sqlalchemy import Select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.models.property import Property
+from app.db.optimized_crud import properties_stream_query, stream_properties_query
+from app.db.read_models import PROPERTIES
 from app.utils.logger import logger
 from app.utils.metrics import metrics_collector
 
+ORJSON_AVAILABLE = importlib.util.find_spec("orjson") is not None
+PYARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+# Колонки выгрузки: url — ссылка на объявление (колонка link)
+EXPORT_FIELDS = (
+    'id', 'source', 'external_id', 'title', 'price', 'area',
+    'rooms', 'city', 'district', 'url', 'created_at',
+)
+EXPORT_COLUMNS = tuple(
+    PROPERTIES.c.link.label('url') if name == 'url' else PROPERTIES.c[name]
+    for name in EXPORT_FIELDS
+)
+
+MEDIA_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'json': 'application/json',
+    'jsonl': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+# Колонки Parquet со словарным кодированием (мало различных значений)
+PARQUET_DICTIONARY_COLUMNS = ('source', 'city', 'district')
+PARQUET_COMPRESSION = 'zstd'
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _get_json_dumps() -> Callable[[Dict[str, Any]], bytes]:
+    """Кодировщик объекта в UTF-8 JSON: orjson, иначе стандартный json."""
+    if ORJSON_AVAILABLE:
+        import orjson
+
+        return orjson.dumps
+
+    def dumps(item: Dict[str, Any]) -> bytes:
+        return json.dumps(item, ensure_ascii=False, default=_json_default).encode('utf-8')
+
+    return dumps
+
+
+def encode_csv_rows(rows: Sequence[Sequence[Any]]) -> bytes:
+    """Пачка строк в CSV."""
+    output = io.StringIO()
+    csv.writer(output, lineterminator='\n').writerows(rows)
+    return output.getvalue().encode('utf-8')
+
+
+def encode_jsonl_rows(rows: Sequence[Sequence[Any]], dumps: Callable[[Dict[str, Any]], bytes]) -> bytes:
+    """Пачка строк в JSONL (каждая строка завершается переводом строки)."""
+    return b''.join(dumps(dict(zip(EXPORT_FIELDS, row))) + b'\n' for row in rows)
+
+
+def encode_json_rows(
+    rows: Sequence[Sequence[Any]],
+    dumps: Callable[[Dict[str, Any]], bytes],
+    first: bool,
+) -> bytes:
+    """Пачка строк как продолжение JSON-массива."""
+    body = b',\n'.join(dumps(dict(zip(EXPORT_FIELDS, row))) for row in rows)
+    return body if first else b',\n' + body
+
+
+def parquet_schema():
+    """Arrow-схема выгрузки ``EXPORT_FIELDS``."""
+    import pyarrow as pa
+
+    return pa.schema([
+        ('id', pa.int64()),
+        ('source', pa.string()),
+        ('external_id', pa.string()),
+        ('title', pa.string()),
+        ('price', pa.float64()),
+        ('area', pa.float64()),
+        ('rooms', pa.int32()),
+        ('city', pa.string()),
+        ('district', pa.string()),
+        ('url', pa.string()),
+        ('created_at', pa.timestamp('us', tz='UTC')),
+    ])
+
+
+def rows_to_record_batch(rows: Sequence[Sequence[Any]], schema):
+    """Пачка строк в Arrow record batch (по колонкам)."""
+    import pyarrow as pa
+
+    columns = list(zip(*rows)) if rows else [()] * len(schema)
+    return pa.RecordBatch.from_arrays(
+        [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+        schema=schema,
+    )
+
+
+class _ChunkSink(io.RawIOBase):
+    """Файл для ``ParquetWriter``: копит записанные байты до ``drain()``."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: list = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ParquetStreamWriter:
+    """
+    Пишет Parquet по row group и отдаёт готовые байты.
+
+    Каждый ``write_batches`` — одна row group; ``close`` дописывает футер.
+    """
+
+    def __init__(self):
+        import pyarrow.parquet as pq
+
+        self.schema = parquet_schema()
+        self._sink = _ChunkSink()
+        self._writer = pq.ParquetWriter(
+            self._sink,
+            self.schema,
+            compression=PARQUET_COMPRESSION,
+            use_dictionary=list(PARQUET_DICTIONARY_COLUMNS),
+        )
+
+    def write_batches(self, batches: Sequence[Any]) -> bytes:
+        import pyarrow as pa
+
+        table = pa.Table.from_batches(batches, schema=self.schema)
+        self._writer.write_table(table, row_group_size=max(table.num_rows, 1))
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        self._writer.close()
+        return self._sink.drain()
+
 
 class AsyncExportService:
     """Service for asynchronous export of large datasets."""
 
-    BATCH_SIZE = 1000  # Process in batches to avoid memory issues
+    BATCH_SIZE = 1000  # Rows per server-side cursor fetch
+    PARQUET_BATCH_SIZE = 50000  # Rows per Parquet row group
+    COPY_QUEUE_SIZE = 16  # COPY chunks buffered ahead of the client
     EXPORT_FORMATS = ['csv', 'json', 'jsonl', 'parquet']
 
     @staticmethod
@@ -30,47 +198,43 @@ class AsyncExportService:
         city: Optional[str] = None,
         limit: Optional[int] = None,
         offset: int = 0,
-    ) -> AsyncGenerator[str, None]:
+    ) -> AsyncGenerator[bytes, None]:
         """
         Export properties with streaming to handle large datasets.
 
         Args:
             db: Database session
-            format: Export format (csv, json, jsonl)
+            format: Export format (csv, json, jsonl, parquet)
             city: Filter by city
             limit: Maximum number of items
             offset: Number of items to skip
 
         Yields:
-            Chunks of exported data
+            Chunks of exported data (UTF-8 text or Parquet bytes)
+
+        Raises:
+            ValueError: Unsupported format or ``pyarrow`` is not installed for parquet
         """
         if format not in AsyncExportService.EXPORT_FORMATS:
             raise ValueError(f"Unsupported format: {format}")
+        if format == 'parquet' and not PYARROW_AVAILABLE:
+            raise ValueError("Parquet export requires pyarrow")
 
         start_time = datetime.utcnow()
-        total_items = 0
+        stats = {'items': 0}
 
         try:
             if format == 'csv':
-                async for chunk in AsyncExportService._export_csv(
-                    db, city, limit, offset
-                ):
-                    total_items += len(chunk.split('\n')) - 1
-                    yield chunk
-
+                chunks = AsyncExportService._export_csv(db, city, limit, offset, stats)
             elif format == 'json':
-                async for chunk in AsyncExportService._export_json(
-                    db, city, limit, offset
-                ):
-                    total_items += 1
-                    yield chunk
-
+                chunks = AsyncExportService._export_json(db, city, limit, offset, stats)
             elif format == 'jsonl':
-                async for chunk in AsyncExportService._export_jsonl(
-                    db, city, limit, offset
-                ):
-                    total_items += 1
-                    yield chunk
+                chunks = AsyncExportService._export_jsonl(db, city, limit, offset, stats)
+            else:
+                chunks = AsyncExportService._export_parquet(db, city, limit, offset, stats)
+
+            async for chunk in chunks:
+                yield chunk
 
             # Record export metrics
             duration = (datetime.utcnow() - start_time).total_seconds()
@@ -78,7 +242,7 @@ class AsyncExportService:
                 format=format,
                 status='success',
                 duration=duration,
-                items_count=total_items
+                items_count=stats['items']
             )
 
         except Exception as e:
@@ -94,189 +258,153 @@ class AsyncExportService:
             )
             raise
 
+    @staticmethod
+    async def _stream_rows(
+        db: AsyncSession,
+        city: Optional[str],
+        limit: Optional[int],
+        offset: int,
+        stats: Dict[str, int],
+    ) -> AsyncGenerator[Sequence[Any], None]:
+        """Пачки строк ``EXPORT_COLUMNS`` из серверного курсора."""
+        async for rows in stream_properties_query(
+            db,
+            columns=EXPORT_COLUMNS,
+            city=city,
+            is_active=None,
+            limit=limit,
+            offset=offset,
+            batch_size=AsyncExportService.BATCH_SIZE,
+        ):
+            stats['items'] += len(rows)
+            yield rows
+
     @staticmethod
     async def _export_csv(
         db: AsyncSession,
-        city: Optional[str] = None,
-        limit: Optional[int] = None,
-        offset: int = 0,
-    ) -> AsyncGenerator[str, None]:
+        city: Optional[str],
+        limit: Optional[int],
+        offset: int,
+        stats: Dict[str, int],
+    ) -> AsyncGenerator[bytes, None]:
         """Export as CSV with streaming."""
-        output = io.StringIO()
-        writer = csv.DictWriter(
-            output,
-            fieldnames=[
-                'id', 'source', 'external_id', 'title', 'price', 'area',
-                'rooms', 'city', 'district', 'url', 'property_type', 'created_at'
-            ]
-        )
+        connection = await db.connection()
+        if connection.dialect.name == 'postgresql' and connection.dialect.driver == 'asyncpg':
+            query = properties_stream_query(EXPORT_COLUMNS, city=city, is_active=None, limit=limit, offset=offset)
+            # Строки не разбираются: для метрики считаем переводы строк без заголовка
+            stats['items'] = -1
+            async for chunk in AsyncExportService._copy_csv(db, query):
+                stats['items'] += chunk.count(b'\n')
+                yield chunk
+            return
+
+        yield encode_csv_rows([EXPORT_FIELDS])
+        async for rows in AsyncExportService._stream_rows(db, city, limit, offset, stats):
+            yield encode_csv_rows(rows)
 
-        # Write header
-        writer.writeheader()
-        yield output.getvalue()
-        output.truncate(0)
-        output.seek(0)
-
-        # Fetch and write data in batches
-        batch_offset = offset
-        while True:
-            # Fetch batch
-            properties = await AsyncExportService._fetch_batch(
-                db, city, AsyncExportService.BATCH_SIZE, batch_offset
-            )
+    @staticmethod
+    async def _copy_csv(db: AsyncSession, query: Select) -> AsyncGenerator[bytes, None]:
+        """
+        CSV через ``COPY (query) TO STDOUT`` (asyncpg).
 
-            if not properties:
-                break
-
-            # Write batch
-            for prop in properties:
-                writer.writerow({
-                    'id': prop.id,
-                    'source': prop.source,
-                    'external_id': prop.external_id,
-                    'title': prop.title,
-                    'price': prop.price,
-                    'area': prop.area,
-                    'rooms': prop.rooms,
-                    'city': prop.city,
-                    'district': prop.district,
-                    'url': prop.url,
-                    'property_type': prop.property_type,
-                    'created_at': prop.created_at,
-                })
-
-            yield output.getvalue()
-            output.truncate(0)
-            output.seek(0)
-
-            batch_offset += AsyncExportService.BATCH_SIZE
-
-            # Check limit
-            if limit and batch_offset - offset >= limit:
-                break
+        Чанки COPY передаются через ограниченную очередь: если клиент читает
+        медленно, COPY ждёт, а не копит выгрузку в памяти.
+        """
+        connection = await db.connection()
+        compiled = query.compile(dialect=connection.dialect)
+        args = [compiled.params[name] for name in compiled.positiontup or ()]
+        raw = await connection.get_raw_connection()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=AsyncExportService.COPY_QUEUE_SIZE)
+
+        async def copy() -> None:
+            try:
+                await raw.driver_connection.copy_from_query(
+                    str(compiled), *args, output=queue.put, format='csv', header=True,
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await queue.put(e)
+                return
+            await queue.put(None)
+
+        task = asyncio.create_task(copy())
+        try:
+            while True:
+                chunk = await queue.get()
+                if chunk is None:
+                    break
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield bytes(chunk)
+        finally:
+            if not task.done():
+                task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await task
 
     @staticmethod
     async def _export_json(
         db: AsyncSession,
-        city: Optional[str] = None,
-        limit: Optional[int] = None,
-        offset: int = 0,
-    ) -> AsyncGenerator[str, None]:
+        city: Optional[str],
+        limit: Optional[int],
+        offset: int,
+        stats: Dict[str, int],
+    ) -> AsyncGenerator[bytes, None]:
         """Export as JSON array with streaming."""
-        items = []
-        batch_offset = offset
+        dumps = _get_json_dumps()
 
         # Start array
-        yield '[\n'
-
-        first_item = True
-        while True:
-            # Fetch batch
-            properties = await AsyncExportService._fetch_batch(
-                db, city, AsyncExportService.BATCH_SIZE, batch_offset
-            )
+        yield b'[\n'
 
-            if not properties:
-                break
-
-            # Convert to dicts
-            for prop in properties:
-                if not first_item:
-                    yield ',\n'
-                else:
-                    first_item = False
-
-                prop_dict = {
-                    'id': prop.id,
-                    'source': prop.source,
-                    'external_id': prop.external_id,
-                    'title': prop.title,
-                    'price': prop.price,
-                    'area': prop.area,
-                    'rooms': prop.rooms,
-                    'city': prop.city,
-                    'district': prop.district,
-                    'url': prop.url,
-                    'property_type': prop.property_type,
-                    'created_at': prop.created_at.isoformat() if prop.created_at else None,
-                }
-                yield json.dumps(prop_dict, ensure_ascii=False)
-
-            batch_offset += AsyncExportService.BATCH_SIZE
-
-            # Check limit
-            if limit and batch_offset - offset >= limit:
-                break
+        first = True
+        async for rows in AsyncExportService._stream_rows(db, city, limit, offset, stats):
+            yield encode_json_rows(rows, dumps, first)
+            first = False
 
         # End array
-        yield '\n]'
+        yield b'\n]'
 
     @staticmethod
     async def _export_jsonl(
         db: AsyncSession,
-        city: Optional[str] = None,
-        limit: Optional[int] = None,
-        offset: int = 0,
-    ) -> AsyncGenerator[str, None]:
+        city: Optional[str],
+        limit: Optional[int],
+        offset: int,
+        stats: Dict[str, int],
+    ) -> AsyncGenerator[bytes, None]:
         """Export as JSONL (newline-delimited JSON)."""
-        batch_offset = offset
-
-        while True:
-            # Fetch batch
-            properties = await AsyncExportService._fetch_batch(
-                db, city, AsyncExportService.BATCH_SIZE, batch_offset
-            )
-
-            if not properties:
-                break
-
-            # Write batch
-            output = io.StringIO()
-            for prop in properties:
-                prop_dict = {
-                    'id': prop.id,
-                    'source': prop.source,
-                    'external_id': prop.external_id,
-                    'title': prop.title,
-                    'price': prop.price,
-                    'area': prop.area,
-                    'rooms': prop.rooms,
-                    'city': prop.city,
-                    'district': prop.district,
-                    'url': prop.url,
-                    'property_type': prop.property_type,
-                    'created_at': prop.created_at.isoformat() if prop.created_at else None,
-                }
-                output.write(json.dumps(prop_dict, ensure_ascii=False) + '\n')
-
-            yield output.getvalue()
-
-            batch_offset += AsyncExportService.BATCH_SIZE
-
-            # Check limit
-            if limit and batch_offset - offset >= limit:
-                break
+        dumps = _get_json_dumps()
+        async for rows in AsyncExportService._stream_rows(db, city, limit, offset, stats):
+            yield encode_jsonl_rows(rows, dumps)
 
     @staticmethod
-    async def _fetch_batch(
+    async def _export_parquet(
         db: AsyncSession,
-        city: Optional[str] = None,
-        limit: int = BATCH_SIZE,
-        offset: int = 0,
-    ) -> List[Property]:
-        """Fetch a batch of properties."""
-        from sqlalchemy import select
-        from sqlalchemy.orm import selectinload
-
-        query = select(Property)
-
-        if city:
-            query = query.where(Property.city == city)
-
-        query = query.limit(limit).offset(offset)
+        city: Optional[str],
+        limit: Optional[int],
+        offset: int,
+        stats: Dict[str, int],
+    ) -> AsyncGenerator[bytes, None]:
+        """
+        Export as Parquet: one row group per ``PARQUET_BATCH_SIZE`` rows.
 
-        result = await db.execute(query)
-        return result.scalars().all()
+        Пачки курсора сразу переводятся в компактные Arrow record batch:
+        Python-кортежи живут только в пределах ``BATCH_SIZE`` строк.
+        """
+        writer = ParquetStreamWriter()
+        pending: list = []
+        pending_rows = 0
+        async for rows in AsyncExportService._stream_rows(db, city, limit, offset, stats):
+            pending.append(rows_to_record_batch(rows, writer.schema))
+            pending_rows += len(rows)
+            if pending_rows >= AsyncExportService.PARQUET_BATCH_SIZE:
+                # Кодирование и сжатие row group — CPU; не блокируем event loop
+                yield await asyncio.to_thread(writer.write_batches, pending)
+                pending, pending_rows = [], 0
+        if pending:
+            yield await asyncio.to_thread(writer.write_batches, pending)
+        yield writer.close()
 
     @staticmethod
     async def export_with_progress(
@@ -288,6 +416,8 @@ class AsyncExportService:
         """
         Export with progress tracking callback.
 
+        Чанки не накапливаются: считаются только их количество и объём.
+
         Args:
             db: Database session
             format: Export format
@@ -299,13 +429,13 @@ class AsyncExportService:
         """
         start_time = datetime.utcnow()
         total_items = 0
-        chunks = []
+        total_bytes = 0
 
         try:
             async for chunk in AsyncExportService.export_properties_streaming(
                 db, format, city
             ):
-                chunks.append(chunk)
+                total_bytes += len(chunk)
                 total_items += 1
 
                 if on_progress:
@@ -317,8 +447,9 @@ class AsyncExportService:
                 'status': 'success',
                 'format': format,
                 'items': total_items,
+                'bytes': total_bytes,
                 'duration_seconds': round(duration, 2),
-                'chunks': len(chunks),
+                'chunks': total_items,
             }
 
         except Exception as e:
@@ -0,0 +1,333 @@
+"""
+Кодеки значений кеша Redis: сериализатор + сжатие с версионируемым заголовком.
+
+Формат записи::
+
+    0xCA | версия формата | id сериализатора | id компрессора | payload
+
+Pickle-записи (в том числе с префиксом ``COMPRESSED:`` и zlib) читаются как
+раньше, поэтому переключение кодека не требует сброса кеша.
+
+Сериализаторы ``orjson`` и ``msgpack`` пишут pydantic-модели как словари с
+именем модели из реестра и при чтении валидируют их заново — запись,
+сохранённая до изменения схемы, либо поднимается в новую модель, либо
+читается как промах. Значения, которые нельзя так представить (кортежи,
+произвольные объекты), молча сохраняются через pickle.
+"""
+
+import importlib.util
+import pickle
+import zlib
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Type
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from app.models import schemas
+from app.services.stale_cache import CacheEnvelope
+from app.utils.logger import logger
+
+MAGIC = 0xCA
+FORMAT_VERSION = 1
+HEADER_SIZE = 4
+LEGACY_COMPRESSED_PREFIX = b"COMPRESSED:"
+
+ORJSON_AVAILABLE = importlib.util.find_spec("orjson") is not None
+MSGPACK_AVAILABLE = importlib.util.find_spec("msgpack") is not None
+LZ4_AVAILABLE = importlib.util.find_spec("lz4") is not None
+ZSTD_AVAILABLE = importlib.util.find_spec("zstandard") is not None
+
+# Служебные ключи «простого» представления; пользовательские словари с ключами на \x00 уходят в pickle
+_MODEL = "\x00m"
+_MODEL_LIST = "\x00ml"
+_ENVELOPE = "\x00e"
+
+
+class CacheCodecError(ValueError):
+    """Запись нельзя прочитать этим процессом (неизвестный формат, нет библиотеки, другая схема)."""
+
+
+class _Unrepresentable(TypeError):
+    pass
+
+
+@dataclass(frozen=True)
+class Serializer:
+    """Сериализатор значения в байты."""
+
+    id: int
+    name: str
+    dumps: Callable[[Any], bytes]
+    loads: Callable[[bytes], Any]
+    # Работает с «простым» деревом (dict/list/скаляры), а не с объектами Python
+    plain: bool = True
+
+
+@dataclass(frozen=True)
+class Compressor:
+    """Алгоритм сжатия payload."""
+
+    id: int
+    name: str
+    compress: Callable[[bytes], bytes]
+    decompress: Callable[[bytes], bytes]
+
+
+class CodecRegistry:
+    """Реестр сериализаторов, компрессоров и pydantic-моделей, допустимых в кеше."""
+
+    def __init__(self) -> None:
+        self.serializers: Dict[str, Serializer] = {}
+        self.compressors: Dict[str, Compressor] = {}
+        self._serializers_by_id: Dict[int, Serializer] = {}
+        self._compressors_by_id: Dict[int, Compressor] = {}
+        self._models: Dict[str, Type[BaseModel]] = {}
+        self._model_names: Dict[Type[BaseModel], str] = {}
+        # Списки моделей сериализуются и валидируются одним вызовом pydantic-core
+        self._list_adapters: Dict[Type[BaseModel], TypeAdapter] = {}
+
+    def register_serializer(self, serializer: Serializer) -> None:
+        self.serializers[serializer.name] = serializer
+        self._serializers_by_id[serializer.id] = serializer
+
+    def register_compressor(self, compressor: Compressor) -> None:
+        self.compressors[compressor.name] = compressor
+        self._compressors_by_id[compressor.id] = compressor
+
+    def register_model(self, model: Type[BaseModel], name: Optional[str] = None) -> None:
+        """Разрешает хранить модель в «простых» форматах под стабильным именем."""
+        name = name or model.__name__
+        self._models[name] = model
+        self._model_names[model] = name
+        self._list_adapters[model] = TypeAdapter(List[model])
+
+    def serializer_by_id(self, serializer_id: int) -> Serializer:
+        try:
+            return self._serializers_by_id[serializer_id]
+        except KeyError:
+            raise CacheCodecError(f"Unknown cache serializer id {serializer_id}") from None
+
+    def compressor_by_id(self, compressor_id: int) -> Compressor:
+        try:
+            return self._compressors_by_id[compressor_id]
+        except KeyError:
+            raise CacheCodecError(f"Unknown cache compressor id {compressor_id}") from None
+
+    def model_name(self, model: Type[BaseModel]) -> Optional[str]:
+        return self._model_names.get(model)
+
+    def model(self, name: str) -> Type[BaseModel]:
+        try:
+            return self._models[name]
+        except KeyError:
+            raise CacheCodecError(f"Model {name!r} is not registered for cache decoding") from None
+
+    # --- «простое» представление -------------------------------------------------
+
+    def to_plain(self, value: Any) -> Any:
+        """Переводит значение в дерево из dict/list/скаляров с метками моделей."""
+        if value is None or isinstance(value, (str, int, float, bool)):
+            return value
+        if isinstance(value, BaseModel):
+            return {_MODEL: self._require_name(type(value)), "d": value.model_dump(mode="json")}
+        if isinstance(value, list):
+            if value and isinstance(value[0], BaseModel):
+                model = type(value[0])
+                if all(type(item) is model for item in value):
+                    name = self._require_name(model)
+                    return {_MODEL_LIST: name, "d": self._list_adapters[model].dump_python(value, mode="json")}
+            return [self.to_plain(item) for item in value]
+        if isinstance(value, dict):
+            plain = {}
+            for key, item in value.items():
+                if not isinstance(key, str) or key.startswith("\x00"):
+                    raise _Unrepresentable(f"dict key {key!r}")
+                plain[key] = self.to_plain(item)
+            return plain
+        if isinstance(value, CacheEnvelope):
+            return {_ENVELOPE: value.fresh_until, "v": self.to_plain(value.value)}
+        raise _Unrepresentable(type(value).__name__)
+
+    def from_plain(self, plain: Any) -> Any:
+        """Обратное преобразование ``to_plain`` с валидацией моделей."""
+        if isinstance(plain, list):
+            return [self.from_plain(item) for item in plain]
+        if not isinstance(plain, dict):
+            return plain
+        try:
+            if _MODEL_LIST in plain:
+                model = self.model(plain[_MODEL_LIST])
+                return self._list_adapters[model].validate_python(plain["d"])
+            if _MODEL in plain:
+                return self.model(plain[_MODEL]).model_validate(plain["d"])
+        except ValidationError as e:
+            raise CacheCodecError(f"Cached model no longer matches its schema: {e}") from e
+        if _ENVELOPE in plain:
+            return CacheEnvelope(value=self.from_plain(plain["v"]), fresh_until=plain[_ENVELOPE])
+        return {key: self.from_plain(item) for key, item in plain.items()}
+
+    def _require_name(self, model: Type[BaseModel]) -> str:
+        name = self._model_names.get(model)
+        if name is None:
+            raise _Unrepresentable(f"model {model.__name__} is not registered")
+        return name
+
+
+class CacheCodec:
+    """Кодирование значений кеша выбранным сериализатором и компрессором."""
+
+    def __init__(
+        self,
+        serializer: str = "pickle",
+        compressor: str = "zlib",
+        compress_threshold: int = 1024,
+        registry: Optional[CodecRegistry] = None,
+    ) -> None:
+        """
+        Args:
+            serializer: Имя сериализатора для новых записей
+            compressor: Имя компрессора для записей больше порога
+            compress_threshold: Минимальный размер payload для сжатия (байт)
+            registry: Реестр кодеков (по умолчанию глобальный)
+        """
+        self.registry = registry or codec_registry
+        if serializer not in self.registry.serializers:
+            raise ValueError(f"Cache serializer {serializer!r} is not available")
+        if compressor not in self.registry.compressors:
+            raise ValueError(f"Cache compressor {compressor!r} is not available")
+        self.serializer = self.registry.serializers[serializer]
+        self.compressor = self.registry.compressors[compressor]
+        self.compress_threshold = compress_threshold
+        self._pickle = self.registry.serializers["pickle"]
+        self._none = self.registry.compressors["none"]
+
+    def encode(self, value: Any, compress: bool = True) -> bytes:
+        """
+        Кодирует значение в запись с заголовком.
+
+        Args:
+            value: Значение
+            compress: Разрешить сжатие (большие записи сжимаются выбранным компрессором)
+
+        Returns:
+            Байты для записи в Redis
+        """
+        serializer = self.serializer
+        if serializer.plain:
+            try:
+                payload = serializer.dumps(self.registry.to_plain(value))
+            except (_Unrepresentable, TypeError, ValueError, OverflowError):
+                serializer = self._pickle
+                payload = serializer.dumps(value)
+        else:
+            payload = serializer.dumps(value)
+
+        compressor = self._none
+        if compress and len(payload) > self.compress_threshold:
+            compressor = self.compressor
+            payload = compressor.compress(payload)
+
+        return bytes((MAGIC, FORMAT_VERSION, serializer.id, compressor.id)) + payload
+
+    def decode(self, data: bytes) -> Any:
+        """
+        Декодирует запись любого поддерживаемого формата, включая старые pickle-записи.
+
+        Raises:
+            CacheCodecError: Формат или схема записи этому процессу неизвестны
+        """
+        if data[:1] != bytes((MAGIC,)):
+            # Записи до появления заголовка: pickle, возможно сжатый zlib
+            if data.startswith(LEGACY_COMPRESSED_PREFIX):
+                return pickle.loads(zlib.decompress(data[len(LEGACY_COMPRESSED_PREFIX):]))
+            return pickle.loads(data)
+
+        if len(data) < HEADER_SIZE:
+            raise CacheCodecError("Truncated cache entry header")
+        version, serializer_id, compressor_id = data[1], data[2], data[3]
+        if version > FORMAT_VERSION:
+            raise CacheCodecError(f"Cache entry format v{version} is newer than supported v{FORMAT_VERSION}")
+
+        serializer = self.registry.serializer_by_id(serializer_id)
+        compressor = self.registry.compressor_by_id(compressor_id)
+        payload = compressor.decompress(data[HEADER_SIZE:])
+        value = serializer.loads(payload)
+        return self.registry.from_plain(value) if serializer.plain else value
+
+    @property
+    def name(self) -> str:
+        return f"{self.serializer.name}+{self.compressor.name}"
+
+
+def _build_registry() -> CodecRegistry:
+    registry = CodecRegistry()
+    registry.register_serializer(
+        Serializer(0, "pickle", lambda v: pickle.dumps(v, protocol=pickle.HIGHEST_PROTOCOL), pickle.loads, plain=False)
+    )
+    registry.register_compressor(Compressor(0, "none", lambda b: b, lambda b: b))
+    # Уровень 1: почти тот же размер для JSON/pickle объявлений при кратно меньшем времени сжатия
+    registry.register_compressor(Compressor(1, "zlib", lambda b: zlib.compress(b, 1), zlib.decompress))
+
+    if ORJSON_AVAILABLE:
+        import orjson
+
+        registry.register_serializer(Serializer(1, "orjson", orjson.dumps, orjson.loads))
+    if MSGPACK_AVAILABLE:
+        import msgpack
+
+        registry.register_serializer(
+            Serializer(2, "msgpack", msgpack.packb, lambda b: msgpack.unpackb(b, raw=False, strict_map_key=False))
+        )
+    if LZ4_AVAILABLE:
+        import lz4.frame
+
+        registry.register_compressor(Compressor(2, "lz4", lz4.frame.compress, lz4.frame.decompress))
+    if ZSTD_AVAILABLE:
+        import zstandard
+
+        registry.register_compressor(
+            Compressor(
+                3,
+                "zstd",
+                lambda b: zstandard.ZstdCompressor(level=3).compress(b),
+                lambda b: zstandard.ZstdDecompressor().decompress(b),
+            )
+        )
+
+    # Все pydantic-схемы API можно хранить в «простых» форматах
+    for value in vars(schemas).values():
+        if isinstance(value, type) and issubclass(value, BaseModel) and value.__module__ == schemas.__name__:
+            registry.register_model(value)
+    return registry
+
+
+def available_serializers() -> List[str]:
+    return list(codec_registry.serializers)
+
+
+def available_compressors() -> List[str]:
+    return list(codec_registry.compressors)
+
+
+def resolve_codec(serializer: str = "auto", compressor: str = "auto", compress_threshold: int = 1024) -> CacheCodec:
+    """
+    Создаёт кодек по настройкам; ``auto`` выбирает самый быстрый установленный вариант.
+
+    Сериализатор: msgpack → orjson → pickle. Компрессор: lz4 → zstd → zlib.
+    Если заданная библиотека не установлена, используется ``auto`` с предупреждением.
+    """
+    if serializer != "auto" and serializer not in codec_registry.serializers:
+        logger.warning(f"Cache serializer {serializer!r} is not installed, falling back to auto")
+        serializer = "auto"
+    if compressor != "auto" and compressor not in codec_registry.compressors:
+        logger.warning(f"Cache compressor {compressor!r} is not installed, falling back to auto")
+        compressor = "auto"
+    if serializer == "auto":
+        serializer = next(name for name in ("msgpack", "orjson", "pickle") if name in codec_registry.serializers)
+    if compressor == "auto":
+        compressor = next(name for name in ("lz4", "zstd", "zlib") if name in codec_registry.compressors)
+    return CacheCodec(serializer, compressor, compress_threshold=compress_threshold)
+
+
+# Глобальный реестр кодеков
+codec_registry = _build_registry()
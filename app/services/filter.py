@@ -2,6 +2,8 @@ from datetime import datetime
 from typing import List, Optional, Dict, Any
 
 from app.models.schemas import PropertyCreate
+from app.services.listing_snapshot import ListingSnapshot
+from app.services.pagination import Page, PageCursor, paginate_rows
 
 
 class PropertyFilter:
@@ -95,7 +97,13 @@ class PropertyFilter:
         except ValueError:
             return None
 
-    def filter(self, properties: List[PropertyCreate], skip: int = 0, limit: int = 50) -> tuple[List[PropertyCreate], int]:
+    def filter(
+        self,
+        properties: List[PropertyCreate],
+        skip: int = 0,
+        limit: int = 50,
+        snapshot: Optional[ListingSnapshot] = None,
+    ) -> tuple[List[PropertyCreate], int]:
         """
         Фильтрует список свойств согласно установленным критериям с поддержкой пагинации.
 
@@ -103,10 +111,41 @@ class PropertyFilter:
             properties: Список свойств для фильтрации
             skip: Количество записей для пропуска
             limit: Максимальное количество записей для возврата
+            snapshot: Колоночный снимок этого же списка; если передан,
+                фильтрация выполняется векторно по маскам
 
         Returns:
             Кортеж (отфильтрованный список свойств, общее количество свойств)
         """
+        page = self.filter_page(properties, skip=skip, limit=limit, snapshot=snapshot)
+        return page.items, page.total
+
+    def filter_page(
+        self,
+        properties: List[PropertyCreate],
+        skip: int = 0,
+        limit: int = 50,
+        cursor: Optional[PageCursor] = None,
+        snapshot: Optional[ListingSnapshot] = None,
+    ) -> Page:
+        """
+        Фильтрует список и возвращает страницу вместе с курсором следующей страницы.
+
+        Результаты упорядочены по (полю сортировки, ``source:external_id``).
+
+        Args:
+            properties: Список свойств для фильтрации
+            skip: Количество записей для пропуска (игнорируется при наличии курсора)
+            limit: Максимальное количество записей для возврата
+            cursor: Курсор из предыдущей страницы (keyset-пагинация)
+            snapshot: Колоночный снимок этого же списка
+
+        Returns:
+            Страница результатов
+        """
+        if snapshot is not None and snapshot.properties is properties:
+            return snapshot.filter_page(self, skip=skip, limit=limit, cursor=cursor)
+
         # Предварительная обработка дат (один раз вместо каждого цикла)
         min_first_dt = self._parse_dt(self.min_first_seen)
         max_first_dt = self._parse_dt(self.max_first_seen)
@@ -239,24 +278,5 @@ class PropertyFilter:
 
             filtered.append(prop)
 
-        # Apply custom sorting
-        sort_key_map = {
-            "price": lambda x: x.price or 0,
-            "area": lambda x: x.area or 0,
-            "rooms": lambda x: x.rooms or 0,
-            "floor": lambda x: x.floor or 0,
-            "first_seen": lambda x: x.first_seen or datetime.min,
-            "last_seen": lambda x: x.last_seen or datetime.min,
-        }
-        
-        sort_key = sort_key_map.get(self.sort_by, sort_key_map["price"])
-        reverse_order = self.sort_order.lower() == "desc"
-        
-        # Sort (без лимита, лимит применяется на уровне пагинации)
-        sorted_filtered = sorted(filtered, key=sort_key, reverse=reverse_order)
-        
-        # Применяем пагинацию
-        total_count = len(sorted_filtered)
-        paginated_results = sorted_filtered[skip : skip + limit]
-        
-        return paginated_results, total_count
+        # Сортировка и пагинация: top-k вместо полной сортировки для первых страниц
+        return paginate_rows(filtered, self.sort_by, self.sort_order, skip=skip, limit=limit, cursor=cursor)
@@ -0,0 +1,344 @@
+"""In-process L1 cache engine with O(1) LRU and optional W-TinyLFU admission."""
+
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+POLICIES = ("lru", "tinylfu")
+
+# Segment ids for W-TinyLFU (plain LRU keeps everything in the window)
+_WINDOW = 0
+_PROBATION = 1
+_PROTECTED = 2
+
+_SKETCH_DEPTH = 4
+_SKETCH_MAX_COUNT = 15
+# Rows are indexed by 16-bit slices of one hash, which bounds the row width
+_SKETCH_MAX_WIDTH = 1 << 16
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate the memory footprint of a cached value in bytes.
+
+    Walks one level into containers and object ``__dict__``s, which is enough
+    for lists of pydantic models without paying for a full deep traversal.
+
+    Args:
+        value: Value to measure
+
+    Returns:
+        Approximate size in bytes
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, (str, bytes, bytearray, int, float, bool)) or value is None:
+        return size
+    if isinstance(value, dict):
+        return size + sum(sys.getsizeof(k) + _shallow_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return size + sum(_shallow_size(item) for item in value)
+    return _shallow_size(value)
+
+
+def _shallow_size(value: Any) -> int:
+    size = sys.getsizeof(value)
+    attrs = getattr(value, "__dict__", None)
+    if attrs:
+        size += sys.getsizeof(attrs) + sum(sys.getsizeof(v) for v in attrs.values())
+    return size
+
+
+class CountMinSketch:
+    """Count-min sketch of access frequencies with periodic halving (aging).
+
+    Counters saturate at 15 like the 4-bit counters of TinyLFU; after
+    ``sample_size`` increments every counter is halved so that formerly
+    popular keys fade out.
+    """
+
+    def __init__(self, width: int, sample_size: Optional[int] = None):
+        """Initialize the sketch.
+
+        Args:
+            width: Counters per row (rounded up to a power of two, at most 65536)
+            sample_size: Increments between agings (default: 10 * width)
+        """
+        self.width = min(1 << max(width - 1, 1).bit_length(), _SKETCH_MAX_WIDTH)
+        self._mask = self.width - 1
+        self._rows = [bytearray(self.width) for _ in range(_SKETCH_DEPTH)]
+        self.sample_size = sample_size or 10 * self.width
+        self._additions = 0
+
+    def _slots(self, key: str) -> Tuple[int, int, int, int]:
+        # Disjoint 16-bit slices of the 64-bit hash index the four rows
+        h = hash(key)
+        mask = self._mask
+        return h & mask, (h >> 16) & mask, (h >> 32) & mask, (h >> 48) & mask
+
+    def increment(self, key: str) -> None:
+        """Record one access of ``key``."""
+        for row, index in zip(self._rows, self._slots(key)):
+            if row[index] < _SKETCH_MAX_COUNT:
+                row[index] += 1
+        self._additions += 1
+        if self._additions >= self.sample_size:
+            self._age()
+
+    def estimate(self, key: str) -> int:
+        """Estimated access count of ``key``."""
+        i0, i1, i2, i3 = self._slots(key)
+        r0, r1, r2, r3 = self._rows
+        return min(r0[i0], r1[i1], r2[i2], r3[i3])
+
+    def _age(self) -> None:
+        for i, row in enumerate(self._rows):
+            self._rows[i] = bytearray(count >> 1 for count in row)
+        self._additions //= 2
+
+    def clear(self) -> None:
+        for row in self._rows:
+            row[:] = bytes(self.width)
+        self._additions = 0
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "size", "segment")
+
+    def __init__(self, value: Any, expires_at: float, size: int, segment: int):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+        self.segment = segment
+
+
+class L1Cache:
+    """Bounded in-memory cache with O(1) get/set/evict and monotonic-clock expiry.
+
+    ``policy="lru"`` is a plain LRU over one ``OrderedDict``. ``policy="tinylfu"``
+    is W-TinyLFU: new keys enter a small LRU window (~1% of capacity); a key
+    leaving the window is admitted to the main SLRU (probation + protected)
+    only if the frequency sketch says it is used more often than the main
+    victim, so one-off scans (e.g. cache warmers) cannot flush the hot set.
+
+    Capacity is bounded by entry count and, optionally, by an approximate byte
+    budget. All operations are synchronous and never await, so callers on a
+    single event loop need no lock.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        max_bytes: Optional[int] = None,
+        policy: str = "lru",
+        sizeof: Callable[[Any], int] = estimate_size,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of entries
+            max_bytes: Approximate byte budget (``None`` or 0 for unlimited)
+            policy: Eviction policy, ``"lru"`` or ``"tinylfu"``
+            sizeof: Function estimating the size of a value in bytes
+            clock: Monotonic clock used for expiry
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown L1 cache policy: {policy!r} (expected one of {POLICIES})")
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max_bytes or None
+        self.policy = policy
+        self._sizeof = sizeof
+        self._clock = clock
+
+        self._entries: Dict[str, _Entry] = {}
+        self._segments = (OrderedDict(), OrderedDict(), OrderedDict())
+        self._bytes = 0
+
+        if policy == "tinylfu":
+            self._window_max = max(1, self.max_entries // 100)
+            self._protected_max = max(1, (self.max_entries - self._window_max) * 4 // 5)
+            self._sketch: Optional[CountMinSketch] = CountMinSketch(self.max_entries)
+        else:
+            self._window_max = self.max_entries
+            self._protected_max = 0
+            self._sketch = None
+
+        self.evictions = 0
+        self.expirations = 0
+        self.rejections = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry.expires_at > self._clock()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._entries))
+
+    @property
+    def size_bytes(self) -> int:
+        """Approximate total size of cached values in bytes."""
+        return self._bytes
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value or ``None`` if absent or expired."""
+        if self._sketch is not None:
+            self._sketch.increment(key)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= self._clock():
+            self._remove(key, entry)
+            self.expirations += 1
+            return None
+        self._touch(key, entry)
+        return entry.value
+
+    def set(self, key: str, value: Any, ttl: float, size: Optional[int] = None) -> bool:
+        """Store a value for ``ttl`` seconds.
+
+        Args:
+            key: Cache key
+            value: Value to cache
+            ttl: Time to live in seconds
+            size: Size in bytes (estimated with ``sizeof`` when omitted)
+
+        Returns:
+            ``False`` if the value could not be kept (larger than the byte budget,
+            or rejected by TinyLFU admission)
+        """
+        if size is None:
+            size = self._sizeof(value) if self.max_bytes else 0
+        if self.max_bytes and size > self.max_bytes:
+            self.delete(key)
+            self.rejections += 1
+            return False
+
+        expires_at = self._clock() + ttl
+        entry = self._entries.get(key)
+        if entry is not None:
+            # Updates keep the key's position class; they are never subject to admission
+            self._bytes += size - entry.size
+            entry.value, entry.expires_at, entry.size = value, expires_at, size
+            self._touch(key, entry)
+        else:
+            if self._sketch is not None:
+                self._sketch.increment(key)
+            entry = _Entry(value, expires_at, size, _WINDOW)
+            self._entries[key] = entry
+            self._segments[_WINDOW][key] = entry
+            self._bytes += size
+
+        self._evict()
+        return key in self._entries
+
+    def delete(self, key: str) -> bool:
+        """Remove a key; returns whether it was present."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False
+        self._remove(key, entry)
+        return True
+
+    def clear(self) -> None:
+        """Remove all entries (frequency history is reset as well)."""
+        self._entries.clear()
+        for segment in self._segments:
+            segment.clear()
+        self._bytes = 0
+        if self._sketch is not None:
+            self._sketch.clear()
+
+    def _touch(self, key: str, entry: _Entry) -> None:
+        if entry.segment == _PROBATION:
+            # A second hit promotes the key to the protected segment
+            del self._segments[_PROBATION][key]
+            entry.segment = _PROTECTED
+            protected = self._segments[_PROTECTED]
+            protected[key] = entry
+            if len(protected) > self._protected_max:
+                demoted_key, demoted = protected.popitem(last=False)
+                demoted.segment = _PROBATION
+                self._segments[_PROBATION][demoted_key] = demoted
+        else:
+            self._segments[entry.segment].move_to_end(key)
+
+    def _remove(self, key: str, entry: _Entry) -> None:
+        del self._entries[key]
+        del self._segments[entry.segment][key]
+        self._bytes -= entry.size
+
+    def _over_budget(self) -> bool:
+        return len(self._entries) > self.max_entries or (
+            self.max_bytes is not None and self._bytes > self.max_bytes
+        )
+
+    def _evict(self) -> None:
+        window, probation, protected = self._segments
+        if self._sketch is None:
+            while self._over_budget():
+                key, entry = next(iter(window.items()))
+                self._remove(key, entry)
+                self.evictions += 1
+            return
+
+        # Window overflow moves its LRU key into probation as an admission candidate
+        while len(window) > self._window_max:
+            key, entry = window.popitem(last=False)
+            entry.segment = _PROBATION
+            probation[key] = entry
+            if self._over_budget():
+                self._admit_or_reject(key, entry)
+
+        while self._over_budget():
+            victim_segment = probation or protected or window
+            key, entry = next(iter(victim_segment.items()))
+            self._remove(key, entry)
+            self.evictions += 1
+
+    def _admit_or_reject(self, candidate_key: str, candidate: _Entry) -> None:
+        probation, protected = self._segments[_PROBATION], self._segments[_PROTECTED]
+        victim_segment = probation if len(probation) > 1 else protected
+        if not victim_segment:
+            return
+        victim_key = next(iter(victim_segment))
+        if victim_key == candidate_key:
+            return
+        victim = self._entries[victim_key]
+        if self._sketch.estimate(candidate_key) > self._sketch.estimate(victim_key):
+            self._remove(victim_key, victim)
+            self.evictions += 1
+        else:
+            self._remove(candidate_key, candidate)
+            self.rejections += 1
+
+    def purge_expired(self) -> int:
+        """Drop all expired entries (O(n)); returns how many were removed."""
+        now = self._clock()
+        expired = [key for key, entry in self._entries.items() if entry.expires_at <= now]
+        for key in expired:
+            self._remove(key, self._entries[key])
+        self.expirations += len(expired)
+        return len(expired)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Engine statistics."""
+        stats: Dict[str, Any] = {
+            "policy": self.policy,
+            "size": len(self._entries),
+            "max_size": self.max_entries,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "rejections": self.rejections,
+        }
+        if self._sketch is not None:
+            stats["segments"] = {
+                "window": len(self._segments[_WINDOW]),
+                "probation": len(self._segments[_PROBATION]),
+                "protected": len(self._segments[_PROTECTED]),
+            }
+        return stats
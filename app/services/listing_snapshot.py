@@ -0,0 +1,345 @@
+"""
+Колоночный снимок объявлений для быстрой фильтрации.
+
+Снимок строится один раз при заполнении кэша поиска (``OptimizedSearchService``)
+и хранит данные в виде массивов NumPy. Фильтры ``PropertyFilter`` превращаются
+в булевы маски над этими массивами вместо обхода объектов ``PropertyCreate``.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+from app.models.schemas import PropertyCreate
+from app.services.pagination import Page, PageCursor, RowIdIndex, normalize_sort_by, paginate_indices, timestamp
+
+if TYPE_CHECKING:
+    from app.services.filter import PropertyFilter
+
+_LOCATION_SEPARATOR = "\x00"
+_MAX_MEMO_ENTRIES = 64
+
+
+def _optional_float(value: Optional[float]) -> float:
+    return np.nan if value is None else float(value)
+
+
+def _location_haystack(location: Optional[Dict[str, Any]]) -> str:
+    """Склеивает строковые значения локации в одну строку в нижнем регистре."""
+    if not location or not isinstance(location, dict):
+        return ""
+    return _LOCATION_SEPARATOR.join(
+        value.lower() for value in location.values() if isinstance(value, str)
+    )
+
+
+def _dictionary_encode(values: Iterable[str]) -> Tuple[np.ndarray, List[str]]:
+    """Кодирует строки словарём: возвращает (коды, список уникальных значений)."""
+    index: Dict[str, int] = {}
+    codes = np.fromiter((index.setdefault(value, len(index)) for value in values), dtype=np.int32)
+    return codes, list(index)
+
+
+class ListingSnapshot:
+    """Колоночное представление списка объявлений одного поиска."""
+
+    def __init__(self, properties: Sequence[PropertyCreate]) -> None:
+        """
+        Строит снимок.
+
+        Args:
+            properties: Список объявлений (ссылка сохраняется, элементы не копируются)
+        """
+        self.properties = properties
+        self.size = len(properties)
+        n = self.size
+
+        self.price = np.fromiter((p.price for p in properties), dtype=np.float64, count=n)
+        self.area = np.fromiter((_optional_float(p.area) for p in properties), dtype=np.float64, count=n)
+        self.rooms = np.fromiter((_optional_float(p.rooms) for p in properties), dtype=np.float64, count=n)
+        self.floor = np.fromiter((_optional_float(p.floor) for p in properties), dtype=np.float64, count=n)
+        self.total_floors = np.fromiter(
+            (_optional_float(p.total_floors) for p in properties), dtype=np.float64, count=n
+        )
+        self.first_seen = np.fromiter(
+            (timestamp(getattr(p, "first_seen", None)) for p in properties), dtype=np.float64, count=n
+        )
+        self.last_seen = np.fromiter(
+            (timestamp(getattr(p, "last_seen", None)) for p in properties), dtype=np.float64, count=n
+        )
+        self.has_photos = np.fromiter((bool(p.photos) for p in properties), dtype=bool, count=n)
+        self.has_contact = np.fromiter(
+            (bool(p.contact_name or p.contact_phone) for p in properties), dtype=bool, count=n
+        )
+
+        # Цена за м² считается так же, как в PropertyFilter: только при площади > 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.price_per_sqm = np.where(self.area > 0, self.price / self.area, np.nan)
+
+        self.source_codes, self.source_values = _dictionary_encode(p.source.lower() for p in properties)
+        self.location_codes, self.location_values = _dictionary_encode(
+            _location_haystack(p.location) for p in properties
+        )
+        self.titles_lower: List[str] = [p.title.lower() for p in properties]
+        self.row_ids = RowIdIndex(properties)
+
+        self._title_masks: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._district_masks: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._feature_masks: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._sort_keys: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def from_properties(cls, properties: Sequence[PropertyCreate]) -> "ListingSnapshot":
+        """Строит снимок из списка объявлений."""
+        return cls(properties)
+
+    # ------------------------------------------------------------------
+    # Маски строковых предикатов (кэшируются по значению фильтра)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _memo(store: "OrderedDict[str, np.ndarray]", key: str, factory) -> np.ndarray:
+        mask = store.get(key)
+        if mask is None:
+            mask = factory()
+            store[key] = mask
+            if len(store) > _MAX_MEMO_ENTRIES:
+                store.popitem(last=False)
+        else:
+            store.move_to_end(key)
+        return mask
+
+    def title_contains(self, needle: str) -> np.ndarray:
+        """Маска объявлений, в заголовке которых есть подстрока (needle в нижнем регистре)."""
+        return self._memo(
+            self._title_masks,
+            needle,
+            lambda: np.fromiter((needle in title for title in self.titles_lower), dtype=bool, count=self.size),
+        )
+
+    def district_matches(self, needle: str) -> np.ndarray:
+        """Маска совпадения района по заголовку или строковым полям локации."""
+
+        def build() -> np.ndarray:
+            if _LOCATION_SEPARATOR in needle:
+                # Разделитель не должен участвовать в совпадении — считаем по объектам
+                location_mask = np.fromiter(
+                    (
+                        any(isinstance(v, str) and needle in v.lower() for v in (p.location or {}).values())
+                        if isinstance(p.location, dict)
+                        else False
+                        for p in self.properties
+                    ),
+                    dtype=bool,
+                    count=self.size,
+                )
+            else:
+                unique_mask = np.fromiter(
+                    (needle in value for value in self.location_values),
+                    dtype=bool,
+                    count=len(self.location_values),
+                )
+                location_mask = unique_mask[self.location_codes]
+            return self.title_contains(needle) | location_mask
+
+        return self._memo(self._district_masks, needle, build)
+
+    def feature_present(self, feature: str) -> np.ndarray:
+        """Маска объявлений, у которых характеристика присутствует и истинна."""
+        return self._memo(
+            self._feature_masks,
+            feature,
+            lambda: np.fromiter(
+                (bool(p.features and p.features.get(feature)) for p in self.properties),
+                dtype=bool,
+                count=self.size,
+            ),
+        )
+
+    def source_is(self, source_lower: str) -> np.ndarray:
+        """Маска объявлений из источника (сравнение без учёта регистра)."""
+        try:
+            code = self.source_values.index(source_lower)
+        except ValueError:
+            return np.zeros(self.size, dtype=bool)
+        return self.source_codes == code
+
+    # ------------------------------------------------------------------
+    # Фильтрация и сортировка
+    # ------------------------------------------------------------------
+
+    def mask(self, property_filter: "PropertyFilter") -> np.ndarray:
+        """
+        Строит булеву маску, эквивалентную проверкам ``PropertyFilter.filter``.
+
+        Args:
+            property_filter: Фильтр с критериями
+
+        Returns:
+            Массив bool длиной ``size``
+        """
+        f = property_filter
+        mask = self.price > 0
+
+        if f.min_price is not None:
+            mask &= self.price >= f.min_price
+        if f.max_price is not None:
+            mask &= self.price <= f.max_price
+        if f.source is not None:
+            mask &= self.source_is(f.source.lower())
+
+        # Сравнения с NaN дают False, поэтому объявления без значения отсекаются,
+        # как и в построчном фильтре
+        for column, low, high in (
+            (self.rooms, f.min_rooms, f.max_rooms),
+            (self.area, f.min_area, f.max_area),
+            (self.floor, f.min_floor, f.max_floor),
+            (self.total_floors, f.min_total_floors, f.max_total_floors),
+        ):
+            if low is not None:
+                mask &= column >= low
+            if high is not None:
+                mask &= column <= high
+
+        if f.max_price_per_sqm is not None:
+            mask &= self.price_per_sqm <= f.max_price_per_sqm
+        if f.has_photos is not None:
+            mask &= self.has_photos == f.has_photos
+        if f.has_contact is not None:
+            mask &= self.has_contact == f.has_contact
+
+        for column, low_raw, high_raw in (
+            (self.first_seen, f.min_first_seen, f.max_first_seen),
+            (self.last_seen, f.min_last_seen, f.max_last_seen),
+        ):
+            low = f._parse_dt(low_raw)
+            high = f._parse_dt(high_raw)
+            if low is None and high is None:
+                continue
+            mask &= ~np.isnan(column)
+            if low is not None:
+                mask &= column >= timestamp(low)
+            if high is not None:
+                mask &= column <= timestamp(high)
+
+        # Строковые предикаты — в конце, их маски кэшируются в снимке
+        if f.property_type:
+            mask &= self.title_contains(f.property_type.lower())
+        if f.district:
+            mask &= self.district_matches(f.district.lower())
+        if f.features:
+            for feature in f.features:
+                mask &= self.feature_present(feature)
+
+        return mask
+
+    def sort_key(self, sort_by: str) -> np.ndarray:
+        """Ключ сортировки с той же подстановкой пустых значений, что и в ``PropertyFilter``."""
+        key = self._sort_keys.get(sort_by)
+        if key is None:
+            if sort_by in ("first_seen", "last_seen"):
+                column = self.first_seen if sort_by == "first_seen" else self.last_seen
+                key = np.where(np.isnan(column), -np.inf, column)
+            else:
+                column = {
+                    "area": self.area,
+                    "rooms": self.rooms,
+                    "floor": self.floor,
+                }.get(sort_by, self.price)
+                key = np.nan_to_num(column, nan=0.0)
+            self._sort_keys[sort_by] = key
+        return key
+
+    def filter_page(
+        self,
+        property_filter: "PropertyFilter",
+        skip: int = 0,
+        limit: int = 50,
+        cursor: Optional[PageCursor] = None,
+    ) -> Page:
+        """
+        Фильтрует снимок и выбирает страницу без полной сортировки выборки.
+
+        Args:
+            property_filter: Фильтр с критериями и параметрами сортировки
+            skip: Количество записей для пропуска
+            limit: Максимальное количество записей для возврата
+            cursor: Курсор, после которого начинается страница
+
+        Returns:
+            Страница результатов
+        """
+        sort_by = normalize_sort_by(property_filter.sort_by)
+        return paginate_indices(
+            np.flatnonzero(self.mask(property_filter)),
+            self.sort_key(sort_by),
+            self.row_ids,
+            self.properties,
+            sort_by,
+            property_filter.sort_order,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+        )
+
+
+class ListingSnapshotStore:
+    """Ограниченное хранилище снимков по ключу кэша поиска (LRU)."""
+
+    def __init__(self, max_entries: int = 32) -> None:
+        """
+        Args:
+            max_entries: Максимальное количество хранимых снимков
+        """
+        self.max_entries = max_entries
+        self._snapshots: "OrderedDict[str, ListingSnapshot]" = OrderedDict()
+        self._builds = 0
+
+    def ensure(self, key: str, properties: Sequence[PropertyCreate]) -> ListingSnapshot:
+        """
+        Возвращает снимок для ключа, перестраивая его, только если список изменился.
+
+        Args:
+            key: Ключ кэша поиска
+            properties: Текущий список объявлений для ключа
+
+        Returns:
+            Снимок, построенный по ``properties``
+        """
+        snapshot = self._snapshots.get(key)
+        if snapshot is None or snapshot.properties is not properties:
+            snapshot = ListingSnapshot.from_properties(properties)
+            self._builds += 1
+            self._snapshots[key] = snapshot
+            if len(self._snapshots) > self.max_entries:
+                self._snapshots.popitem(last=False)
+        self._snapshots.move_to_end(key)
+        return snapshot
+
+    def find(self, properties: Sequence[PropertyCreate]) -> Optional[ListingSnapshot]:
+        """Находит снимок, построенный именно по этому объекту списка."""
+        for snapshot in reversed(self._snapshots.values()):
+            if snapshot.properties is properties:
+                return snapshot
+        return None
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """Удаляет снимок по ключу или все снимки."""
+        if key is None:
+            self._snapshots.clear()
+        else:
+            self._snapshots.pop(key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика хранилища снимков."""
+        return {
+            "snapshots": len(self._snapshots),
+            "max_entries": self.max_entries,
+            "rows": sum(s.size for s in self._snapshots.values()),
+            "builds": self._builds,
+        }
+
+
+# Глобальное хранилище снимков
+listing_snapshots = ListingSnapshotStore()
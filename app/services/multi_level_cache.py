@@ -1,28 +1,36 @@
 """Multi-level cache system with L1 (in-memory) and L2 (Redis) layers."""
 
-from typing import Any, Optional, Dict, List, Tuple
-from datetime import datetime, timedelta
+from typing import Any, Optional, Dict, List
 import asyncio
 import json
+from app.core.config import settings
 from app.utils.logger import logger
 from app.services.advanced_cache import advanced_cache_manager
+from app.services.l1_cache import L1Cache
 
 class MultiLevelCacheManager:
     """Manages L1 (in-memory) and L2 (Redis) caching with automatic eviction."""
     
-    def __init__(self, l1_max_size: int = 1000, l1_ttl: int = 300):
+    def __init__(
+        self,
+        l1_max_size: int = 1000,
+        l1_ttl: int = 300,
+        l1_max_bytes: Optional[int] = None,
+        l1_policy: str = "lru",
+    ):
         """Initialize multi-level cache manager.
         
         Args:
             l1_max_size: Maximum number of items in L1 cache
             l1_ttl: Default TTL for L1 cache in seconds
+            l1_max_bytes: Approximate L1 memory budget in bytes (None for unlimited)
+            l1_policy: L1 eviction policy, "lru" or "tinylfu"
         """
-        self.l1_cache: Dict[str, Tuple[Any, datetime]] = {}
+        # L1 operations never await, so they need no lock on the event loop
+        self.l1_cache = L1Cache(max_entries=l1_max_size, max_bytes=l1_max_bytes, policy=l1_policy)
         self.l1_max_size = l1_max_size
         self.l1_ttl = l1_ttl
         self.l2_manager = advanced_cache_manager
-        self._access_times: Dict[str, float] = {}
-        self._lock = asyncio.Lock()
         self._hit_count = 0
         self._miss_count = 0
     
@@ -36,26 +44,18 @@ class MultiLevelCacheManager:
             Cached value or None if not found
         """
         # Try L1 (in-memory)
-        if key in self.l1_cache:
-            value, expiry = self.l1_cache[key]
-            if datetime.now() < expiry:
-                self._access_times[key] = datetime.now().timestamp()
-                self._hit_count += 1
-                logger.debug(f"L1 cache HIT: {key}")
-                return value
-            else:
-                # Expired in L1
-                del self.l1_cache[key]
-                if key in self._access_times:
-                    del self._access_times[key]
+        value = self.l1_cache.get(key)
+        if value is not None:
+            self._hit_count += 1
+            logger.debug(f"L1 cache HIT: {key}")
+            return value
         
         # Try L2 (Redis)
         try:
             value = await self.l2_manager.get_async(key)
             if value is not None:
                 # Update L1 from L2
-                async with self._lock:
-                    await self._set_l1(key, value)
+                await self._set_l1(key, value)
                 self._hit_count += 1
                 logger.debug(f"L2 cache HIT: {key}")
                 return value
@@ -82,8 +82,7 @@ class MultiLevelCacheManager:
         ttl = ttl or self.l1_ttl
         
         # Set L1
-        async with self._lock:
-            await self._set_l1(key, value, ttl)
+        await self._set_l1(key, value, ttl)
         
         # Set L2 (Redis)
         try:
@@ -98,7 +97,7 @@ class MultiLevelCacheManager:
         value: Any,
         ttl: Optional[int] = None,
     ) -> None:
-        """Internal L1 cache set with LRU eviction.
+        """Internal L1 cache set; eviction is O(1) and handled by the L1 engine.
         
         Args:
             key: Cache key
@@ -106,18 +105,8 @@ class MultiLevelCacheManager:
             ttl: Time to live in seconds
         """
         ttl = ttl or self.l1_ttl
-        expiry = datetime.now() + timedelta(seconds=ttl)
-        
-        self.l1_cache[key] = (value, expiry)
-        self._access_times[key] = datetime.now().timestamp()
-        
-        # LRU eviction if needed
-        if len(self.l1_cache) > self.l1_max_size:
-            # Remove least recently used
-            lru_key = min(self._access_times, key=self._access_times.get)
-            del self.l1_cache[lru_key]
-            del self._access_times[lru_key]
-            logger.debug(f"L1 cache evicted (LRU): {lru_key}")
+        if not self.l1_cache.set(key, value, ttl):
+            logger.debug(f"L1 cache did not admit: {key}")
     
     async def delete(self, key: str) -> None:
         """Delete from both cache levels.
@@ -125,11 +114,7 @@ class MultiLevelCacheManager:
         Args:
             key: Cache key
         """
-        async with self._lock:
-            if key in self.l1_cache:
-                del self.l1_cache[key]
-            if key in self._access_times:
-                del self._access_times[key]
+        self.l1_cache.delete(key)
         
         try:
             await self.l2_manager.delete_async(key)
@@ -149,13 +134,10 @@ class MultiLevelCacheManager:
         deleted = 0
         
         # Delete from L1
-        async with self._lock:
-            keys_to_delete = [k for k in self.l1_cache if self._matches_pattern(k, pattern)]
-            for key in keys_to_delete:
-                del self.l1_cache[key]
-                if key in self._access_times:
-                    del self._access_times[key]
-                deleted += 1
+        keys_to_delete = [k for k in self.l1_cache if self._matches_pattern(k, pattern)]
+        for key in keys_to_delete:
+            self.l1_cache.delete(key)
+            deleted += 1
         
         # Delete from L2
         try:
@@ -183,9 +165,7 @@ class MultiLevelCacheManager:
     
     async def clear(self) -> None:
         """Clear both cache levels."""
-        async with self._lock:
-            self.l1_cache.clear()
-            self._access_times.clear()
+        self.l1_cache.clear()
         
         try:
             await self.l2_manager.clear_redis()
@@ -204,8 +184,7 @@ class MultiLevelCacheManager:
         
         return {
             "l1": {
-                "size": len(self.l1_cache),
-                "max_size": self.l1_max_size,
+                **self.l1_cache.get_stats(),
                 "usage_percent": (len(self.l1_cache) / self.l1_max_size) * 100,
                 "ttl": self.l1_ttl,
             },
@@ -239,4 +218,8 @@ class MultiLevelCacheManager:
 
 
 # Global instance
-multi_level_cache = MultiLevelCacheManager()
+multi_level_cache = MultiLevelCacheManager(
+    l1_max_size=settings.CACHE_L1_MAX_ENTRIES,
+    l1_max_bytes=settings.CACHE_L1_MAX_BYTES or None,
+    l1_policy=settings.CACHE_L1_POLICY,
+)
@@ -19,8 +19,12 @@ from fastapi import WebSocket
 from pydantic import BaseModel, EmailStr
 
 from app.core.config import settings
+from app.db.batch_insert import PriceChange
+from app.db.models.session import AsyncSessionLocal
+from app.db.repositories.alerts import get_active_alerts
 from app.utils.logger import logger
 from app.models.schemas import Property
+from app.services.price_changes import price_change_publisher
 
 
 class EmailNotification(BaseModel):
@@ -169,6 +173,55 @@ class NotificationService:
         
         logger.info(f"Notified about price change: {property_id} ({percentage:+.1f}%)")
     
+    async def notify_price_drops(self, drops: List[PriceChange]):
+        """Уведомить о снижениях цен батча: одно сообщение на топик, а не на объявление."""
+        by_city: Dict[str, List[PriceChange]] = {}
+        for drop in drops:
+            if drop.city:
+                by_city.setdefault(drop.city.lower(), []).append(drop)
+
+        await self.ws_manager.broadcast(self._price_drops_message(drops), "price_drops")
+        for city, city_drops in by_city.items():
+            await self.ws_manager.broadcast(self._price_drops_message(city_drops), f"city:{city}")
+
+        logger.info(f"Notified about {len(drops)} price drops in {len(by_city)} cities")
+
+    async def notify_alerts_for_price_drops(self, drops: List[PriceChange]):
+        """Проверить активные алерты по снижениям цен батча (один запрос алертов на батч)."""
+        async with AsyncSessionLocal() as session:
+            alerts = await get_active_alerts(session) or []
+
+        for alert in alerts:
+            matched = [drop for drop in drops if _alert_matches(alert, drop)]
+            if not matched:
+                continue
+            message = self._price_drops_message(matched, limit=5)
+            message.event_type = "alert_price_drops"
+            message.data["alert_id"] = alert.id
+            await self.ws_manager.broadcast(message, "alerts")
+            logger.info(f"Alert {alert.id} matched {len(matched)} price drops")
+
+    @staticmethod
+    def _price_drops_message(drops: List[PriceChange], limit: Optional[int] = None) -> WebSocketMessage:
+        return WebSocketMessage(
+            event_type="price_drops",
+            data={
+                "count": len(drops),
+                "items": [
+                    {
+                        "property_id": drop.property_id,
+                        "source": drop.source,
+                        "external_id": drop.external_id,
+                        "old_price": drop.old_price,
+                        "new_price": drop.new_price,
+                        "percentage": round(drop.change_percent, 2),
+                        "city": drop.city,
+                    }
+                    for drop in drops[:limit]
+                ],
+            },
+        )
+
     async def notify_alert_triggered(
         self,
         alert_id: int,
@@ -312,5 +365,34 @@ class NotificationService:
         await self.send_email(notification)
 
 
+def _alert_matches(alert: Any, drop: PriceChange) -> bool:
+    """Подходит ли новая цена под критерии алерта."""
+    if alert.city and (drop.city or "").lower() != alert.city.lower():
+        return False
+    if alert.min_price is not None and drop.new_price < alert.min_price:
+        return False
+    if alert.max_price is not None and drop.new_price > alert.max_price:
+        return False
+    if alert.rooms is not None and drop.rooms != alert.rooms:
+        return False
+    if alert.min_area is not None and (drop.area is None or drop.area < alert.min_area):
+        return False
+    if alert.max_area is not None and (drop.area is None or drop.area > alert.max_area):
+        return False
+    return True
+
+
 # Глобальный экземпляр сервиса
 notification_service = NotificationService()
+
+
+def register_price_drop_subscribers() -> None:
+    """
+    Подписывает уведомления на снижения цен из массового upsert.
+
+    Вызывается при старте процесса, который сохраняет объявления (lifespan
+    FastAPI, ``worker_process_init`` Celery): импорт модуля подписчиков не
+    регистрирует. Повторный вызов ничего не меняет.
+    """
+    price_change_publisher.subscribe(notification_service.notify_price_drops)
+    price_change_publisher.subscribe(notification_service.notify_alerts_for_price_drops)
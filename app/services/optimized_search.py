@@ -1,25 +1,39 @@
 """Optimized search service with multi-level caching and performance enhancements."""
 
-from typing import List, Optional, Dict, Any, Tuple
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Dict, Any, Tuple
+import asyncio
 import hashlib
 from datetime import datetime
 from app.models.schemas import PropertyResponse
-from app.services.search import SearchService
+from app.services.search import PartialSearchResult, SearchService, SourceBatch
+from app.services.advanced_cache import advanced_cache_manager
 from app.services.multi_level_cache import multi_level_cache
+from app.services.listing_snapshot import listing_snapshots
+from app.services.single_flight import SingleFlight
+from app.services.stale_cache import STALE, MISS, StaleWhileRevalidate, hard_ttl, unwrap, wrap
 from app.utils.logger import logger
 
 
+# Shared by all service instances: the endpoints create a new service per request
+search_flight = SingleFlight("search", redis_getter=lambda: advanced_cache_manager.redis_client)
+# Stale results are served immediately while one background refresh per key re-runs the parsers
+search_swr = StaleWhileRevalidate("search", search_flight)
+
+
 class OptimizedSearchService:
     """Enhanced search service with cache-first pattern for 10-20% performance improvement."""
     
-    def __init__(self, cache_ttl: int = 600):
+    def __init__(self, cache_ttl: int = 600, stale_ttl: Optional[int] = None):
         """Initialize optimized search service.
         
         Args:
-            cache_ttl: Cache time-to-live in seconds (default: 10 minutes)
+            cache_ttl: Freshness period of cached results in seconds (default: 10 minutes)
+            stale_ttl: Extra seconds a stale result is served while refreshing in
+                the background (default: ``CACHE_STALE_TTL``, 0 disables)
         """
         self.base_search = SearchService()
         self.cache_ttl = cache_ttl
+        self.stale_ttl = stale_ttl
         self._search_count = 0
         self._cache_hits = 0
     
@@ -45,30 +59,145 @@ class OptimizedSearchService:
         
         if not use_cache:
             logger.info("Cache disabled for this search")
-            results = await self.base_search.search(query, city, filters)
+            results = await self._run_search(city, filters)
             return results, False, {}
         
         # Generate cache key
         cache_key = self._generate_cache_key(query, city, filters)
-        
-        # Try to get from cache
-        cached_result = await multi_level_cache.get(cache_key)
-        if cached_result is not None:
+
+        # Fresh hit, stale hit (refreshed in the background) or miss; concurrent
+        # misses for the same key share one parser run
+        results, state = await search_swr.fetch(
+            cache_key,
+            lambda: multi_level_cache.get(cache_key),
+            self._fetcher(cache_key, city, filters),
+        )
+        is_cached = state != MISS
+        if is_cached:
             self._cache_hits += 1
-            logger.info(f"Cache HIT for key: {cache_key}")
-            stats = multi_level_cache.get_stats()
-            return cached_result, True, stats
-        
-        # Cache MISS - fetch fresh data
-        logger.info(f"Cache MISS for key: {cache_key}, fetching fresh data")
-        results = await self.base_search.search(query, city, filters)
-        
-        # Store in cache for future requests
-        await multi_level_cache.set(cache_key, results, ttl=self.cache_ttl)
+            logger.info(f"Cache {'STALE' if state == STALE else 'HIT'} for key: {cache_key}")
+        else:
+            logger.info(f"Cache MISS for key: {cache_key}, fetched fresh data")
+        # Снимок перестраивается только если L1 отдал новый объект списка (например, после L2)
+        listing_snapshots.ensure(cache_key, results)
         
         stats = multi_level_cache.get_stats()
-        return results, False, stats
+        return results, is_cached, stats
     
+    async def search_stream(
+        self,
+        city: str,
+        property_type: str = "Квартира",
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[SourceBatch]:
+        """Stream per-source batches, serving a cached result as a single batch.
+
+        A cache miss goes through ``search_flight``: the leading request streams
+        the batches of ``SearchService.search_stream`` (each batch is saved to the
+        database), concurrent requests for the same key get the combined result
+        as a single batch. The run belongs to the flight, not to the client, so
+        the result is saved and cached even if the client disconnects early.
+
+        Args:
+            city: Target city
+            property_type: Property type
+            timeout: Overall search timeout in seconds
+
+        Yields:
+            Source batches in completion order
+        """
+        self._search_count += 1
+        cache_key = self._generate_cache_key("", city, {"property_type": property_type})
+
+        cached_result, _ = search_swr.lookup(
+            cache_key,
+            await multi_level_cache.get(cache_key),
+            self._fetcher(cache_key, city, {"property_type": property_type}),
+        )
+        if cached_result is not None:
+            self._cache_hits += 1
+            yield SourceBatch(parser_name="cache", properties=cached_result)
+            return
+
+        # Батчи приходят, только если вычисление запустил этот вызов; завершение
+        # flight (в том числе объединённого с чужим) закрывает очередь
+        batches: "asyncio.Queue[Optional[SourceBatch]]" = asyncio.Queue()
+        flight = asyncio.ensure_future(search_flight.do(
+            cache_key,
+            self._stream_fetcher(cache_key, city, property_type, timeout, batches),
+            load=lambda: self._load(cache_key),
+        ))
+        flight.add_done_callback(lambda _: batches.put_nowait(None))
+        try:
+            streamed = False
+            while (batch := await batches.get()) is not None:
+                streamed = True
+                yield batch
+            results = await flight
+            if not streamed:
+                yield SourceBatch(parser_name="cache", properties=results)
+        finally:
+            # Отменяется только ожидание: shield в SingleFlight доводит поиск до конца
+            flight.cancel()
+
+    async def search_partial(
+        self,
+        city: str,
+        property_type: str = "Квартира",
+        deadline: float = 5.0,
+    ) -> Tuple[List[PropertyResponse], bool, Optional[PartialSearchResult]]:
+        """Return whatever finished by the deadline; late sources extend the cache entry.
+
+        The entry is keyed exactly like ``search_cached(query="", city, {"property_type": ...})``,
+        so a follow-up regular search sees the late results without re-parsing.
+
+        Args:
+            city: Target city
+            property_type: Property type
+            deadline: Seconds to wait before returning partial results
+
+        Concurrent misses for the same key share one run through ``search_flight``.
+
+        Returns:
+            Tuple of (properties, is_from_cache, partial_result); ``partial_result``
+            is ``None`` on a cache hit and for requests coalesced with another run
+        """
+        self._search_count += 1
+        cache_key = self._generate_cache_key("", city, {"property_type": property_type})
+
+        cached_result, _ = search_swr.lookup(
+            cache_key,
+            await multi_level_cache.get(cache_key),
+            self._fetcher(cache_key, city, {"property_type": property_type}),
+        )
+        if cached_result is not None:
+            self._cache_hits += 1
+            listing_snapshots.ensure(cache_key, cached_result)
+            return cached_result, True, None
+
+        collected: List[PropertyResponse] = []
+        partial: Optional[PartialSearchResult] = None
+
+        async def extend_cache(batch: SourceBatch) -> None:
+            collected.extend(batch.properties)
+            # Новый объект списка, чтобы снимок перестроился при следующем чтении
+            await self._store(cache_key, list(collected))
+            listing_snapshots.invalidate(cache_key)
+
+        async def fetch() -> List[PropertyResponse]:
+            nonlocal partial
+            partial = await self.base_search.search_until(
+                city, property_type, deadline=deadline, on_late_batch=extend_cache
+            )
+            collected.extend(partial.properties)
+            if partial.properties:
+                await self._store(cache_key, list(collected))
+                listing_snapshots.invalidate(cache_key)
+            return partial.properties
+
+        properties = await search_flight.do(cache_key, fetch, load=lambda: self._load(cache_key))
+        return properties, False, partial
+
     async def search_by_city(
         self,
         city: str,
@@ -89,20 +218,71 @@ class OptimizedSearchService:
             filters_str = self._serialize_filters(filters)
             cache_key = f"city:{city}:{filters_str}"
         
-        # Try cache first
-        cached = await multi_level_cache.get(cache_key)
-        if cached is not None:
+        # Search all sources for the city, cache first
+        results, state = await search_swr.fetch(
+            cache_key,
+            lambda: multi_level_cache.get(cache_key),
+            self._fetcher(cache_key, city, filters),
+        )
+        if state != MISS:
             logger.info(f"Cache HIT for city search: {city}")
-            return cached, multi_level_cache.get_stats()
-        
-        # Search all sources for the city
-        results = await self.base_search.search("", city, filters)
-        
-        # Cache results
-        await multi_level_cache.set(cache_key, results, ttl=self.cache_ttl)
         
         return results, multi_level_cache.get_stats()
     
+    async def _run_search(self, city: str, filters: Optional[Dict[str, Any]]) -> List[PropertyResponse]:
+        """Run the parsers; ``SearchService`` only takes the property type from the filters."""
+        property_type = (filters or {}).get("property_type", "Квартира")
+        return await self.base_search.search(city, property_type)
+
+    async def _store(self, cache_key: str, results: List[PropertyResponse]) -> None:
+        """Cache results as fresh for ``cache_ttl`` and servable-when-stale for ``stale_ttl`` more."""
+        await multi_level_cache.set(
+            cache_key, wrap(results, self.cache_ttl), ttl=hard_ttl(self.cache_ttl, self.stale_ttl)
+        )
+
+    async def _load(self, cache_key: str) -> Optional[List[PropertyResponse]]:
+        """Read the cached value (fresh or stale) for distributed single-flight waiters."""
+        raw = await multi_level_cache.get(cache_key)
+        return None if raw is None else unwrap(raw)[0]
+
+    def _stream_fetcher(
+        self,
+        cache_key: str,
+        city: str,
+        property_type: str,
+        timeout: Optional[float],
+        batches: "asyncio.Queue[Optional[SourceBatch]]",
+    ) -> Callable[[], Awaitable[List[PropertyResponse]]]:
+        """Build the streaming miss computation: hand batches to the leader, then cache the results."""
+
+        async def fetch() -> List[PropertyResponse]:
+            results: List[PropertyResponse] = []
+            async for batch in self.base_search.search_stream(city, property_type, timeout=timeout):
+                results.extend(batch.properties)
+                batches.put_nowait(batch)
+            await self._store(cache_key, results)
+            listing_snapshots.invalidate(cache_key)
+            return results
+
+        return fetch
+
+    def _fetcher(
+        self,
+        cache_key: str,
+        city: str,
+        filters: Optional[Dict[str, Any]],
+    ) -> Callable[[], Awaitable[List[PropertyResponse]]]:
+        """Build the miss/refresh computation: run the search and cache the results."""
+
+        async def fetch() -> List[PropertyResponse]:
+            fresh = await self._run_search(city, filters)
+            await self._store(cache_key, fresh)
+            # The refreshed list is a new object, so the snapshot is rebuilt on the next read
+            listing_snapshots.invalidate(cache_key)
+            return fresh
+
+        return fetch
+
     async def invalidate_cache(self, pattern: str) -> int:
         """Invalidate cached entries matching a pattern.
         
@@ -113,12 +293,14 @@ class OptimizedSearchService:
             Number of keys deleted
         """
         deleted = await multi_level_cache.delete_pattern(pattern)
+        listing_snapshots.invalidate()
         logger.info(f"Invalidated {deleted} cache entries matching pattern: {pattern}")
         return deleted
     
     async def clear_cache(self) -> None:
         """Clear all cache entries."""
         await multi_level_cache.clear()
+        listing_snapshots.invalidate()
         logger.info("Cache cleared")
     
     def get_stats(self) -> Dict[str, Any]:
@@ -137,6 +319,9 @@ class OptimizedSearchService:
                 "hit_rate_percent": hit_rate,
             },
             "cache": multi_level_cache.get_stats(),
+            "snapshots": listing_snapshots.get_stats(),
+            "single_flight": search_flight.get_stats(),
+            "stale_while_revalidate": search_swr.get_stats(),
         }
     
     def _generate_cache_key(
@@ -0,0 +1,275 @@
+"""
+Постраничная выдача результатов онлайн-поиска.
+
+Вместо полной сортировки всей выборки выбираются только первые ``skip + limit``
+элементов (top-k через ``heapq``/``np.partition``), а курсор (keyset по значению
+сортировки и ``source:external_id``) позволяет листать глубоко без повторной
+сортировки с начала.
+
+Порядок выдачи полностью детерминирован: (значение сортировки, ``source:external_id``).
+"""
+
+import base64
+import heapq
+import json
+import math
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from app.models.schemas import PropertyCreate
+
+SORT_FIELDS = ("price", "area", "rooms", "floor", "first_seen", "last_seen")
+
+# Частичная выборка используется, когда skip + limit не больше n / TOP_K_RATIO
+TOP_K_RATIO = 8
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class CursorError(ValueError):
+    """Некорректный или несовместимый с запросом курсор пагинации."""
+
+
+@dataclass(frozen=True)
+class PageCursor:
+    """Позиция последнего элемента страницы."""
+
+    sort_by: str
+    sort_order: str
+    value: float
+    row_id: str
+
+
+class Page(NamedTuple):
+    """Страница результатов фильтрации."""
+
+    items: List[PropertyCreate]
+    total: int
+    remaining: int
+    next_cursor: Optional[str]
+
+    @property
+    def has_next(self) -> bool:
+        return self.remaining > len(self.items)
+
+
+def normalize_sort_by(sort_by: str) -> str:
+    """Неизвестные поля сортировки сводятся к цене, как и раньше в ``PropertyFilter``."""
+    return sort_by if sort_by in SORT_FIELDS else "price"
+
+
+def timestamp(value: Optional[datetime]) -> float:
+    """
+    Секунды от эпохи (наивные даты считаются UTC), NaN если даты нет.
+
+    Единственная реализация: ею же заполняются колонки дат ``ListingSnapshot``,
+    поэтому курсоры и маски снимка сравнивают одинаковые числа.
+    """
+    if value is None:
+        return math.nan
+    if value.tzinfo is not None:
+        return value.timestamp()
+    return (value - _EPOCH).total_seconds()
+
+
+def sort_value(prop: PropertyCreate, sort_by: str) -> float:
+    """Значение сортировки объявления; пустые значения — 0 (даты — минус бесконечность)."""
+    if sort_by in ("first_seen", "last_seen"):
+        value = getattr(prop, sort_by, None)
+        return -math.inf if value is None else timestamp(value)
+    return float(getattr(prop, sort_by, None) or 0)
+
+
+def row_id(prop: PropertyCreate) -> str:
+    """Уникальный ключ объявления для разрешения равных значений сортировки."""
+    return f"{prop.source}:{prop.external_id}"
+
+
+def encode_cursor(cursor: PageCursor) -> str:
+    """Кодирует курсор в непрозрачную URL-безопасную строку."""
+    value = None if math.isinf(cursor.value) else cursor.value
+    payload = json.dumps(
+        [cursor.sort_by, cursor.sort_order, value, cursor.row_id],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(token: str, sort_by: str, sort_order: str) -> PageCursor:
+    """
+    Декодирует курсор и проверяет, что он выдан для той же сортировки.
+
+    Raises:
+        CursorError: Если курсор повреждён или относится к другой сортировке
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        cursor_sort_by, cursor_order, value, cursor_row_id = json.loads(
+            base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        )
+        cursor = PageCursor(
+            sort_by=str(cursor_sort_by),
+            sort_order=str(cursor_order),
+            value=-math.inf if value is None else float(value),
+            row_id=str(cursor_row_id),
+        )
+    except (ValueError, TypeError, UnicodeError) as e:
+        raise CursorError("Invalid pagination cursor") from e
+
+    if cursor.sort_by != normalize_sort_by(sort_by) or cursor.sort_order != sort_order.lower():
+        raise CursorError("Pagination cursor does not match sort parameters")
+    return cursor
+
+
+def make_cursor(prop: PropertyCreate, sort_by: str, sort_order: str) -> str:
+    """Курсор, указывающий на объявление как на последний элемент страницы."""
+    sort_by = normalize_sort_by(sort_by)
+    return encode_cursor(PageCursor(sort_by, sort_order.lower(), sort_value(prop, sort_by), row_id(prop)))
+
+
+def _page(
+    items: List[PropertyCreate], total: int, remaining: int, sort_by: str, sort_order: str
+) -> Page:
+    next_cursor = make_cursor(items[-1], sort_by, sort_order) if items and remaining > len(items) else None
+    return Page(items=items, total=total, remaining=remaining, next_cursor=next_cursor)
+
+
+def paginate_rows(
+    rows: Sequence[PropertyCreate],
+    sort_by: str,
+    sort_order: str,
+    skip: int = 0,
+    limit: int = 50,
+    cursor: Optional[PageCursor] = None,
+) -> Page:
+    """
+    Сортирует и пагинирует уже отфильтрованный список объектов.
+
+    Args:
+        rows: Отфильтрованные объявления
+        sort_by: Поле сортировки
+        sort_order: Порядок сортировки (asc или desc)
+        skip: Количество пропускаемых записей (игнорируется при наличии курсора)
+        limit: Размер страницы
+        cursor: Курсор, после которого начинается страница
+
+    Returns:
+        Страница результатов
+    """
+    sort_by = normalize_sort_by(sort_by)
+    sign = -1.0 if sort_order.lower() == "desc" else 1.0
+
+    # Сначала считаются только числовые ключи (плоский список float, без кортежей
+    # на каждую строку); строковый идентификатор нужен лишь для кандидатов
+    values = [sign * sort_value(prop, sort_by) for prop in rows]
+    total = len(values)
+    positions = range(total)
+    if cursor is not None:
+        boundary = sign * cursor.value
+        positions = [
+            i
+            for i, value in enumerate(values)
+            if value > boundary or (value == boundary and row_id(rows[i]) > cursor.row_id)
+        ]
+        skip = 0
+
+    k = skip + limit
+    remaining = len(positions) - skip
+    if 0 < k and k * TOP_K_RATIO <= len(positions):
+        kth = heapq.nsmallest(k, (values[i] for i in positions))[-1]
+        positions = [i for i in positions if values[i] <= kth]
+    ordered = sorted(positions, key=lambda i: (values[i], row_id(rows[i])))
+    return _page([rows[i] for i in ordered[skip:k]], total, remaining, sort_by, sort_order)
+
+
+def top_k_order(keys: np.ndarray, k: int, tiebreak: np.ndarray) -> np.ndarray:
+    """
+    Позиции k наименьших элементов в порядке (ключ, tiebreak).
+
+    При малом k используется ``np.partition`` (O(n)) и сортируются только
+    кандидаты; иначе выполняется полная сортировка.
+
+    Args:
+        keys: Ключи сортировки (без NaN)
+        k: Количество элементов
+        tiebreak: Целочисленный вторичный ключ той же длины
+
+    Returns:
+        Массив позиций длиной ``min(k, len(keys))``
+    """
+    n = keys.size
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k * TOP_K_RATIO <= n:
+        kth = np.partition(keys, k - 1)[k - 1]
+        candidates = np.flatnonzero(keys <= kth)
+    else:
+        candidates = np.arange(n)
+    order = np.lexsort((tiebreak[candidates], keys[candidates]))
+    return candidates[order[:k]]
+
+
+class RowIdIndex:
+    """Ранги ``source:external_id`` для векторного разрешения равных ключей."""
+
+    def __init__(self, rows: Sequence[PropertyCreate]) -> None:
+        ids = [row_id(prop) for prop in rows]
+        order = sorted(range(len(ids)), key=ids.__getitem__)
+        self.sorted_ids: List[str] = [ids[i] for i in order]
+        self.rank = np.empty(len(ids), dtype=np.int64)
+        self.rank[np.asarray(order, dtype=np.intp)] = np.arange(len(ids), dtype=np.int64)
+
+    def rank_after(self, value: str) -> int:
+        """Минимальный ранг среди идентификаторов строго больше ``value``."""
+        return bisect_right(self.sorted_ids, value)
+
+
+def paginate_indices(
+    indices: np.ndarray,
+    keys: np.ndarray,
+    id_index: RowIdIndex,
+    rows: Sequence[PropertyCreate],
+    sort_by: str,
+    sort_order: str,
+    skip: int = 0,
+    limit: int = 50,
+    cursor: Optional[PageCursor] = None,
+) -> Page:
+    """
+    Векторная пагинация по позициям отфильтрованных строк колоночного снимка.
+
+    Args:
+        indices: Позиции строк, прошедших фильтр
+        keys: Ключи сортировки для всех строк снимка
+        id_index: Ранги идентификаторов строк снимка
+        rows: Исходные объекты снимка
+        sort_by: Поле сортировки
+        sort_order: Порядок сортировки
+        skip: Количество пропускаемых записей (игнорируется при наличии курсора)
+        limit: Размер страницы
+        cursor: Курсор, после которого начинается страница
+
+    Returns:
+        Страница результатов
+    """
+    sort_by = normalize_sort_by(sort_by)
+    sign = -1.0 if sort_order.lower() == "desc" else 1.0
+    total = int(indices.size)
+
+    directed = keys[indices] * sign
+    ranks = id_index.rank[indices]
+    if cursor is not None:
+        boundary = cursor.value * sign
+        after = (directed > boundary) | ((directed == boundary) & (ranks >= id_index.rank_after(cursor.row_id)))
+        indices, directed, ranks = indices[after], directed[after], ranks[after]
+        skip = 0
+
+    positions = top_k_order(directed, skip + limit, ranks)[skip:]
+    items = [rows[i] for i in indices[positions]]
+    return _page(items, total, int(indices.size) - skip, sort_by, sort_order)
@@ -0,0 +1,78 @@
+"""
+Публикация изменений цен, найденных при массовом upsert.
+
+Upsert (``app.db.batch_insert``) возвращает изменения цен всего батча.
+После коммита они передаются сюда, и каждый подписчик (WebSocket,
+уведомления о снижении цены) получает снижения цен одним вызовом на батч,
+а не по событию на объявление.
+"""
+
+from typing import Awaitable, Callable, List
+
+from app.db.batch_insert import PriceChange
+from app.utils.logger import logger
+from app.utils.metrics import metrics_collector
+
+PriceDropHandler = Callable[[List[PriceChange]], Awaitable[None]]
+
+
+class PriceChangePublisher:
+    """Рассылает снижения цен батча зарегистрированным подписчикам."""
+
+    def __init__(self):
+        self._handlers: List[PriceDropHandler] = []
+
+    def subscribe(self, handler: PriceDropHandler) -> PriceDropHandler:
+        """
+        Регистрирует подписчика (повторная регистрация игнорируется).
+
+        Можно использовать как декоратор.
+        """
+        if handler not in self._handlers:
+            self._handlers.append(handler)
+        return handler
+
+    def unsubscribe(self, handler: PriceDropHandler) -> None:
+        if handler in self._handlers:
+            self._handlers.remove(handler)
+
+    async def publish(self, changes: List[PriceChange]) -> int:
+        """
+        Публикует изменения цен батча.
+
+        Вызывается после коммита: подписчики не должны узнать о цене,
+        которая откатилась вместе с транзакцией. Ошибка одного подписчика
+        не мешает остальным.
+
+        Args:
+            changes: Изменения цен батча
+
+        Returns:
+            Количество снижений цен в батче
+        """
+        drops = [change for change in changes if change.is_drop]
+        metrics_collector.record_price_changes(len(drops), len(changes) - len(drops))
+        if not drops:
+            return 0
+
+        for handler in list(self._handlers):
+            name = getattr(handler, "__qualname__", repr(handler))
+            try:
+                await handler(drops)
+                metrics_collector.record_price_drop_event(name, "success")
+            except Exception as e:
+                metrics_collector.record_price_drop_event(name, "error")
+                logger.error(f"Price drop subscriber {name} failed: {e}", exc_info=True)
+
+        logger.info(f"Published {len(drops)} price drops to {len(self._handlers)} subscribers")
+        return len(drops)
+
+
+price_change_publisher = PriceChangePublisher()
+
+
+__all__ = [
+    "PriceChangePublisher",
+    "PriceDropHandler",
+    "price_change_publisher",
+]
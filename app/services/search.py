@@ -1,9 +1,11 @@
 import asyncio
 import logging
 import time
-from typing import List, Dict, Any
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set
 
-from app.db.batch_insert import bulk_insert_with_deduplication
+from app.db.batch_insert import bulk_upsert_with_deduplication
+from app.db.models.session import AsyncSessionLocal
 from app.models.schemas import Property
 from app.parsers.avito.parser import AvitoParser
 from app.parsers.cian.parser import CianParser
@@ -13,16 +15,78 @@ from app.parsers.domclick.parser import DomclickParser
 from app.parsers.etagi.parser import EtagiParser
 from app.parsers.cian_commercial.parser import CianCommercialParser
 from app.parsers.base_parser import BaseParser
+from app.services.price_changes import price_change_publisher
 from app.utils.parser_errors import ErrorClassifier
 from app.utils.metrics import metrics_collector
 from app.utils.performance_profiling import profile_function
 from app.utils.circuit_breaker import ParserCircuitBreaker
-from app.utils.bloom_filter import DuplicateFilter
+from app.utils.bloom_filter import WindowedDuplicateFilter
+from app.services.advanced_cache import advanced_cache_manager
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
 
+async def save_properties(properties: List[Property]) -> Dict[str, Any]:
+    """
+    Сохраняет объявления в БД пакетным upsert в отдельной сессии.
+
+    После коммита снижения цен батча публикуются подписчикам одним событием.
+
+    Args:
+        properties: Объявления для сохранения
+
+    Returns:
+        Статистика ``bulk_upsert_with_deduplication``
+    """
+    async with AsyncSessionLocal() as session:
+        stats = await bulk_upsert_with_deduplication(session, properties)
+        await session.commit()
+    await price_change_publisher.publish(stats['price_changes'])
+    return stats
+
+
+@dataclass
+class SourceBatch:
+    """Результаты одного источника в потоковом поиске."""
+
+    parser_name: str
+    properties: List[Property] = field(default_factory=list)
+    elapsed: float = 0.0
+    error: Optional[BaseException] = None
+    duplicates: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class PartialSearchResult:
+    """Результаты, готовые к дедлайну, и источники, которые ещё выполняются."""
+
+    properties: List[Property]
+    batches: List[SourceBatch]
+    pending: List[str]
+    background: Optional["asyncio.Task[None]"] = None
+
+    @property
+    def complete(self) -> bool:
+        return not self.pending
+
+
+@dataclass
+class _SearchRun:
+    """Состояние одного запуска парсеров."""
+
+    city: str
+    started: float
+    pending: Dict["asyncio.Task[SourceBatch]", str]
+    first_result_at: Optional[float] = None
+    # Ключи объявлений, уже отданных в этом запуске (дубликаты между источниками)
+    seen: Set[str] = field(default_factory=set)
+
+
 class SearchService:
     """Сервис поиска недвижимости с поддержкой множества парсеров."""
 
@@ -37,19 +101,28 @@ class SearchService:
             EtagiParser(),
             CianCommercialParser(),
         ]
-        self.duplicate_filter = DuplicateFilter(
-            expected_items=100000,
-            false_positive_rate=0.001,  # 0.1% FP rate
-            use_exact_check=True,
-            exact_check_threshold=5000
+        # Общее окно только экономит работу: объявление с той же ценой, уже
+        # сохранённое в окне (этим или другим воркером), повторно не upsert'ится.
+        # Из результатов поиска оно не убирается — дубликаты чистятся в пределах запуска
+        self.duplicate_filter = WindowedDuplicateFilter(
+            window_seconds=settings.DEDUP_WINDOW_SECONDS,
+            generations=settings.DEDUP_GENERATIONS,
+            expected_items=settings.DEDUP_EXPECTED_ITEMS,
+            false_positive_rate=settings.DEDUP_FALSE_POSITIVE_RATE,
+            redis_getter=(lambda: advanced_cache_manager.redis_client) if settings.DEDUP_REDIS_SHARED else None,
         )
+        self._background_tasks: Set["asyncio.Task[None]"] = set()
         logger.info("SearchService initialized with circuit breaker and bloom filter")
 
     @profile_function
     async def search(self, city: str, property_type: str = "Квартира") -> List[Property]:
         """
         Поиск недвижимости с использованием параллельного выполнения парсеров.
-        Использует circuit breaker для защиты от сбоев и bloom filter для дедупликации.
+        Использует circuit breaker для защиты от сбоев; bloom filter пропускает
+        повторное сохранение неизменившихся объявлений.
+
+        При превышении общего таймаута возвращаются результаты источников,
+        успевших ответить, а не пустой список.
 
         Args:
             city: Город для поиска
@@ -60,100 +133,264 @@ class SearchService:
         """
         start_time = time.time()
 
-        # Выполняем парсеры параллельно с индивидуальными таймаутами
+        batches = [batch async for batch in self.search_stream(city, property_type, save=False)]
+        unique_properties = [prop for batch in batches for prop in batch.properties]
+        duplicates_count = sum(batch.duplicates for batch in batches)
+
+        # Сохраняем свойства в базу данных с помощью bulk операции
+        await self._save_properties(unique_properties, city)
+
+        # Записываем метрики
+        duration = time.time() - start_time
+        metrics_collector.record_search_operation(city, len(unique_properties), duration)
+        metrics_collector.record_duplicates_removed(duplicates_count)
+
+        logger.info(
+            f"Search completed for {city}: {len(unique_properties) + duplicates_count} total, "
+            f"{len(unique_properties)} unique, {duplicates_count} duplicates, "
+            f"{duration:.2f}s"
+        )
+
+        return unique_properties
+
+    async def search_stream(
+        self,
+        city: str,
+        property_type: str = "Квартира",
+        timeout: Optional[float] = None,
+        save: bool = True,
+    ) -> AsyncIterator[SourceBatch]:
+        """
+        Потоковый поиск: отдаёт результаты каждого источника по мере готовности.
+
+        Быстрые источники не ждут медленных. Источники, не ответившие за
+        ``timeout``, отменяются при завершении итерации (в том числе при
+        досрочном выходе из ``async for``).
+
+        Пакет сохраняется в БД, когда потребитель запрашивает следующий, —
+        как в ``_finish_run``, отдача пакета не ждёт upsert.
+
+        Args:
+            city: Город для поиска
+            property_type: Тип недвижимости
+            timeout: Общий таймаут в секундах (по умолчанию ``SEARCH_TIMEOUT``)
+            save: Сохранять пакеты в БД (``search`` сохраняет результат целиком сам)
+
+        Yields:
+            Пакеты результатов по источникам (без дубликатов в пределах запуска)
+        """
+        run = self._start_run(city, property_type)
+        try:
+            async for batch in self._drain(run, run.started + self._overall_timeout(timeout)):
+                yield batch
+                if save:
+                    await self._save_properties(batch.properties, city)
+        finally:
+            self._report_pending(run)
+            for task in run.pending:
+                task.cancel()
+
+    async def search_until(
+        self,
+        city: str,
+        property_type: str = "Квартира",
+        deadline: float = 5.0,
+        on_late_batch: Optional[Callable[[SourceBatch], Awaitable[None]]] = None,
+    ) -> PartialSearchResult:
+        """
+        Возвращает то, что успело завершиться к дедлайну.
+
+        Незавершённые источники продолжают работать в фоне до общего таймаута
+        ``SEARCH_TIMEOUT``; их результаты сохраняются в БД и передаются в
+        ``on_late_batch`` (например, чтобы дополнить кэш). Фоновая задача
+        живёт, пока жив event loop, поэтому в Celery-задачах с собственным
+        циклом нужно дожидаться ``PartialSearchResult.background``.
+
+        Args:
+            city: Город для поиска
+            property_type: Тип недвижимости
+            deadline: Дедлайн в секундах от начала поиска
+            on_late_batch: Колбэк для пакетов, пришедших после дедлайна
+
+        Returns:
+            Частичный результат поиска
+        """
+        run = self._start_run(city, property_type)
+        overall_at = run.started + self._overall_timeout()
+        deadline_at = min(run.started + deadline, overall_at)
+
+        batches = [batch async for batch in self._drain(run, deadline_at)]
+        properties = [prop for batch in batches for prop in batch.properties]
+        pending = sorted(run.pending.values())
+        for parser_name in pending:
+            metrics_collector.record_search_source_pending(parser_name)
+        if pending:
+            logger.info(f"Search deadline {deadline}s for {city}: still waiting for {', '.join(pending)}")
+
+        background = None
+        if properties or pending:
+            background = asyncio.create_task(self._finish_run(run, overall_at, properties, on_late_batch))
+            self._background_tasks.add(background)
+            background.add_done_callback(self._background_tasks.discard)
+
+        return PartialSearchResult(
+            properties=properties,
+            batches=batches,
+            pending=pending,
+            background=background,
+        )
+
+    def _overall_timeout(self, timeout: Optional[float] = None) -> float:
+        if timeout is not None:
+            return float(timeout)
+        return float(getattr(settings, 'SEARCH_TIMEOUT', 45.0))
+
+    def _start_run(self, city: str, property_type: str) -> _SearchRun:
+        """Запускает задачи всех парсеров."""
         individual_timeout = float(getattr(settings, 'PARSER_TIMEOUT', 15.0))
-        overall_timeout = float(getattr(settings, 'SEARCH_TIMEOUT', 45.0))
+        started = time.monotonic()
+        tasks = {
+            asyncio.create_task(
+                self._run_source(parser, city, property_type, started, individual_timeout)
+            ): parser.__class__.__name__
+            for parser in self.parsers
+        }
+        return _SearchRun(city=city, started=started, pending=tasks)
 
-        # Используем circuit breaker для каждого парсера
-        parser_tasks = [
-            asyncio.wait_for(
+    async def _run_source(
+        self,
+        parser: BaseParser,
+        city: str,
+        property_type: str,
+        started: float,
+        timeout: float,
+    ) -> SourceBatch:
+        """Выполняет один парсер с circuit breaker и таймаутом; ошибки не пробрасываются."""
+        parser_name = parser.__class__.__name__
+        try:
+            properties = await asyncio.wait_for(
                 ParserCircuitBreaker.call_parser(
-                    parser.__class__.__name__,
+                    parser_name,
                     self._parse_with_parser,
                     parser, city, property_type
                 ),
-                timeout=individual_timeout
+                timeout=timeout
             )
-            for parser in self.parsers
-        ]
+            return SourceBatch(parser_name, list(properties or []), time.monotonic() - started)
+        except asyncio.TimeoutError as e:
+            logger.warning(f"Parser {parser_name} timed out for {city}")
+            return SourceBatch(parser_name, [], time.monotonic() - started, error=e)
+        except Exception as e:
+            classification = ErrorClassifier.classify(e)
+            logger.warning(f"Error in {parser_name} ({classification['type']}): {e}")
+            metrics_collector.record_parser_error(parser_name, classification.get("type", "Unknown"))
+            return SourceBatch(parser_name, [], time.monotonic() - started, error=e)
 
-        # Ждем завершения всех задач с общим таймаутом
-        try:
-            raw_results = await asyncio.wait_for(
-                asyncio.gather(*parser_tasks, return_exceptions=True),
-                timeout=overall_timeout
+    async def _drain(self, run: _SearchRun, deadline_at: float) -> AsyncIterator[SourceBatch]:
+        """Отдаёт пакеты завершившихся задач до момента ``deadline_at`` (time.monotonic)."""
+        while run.pending:
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                break
+            done, _ = await asyncio.wait(
+                run.pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
             )
-            # Process results, handling TimeoutError exceptions
-            parser_results = []
-            for i, result in enumerate(raw_results):
-                if isinstance(result, asyncio.TimeoutError):
-                    parser_name = self.parsers[i].__class__.__name__
-                    logger.warning(f"Parser {parser_name} timed out for {city}")
-                    parser_results.append([])
-                elif isinstance(result, Exception):
-                    parser_name = self.parsers[i].__class__.__name__
-                    logger.warning(f"Parser {parser_name} failed: {result}")
-                    parser_results.append([])
-                else:
-                    parser_results.append(result)
-        except asyncio.TimeoutError:
-            logger.warning(f"Overall search timeout exceeded for {city} (timeout: {overall_timeout}s)")
-            parser_results = []
-
-        # Собираем результаты
-        all_properties = []
-        for i, result in enumerate(parser_results):
-            if isinstance(result, Exception):
-                parser_name = self.parsers[i].__class__.__name__
-                classification = ErrorClassifier.classify(result)
-                logger.warning(f"Error in {parser_name} ({classification['type']}): {result}")
-                metrics_collector.record_parser_error(parser_name, classification.get("type", "Unknown"))
-            elif result:
-                all_properties.extend(result)
-
-        # Используем bloom filter для дедупликации
-        unique_properties = []
-        duplicates_count = 0
+            batches = [task.result() for task in done]
+            for task in done:
+                del run.pending[task]
+            for batch in sorted(batches, key=lambda b: b.elapsed):
+                self._deduplicate(batch, run.seen)
+                if batch.properties and run.first_result_at is None:
+                    run.first_result_at = time.monotonic()
+                    metrics_collector.record_time_to_first_result(
+                        batch.parser_name, run.first_result_at - run.started
+                    )
+                yield batch
 
-        for prop in all_properties:
+    @staticmethod
+    def _deduplicate(batch: SourceBatch, seen: Set[str]) -> None:
+        """Убирает из пакета объявления, уже отданные в этом запуске поиска."""
+        unique_properties = []
+        for prop in batch.properties:
             key = f"{prop.source}:{prop.external_id}"
-            if not self.duplicate_filter.is_duplicate(key):
+            if key not in seen:
+                seen.add(key)
                 unique_properties.append(prop)
-            else:
-                duplicates_count += 1
+        batch.duplicates = len(batch.properties) - len(unique_properties)
+        batch.properties = unique_properties
 
-        # Сохраняем свойства в базу данных с помощью bulk операции
-        if unique_properties:
-            try:
-                stats = await bulk_upsert_with_deduplication(
-                    db=None,
-                    properties=unique_properties
-                )
-                
+    @staticmethod
+    def _save_key(prop: Property) -> str:
+        # Новая цена даёт новый ключ, поэтому изменения цен сохраняются всегда
+        return f"{prop.source}:{prop.external_id}:{prop.price}"
+
+    async def _changed_properties(self, properties: List[Property], city: str) -> List[Property]:
+        """
+        Объявления, которые нужно сохранить.
+
+        Объявление с той же ценой, уже сохранённое в окне дедупликации города,
+        пропускается: повторный upsert ничего бы не изменил. Окно только
+        проверяется — ключи попадают в него в ``_save_properties`` после коммита.
+        """
+        flags = await self.duplicate_filter.contains([self._save_key(prop) for prop in properties], scope=city)
+        return [prop for prop, seen in zip(properties, flags) if not seen]
+
+    def _report_pending(self, run: _SearchRun) -> None:
+        if run.pending:
+            logger.warning(
+                f"Overall search timeout exceeded for {run.city}, "
+                f"cancelling {', '.join(sorted(run.pending.values()))}"
+            )
+
+    async def _finish_run(
+        self,
+        run: _SearchRun,
+        overall_at: float,
+        early_properties: List[Property],
+        on_late_batch: Optional[Callable[[SourceBatch], Awaitable[None]]],
+    ) -> None:
+        """Сохраняет ранние результаты и дожидается оставшихся источников."""
+        try:
+            await self._save_properties(early_properties, run.city)
+            async for batch in self._drain(run, overall_at):
+                if not batch.properties:
+                    continue
+                await self._save_properties(batch.properties, run.city)
+                if on_late_batch is not None:
+                    try:
+                        await on_late_batch(batch)
+                    except Exception as e:
+                        logger.error(f"Late batch callback failed for {batch.parser_name}: {e}", exc_info=True)
+        finally:
+            self._report_pending(run)
+            for task in run.pending:
+                task.cancel()
+
+    async def _save_properties(self, properties: List[Property], city: str) -> None:
+        """Сохраняет изменившиеся объявления в БД (ошибки логируются и не пробрасываются)."""
+        if not properties:
+            return
+        try:
+            properties = await self._changed_properties(properties, city)
+            if not properties:
+                return
+            stats = await save_properties(properties)
+            # Только после коммита: при ошибке upsert объявления не должны
+            # пропускаться всё окно дедупликации (на всех воркерах с общим Redis)
+            await self.duplicate_filter.add([self._save_key(prop) for prop in properties], scope=city)
+
+            if stats:
                 logger.info(
                     f"Database upsert: {stats['inserted']} inserted, "
                     f"{stats['updated']} updated, {stats['duplicates_removed']} DB duplicates"
                 )
-                
-                for prop in unique_properties:
-                    metrics_collector.record_property_processed(prop.source, "saved")
-                    
-            except Exception as e:
-                logger.error(f"Error saving properties to database: {e}", exc_info=True)
-                metrics_collector.record_error("database_save")
 
-        # Записываем метрики
-        duration = time.time() - start_time
-        metrics_collector.record_search_operation(city, len(unique_properties), duration)
-        metrics_collector.record_duplicates_removed(duplicates_count)
+            for prop in properties:
+                metrics_collector.record_property_processed(prop.source, "saved")
 
-        logger.info(
-            f"Search completed for {city}: {len(all_properties)} total, "
-            f"{len(unique_properties)} unique, {duplicates_count} duplicates, "
-            f"{duration:.2f}s"
-        )
-
-        return unique_properties
+        except Exception as e:
+            logger.error(f"Error saving properties to database: {e}", exc_info=True)
+            metrics_collector.record_error("database_save")
 
     @profile_function
     async def _parse_with_parser(self, parser: BaseParser, city: str, property_type: str) -> List[Property]:
@@ -0,0 +1,197 @@
+"""
+Single-flight: объединение одинаковых одновременных вычислений.
+
+Когда истекает популярная запись кэша, все параллельные запросы промахиваются
+одновременно и каждый запускает парсеры заново. ``SingleFlight`` гарантирует,
+что в процессе выполняется не больше одного вычисления на ключ, а остальные
+вызывающие ждут его результат.
+
+С ``distributed=True`` ведущий вызов дополнительно берёт Redis-блокировку
+(``SET NX PX``); воркеры, не получившие её, опрашивают кэш, пока владелец
+блокировки не положит туда значение.
+"""
+
+import asyncio
+import functools
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from app.core.config import settings
+from app.utils.logger import logger
+from app.utils.metrics import metrics_collector
+
+T = TypeVar("T")
+
+# Удаляет ключ, только если блокировка всё ещё принадлежит нам
+_RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+_POLL_INITIAL_DELAY = 0.05
+_POLL_MAX_DELAY = 1.0
+
+
+class RedisLock:
+    """Блокировка ``SET NX PX`` с освобождением только владельцем."""
+
+    def __init__(self, client: Any, key: str, ttl: float) -> None:
+        """
+        Args:
+            client: Асинхронный клиент Redis
+            key: Ключ блокировки
+            ttl: Время жизни блокировки в секундах (страховка от упавшего владельца)
+        """
+        self.client = client
+        self.key = key
+        self.ttl = ttl
+        self.token = uuid.uuid4().hex
+
+    async def acquire(self) -> bool:
+        """Пытается взять блокировку без ожидания."""
+        return bool(await self.client.set(self.key, self.token, nx=True, px=int(self.ttl * 1000)))
+
+    async def release(self) -> None:
+        """Снимает блокировку, если она ещё наша."""
+        try:
+            await self.client.eval(_RELEASE_SCRIPT, 1, self.key, self.token)
+        except Exception as e:
+            logger.warning(f"Failed to release single-flight lock {self.key}: {e}")
+
+    async def is_held(self) -> bool:
+        """Занята ли блокировка кем-либо."""
+        return bool(await self.client.exists(self.key))
+
+
+class SingleFlight:
+    """
+    Группа объединяемых вычислений.
+
+    Вычисление запускается отдельной задачей, поэтому отмена ведущего запроса
+    (например, клиент закрыл соединение) не прерывает ожидающих. Исключение
+    получают все ожидающие, после чего ключ освобождается для нового вызова.
+    """
+
+    def __init__(self, group: str, redis_getter: Optional[Callable[[], Any]] = None) -> None:
+        """
+        Args:
+            group: Имя группы (метка метрик и префикс ключей блокировок)
+            redis_getter: Функция, возвращающая текущий клиент Redis для распределённого режима
+        """
+        self.group = group
+        self._redis_getter = redis_getter
+        self._calls: Dict[str, "asyncio.Task[Any]"] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.remote_waits = 0
+
+    async def do(
+        self,
+        key: str,
+        func: Callable[[], Awaitable[T]],
+        *,
+        load: Optional[Callable[[], Awaitable[Optional[T]]]] = None,
+        distributed: Optional[bool] = None,
+    ) -> T:
+        """
+        Выполняет ``func`` не более одного раза на ключ одновременно.
+
+        Args:
+            key: Ключ вычисления (обычно ключ кэша)
+            func: Вычисление; должно само сохранять результат в кэш
+            load: Чтение результата из общего кэша (нужно для распределённого режима)
+            distributed: Брать Redis-блокировку (по умолчанию ``SINGLE_FLIGHT_REDIS_LOCK``)
+
+        Returns:
+            Результат вычисления (общий для всех объединённых вызовов)
+        """
+        loop = asyncio.get_running_loop()
+        task = self._calls.get(key)
+        # Задача из другого event loop (Celery с asyncio.run) недоступна для ожидания
+        if task is not None and not task.done() and task.get_loop() is loop:
+            self.coalesced += 1
+            metrics_collector.record_single_flight(self.group, "coalesced")
+            return await asyncio.shield(task)
+
+        if distributed is None:
+            distributed = settings.SINGLE_FLIGHT_REDIS_LOCK
+        if distributed and load is not None:
+            task = asyncio.ensure_future(self._run_distributed(key, func, load))
+        else:
+            task = asyncio.ensure_future(func())
+
+        self._calls[key] = task
+        task.add_done_callback(functools.partial(self._forget, key))
+        self.leaders += 1
+        metrics_collector.record_single_flight(self.group, "leader")
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: "asyncio.Task[Any]") -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Помечаем исключение как полученное, даже если все ожидающие были отменены
+            task.exception()
+
+    def redis_client(self) -> Optional[Any]:
+        """Клиент Redis для блокировок или ``None``, если блокировки между воркерами не нужны."""
+        client = self._redis_getter() if self._redis_getter is not None else None
+        # In-memory fallback живёт в одном процессе — блокировка между воркерами не нужна
+        if client is None or not hasattr(client, "eval"):
+            return None
+        return client
+
+    async def _run_distributed(
+        self,
+        key: str,
+        func: Callable[[], Awaitable[T]],
+        load: Callable[[], Awaitable[Optional[T]]],
+    ) -> T:
+        client = self.redis_client()
+        if client is None:
+            return await func()
+
+        lock = RedisLock(client, f"singleflight:{self.group}:{key}", settings.SINGLE_FLIGHT_LOCK_TTL)
+        try:
+            acquired = await lock.acquire()
+        except Exception as e:
+            logger.warning(f"Single-flight lock unavailable for {key}, computing locally: {e}")
+            return await func()
+
+        if acquired:
+            try:
+                return await func()
+            finally:
+                await lock.release()
+
+        # Значение вычисляет другой воркер — ждём его в кэше
+        self.remote_waits += 1
+        metrics_collector.record_single_flight(self.group, "remote")
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.SINGLE_FLIGHT_WAIT_TIMEOUT
+        delay = _POLL_INITIAL_DELAY
+        while loop.time() < deadline:
+            await asyncio.sleep(delay)
+            held = await lock.is_held()
+            value = await load()
+            if value is not None:
+                return value
+            if not held:
+                # Владелец завершился без результата (ошибка или пустой ответ)
+                break
+            delay = min(delay * 2, _POLL_MAX_DELAY)
+
+        logger.info(f"Single-flight wait for {key} ended without a shared value, computing locally")
+        return await func()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика группы."""
+        return {
+            "group": self.group,
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "remote_waits": self.remote_waits,
+        }
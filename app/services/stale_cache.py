@@ -0,0 +1,203 @@
+"""
+Stale-while-revalidate для кэшей поиска и парсеров.
+
+Запись хранится в конверте ``CacheEnvelope`` с моментом окончания «свежести»
+(мягкий TTL), а в хранилище кладётся с жёстким TTL = мягкий + окно устаревания
+(``CACHE_STALE_TTL``). После мягкого TTL устаревшее значение отдаётся сразу,
+а обновление запускается в фоне — не более одного на ключ. После жёсткого TTL
+запись исчезает и запрос ждёт вычисления как при обычном промахе.
+
+Значения, сохранённые до появления конвертов, читаются как свежие.
+"""
+
+import asyncio
+import functools
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+from app.core.config import settings
+from app.services.single_flight import RedisLock, SingleFlight
+from app.utils.logger import logger
+from app.utils.metrics import metrics_collector
+
+T = TypeVar("T")
+
+_EVENTS = ("hit", "stale", "miss", "refresh", "refresh_skipped", "refresh_error")
+
+# Состояния чтения
+FRESH = "fresh"
+STALE = "stale"
+MISS = "miss"
+
+
+@dataclass
+class CacheEnvelope:
+    """Значение кэша с моментом окончания свежести (unix time)."""
+
+    value: Any
+    fresh_until: float
+
+    @property
+    def is_stale(self) -> bool:
+        return time.time() >= self.fresh_until
+
+
+def wrap(value: Any, soft_ttl: float) -> CacheEnvelope:
+    """Упаковывает значение, свежее ``soft_ttl`` секунд."""
+    return CacheEnvelope(value=value, fresh_until=time.time() + soft_ttl)
+
+
+def unwrap(raw: Any) -> Tuple[Any, bool]:
+    """
+    Распаковывает прочитанное из кэша значение.
+
+    Returns:
+        Кортеж (значение, устарело ли оно)
+    """
+    if isinstance(raw, CacheEnvelope):
+        return raw.value, raw.is_stale
+    return raw, False
+
+
+def hard_ttl(soft_ttl: int, stale_ttl: Optional[int] = None) -> int:
+    """Жёсткий TTL записи: мягкий TTL плюс окно, в котором отдаётся устаревшее значение."""
+    if stale_ttl is None:
+        stale_ttl = settings.CACHE_STALE_TTL
+    return int(soft_ttl) + max(int(stale_ttl), 0)
+
+
+class StaleWhileRevalidate:
+    """
+    Чтение кэша с фоновым обновлением устаревших записей.
+
+    Промахи объединяются через ``SingleFlight``; фоновые обновления
+    дедуплицируются по ключу в процессе, а при ``SINGLE_FLIGHT_REDIS_LOCK`` —
+    ещё и между воркерами: воркер, не взявший блокировку, обновление пропускает.
+    """
+
+    def __init__(self, cache: str, flight: SingleFlight) -> None:
+        """
+        Args:
+            cache: Имя кэша (метка метрик и префикс ключей блокировок)
+            flight: Группа single-flight для промахов и обновлений
+        """
+        self.cache = cache
+        self.flight = flight
+        self._refreshing: Dict[str, "asyncio.Task[None]"] = {}
+        self.counts: Dict[str, int] = {}
+
+    def _record(self, event: str) -> None:
+        self.counts[event] = self.counts.get(event, 0) + 1
+        metrics_collector.record_cache_swr(self.cache, event)
+
+    async def fetch(
+        self,
+        key: str,
+        load: Callable[[], Awaitable[Any]],
+        compute: Callable[[], Awaitable[T]],
+    ) -> Tuple[T, str]:
+        """
+        Читает значение, при необходимости вычисляя или обновляя его.
+
+        Args:
+            key: Ключ кэша
+            load: Чтение сырого значения из кэша (конверт или старое значение)
+            compute: Вычисление, которое само сохраняет результат через ``wrap``
+
+        Returns:
+            Кортеж (значение, состояние: ``fresh``, ``stale`` или ``miss``)
+        """
+        raw = await load()
+        if raw is not None:
+            value, stale = unwrap(raw)
+            if not stale:
+                self._record("hit")
+                return value, FRESH
+            self._record("stale")
+            self.schedule_refresh(key, compute)
+            return value, STALE
+
+        self._record("miss")
+
+        async def load_value() -> Any:
+            found = await load()
+            return None if found is None else unwrap(found)[0]
+
+        return await self.flight.do(key, compute, load=load_value), MISS
+
+    def lookup(self, key: str, raw: Any, compute: Callable[[], Awaitable[Any]]) -> Tuple[Any, str]:
+        """
+        Разбирает уже прочитанное значение, планируя обновление устаревшего.
+
+        Для мест, которым при промахе нужно своё вычисление (стриминг, частичный поиск).
+
+        Returns:
+            Кортеж (значение или ``None``, состояние)
+        """
+        if raw is None:
+            self._record("miss")
+            return None, MISS
+        value, stale = unwrap(raw)
+        if not stale:
+            self._record("hit")
+            return value, FRESH
+        self._record("stale")
+        self.schedule_refresh(key, compute)
+        return value, STALE
+
+    def schedule_refresh(self, key: str, compute: Callable[[], Awaitable[Any]]) -> bool:
+        """
+        Запускает фоновое обновление ключа, если оно ещё не идёт.
+
+        Returns:
+            ``True``, если обновление запущено
+        """
+        loop = asyncio.get_running_loop()
+        task = self._refreshing.get(key)
+        if task is not None and not task.done() and task.get_loop() is loop:
+            self._record("refresh_skipped")
+            return False
+
+        task = asyncio.ensure_future(self._refresh(key, compute))
+        self._refreshing[key] = task
+        task.add_done_callback(functools.partial(self._forget, key))
+        return True
+
+    def _forget(self, key: str, task: "asyncio.Task[None]") -> None:
+        if self._refreshing.get(key) is task:
+            del self._refreshing[key]
+
+    async def _refresh(self, key: str, compute: Callable[[], Awaitable[Any]]) -> None:
+        try:
+            client = self.flight.redis_client() if settings.SINGLE_FLIGHT_REDIS_LOCK else None
+            if client is None:
+                await self.flight.do(key, compute, distributed=False)
+            else:
+                lock = RedisLock(client, f"refresh:{self.cache}:{key}", settings.SINGLE_FLIGHT_LOCK_TTL)
+                if not await lock.acquire():
+                    # Обновляет другой воркер
+                    self._record("refresh_skipped")
+                    return
+                try:
+                    await self.flight.do(key, compute, distributed=False)
+                finally:
+                    await lock.release()
+            self._record("refresh")
+        except Exception as e:
+            self._record("refresh_error")
+            logger.warning(f"Background refresh of {key} failed, stale value kept: {e}")
+
+    async def wait_refreshes(self) -> None:
+        """Дожидается текущих фоновых обновлений (для тестов и остановки)."""
+        tasks = list(self._refreshing.values())
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика чтений и обновлений."""
+        return {
+            "cache": self.cache,
+            "refreshing": len(self._refreshing),
+            **{event: self.counts.get(event, 0) for event in _EVENTS},
+        }
@@ -2,6 +2,7 @@
 
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_init, worker_process_init
 import asyncio
 from typing import List, Dict, Any
 import logging
@@ -9,6 +10,8 @@ import logging
 from app.core.config import settings
 from app.services.search import SearchService
 from app.services.advanced_cache import advanced_cache_manager
+from app.services.notifications import register_price_drop_subscribers
+from app.utils.http_pool import http_pool
 from app.models.schemas import PropertyCreate
 
 logger = logging.getLogger(__name__)
@@ -37,6 +40,15 @@ celery_app.conf.update(
     result_expires=3600,  # Результаты хранятся 1 час
 )
 
+
+# worker_process_init — дочерние процессы prefork; worker_init — пулы solo/threads
+@worker_init.connect
+@worker_process_init.connect
+def register_subscribers(**kwargs: Any) -> None:
+    """Подписывает уведомления на снижения цен, найденные задачами парсинга."""
+    register_price_drop_subscribers()
+
+
 # Периодические задачи (Celery Beat)
 celery_app.conf.beat_schedule = {
     # Обновление кеша для популярных городов каждые 30 минут
@@ -69,6 +81,13 @@ celery_app.conf.beat_schedule = {
         "task": "app.tasks.celery.database_backup_task",
         "schedule": crontab(hour=4, minute=0),
     },
+    # Пересчёт сетки heatmap каждые 15 минут
+    "refresh-geo-heatmap": {
+        "task": "app.tasks.celery.refresh_materialized_views_task",
+        "schedule": crontab(minute="*/15"),
+        "args": (["mv_geo_heatmap_grid"],),
+        "kwargs": {"concurrently": True},
+    },
 }
 
 
@@ -121,6 +140,8 @@ def parse_city_task(self, city: str, property_type: str = "Квартира") ->
             return result
             
         finally:
+            # Клиенты пула принадлежат этому loop: закрываем их, пока он жив
+            loop.run_until_complete(http_pool.close_all())
             loop.close()
             
     except Exception as exc:
@@ -217,6 +238,7 @@ def warm_cache_task(cities: List[str]) -> Dict[str, Any]:
         }
     finally:
         loop.run_until_complete(advanced_cache_manager.disconnect())
+        loop.run_until_complete(http_pool.close_all())
         loop.close()
 
 
@@ -259,6 +281,48 @@ def cleanup_cache_task() -> Dict[str, Any]:
         loop.close()
 
 
+@celery_app.task(name="app.tasks.celery.refresh_materialized_views_task")
+def refresh_materialized_views_task(view_names: List[str], concurrently: bool = False) -> Dict[str, Any]:
+    """
+    Задача обновления материализованных представлений.
+    
+    Args:
+        view_names: Имена представлений (из whitelist репозитория)
+        concurrently: REFRESH ... CONCURRENTLY (нужен уникальный индекс)
+        
+    Returns:
+        Результат обновления
+    """
+    from app.db.models.session import AsyncSessionLocal
+    from app.db.repositories.materialized_views import refresh_materialized_view
+
+    logger.info(f"Starting refresh of materialized views: {view_names}")
+
+    async def refresh() -> None:
+        async with AsyncSessionLocal() as session:
+            for view_name in view_names:
+                await refresh_materialized_view(session, view_name, concurrently=concurrently)
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    try:
+        loop.run_until_complete(refresh())
+        logger.info(f"Materialized views refreshed: {view_names}")
+        return {
+            "status": "success",
+            "views_refreshed": view_names,
+        }
+    except Exception as e:
+        logger.error(f"Materialized views refresh failed: {e}", exc_info=True)
+        return {
+            "status": "error",
+            "error": str(e),
+        }
+    finally:
+        loop.close()
+
+
 @celery_app.task(name="app.tasks.celery.schedule_parse_task")
 def schedule_parse_task(
     city: str,
@@ -133,10 +133,10 @@ def disable_rate_limiting():
     from unittest.mock import patch
 
     # Патчим RateLimitMiddleware чтобы не применять ограничения
-    async def passthrough_dispatch(self, request, call_next):
-        return await call_next(request)
+    async def passthrough_on_request(self, scope, state):
+        return None
 
-    with patch('app.utils.ip_ratelimiter.RateLimitMiddleware.dispatch', new=passthrough_dispatch):
+    with patch('app.utils.ip_ratelimiter.RateLimitMiddleware.on_request', new=passthrough_on_request):
         yield
 
 
@@ -164,3 +164,20 @@ async def session(request, pg_engine, db_engine):
         )() as session:
             yield session
             await session.rollback()
+
+
+@pytest.fixture(autouse=True)
+def isolate_parser_cache():
+    """
+    Очищает in-memory fallback кеша парсеров между тестами.
+
+    Ключ ``cached_parser`` не зависит от экземпляра парсера, поэтому без очистки
+    результат одного теста возвращался бы из кеша в другом.
+    """
+    from app.services.advanced_cache import InMemoryAsyncRedis, advanced_cache_manager
+
+    client = advanced_cache_manager.redis_client
+    if isinstance(client, InMemoryAsyncRedis):
+        client.store.clear()
+        client.sets.clear()
+    yield
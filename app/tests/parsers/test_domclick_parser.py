@@ -100,6 +100,7 @@ async def test_domclick_parser_parse_success(mock_get, domclick_parser, mock_htm
     """Test successful parsing of DomClick search results."""
     # Setup mock response
     mock_response = Mock()
+    mock_response.status_code = 200
     mock_response.text = mock_html_response
     mock_response.raise_for_status.return_value = None
     mock_get.return_value = mock_response
@@ -141,6 +142,7 @@ async def test_domclick_parser_parse_empty_results(mock_get, domclick_parser):
     """Test parsing when no results are found."""
     # Setup mock response with no results
     mock_response = Mock()
+    mock_response.status_code = 200
     mock_response.text = "<html><body></body></html>"
     mock_response.raise_for_status.return_value = None
     mock_get.return_value = mock_response
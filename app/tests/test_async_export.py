@@ -0,0 +1,125 @@
+"""Тесты потоковой выгрузки объявлений из БД."""
+
+import csv
+import io
+import json
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.optimized_crud import stream_properties_query
+from app.db.repositories import property as property_repo
+from app.models.schemas import PropertyCreate
+from app.services import async_export
+from app.services.async_export import EXPORT_FIELDS, AsyncExportService
+
+
+async def _seed(db: AsyncSession, count: int) -> None:
+    for i in range(count):
+        await property_repo.create_property(db, PropertyCreate(
+            source="test", external_id=f"exp{i}", title=f"Квартира, \"{i}\"",
+            price=30000.0 + i, area=40.0, rooms=2, link=f"https://example.com/{i}",
+            location={"city": "Moscow" if i % 2 else "Kazan"},
+        ))
+
+
+async def _export(db: AsyncSession, format: str, **params) -> bytes:
+    chunks = [
+        chunk async for chunk in AsyncExportService.export_properties_streaming(db, format=format, **params)
+    ]
+    assert all(isinstance(chunk, bytes) for chunk in chunks)
+    return b"".join(chunks)
+
+
+@pytest.mark.asyncio
+async def test_stream_properties_query_yields_batches(db_session: AsyncSession):
+    await _seed(db_session, 7)
+
+    batches = [
+        rows async for rows in stream_properties_query(db_session, is_active=None, batch_size=3)
+    ]
+
+    assert [len(rows) for rows in batches] == [3, 3, 1]
+    assert [row.id for rows in batches for row in rows] == sorted(row.id for rows in batches for row in rows)
+
+
+@pytest.mark.asyncio
+async def test_export_csv(db_session: AsyncSession, monkeypatch):
+    monkeypatch.setattr(AsyncExportService, "BATCH_SIZE", 2)
+    await _seed(db_session, 5)
+
+    rows = list(csv.DictReader(io.StringIO((await _export(db_session, "csv")).decode("utf-8"))))
+
+    assert len(rows) == 5
+    assert tuple(rows[0]) == EXPORT_FIELDS
+    assert rows[0]["title"] == 'Квартира, "0"'
+    assert rows[0]["url"] == "https://example.com/0"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("orjson_available", [True, False])
+async def test_export_json_and_jsonl(db_session: AsyncSession, monkeypatch, orjson_available: bool):
+    if orjson_available:
+        pytest.importorskip("orjson")
+    monkeypatch.setattr(async_export, "ORJSON_AVAILABLE", orjson_available)
+    monkeypatch.setattr(AsyncExportService, "BATCH_SIZE", 2)
+    await _seed(db_session, 5)
+
+    items = json.loads(await _export(db_session, "json"))
+    lines = (await _export(db_session, "jsonl")).decode("utf-8").splitlines()
+
+    assert [item["id"] for item in items] == [json.loads(line)["id"] for line in lines]
+    assert len(items) == 5
+    assert set(items[0]) == set(EXPORT_FIELDS)
+    assert isinstance(items[0]["created_at"], str)
+
+
+@pytest.mark.asyncio
+async def test_export_filters_and_limits(db_session: AsyncSession):
+    await _seed(db_session, 6)
+
+    items = json.loads(await _export(db_session, "json", city="Moscow", limit=2, offset=1))
+
+    assert len(items) == 2
+    assert all(item["city"] == "Moscow" for item in items)
+
+
+@pytest.mark.asyncio
+async def test_export_empty_json_is_valid(db_session: AsyncSession):
+    assert json.loads(await _export(db_session, "json")) == []
+
+
+@pytest.mark.asyncio
+async def test_export_parquet_row_groups(db_session: AsyncSession, monkeypatch):
+    pq = pytest.importorskip("pyarrow.parquet")
+    monkeypatch.setattr(AsyncExportService, "BATCH_SIZE", 2)
+    monkeypatch.setattr(AsyncExportService, "PARQUET_BATCH_SIZE", 3)
+    await _seed(db_session, 5)
+
+    parquet = pq.ParquetFile(io.BytesIO(await _export(db_session, "parquet")))
+    table = parquet.read()
+
+    assert table.num_rows == 5
+    assert tuple(table.column_names) == EXPORT_FIELDS
+    assert [parquet.metadata.row_group(i).num_rows for i in range(parquet.metadata.num_row_groups)] == [4, 1]
+    city = parquet.metadata.row_group(0).column(table.column_names.index("city"))
+    assert city.compression == "ZSTD"
+    assert city.has_dictionary_page
+    assert table.column("title").to_pylist()[0] == 'Квартира, "0"'
+
+
+@pytest.mark.asyncio
+async def test_export_parquet_empty_is_valid(db_session: AsyncSession):
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    table = pq.read_table(io.BytesIO(await _export(db_session, "parquet")))
+
+    assert table.num_rows == 0
+
+
+@pytest.mark.asyncio
+async def test_export_parquet_without_pyarrow(db_session: AsyncSession, monkeypatch):
+    monkeypatch.setattr(async_export, "PYARROW_AVAILABLE", False)
+
+    with pytest.raises(ValueError):
+        await _export(db_session, "parquet")
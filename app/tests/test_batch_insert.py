@@ -0,0 +1,230 @@
+"""Тесты upsert через COPY в staging-таблицу."""
+
+import json
+import re
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.db import batch_insert
+from app.db.batch_insert import (
+    STAGING_COLUMNS,
+    STAGING_TABLE,
+    _MERGE_SQL,
+    BatchPropertyInserter,
+    PriceChange,
+    StagingCopyUpserter,
+    UpsertResult,
+    bulk_upsert_with_deduplication,
+    copy_upsert_properties,
+    record_price_history,
+)
+from app.models.schemas import PropertyCreate
+
+
+class FakeAsyncpgConnection:
+    def __init__(self):
+        self.copies = []
+
+    async def copy_records_to_table(self, table_name, records, columns):
+        self.copies.append((table_name, list(records), columns))
+
+
+class FakeSession:
+    """Сессия, которая запоминает SQL и отвечает на merge заданной строкой."""
+
+    def __init__(self, driver_connection, merge_row=None):
+        self.driver = driver_connection
+        self.merge_row = merge_row
+        self.statements = []
+
+    async def connection(self):
+        session = self
+
+        class _Connection:
+            async def get_raw_connection(self):
+                return SimpleNamespace(driver_connection=session.driver)
+
+        return _Connection()
+
+    async def execute(self, statement, *args):
+        sql = str(statement)
+        self.statements.append(sql)
+        return SimpleNamespace(one=lambda: self.merge_row)
+
+    async def flush(self):
+        pass
+
+
+class Rows(list):
+    def all(self):
+        return list(self)
+
+
+class RowsSession(FakeSession):
+    """Сессия для пути INSERT ... RETURNING: отвечает наборами строк по очереди."""
+
+    def __init__(self, *results):
+        super().__init__(driver_connection=object())
+        self.results = list(results)
+        self.executed = []
+
+    async def execute(self, statement, *args):
+        self.executed.append(statement)
+        return self.results.pop(0) if self.results else Rows()
+
+
+def _listing(external_id, price, **extra):
+    return PropertyCreate(source="avito", external_id=external_id, title="Квартира", price=price, **extra)
+
+
+@pytest.mark.asyncio
+async def test_upsert_copies_into_staging_and_merges_once():
+    driver = FakeAsyncpgConnection()
+    changes = [{"property_id": 7, "source": "avito", "external_id": "2", "old_price": 50000, "new_price": 45000}]
+    session = FakeSession(driver, SimpleNamespace(inserted=1, updated=1, changes=json.dumps(changes)))
+
+    result = await StagingCopyUpserter(session).upsert([
+        _listing("1", 40000, area=40.0, location={"city": "Москва"}),
+        _listing("2", 45000),
+    ])
+
+    assert result.inserted == 1 and result.updated == 1
+    assert [(c.property_id, c.old_price, c.new_price) for c in result.price_changes] == [(7, 50000, 45000)]
+
+    table, records, columns = driver.copies[0]
+    assert table == STAGING_TABLE
+    assert columns == [name for name, _ in STAGING_COLUMNS]
+    first = dict(zip(columns, records[0]))
+    assert first["price_per_sqm"] == 1000.0
+    assert first["city"] == "Москва"
+    assert json.loads(first["location"]) == {"city": "Москва"}
+
+    create, merge, drop = session.statements
+    assert create.startswith(f"CREATE TEMP TABLE {STAGING_TABLE}") and "ON COMMIT DROP" in create
+    assert "ON CONFLICT (source, external_id) DO UPDATE" in merge
+    assert "xmax = 0" in merge
+    assert "INSERT INTO property_price_history" in merge
+    assert drop == f"DROP TABLE {STAGING_TABLE}"
+
+
+@pytest.mark.asyncio
+async def test_repeated_keys_are_collapsed_before_copy():
+    driver = FakeAsyncpgConnection()
+    session = FakeSession(driver, SimpleNamespace(inserted=1, updated=0, changes=[]))
+
+    await StagingCopyUpserter(session).upsert([_listing("1", 40000), _listing("1", 41000)])
+
+    _, records, columns = driver.copies[0]
+    assert len(records) == 1
+    assert records[0][columns.index("price")] == 41000
+
+
+@pytest.mark.asyncio
+async def test_non_asyncpg_driver_falls_back_to_batch_inserter(monkeypatch):
+    session = FakeSession(driver_connection=object())
+    calls = []
+
+    async def fake_upsert(self, properties, conflict_columns=None):
+        calls.append(len(properties))
+        return UpsertResult(inserted=len(properties))
+
+    monkeypatch.setattr(BatchPropertyInserter, "upsert", fake_upsert)
+
+    result = await copy_upsert_properties(session, [_listing("1", 40000), _listing("2", 41000)])
+
+    assert calls == [2]
+    assert result.inserted == 2 and result.price_changes == []
+    assert session.statements == []
+
+
+@pytest.mark.asyncio
+async def test_bulk_upsert_with_deduplication_reports_merge_counts(monkeypatch):
+    driver = FakeAsyncpgConnection()
+    changes = [{"property_id": 1, "source": "avito", "external_id": "1", "old_price": 40000, "new_price": 39000}]
+    session = FakeSession(driver, SimpleNamespace(inserted=0, updated=2, changes=changes))
+
+    stats = await bulk_upsert_with_deduplication(
+        session, [_listing("1", 39000), _listing("1", 39000), _listing("2", 41000)]
+    )
+
+    assert stats["duplicates_removed"] == 1
+    assert stats["inserted"] == 0 and stats["updated"] == 2
+    assert stats["price_changed"] == 1
+    assert "bulk_upsert_with_deduplication" in batch_insert.__all__
+
+
+@pytest.mark.asyncio
+async def test_batch_inserter_captures_price_changes_set_based():
+    previous = [SimpleNamespace(id=1, price=50000.0), SimpleNamespace(id=2, price=30000.0)]
+    returned = [
+        SimpleNamespace(id=1, source="avito", external_id="1", price=45000.0, city="Москва", rooms=2, area=50.0,
+                        inserted=False),
+        SimpleNamespace(id=3, source="avito", external_id="3", price=20000.0, city="Москва", rooms=1, area=30.0,
+                        inserted=True),
+    ]
+
+    session = RowsSession(Rows(previous), Rows(returned))
+
+    result = await BatchPropertyInserter(session).upsert(
+        [_listing("1", 45000), _listing("2", 30000), _listing("3", 20000)]
+    )
+
+    assert (result.inserted, result.updated) == (1, 1)
+    assert [(c.property_id, c.old_price, c.new_price, c.city) for c in result.price_changes] == [
+        (1, 50000.0, 45000.0, "Москва")
+    ]
+    select_sql, upsert_sql, history_sql = (str(statement) for statement in session.executed)
+    assert "RETURNING" in upsert_sql and "xmax = 0" in upsert_sql
+    assert "INSERT INTO property_price_history" in history_sql
+
+
+def _conflict_update(sql):
+    """SET-часть ON CONFLICT без регистра, скобок и лишних пробелов."""
+    clause = sql.split("DO UPDATE SET", 1)[1].split("RETURNING", 1)[0]
+    return re.sub(r"\s+", " ", re.sub(r"[()]", " ", clause)).lower()
+
+
+@pytest.mark.asyncio
+async def test_copy_and_fallback_paths_count_updates_the_same_way():
+    previous = [SimpleNamespace(id=1, price=50000.0)]
+    # Цена не изменилась, но строка существует: обе ветки считают её обновлённой
+    returned = [
+        SimpleNamespace(id=1, source="avito", external_id="1", price=50000.0, city=None, rooms=None, area=None,
+                        inserted=False),
+    ]
+    session = RowsSession(Rows(previous), Rows(returned))
+
+    result = await BatchPropertyInserter(session).upsert([_listing("1", 50000)])
+
+    assert (result.inserted, result.updated, result.price_changes) == (0, 1, [])
+    fallback = _conflict_update(str(session.executed[1].compile(dialect=postgresql.dialect())))
+    merge = _conflict_update(_MERGE_SQL)
+    for clause in (fallback, merge):
+        assert " where " not in clause
+        assert "last_seen = excluded.last_seen" in clause
+        assert re.search(r"last_updated = case when properties\.price is distinct from excluded\.price then", clause)
+        assert clause.rstrip().endswith("else properties.last_updated end")
+
+
+@pytest.mark.asyncio
+async def test_record_price_history_is_one_statement_per_slice(monkeypatch):
+    monkeypatch.setattr(batch_insert, "HISTORY_ROWS_PER_STATEMENT", 2)
+    session = RowsSession()
+    changes = [PriceChange(i, "avito", str(i), 100.0, 90.0) for i in range(5)]
+
+    assert await record_price_history(session, changes) == 5
+    assert len(session.executed) == 3
+    assert await record_price_history(session, []) == 0
+    assert len(session.executed) == 3
+
+
+def test_price_change_direction_and_history_row():
+    drop = PriceChange(1, "avito", "1", old_price=50000, new_price=40000)
+    rise = PriceChange(2, "avito", "2", old_price=0, new_price=40000)
+
+    assert drop.is_drop and not rise.is_drop
+    assert drop.history_row()["price_change_percent"] == -20.0
+    assert rise.change_percent == 0.0
+    assert UpsertResult(price_changes=[drop, rise]).price_drops == [drop]
@@ -0,0 +1,139 @@
+"""Тесты кодеков значений Redis-кеша."""
+
+import pickle
+import zlib
+from datetime import datetime
+
+import pytest
+
+from app.models.schemas import PaginatedProperties, Property, PropertyCreate
+from app.services.advanced_cache import AdvancedCacheManager, InMemoryAsyncRedis
+from app.services.cache_codec import (
+    FORMAT_VERSION,
+    MAGIC,
+    CacheCodec,
+    CacheCodecError,
+    available_compressors,
+    available_serializers,
+    resolve_codec,
+)
+from app.services.stale_cache import CacheEnvelope
+
+pytest.importorskip("orjson")
+
+
+def _listings(count: int = 20):
+    return [
+        PropertyCreate(
+            source="avito",
+            external_id=str(i),
+            title=f"{i % 4 + 1}-к. квартира",
+            description="Светлая квартира рядом с метро. " * 5,
+            price=40000 + i,
+            rooms=i % 4 + 1,
+            area=35.5 + i,
+            city="Москва",
+            photos=[f"https://img.example/{i}/{n}.jpg" for n in range(3)],
+            features={"balcony": bool(i % 2)},
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize("compressor", available_compressors())
+@pytest.mark.parametrize("serializer", available_serializers())
+def test_roundtrip_property_list(serializer, compressor):
+    codec = CacheCodec(serializer, compressor)
+    listings = _listings()
+
+    data = codec.encode(listings)
+    decoded = codec.decode(data)
+
+    assert data[0] == MAGIC and data[1] == FORMAT_VERSION
+    assert decoded == listings
+    assert all(type(item) is PropertyCreate for item in decoded)
+
+
+def test_envelope_and_nested_models_roundtrip():
+    codec = CacheCodec("orjson", "zlib")
+    page = PaginatedProperties(
+        items=[Property(source="cian", external_id="1", title="Студия", price=30000, first_seen=datetime(2026, 1, 2))],
+        total=1, skip=0, limit=10, page=1, pages=1, has_next=False, has_prev=False,
+    )
+    envelope = CacheEnvelope(value=page, fresh_until=1234.5)
+
+    decoded = codec.decode(codec.encode(envelope))
+
+    assert isinstance(decoded, CacheEnvelope)
+    assert decoded.fresh_until == 1234.5
+    assert decoded.value == page
+    assert decoded.value.items[0].first_seen == datetime(2026, 1, 2)
+
+
+def test_unrepresentable_values_fall_back_to_pickle():
+    codec = CacheCodec("orjson", "none")
+    value = {"bounds": (1, 2), "when": datetime(2026, 1, 1)}
+
+    data = codec.encode(value)
+
+    assert data[2] == codec.registry.serializers["pickle"].id
+    assert codec.decode(data) == value
+
+
+def test_legacy_pickle_entries_are_readable():
+    codec = resolve_codec()
+    listings = _listings(3)
+
+    assert codec.decode(pickle.dumps(listings)) == listings
+    assert codec.decode(b"COMPRESSED:" + zlib.compress(pickle.dumps(listings))) == listings
+
+
+def test_small_values_are_not_compressed():
+    codec = CacheCodec("orjson", "zlib", compress_threshold=1024)
+
+    assert codec.encode({"a": 1})[3] == codec.registry.compressors["none"].id
+    assert codec.encode(_listings(20))[3] == codec.registry.compressors["zlib"].id
+
+
+def test_unknown_format_is_a_codec_error():
+    codec = resolve_codec()
+
+    with pytest.raises(CacheCodecError):
+        codec.decode(bytes((MAGIC, FORMAT_VERSION + 1, 0, 0)) + b"payload")
+    with pytest.raises(CacheCodecError):
+        codec.decode(bytes((MAGIC, FORMAT_VERSION, 250, 0)) + b"payload")
+
+
+def test_schema_mismatch_is_a_codec_error():
+    codec = CacheCodec("orjson", "none")
+    data = codec.encode(_listings(1))
+    # Запись старой схемы: обязательное поле отсутствует
+    broken = data.replace(b'"title"', b'"titl_"')
+
+    with pytest.raises(CacheCodecError):
+        codec.decode(broken)
+
+
+def test_resolve_codec_falls_back_when_library_missing():
+    missing = [name for name in ("msgpack", "orjson") if name not in available_serializers()]
+    if not missing:
+        pytest.skip("all optional serializers are installed")
+
+    codec = resolve_codec(missing[0], "auto")
+
+    assert codec.serializer.name in available_serializers()
+
+
+@pytest.mark.asyncio
+async def test_manager_reads_legacy_entry_and_treats_unknown_format_as_miss():
+    manager = AdvancedCacheManager(codec=CacheCodec("orjson", "zlib"))
+    manager.redis_client = InMemoryAsyncRedis()
+
+    await manager.redis_client.setex("legacy", 60, pickle.dumps({"city": "Москва"}))
+    await manager.redis_client.setex("future", 60, bytes((MAGIC, FORMAT_VERSION + 1, 0, 0)))
+    await manager.set("fresh", _listings(2), 60)
+
+    assert await manager.get("legacy") == {"city": "Москва"}
+    assert await manager.get("future") is None
+    assert await manager.get("fresh") == _listings(2)
+    assert manager.errors == 0
@@ -32,6 +32,10 @@ def test_celery_beat_schedule():
     assert warm_task["task"] == "app.tasks.celery.warm_cache_task"
     assert "schedule" in warm_task
 
+    heatmap_task = schedule["refresh-geo-heatmap"]
+    assert heatmap_task["task"] == "app.tasks.celery.refresh_materialized_views_task"
+    assert heatmap_task["args"] == (["mv_geo_heatmap_grid"],)
+
 
 def test_get_task_status():
     """Тест получения статуса задачи."""
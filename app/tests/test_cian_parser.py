@@ -120,6 +120,7 @@ async def test_cian_parser_parse_success(mock_get, cian_parser, mock_html_respon
     """Test successful parsing of CIAN search results."""
     # Setup mock response
     mock_response = Mock()
+    mock_response.status_code = 200
     mock_response.text = mock_html_response
     mock_response.raise_for_status.return_value = None
     mock_get.return_value = mock_response
@@ -116,6 +116,27 @@ class TestDBCommands:
         result = runner.invoke(cli, ['db', 'recent', '--limit', '5'])
         assert result.exit_code == 0
 
+    def test_db_export(self, runner, tmp_path, monkeypatch):
+        """Тест выгрузки в файл."""
+        calls = []
+
+        async def fake_export(output, export_format, city, limit):
+            calls.append((output, export_format, city, limit))
+            output.write_bytes(b'PAR1')
+            return 4
+
+        monkeypatch.setattr('app.cli.export_properties_to_file', fake_export)
+        output = tmp_path / 'moscow.parquet'
+        result = runner.invoke(cli, ['--json-output', 'db', 'export', '--city', 'Москва', '-o', str(output)])
+        assert result.exit_code == 0
+        assert calls == [(output, 'parquet', 'Москва', None)]
+        assert '"bytes": 4' in result.output
+
+    def test_db_export_requires_output(self, runner):
+        """Тест обязательного пути выгрузки."""
+        result = runner.invoke(cli, ['db', 'export'])
+        assert result.exit_code != 0
+
 
 class TestParserCommands:
     """Тесты команд парсеров."""
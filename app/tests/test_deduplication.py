@@ -0,0 +1,108 @@
+"""Tests for blocking + MinHash/LSH duplicate detection."""
+
+import numpy as np
+
+from app.models.schemas import PropertyCreate
+from app.utils import geohash
+from app.utils.deduplication import (
+    DeduplicationStrategy,
+    DuplicateDetector,
+    MinHasher,
+    normalize_address,
+    shingles,
+)
+
+
+def _listing(source, external_id, address, price=50000, rooms=2, area=54.0, lat=55.7601, lon=37.6201, **extra):
+    return PropertyCreate(
+        source=source,
+        external_id=external_id,
+        title=f"{rooms}-к. квартира",
+        price=price,
+        rooms=rooms,
+        area=area,
+        city="Москва",
+        address=address,
+        latitude=lat,
+        longitude=lon,
+        **extra,
+    )
+
+
+def test_normalize_address_drops_markers_and_punctuation():
+    assert normalize_address("г. Москва, ул. Ленина, д. 5") == "москва ленина 5"
+    assert normalize_address("Лёвина улица, дом 5к2") == "левина 5к2"
+
+
+def test_geohash_encode():
+    assert geohash.encode(57.64911, 10.40744, precision=11) == "u4pruydqqvj"
+    assert len(geohash.encode(55.75, 37.62)) == 7
+
+
+def test_minhash_signatures_are_equal_for_equal_sets():
+    hasher = MinHasher(num_perm=16, bands=4)
+    first, second = shingles("ленина 5"), shingles("мира 120")
+    signatures = hasher.signatures([first, set(first), second])
+
+    assert signatures.shape == (3, 16)
+    assert np.array_equal(signatures[0], signatures[1])
+    assert not np.array_equal(signatures[0], signatures[2])
+    bands = hasher.band_hashes(signatures)
+    assert bands.shape == (3, 4)
+    assert (bands[0] == bands[1]).all()
+
+
+def test_cross_source_duplicates_share_a_cluster():
+    items = [
+        _listing("avito", "1", "Москва, ул. Ленина, д. 5"),
+        _listing("cian", "2", "г. Москва, улица Ленина, дом 5", price=50500, area=54.3, lat=55.7602),
+        _listing("domofond", "3", "Москва, ул. Ленина, д. 5"),
+        _listing("avito", "4", "Москва, ул. Мира, д. 120", price=80000, rooms=3, lat=55.80, lon=37.70),
+    ]
+
+    result = DuplicateDetector().cluster(items)
+
+    assert [item.external_id for item in result.unique] == ["1", "4"]
+    assert len(result.matches) == 2
+    assert result.cluster_ids[0] == result.cluster_ids[1] == result.cluster_ids[2]
+    assert result.cluster_ids[3] != result.cluster_ids[0]
+    assert sorted(result.clusters.values()) == [[0, 1, 2], [3]]
+
+
+def test_cluster_ids_do_not_depend_on_input_order():
+    items = [
+        _listing("avito", "1", "Москва, ул. Ленина, д. 5"),
+        _listing("cian", "2", "г. Москва, улица Ленина, дом 5", price=50300),
+    ]
+    detector = DuplicateDetector()
+
+    forward = detector.cluster(items).cluster_ids
+    backward = detector.cluster(list(reversed(items))).cluster_ids
+
+    assert forward[0] == forward[1] == backward[0] == backward[1]
+
+
+def test_distant_listings_are_never_scored():
+    items = [
+        _listing("avito", "1", "Москва, ул. Ленина, д. 5"),
+        _listing("cian", "2", "Москва, ул. Ленина, д. 15", lat=55.7651),
+        _listing("cian", "3", "Москва, ул. Ленина, д. 5", price=90000),
+        _listing("cian", "4", "Москва, ул. Ленина, д. 5", rooms=4),
+    ]
+
+    result = DuplicateDetector().cluster(items, DeduplicationStrategy.FUZZY)
+
+    assert result.candidate_pairs == 0
+    assert len(result.unique) == 4
+
+
+def test_detect_duplicates_keeps_its_tuple_contract():
+    items = [
+        _listing("avito", "1", "Москва, ул. Ленина, д. 5"),
+        _listing("avito", "1", "Москва, ул. Ленина, д. 5"),
+    ]
+
+    unique, matches = DuplicateDetector().detect_duplicates(items)
+
+    assert len(unique) == 1
+    assert matches[0].match_reason == "Exact match (same hash)"
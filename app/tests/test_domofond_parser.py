@@ -107,6 +107,7 @@ async def test_domofond_parser_parse_success(mock_get, domofond_parser, mock_htm
     """Test successful parsing of Domofond search results."""
     # Setup mock response
     mock_response = Mock()
+    mock_response.status_code = 200
     mock_response.text = mock_html_response
     mock_response.raise_for_status.return_value = None
     mock_get.return_value = mock_response
@@ -0,0 +1,218 @@
+"""Тесты фильтра дубликатов с окном по времени и поколениями по городам."""
+
+from typing import Any, Dict, List
+
+import pytest
+
+from app.services.search import SearchService, SourceBatch
+from app.models.schemas import PropertyCreate
+from app.utils.bloom_filter import BloomFilter, WindowedDuplicateFilter, bit_indexes, hash128
+
+
+class Clock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakePipeline:
+    def __init__(self, redis: "FakeRedis"):
+        self.redis = redis
+        self.commands: List[tuple] = []
+
+    def execute_command(self, *args):
+        self.commands.append(args)
+
+    def expire(self, key, seconds):
+        self.commands.append(("EXPIRE", key, seconds))
+
+    async def execute(self):
+        self.redis.round_trips += 1
+        return [self.redis.run(command) for command in self.commands]
+
+
+class FakeRedis:
+    """Redis с BITFIELD GET/SET u1 и EXPIRE."""
+
+    def __init__(self):
+        self.bits: Dict[str, set] = {}
+        self.ttl: Dict[str, int] = {}
+        self.round_trips = 0
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def run(self, command: tuple) -> Any:
+        if command[0] == "EXPIRE":
+            self.ttl[command[1]] = command[2]
+            return True
+        _, key, *args = command
+        bits = self.bits.setdefault(key, set())
+        replies = []
+        while args:
+            op, _, offset, *rest = args
+            replies.append(int(offset in bits))
+            if op == "SET":
+                bits.add(offset)
+                args = rest[1:]
+            else:
+                args = rest
+        return replies
+
+
+def _filter(clock, **kwargs):
+    return WindowedDuplicateFilter(window_seconds=300, generations=3, expected_items=1000, clock=clock, **kwargs)
+
+
+def test_hash128_is_deterministic_and_double_hashing_stays_in_range():
+    h1, h2 = hash128("avito:1")
+    assert hash128(b"avito:1") == (h1, h2)
+    assert h2 % 2 == 1
+    assert all(0 <= i < 997 for i in bit_indexes("avito:1", 7, 997))
+
+
+def test_bloom_filter_keeps_its_contract():
+    bloom = BloomFilter(expected_items=1000, false_positive_rate=0.01)
+    bloom.add("avito:1")
+
+    assert "avito:1" in bloom
+    assert sum(f"cian:{i}" in bloom for i in range(1000)) < 50
+    assert bloom.memory_bytes == (bloom.size + 7) // 8
+
+
+@pytest.mark.asyncio
+async def test_keys_expire_after_the_window():
+    clock = Clock()
+    dedup = _filter(clock)
+
+    assert await dedup.check_and_add(["avito:1", "avito:2", "avito:1"], "Москва") == [False, False, True]
+    clock.now += 150
+    assert await dedup.check_and_add(["avito:1", "avito:3"], "Москва") == [True, False]
+
+    clock.now += 200
+    # Поколение с avito:1 вышло из окна, avito:3 ещё в нём
+    assert await dedup.check_and_add(["avito:1", "avito:3"], "Москва") == [False, True]
+    assert len(dedup._local["Москва"]) <= dedup.generations
+
+
+@pytest.mark.asyncio
+async def test_cities_are_independent():
+    dedup = _filter(Clock())
+
+    await dedup.check_and_add(["avito:1"], "Москва")
+
+    assert await dedup.check_and_add(["avito:1"], "Казань") == [False]
+    assert dedup.get_stats()["local_items_by_scope"] == {"Москва": 1, "Казань": 1}
+
+
+@pytest.mark.asyncio
+async def test_redis_generations_are_shared_between_workers():
+    redis = FakeRedis()
+    clock = Clock()
+    api_worker = _filter(clock, redis_getter=lambda: redis)
+    celery_worker = _filter(clock, redis_getter=lambda: redis)
+
+    assert await api_worker.check_and_add(["avito:1", "cian:2"], "Москва") == [False, False]
+    assert await celery_worker.check_and_add(["avito:1", "avito:3"], "Москва") == [True, False]
+    # Проверка и запись батча — два round-trip независимо от размера
+    assert redis.round_trips == 4
+
+    generation_key = f"dedup:москва:{api_worker.current_generation()}"
+    assert redis.ttl[generation_key] == 400
+    assert api_worker._local == {}
+
+    clock.now += 301
+    assert await celery_worker.check_and_add(["avito:1"], "Москва") == [False]
+
+
+@pytest.mark.asyncio
+async def test_redis_errors_fall_back_to_local_filter():
+    class BrokenRedis(FakeRedis):
+        def run(self, command):
+            raise ConnectionError("redis down")
+
+    dedup = _filter(Clock(), redis_getter=lambda: BrokenRedis())
+
+    assert await dedup.check_and_add(["avito:1", "avito:1"], "Москва") == [False, True]
+    assert await dedup.check_and_add(["avito:1"], "Москва") == [True]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("shared", [False, True])
+async def test_contains_does_not_remember_keys_until_added(shared):
+    redis = FakeRedis()
+    dedup = _filter(Clock(), redis_getter=(lambda: redis) if shared else None)
+
+    assert await dedup.contains(["avito:1", "avito:1"], "Москва") == [False, True]
+    assert await dedup.contains(["avito:1"], "Москва") == [False]
+
+    await dedup.add(["avito:1"], "Москва")
+
+    assert await dedup.contains(["avito:1", "avito:2"], "Москва") == [True, False]
+
+
+def test_search_service_deduplicates_within_run():
+    def batch():
+        return SourceBatch(parser_name="avito", properties=[
+            PropertyCreate(source="avito", external_id="1", title="Квартира", price=30000),
+        ])
+
+    seen = set()
+    first, again = batch(), batch()
+    SearchService._deduplicate(first, seen)
+    SearchService._deduplicate(again, seen)
+    next_run = batch()
+    SearchService._deduplicate(next_run, set())
+
+    assert (len(first.properties), first.duplicates) == (1, 0)
+    assert (len(again.properties), again.duplicates) == (0, 1)
+    # Следующий запуск (другой воркер, фоновое обновление кэша) видит объявление снова
+    assert (len(next_run.properties), next_run.duplicates) == (1, 0)
+
+
+@pytest.mark.asyncio
+async def test_search_service_skips_only_unchanged_saves(monkeypatch):
+    service = SearchService()
+    service.duplicate_filter = _filter(Clock())
+    saved: List[List[Any]] = []
+
+    async def fake_save(properties):
+        saved.append([(prop.external_id, prop.price) for prop in properties])
+        return {"inserted": len(properties), "updated": 0, "duplicates_removed": 0, "price_changes": []}
+
+    monkeypatch.setattr("app.services.search.save_properties", fake_save)
+
+    def listing(price):
+        return PropertyCreate(source="avito", external_id="1", title="Квартира", price=price)
+
+    await service._save_properties([listing(30000)], "Москва")
+    await service._save_properties([listing(30000)], "Москва")
+    await service._save_properties([listing(28000)], "Москва")
+    await service._save_properties([listing(30000)], "Казань")
+
+    assert saved == [[("1", 30000)], [("1", 28000)], [("1", 30000)]]
+
+
+@pytest.mark.asyncio
+async def test_failed_save_does_not_mark_listings_as_saved(monkeypatch):
+    service = SearchService()
+    service.duplicate_filter = _filter(Clock())
+    attempts: List[str] = []
+
+    async def flaky_save(properties):
+        attempts.append(properties[0].external_id)
+        if len(attempts) == 1:
+            raise ConnectionError("database down")
+        return {"inserted": len(properties), "updated": 0, "duplicates_removed": 0, "price_changes": []}
+
+    monkeypatch.setattr("app.services.search.save_properties", flaky_save)
+    listing = PropertyCreate(source="avito", external_id="1", title="Квартира", price=30000)
+
+    await service._save_properties([listing], "Москва")
+    await service._save_properties([listing], "Москва")
+    await service._save_properties([listing], "Москва")
+
+    # Вторая попытка после ошибки выполняется, третья (уже сохранено) пропускается
+    assert attempts == ["1", "1"]
@@ -24,29 +24,18 @@ async def test_avito_parse_internal_with_mocked_http(monkeypatch):
     </div>
     """
 
-    # Dummy response and client to bypass real network
+    # Dummy response to bypass real network
     class DummyResponse:
+        status_code = 200
+
         def __init__(self, text: str):
             self.text = text
 
         def raise_for_status(self):
             return None
 
-    class DummyClient:
-        def __init__(self, *args, **kwargs):
-            pass
-
-        async def __aenter__(self):
-            return self
-
-        async def __aexit__(self, exc_type, exc, tb):
-            return False
-
-        async def get(self, url):
-            return DummyResponse(sample_html)
-
-    # Monkeypatch external dependencies
-    monkeypatch.setattr("httpx.AsyncClient", DummyClient)
+    # Monkeypatch external dependencies (parsers go through the shared transport)
+    monkeypatch.setattr(parser.transport, "get", AsyncMock(return_value=DummyResponse(sample_html)))
     monkeypatch.setattr("app.parsers.avito.parser.rate_limiter.acquire", AsyncMock())
 
     results = await parser._parse_internal("moskva", {"type": "Квартира"})
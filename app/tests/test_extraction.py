@@ -0,0 +1,144 @@
+"""Тесты декларативного извлечения объявлений и общих шаблонов."""
+
+import json
+
+import pytest
+from bs4 import BeautifulSoup
+
+from app.parsers.avito.parser import AvitoParser
+from app.parsers.cian_commercial.parser import CianCommercialParser
+from app.parsers.domclick.parser import DomclickParser
+from app.parsers.etagi.parser import EtagiParser
+from app.parsers.extraction import FieldSpec, ListingSpec, SimpleSelector
+from app.parsers.patterns import extract_area, extract_floor, extract_rooms, find_district, parse_price
+
+
+def test_patterns_parse_russian_listing_strings():
+    assert extract_rooms("2-комн. квартира, 45 м²") == 2
+    assert extract_rooms("Квартира 50 кв. м, 5 км от МКАД") is None
+    assert extract_area("Квартира 55,7 кв.м") == 55.7
+    assert extract_floor("1-к, 38 м², 3/9 эт.") == (3, 9)
+    assert extract_floor("100 м² • 2-й этаж из 12") == (2, 12)
+    assert extract_floor("3 / 9") == (None, None)
+    assert extract_floor("3 / 9", strict=False) == (3, 9)
+    assert parse_price("120 000 ₽/мес.") == 120000.0
+    assert parse_price("от 1 500,50 руб.") == 1500.5
+    assert find_district("Квартира, ЮЗАО, Кунцево") == "юзао"
+
+
+def test_simple_selector_compiles_to_predicate_and_xpath():
+    selector = SimpleSelector("div.param-item[data-param='rooms']")
+
+    assert selector.xpath == (
+        "div[contains(concat(' ', normalize-space(@class), ' '), ' param-item ')][@data-param='rooms']"
+    )
+    with pytest.raises(ValueError):
+        SimpleSelector("div a")
+    with pytest.raises(ValueError):
+        ListingSpec(source="x", base_url="https://x", card="main > article", fields={})
+
+
+def test_alternatives_are_chosen_by_priority_not_document_order():
+    spec = ListingSpec(
+        source="test",
+        base_url="https://example.com",
+        card="article",
+        fields={
+            "title": FieldSpec("h2"),
+            "price": FieldSpec(("[data-mark='MainPrice']", ".price")),
+            "link": FieldSpec("a", attr="href"),
+            "photos": FieldSpec("img", attr=("src", "data-src"), many=True, limit=2),
+        },
+    )
+    html = """
+    <article>
+      <span class="price">1 ₽</span>
+      <h2>Студия <b>28 м²</b></h2>
+      <a href="/flat/42/">x</a><a href="/other/1/">y</a>
+      <img data-src="//cdn.example.com/1.jpg"><img src="/2.jpg"><img src="/3.jpg">
+      <span data-mark="MainPrice">45 000 ₽</span>
+    </article>
+    """
+
+    [row] = spec.extract(html)
+
+    assert (row["title"], row["price"], row["area"]) == ("Студия 28 м²", 45000.0, 28.0)
+    assert (row["link"], row["external_id"]) == ("https://example.com/flat/42/", "42")
+    assert row["photos"] == ["https://cdn.example.com/1.jpg", "https://example.com/2.jpg"]
+
+
+def test_cards_without_required_fields_are_skipped():
+    html = """
+    <div data-testid="search-results-item">
+      <div data-testid="item-title">1-к квартира</div>
+      <a href="/card/rent/flat/listing/1/">x</a>
+    </div>
+    <div data-testid="search-results-item">
+      <div data-testid="item-title">2-к квартира</div>
+      <div data-testid="item-price">50 000 ₽</div>
+      <a href="/card/rent/flat/listing/2/">x</a>
+    </div>
+    """
+
+    rows = DomclickParser()._extract_listings(html)
+
+    assert [(row["external_id"], row["rooms"]) for row in rows] == [("2", 2)]
+
+
+def test_card_helpers_accept_beautifulsoup_items():
+    html = """
+    <div data-marker="item" data-item-id="1">
+      <h3 itemprop="name">2-к квартира, Арбат</h3>
+      <div data-marker="item-address">Москва, Арбат, 10</div>
+    </div>
+    """
+    item = BeautifulSoup(html, "lxml").select_one("[data-marker='item']")
+    parser = AvitoParser()
+
+    assert parser._extract_location(item) == {"district": "арбат", "address": "Москва, Арбат, 10"}
+
+
+def test_etagi_params_use_shared_patterns():
+    html = """
+    <div class="listing-item">
+      <a class="listing-title" href="/arenda/kvartiry/777/">Квартира</a>
+      <div class="listing-price">35 000 ₽</div>
+      <div class="listing-params">
+        <div class="param-item" data-param="rooms">2 комн.</div>
+        <div class="param-item" data-param="area">45,5 м²</div>
+        <div class="param-item" data-param="floor">3 / 9</div>
+      </div>
+      <img class="listing-image" data-src="/img/777.jpg">
+    </div>
+    """
+
+    [row] = EtagiParser()._extract_listings(html, "Тюмень")
+
+    assert (row["rooms"], row["area"], row["floor"], row["total_floors"]) == (2, 45.5, 3, 9)
+    assert row["photos"] == ["https://etagi.com/img/777.jpg"]
+    assert (row["city"], row["external_id"]) == ("Тюмень", "777")
+
+
+def test_cian_commercial_prefers_json_ld_and_falls_back_to_cards():
+    parser = CianCommercialParser()
+    offer = {
+        "@type": "Offer",
+        "name": "Офис 120 м²",
+        "url": "https://www.cian.ru/rent/commercial/snyat-ofis-123/",
+        "offers": {"price": 250000},
+    }
+    json_ld = f'<script type="application/ld+json">{json.dumps(offer)}</script>'
+    cards = """
+    <div data-name="ListingItem">
+      <a href="/rent/commercial/snyat-sklad-456/">Склад</a>
+      <div class="_9344497d01">300 000 ₽/мес.</div>
+      <div class="_9344497d02">800 м² • 1 этаж из 2</div>
+    </div>
+    """
+
+    [from_script] = parser._extract_listings(f"<html><head>{json_ld}</head><body>{cards}</body></html>", "Москва")
+    [from_card] = parser._extract_listings(f"<html><body>{cards}</body></html>", "Москва")
+
+    assert (from_script["external_id"], from_script["price"]) == ("123", 250000.0)
+    assert (from_card["external_id"], from_card["price"], from_card["area"]) == ("456", 300000.0, 800.0)
+    assert (from_card["floor"], from_card["total_floors"], from_card["city"]) == (1, 2, "Москва")
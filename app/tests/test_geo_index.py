@@ -0,0 +1,112 @@
+"""Тесты геопространственного поиска: сетка ячеек, bounding box, векторный haversine."""
+
+import math
+
+import numpy as np
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.repositories import property as property_repo
+from app.models.schemas import PropertyCreate
+from app.utils.geo import bounding_box, cell_id, haversine_km, nearest_within
+
+
+def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371.0 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+def test_vectorized_haversine_matches_scalar():
+    rng = np.random.default_rng(0)
+    lats = rng.uniform(55.5, 56.0, 100)
+    lons = rng.uniform(37.3, 37.9, 100)
+
+    distances = haversine_km(55.75, 37.61, lats, lons)
+
+    expected = [haversine_distance(55.75, 37.61, lat, lon) for lat, lon in zip(lats, lons)]
+    assert np.allclose(distances, expected)
+
+
+def test_bounding_box_contains_circle():
+    box = bounding_box(55.75, 37.61, 5.0)
+    rng = np.random.default_rng(1)
+    lats = rng.uniform(55.6, 55.9, 5000)
+    lons = rng.uniform(37.3, 37.9, 5000)
+
+    inside = haversine_km(55.75, 37.61, lats, lons) <= 5.0
+
+    assert np.all((lats[inside] >= box.south) & (lats[inside] <= box.north))
+    assert np.all((lons[inside] >= box.west) & (lons[inside] <= box.east))
+
+
+def test_cell_ranges_cover_bounding_box():
+    box = bounding_box(55.75, 37.61, 2.0)
+    ranges = box.cell_ranges()
+    rng = np.random.default_rng(2)
+
+    for lat, lon in zip(rng.uniform(box.south, box.north, 500), rng.uniform(box.west, box.east, 500)):
+        cell = cell_id(lat, lon)
+        assert any(first <= cell <= last for first, last in ranges)
+
+
+def test_cell_ranges_fall_back_for_large_boxes():
+    assert bounding_box(55.75, 37.61, 500.0).cell_ranges() == []
+
+
+def test_nearest_within_returns_sorted_top_k_and_total():
+    distances = np.array([5.0, 0.5, 3.0, 0.1, 9.0, 2.0])
+
+    nearest, total = nearest_within(distances, radius_km=4.0, limit=2)
+
+    assert total == 4
+    assert list(nearest) == [3, 1]
+
+
+def make_property(index: int, latitude: float, longitude: float) -> PropertyCreate:
+    return PropertyCreate(
+        source="test",
+        external_id=f"geo-{index}",
+        title=f"Property {index}",
+        price=40000.0 + index,
+        rooms=1,
+        area=30.0,
+        location={"city": "Москва", "latitude": latitude, "longitude": longitude},
+    )
+
+
+@pytest.mark.asyncio
+async def test_find_properties_within_radius(db_session: AsyncSession):
+    # ~0.55 км, ~1.1 км и ~11 км к северу от центра
+    for index, offset in enumerate((0.005, 0.01, 0.1)):
+        await property_repo.create_property(db_session, make_property(index, 55.75 + offset, 37.61))
+
+    items, total = await property_repo.find_properties_within_radius(db_session, 55.75, 37.61, 2.0, limit=1)
+
+    assert total == 2
+    assert [item["title"] for item in items] == ["Property 0"]
+    assert items[0]["distance_km"] == pytest.approx(0.556, abs=0.01)
+
+
+@pytest.mark.asyncio
+async def test_find_nearest_properties_expands_radius(db_session: AsyncSession):
+    for index, offset in enumerate((0.05, 0.1)):
+        await property_repo.create_property(db_session, make_property(index, 55.75 + offset, 37.61))
+
+    items = await property_repo.find_nearest_properties(db_session, 55.75, 37.61, k=2)
+
+    assert [item["title"] for item in items] == ["Property 0", "Property 1"]
+
+
+@pytest.mark.asyncio
+async def test_get_heatmap_grid_aggregates_in_sql(db_session: AsyncSession):
+    points = [(55.751, 37.611), (55.752, 37.612), (55.758, 37.615), (55.801, 37.651)]
+    for index, (latitude, longitude) in enumerate(points):
+        await property_repo.create_property(db_session, make_property(index, latitude, longitude))
+
+    cells = await property_repo.get_heatmap_grid(db_session, 0.01, south=55.7, west=37.5, north=55.9, east=37.7)
+
+    assert [cell["count"] for cell in cells] == [3, 1]
+    assert cells[0]["latitude"] == pytest.approx(55.755)
+    assert cells[0]["longitude"] == pytest.approx(37.615)
+    assert cells[0]["avg_price"] == pytest.approx(40001.0)
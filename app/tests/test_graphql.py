@@ -2,10 +2,20 @@
 Тесты для GraphQL API.
 """
 
+import hashlib
+from contextlib import contextmanager
+from typing import List
+
 import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.repositories import property as property_repo
+from app.models.schemas import PropertyCreate
 
 # Импортируем с проверкой доступности strawberry
 try:
+    from app.api import graphql as graphql_module
     from app.api.graphql import (
         PropertyType,
         PropertyFilter,
@@ -13,8 +23,14 @@ try:
         PropertyStatisticsType,
         Query,
         Mutation,
+        GraphQLContext,
+        QueryComplexityRule,
+        resolve_persisted_query,
+        schema,
         STRAWBERRY_AVAILABLE,
     )
+    from app.services.l1_cache import L1Cache
+    from graphql import GraphQLError
 except ImportError:
     STRAWBERRY_AVAILABLE = False
 
@@ -25,6 +41,39 @@ pytestmark = pytest.mark.skipif(
 )
 
 
+async def _seed(db: AsyncSession, count: int) -> List[int]:
+    ids = []
+    for i in range(count):
+        prop = await property_repo.create_property(db, PropertyCreate(
+            source="test", external_id=f"gql{i}", title=f"Flat {i}",
+            price=30000.0 + i * 1000, area=40.0, rooms=i % 3 + 1,
+            location={"city": "Moscow" if i % 2 else "Kazan"},
+        ))
+        ids.append(prop.id)
+    return ids
+
+
+async def _execute(db: AsyncSession, query: str, **variables):
+    return await schema.execute(query, variable_values=variables, context_value=GraphQLContext(db))
+
+
+@contextmanager
+def _count_selects(db: AsyncSession):
+    """Собирает SELECT'ы, выполненные на соединении сессии."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+
 class TestGraphQLTypes:
     """Тесты GraphQL типов."""
 
@@ -88,33 +137,46 @@ class TestGraphQLQueries:
         assert result.status == "operational"
         assert result.version == "1.0.0"
 
-    def test_property_query(self):
+    @pytest.mark.asyncio
+    async def test_property_query(self, db_session: AsyncSession):
         """Тест property query."""
-        query = Query()
-        result = query.property(id=1)
-        assert result is not None
-        assert result.id == 1
+        ids = await _seed(db_session, 2)
 
-    def test_properties_query_no_filter(self):
-        """Тест properties без фильтра."""
-        query = Query()
-        results = query.properties(limit=5, offset=0)
-        assert len(results) == 5
+        result = await _execute(db_session, "query ($id: Int!) { property(id: $id) { id title } }", id=ids[1])
 
-    def test_properties_query_pagination(self):
-        """Тест пагинации."""
-        query = Query()
-        page1 = query.properties(limit=5, offset=0)
-        page2 = query.properties(limit=5, offset=5)
-        assert len(page1) == 5
-        assert len(page2) == 5
-        assert page1[0].id != page2[0].id
+        assert result.data["property"] == {"id": ids[1], "title": "Flat 1"}
+
+    @pytest.mark.asyncio
+    async def test_property_query_missing(self, db_session: AsyncSession):
+        """Тест property query для несуществующего id."""
+        result = await _execute(db_session, "{ property(id: 404) { id } }")
+        assert result.data["property"] is None
+
+    @pytest.mark.asyncio
+    async def test_properties_query_pagination(self, db_session: AsyncSession):
+        """Тест пагинации и фильтра."""
+        await _seed(db_session, 8)
+        query = """
+            query ($offset: Int!) {
+                properties(filter: {city: "Moscow", minRooms: 1}, limit: 2, offset: $offset) { id city rooms }
+            }
+        """
+
+        page1 = (await _execute(db_session, query, offset=0)).data["properties"]
+        page2 = (await _execute(db_session, query, offset=2)).data["properties"]
+
+        assert len(page1) == len(page2) == 2
+        assert page1[0]["id"] != page2[0]["id"]
+        assert all(item["city"] == "Moscow" and item["rooms"] >= 1 for item in page1 + page2)
 
-    def test_statistics_query(self):
+    @pytest.mark.asyncio
+    async def test_statistics_query(self, db_session: AsyncSession):
         """Тест statistics query."""
-        query = Query()
-        result = query.statistics(city="Москва", days=30)
-        assert result.total > 0
+        await _seed(db_session, 4)
+
+        result = await _execute(db_session, '{ statistics(city: "Moscow", days: 30) { total minPrice maxPrice } }')
+
+        assert result.data["statistics"] == {"total": 2, "minPrice": 31000.0, "maxPrice": 33000.0}
 
 
 class TestGraphQLMutations:
@@ -161,13 +223,42 @@ class TestGraphQLSchema:
 class TestGraphQLIntegration:
     """Интеграционные тесты."""
 
-    def test_full_query_workflow(self):
+    @pytest.mark.asyncio
+    async def test_nested_query_is_batched(self, db_session: AsyncSession):
+        """Вложенные поля 20 объявлений — три запроса к БД, без N+1."""
+        ids = await _seed(db_session, 20)
+        for property_id in ids[:3]:
+            await property_repo.track_price_change(db_session, property_id, 50000.0, 45000.0)
+            await property_repo.track_property_view(db_session, property_id)
+        query = """
+            {
+                properties(limit: 20) {
+                    id
+                    viewsCount
+                    priceHistory { oldPrice newPrice }
+                }
+            }
+        """
+
+        with _count_selects(db_session) as selects:
+            result = await _execute(db_session, query)
+
+        assert result.errors is None
+        items = {item["id"]: item for item in result.data["properties"]}
+        assert len(items) == 20
+        assert items[ids[0]]["viewsCount"] == 1
+        assert items[ids[0]]["priceHistory"] == [{"oldPrice": 50000.0, "newPrice": 45000.0}]
+        assert items[ids[5]]["priceHistory"] == []
+        # поиск + одна пачка истории цен + одна пачка просмотров
+        assert len(selects) == 3
+
+    @pytest.mark.asyncio
+    async def test_full_query_workflow(self, db_session: AsyncSession):
         """Тест workflow query."""
-        query = Query()
-        health = query.health()
-        assert health.status == "operational"
-        props = query.properties(limit=3)
-        assert len(props) == 3
+        await _seed(db_session, 3)
+        result = await _execute(db_session, "{ health { status } properties(limit: 3) { id } }")
+        assert result.data["health"]["status"] == "operational"
+        assert len(result.data["properties"]) == 3
 
     def test_full_mutation_workflow(self):
         """Тест workflow mutation."""
@@ -181,3 +272,79 @@ class TestGraphQLIntegration:
         assert updated.price == 55000
         deleted = mutation.delete_property(id=created.id)
         assert deleted is True
+
+
+class TestGraphQLLimits:
+    """Ограничения глубины и стоимости запросов."""
+
+    @pytest.mark.asyncio
+    async def test_complexity_limit(self, db_session: AsyncSession, monkeypatch):
+        """Запрос дороже лимита отклоняется до обращения к БД."""
+        monkeypatch.setattr(QueryComplexityRule, "max_complexity", 500)
+        query = "{ properties(limit: 100) { id priceHistory(limit: 10) { newPrice } } }"
+
+        with _count_selects(db_session) as selects:
+            result = await _execute(db_session, query)
+
+        assert result.errors and "complexity" in result.errors[0].message
+        assert selects == []
+
+    @pytest.mark.asyncio
+    async def test_complexity_counts_fragments_and_variables(self, db_session: AsyncSession, monkeypatch):
+        """Limit из переменной считается по максимуму, фрагменты — как поля."""
+        monkeypatch.setattr(QueryComplexityRule, "max_complexity", 150)
+        query = """
+            query ($limit: Int!) { properties(limit: $limit) { ...Card } }
+            fragment Card on PropertyType { id title }
+        """
+
+        result = await _execute(db_session, query, limit=1)
+
+        assert result.errors and "complexity" in result.errors[0].message
+
+    @pytest.mark.asyncio
+    async def test_depth_limit(self, db_session: AsyncSession, monkeypatch):
+        """Слишком глубокий запрос отклоняется."""
+        monkeypatch.setattr(
+            graphql_module, "QUERY_LIMIT_RULES", [graphql_module.create_depth_validator(1, None)]
+        )
+
+        assert (await _execute(db_session, "{ properties { id } }")).errors is None
+        result = await _execute(db_session, "{ properties { priceHistory { newPrice } } }")
+        assert result.errors and "depth" in result.errors[0].message
+
+
+class TestPersistedQueries:
+    """Automatic persisted queries."""
+
+    @pytest.mark.asyncio
+    async def test_persisted_query_round_trip(self, db_session: AsyncSession):
+        """Неизвестный хэш — PersistedQueryNotFound; после регистрации текст не нужен."""
+        ids = await _seed(db_session, 1)
+        query = "query Card($id: Int!) { property(id: $id) { id } }"
+        persisted = {"persistedQuery": {"version": 1, "sha256Hash": hashlib.sha256(query.encode()).hexdigest()}}
+        graphql_module.persisted_queries.clear()
+
+        miss = await schema.execute(
+            None, variable_values={"id": ids[0]}, context_value=GraphQLContext(db_session),
+            operation_extensions=persisted,
+        )
+        assert miss.errors[0].message == "PersistedQueryNotFound"
+
+        registered = await schema.execute(
+            query, variable_values={"id": ids[0]}, context_value=GraphQLContext(db_session),
+            operation_extensions=persisted,
+        )
+        hit = await schema.execute(
+            None, variable_values={"id": ids[0]}, context_value=GraphQLContext(db_session),
+            operation_extensions=persisted,
+        )
+
+        assert registered.data == hit.data == {"property": {"id": ids[0]}}
+
+    def test_persisted_query_hash_mismatch(self):
+        """Текст, не совпадающий с хэшем, не сохраняется."""
+        store = L1Cache()
+        with pytest.raises(GraphQLError):
+            resolve_persisted_query("{ hello }", {"version": 1, "sha256Hash": "0" * 64}, store)
+        assert len(store) == 0
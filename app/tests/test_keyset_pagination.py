@@ -0,0 +1,196 @@
+"""Тесты keyset-пагинации поиска и планов запросов по частичным индексам."""
+
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+import pytest
+from sqlalchemy import event, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.keyset import (
+    KeysetCursor,
+    decode_keyset_cursor,
+    encode_keyset_cursor,
+    next_cursor,
+    price_per_sqm_of,
+)
+from app.db.models.property import Property
+from app.db.repositories import property as property_repo
+from app.models.schemas import PropertyCreate
+from app.services.pagination import CursorError
+
+
+async def _seed(db: AsyncSession, count: int = 25) -> None:
+    now = datetime.now(timezone.utc)
+    for i in range(count):
+        prop = await property_repo.create_property(db, PropertyCreate(
+            source="test", external_id=f"ks{i}", title=f"Flat {i}",
+            price=30000.0 + (i % 5) * 1000,  # повторяющиеся цены: порядок решает id
+            area=None if i % 7 == 0 else 30.0 + i,
+            rooms=i % 3 + 1,
+            location={"city": "Moscow"},
+        ))
+        # server_default в SQLite пишет время строкой другого формата, чем
+        # bind-параметр курсора; явное значение сравнивается корректно.
+        # По три строки на одно значение created_at: порядок решает id
+        await db.execute(
+            update(Property).where(Property.id == prop.id).values(created_at=now - timedelta(minutes=i // 3))
+        )
+
+
+async def _walk(db: AsyncSession, limit: int, **params) -> List[int]:
+    """Проходит все страницы по курсорам и возвращает id в порядке выдачи."""
+    sort_by, sort_order = params["sort_by"], params["sort_order"]
+    ids, cursor = [], None
+    while True:
+        page = await property_repo.search_properties(db, city="Moscow", limit=limit, cursor=cursor, **params)
+        ids.extend(item.id for item in page)
+        token = next_cursor(page, limit, sort_by, sort_order)
+        if token is None:
+            return ids
+        cursor = decode_keyset_cursor(token, sort_by, sort_order)
+
+
+def test_cursor_round_trip():
+    created = datetime(2026, 10, 16, 12, 30, tzinfo=timezone.utc)
+    for cursor in (
+        KeysetCursor("created_at", "desc", created, 42),
+        KeysetCursor("price", "asc", 50000.0, 7),
+        KeysetCursor("area", "asc", None, 3),
+    ):
+        token = encode_keyset_cursor(cursor)
+        assert decode_keyset_cursor(token, cursor.sort_by, cursor.sort_order) == cursor
+
+
+def test_cursor_for_other_sort_is_rejected():
+    token = encode_keyset_cursor(KeysetCursor("price", "asc", 50000.0, 7))
+
+    with pytest.raises(CursorError):
+        decode_keyset_cursor(token, "price", "desc")
+    with pytest.raises(CursorError):
+        decode_keyset_cursor(token, "area", "asc")
+    with pytest.raises(CursorError):
+        decode_keyset_cursor("not-a-cursor", "price", "asc")
+
+
+def test_next_cursor_only_for_full_page():
+    assert next_cursor([], 10, "price", "asc") is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("sort_by", ["created_at", "price", "area", "rooms"])
+@pytest.mark.parametrize("sort_order", ["asc", "desc"])
+async def test_keyset_pages_match_single_query(db_session: AsyncSession, sort_by: str, sort_order: str):
+    await _seed(db_session)
+
+    expected = await property_repo.search_properties(
+        db_session, city="Moscow", sort_by=sort_by, sort_order=sort_order, limit=100,
+    )
+    ids = await _walk(db_session, 4, sort_by=sort_by, sort_order=sort_order)
+
+    assert ids == [item.id for item in expected]
+    assert len(set(ids)) == 25
+
+
+@pytest.mark.asyncio
+async def test_price_per_sqm_keyset_pages(db_session: AsyncSession):
+    await _seed(db_session)
+
+    expected = await property_repo.search_properties_by_price_per_sqm(db_session, city="Moscow", limit=100)
+    ids, cursor = [], None
+    while True:
+        page = await property_repo.search_properties_by_price_per_sqm(
+            db_session, city="Moscow", limit=5, cursor=cursor,
+        )
+        ids.extend(item.id for item in page)
+        token = next_cursor(page, 5, "price_per_sqm", "asc", value_of=price_per_sqm_of)
+        if token is None:
+            break
+        cursor = decode_keyset_cursor(token, "price_per_sqm", "asc")
+
+    assert ids == [item.id for item in expected]
+    # Объявления без площади в подбор по цене за м² не попадают
+    assert len(ids) == 25 - 4
+
+
+# -----------------------------------------------------------------------------
+# Регрессия планов: запросы поиска читают частичные индексы по порядку
+# -----------------------------------------------------------------------------
+
+async def _captured_statement(db: AsyncSession, search, **params):
+    """Выполняет ``search`` и возвращает SQL и параметры последнего SELECT."""
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    engine = (await db.connection()).sync_engine
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        await search(db, **params)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    return captured[-1]
+
+
+async def _sqlite_plan(db: AsyncSession, search, **params) -> str:
+    statement, parameters = await _captured_statement(db, search, **params)
+    raw = await (await db.connection()).get_raw_connection()
+    cursor = await raw.driver_connection.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+    return "\n".join(row[-1] for row in await cursor.fetchall())
+
+
+SQLITE_PLAN_CASES = [
+    (dict(city="Moscow", sort_by="created_at", sort_order="desc"), "ix_properties_active_city_created"),
+    (dict(sort_by="created_at", sort_order="desc"), "ix_properties_active_created"),
+    (dict(city="Moscow", sort_by="price", sort_order="asc"), "ix_properties_active_city_price"),
+    (dict(sort_by="price", sort_order="desc"), "ix_properties_active_price"),
+    (
+        dict(city="Moscow", sort_by="price", sort_order="asc",
+             cursor=KeysetCursor("price", "asc", 31000.0, 10)),
+        "ix_properties_active_city_price",
+    ),
+]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("params,index", SQLITE_PLAN_CASES)
+async def test_search_plan_uses_partial_index(db_session: AsyncSession, params, index: str):
+    await _seed(db_session, 5)
+
+    plan = await _sqlite_plan(db_session, property_repo.search_properties, limit=20, **params)
+
+    assert index in plan
+    assert "TEMP B-TREE" not in plan
+
+
+@pytest.mark.asyncio
+async def test_price_per_sqm_plan_uses_expression_index(db_session: AsyncSession):
+    await _seed(db_session, 5)
+
+    plan = await _sqlite_plan(
+        db_session, property_repo.search_properties_by_price_per_sqm,
+        limit=20, cursor=KeysetCursor("price_per_sqm", "asc", 900.0, 3),
+    )
+
+    assert "ix_properties_active_price_per_sqm" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("params,index", SQLITE_PLAN_CASES)
+async def test_postgres_search_plan_uses_partial_index(pg_session: AsyncSession, params, index: str):
+    await _seed(pg_session, 5)
+    await pg_session.execute(text("ANALYZE properties"))
+    statement, parameters = await _captured_statement(
+        pg_session, property_repo.search_properties, limit=20, **params,
+    )
+
+    raw = await (await pg_session.connection()).get_raw_connection()
+    await raw.driver_connection.execute("SET LOCAL enable_seqscan = off")
+    rows = await raw.driver_connection.fetch(f"EXPLAIN {statement}", *parameters)
+    plan = "\n".join(row[0] for row in rows)
+
+    assert index in plan
+    assert "Sort" not in plan
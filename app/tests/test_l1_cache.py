@@ -0,0 +1,114 @@
+"""Tests for the L1 cache engine (O(1) LRU and W-TinyLFU)."""
+
+import pytest
+
+from app.services.l1_cache import CountMinSketch, L1Cache
+from app.services.multi_level_cache import MultiLevelCacheManager
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_evicts_least_recently_used():
+    cache = L1Cache(max_entries=3)
+    for key in ("a", "b", "c"):
+        cache.set(key, key.upper(), ttl=60)
+
+    assert cache.get("a") == "A"
+    cache.set("d", "D", ttl=60)
+
+    assert "b" not in cache
+    assert [key for key in ("a", "c", "d") if key in cache] == ["a", "c", "d"]
+    assert cache.evictions == 1
+
+
+def test_expiry_uses_monotonic_clock():
+    clock = FakeClock()
+    cache = L1Cache(max_entries=10, clock=clock)
+    cache.set("key", "value", ttl=5)
+
+    clock.now += 4.9
+    assert cache.get("key") == "value"
+    clock.now += 0.2
+    assert cache.get("key") is None
+    assert len(cache) == 0
+    assert cache.expirations == 1
+
+
+def test_byte_budget_evicts_until_under_limit():
+    cache = L1Cache(max_entries=100, max_bytes=100)
+    cache.set("a", "x", ttl=60, size=40)
+    cache.set("b", "y", ttl=60, size=40)
+    cache.set("c", "z", ttl=60, size=40)
+
+    assert "a" not in cache
+    assert cache.size_bytes == 80
+
+    # A value larger than the whole budget is not cached and evicts nothing
+    assert cache.set("huge", "v", ttl=60, size=500) is False
+    assert len(cache) == 2
+
+
+def test_update_replaces_size_and_value():
+    cache = L1Cache(max_entries=10, max_bytes=1000)
+    cache.set("a", "x", ttl=60, size=100)
+    cache.set("a", "y", ttl=60, size=300)
+
+    assert cache.get("a") == "y"
+    assert cache.size_bytes == 300
+
+
+def test_count_min_sketch_estimates_and_ages():
+    sketch = CountMinSketch(width=64, sample_size=1000)
+    for _ in range(5):
+        sketch.increment("hot")
+    sketch.increment("cold")
+
+    assert sketch.estimate("hot") >= 5
+    assert sketch.estimate("cold") >= 1
+    assert sketch.estimate("hot") > sketch.estimate("cold")
+
+    sketch._age()
+    assert sketch.estimate("hot") >= 2
+
+
+def test_tinylfu_resists_scan_pollution():
+    capacity = 100
+    lru = L1Cache(max_entries=capacity, policy="lru")
+    tinylfu = L1Cache(max_entries=capacity, policy="tinylfu")
+    hot = [f"hot:{i}" for i in range(50)]
+
+    for cache in (lru, tinylfu):
+        for _ in range(5):
+            for key in hot:
+                if cache.get(key) is None:
+                    cache.set(key, key, ttl=60)
+        # One-off keys, like a cache warmer sweeping all cities
+        for i in range(1000):
+            cache.set(f"scan:{i}", i, ttl=60)
+
+    assert sum(key in lru for key in hot) == 0
+    assert sum(key in tinylfu for key in hot) >= 45
+    assert len(tinylfu) <= capacity
+    assert tinylfu.rejections > 0
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        L1Cache(policy="fifo")
+
+
+@pytest.mark.asyncio
+async def test_multi_level_cache_with_tinylfu_and_byte_budget():
+    manager = MultiLevelCacheManager(l1_max_size=10, l1_max_bytes=10_000, l1_policy="tinylfu")
+    await manager.set("key", ["value"] * 10)
+
+    assert await manager.get("key") == ["value"] * 10
+    stats = manager.get_stats()["l1"]
+    assert stats["policy"] == "tinylfu"
+    assert 0 < stats["bytes"] <= 10_000
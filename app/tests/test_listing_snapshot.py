@@ -0,0 +1,116 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.schemas import Property, PropertyCreate
+from app.services.filter import PropertyFilter
+from app.services.listing_snapshot import ListingSnapshot, ListingSnapshotStore
+
+
+SOURCES = ["avito", "Cian", "domclick", "etagi"]
+DISTRICTS = ["Центральный", "ЮЗАО", "Хамовники", "Арбат", None]
+TITLES = ["квартира", "Студия", "Апартаменты", "Комната", "Квартира у метро"]
+
+
+def _make_properties(count: int, seed: int = 42):
+    rng = random.Random(seed)
+    base = datetime(2026, 1, 1)
+    properties = []
+    for i in range(count):
+        district = rng.choice(DISTRICTS)
+        properties.append(
+            Property(
+                source=rng.choice(SOURCES),
+                external_id=str(i),
+                title=f"{rng.randint(1, 4)}-комн. {rng.choice(TITLES)}",
+                price=float(rng.choice([0, rng.randint(1000, 200000)])),
+                rooms=rng.choice([None, 0, 1, 2, 3, 4]),
+                area=rng.choice([None, 0.0, round(rng.uniform(15, 150), 1)]),
+                floor=rng.choice([None, rng.randint(1, 25)]),
+                total_floors=rng.choice([None, rng.randint(5, 30)]),
+                location={"district": district} if district else None,
+                photos=["p.jpg"] if rng.random() < 0.5 else [],
+                features={"wifi": rng.random() < 0.5, "parking": rng.random() < 0.3},
+                contact_phone="+7900" if rng.random() < 0.4 else None,
+                first_seen=rng.choice([None, base + timedelta(days=rng.randint(0, 60))]),
+                last_seen=base + timedelta(days=rng.randint(0, 90)),
+            )
+        )
+    return properties
+
+
+FILTER_CASES = [
+    {},
+    {"min_price": 50000, "max_price": 120000},
+    {"min_rooms": 1, "max_rooms": 2, "sort_by": "area", "sort_order": "desc"},
+    {"min_area": 30, "max_area": 80, "sort_by": "rooms"},
+    {"source": "CIAN", "has_photos": True},
+    {"source": "unknown"},
+    {"property_type": "квартира", "district": "центр"},
+    {"district": "юзао", "sort_by": "floor", "sort_order": "desc"},
+    {"max_price_per_sqm": 1500},
+    {"min_floor": 3, "max_floor": 10, "min_total_floors": 9, "max_total_floors": 20},
+    {"features": ["wifi", "parking"], "has_contact": False},
+    {"min_first_seen": "2026-01-15", "max_first_seen": "2026-02-15", "sort_by": "first_seen"},
+    {"min_last_seen": "2026-02-01", "sort_by": "last_seen", "sort_order": "desc"},
+]
+
+
+@pytest.mark.parametrize("criteria", FILTER_CASES)
+def test_snapshot_matches_row_filter(criteria):
+    """Векторный путь возвращает те же объявления и в том же порядке."""
+    properties = _make_properties(500)
+    snapshot = ListingSnapshot.from_properties(properties)
+    property_filter = PropertyFilter(**criteria)
+
+    for skip, limit in [(0, 50), (20, 30), (480, 50)]:
+        expected, expected_total = property_filter.filter(properties, skip=skip, limit=limit)
+        actual, actual_total = property_filter.filter(properties, skip=skip, limit=limit, snapshot=snapshot)
+
+        assert actual_total == expected_total
+        assert [p.external_id for p in actual] == [p.external_id for p in expected]
+
+
+def test_snapshot_ignored_for_other_list():
+    """Снимок другого списка не используется."""
+    properties = _make_properties(10)
+    snapshot = ListingSnapshot.from_properties(_make_properties(10, seed=1))
+
+    result, total = PropertyFilter().filter(properties, snapshot=snapshot)
+    expected, expected_total = PropertyFilter().filter(properties)
+
+    assert total == expected_total
+    assert result == expected
+
+
+def test_snapshot_dictionary_encodes_source():
+    properties = [
+        PropertyCreate(source="Avito", external_id="1", title="Квартира", price=1000),
+        PropertyCreate(source="avito", external_id="2", title="Квартира", price=2000),
+        PropertyCreate(source="cian", external_id="3", title="Квартира", price=3000),
+    ]
+    snapshot = ListingSnapshot.from_properties(properties)
+
+    assert snapshot.source_values == ["avito", "cian"]
+    assert snapshot.source_is("avito").tolist() == [True, True, False]
+
+
+def test_snapshot_store_rebuilds_only_for_new_list():
+    store = ListingSnapshotStore(max_entries=2)
+    properties = _make_properties(5)
+
+    first = store.ensure("search:a", properties)
+    assert store.ensure("search:a", properties) is first
+    assert store.find(properties) is first
+
+    replaced = _make_properties(5)
+    assert store.ensure("search:a", replaced) is not first
+    assert store.find(properties) is None
+
+    store.ensure("search:b", properties)
+    store.ensure("search:c", properties)
+    assert store.get_stats()["snapshots"] == 2
+
+    store.invalidate()
+    assert store.get_stats()["snapshots"] == 0
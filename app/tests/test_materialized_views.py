@@ -12,6 +12,7 @@ from app.db.repositories.materialized_views import (
     get_property_view_stats,
     refresh_materialized_view,
     get_all_materialized_views,
+    get_geo_heatmap,
 )
 
 
@@ -168,6 +169,37 @@ async def test_get_property_view_stats_all(mock_db):
     assert isinstance(result, list)
 
 
+@pytest.mark.asyncio
+async def test_get_geo_heatmap(mock_db):
+    """Test getting heatmap grid cells from materialized view."""
+    mock_result = MagicMock()
+    mock_result.all.return_value = [
+        MagicMock(lat_cell=5575, lon_cell=3761, property_count=42, avg_price=65000.0),
+    ]
+    mock_db.execute.return_value = mock_result
+
+    result = await get_geo_heatmap(mock_db, 0.01, south=55.55, west=37.35, north=55.95, east=37.95)
+
+    assert result[0]["latitude"] == pytest.approx(55.755)
+    assert result[0]["longitude"] == pytest.approx(37.615)
+    assert result[0]["count"] == 42
+    assert result[0]["avg_price"] == 65000.0
+    params = mock_db.execute.call_args[0][1]
+    assert params["grid_size"] == 0.01
+    assert params["lat_from"] <= 5555 and params["lat_to"] == 5595
+
+
+@pytest.mark.asyncio
+async def test_refresh_geo_heatmap_view_allowed(mock_db):
+    """Test heatmap grid view is in the refresh whitelist."""
+    mock_db.execute.return_value = MagicMock()
+
+    result = await refresh_materialized_view(mock_db, "mv_geo_heatmap_grid", concurrently=True)
+
+    assert result is True
+    assert "CONCURRENTLY mv_geo_heatmap_grid" in str(mock_db.execute.call_args[0][0])
+
+
 @pytest.mark.asyncio
 async def test_refresh_materialized_view(mock_db):
     """Test refreshing materialized view."""
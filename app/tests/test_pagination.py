@@ -0,0 +1,112 @@
+import random
+
+import numpy as np
+import pytest
+
+from app.models.schemas import PropertyCreate
+from app.services.filter import PropertyFilter
+from app.services.listing_snapshot import ListingSnapshot
+from app.services.pagination import (
+    CursorError,
+    PageCursor,
+    decode_cursor,
+    encode_cursor,
+    make_cursor,
+    top_k_order,
+)
+
+
+def _make_properties(count: int, seed: int = 3):
+    rng = random.Random(seed)
+    return [
+        PropertyCreate(
+            source=rng.choice(["avito", "cian", "etagi"]),
+            external_id=str(i),
+            title="Квартира",
+            # Небольшой набор цен, чтобы было много равных значений
+            price=float(rng.choice([10000, 20000, 30000, 40000])),
+            rooms=rng.choice([None, 1, 2, 3]),
+            area=rng.choice([None, 30.0, 45.5, 60.0]),
+        )
+        for i in range(count)
+    ]
+
+
+def _expected_order(properties, sort_by="price", sort_order="asc"):
+    sign = -1 if sort_order == "desc" else 1
+    return [
+        f"{p.source}:{p.external_id}"
+        for p in sorted(properties, key=lambda p: (sign * float(getattr(p, sort_by) or 0), f"{p.source}:{p.external_id}"))
+    ]
+
+
+@pytest.mark.parametrize("sort_by,sort_order", [("price", "asc"), ("area", "desc"), ("rooms", "asc")])
+@pytest.mark.parametrize("use_snapshot", [False, True])
+def test_offset_pages_follow_total_order(sort_by, sort_order, use_snapshot):
+    properties = _make_properties(400)
+    snapshot = ListingSnapshot.from_properties(properties) if use_snapshot else None
+    property_filter = PropertyFilter(sort_by=sort_by, sort_order=sort_order)
+    expected = _expected_order(properties, sort_by, sort_order)
+
+    for skip, limit in [(0, 10), (35, 20), (390, 50)]:
+        page = property_filter.filter_page(properties, skip=skip, limit=limit, snapshot=snapshot)
+        assert [f"{p.source}:{p.external_id}" for p in page.items] == expected[skip : skip + limit]
+        assert page.total == 400
+
+
+@pytest.mark.parametrize("use_snapshot", [False, True])
+def test_cursor_walk_returns_every_row_once(use_snapshot):
+    properties = _make_properties(230)
+    snapshot = ListingSnapshot.from_properties(properties) if use_snapshot else None
+    property_filter = PropertyFilter(min_price=15000, sort_by="price", sort_order="desc")
+    expected = _expected_order([p for p in properties if p.price >= 15000], "price", "desc")
+
+    seen = []
+    cursor = None
+    while True:
+        page = property_filter.filter_page(properties, limit=25, cursor=cursor, snapshot=snapshot)
+        seen.extend(f"{p.source}:{p.external_id}" for p in page.items)
+        if page.next_cursor is None:
+            break
+        cursor = decode_cursor(page.next_cursor, "price", "desc")
+
+    assert seen == expected
+
+
+def test_top_k_order_matches_full_sort():
+    rng = np.random.default_rng(0)
+    keys = rng.integers(0, 20, size=5000).astype(np.float64)
+    tiebreak = rng.permutation(5000)
+
+    full = np.lexsort((tiebreak, keys))
+    assert np.array_equal(top_k_order(keys, 50, tiebreak), full[:50])
+    assert np.array_equal(top_k_order(keys, 4000, tiebreak), full[:4000])
+    assert top_k_order(keys, 0, tiebreak).size == 0
+
+
+def test_cursor_round_trip():
+    prop = PropertyCreate(source="avito", external_id="42", title="Квартира", price=50000)
+    token = make_cursor(prop, "price", "asc")
+
+    assert decode_cursor(token, "price", "asc") == PageCursor("price", "asc", 50000.0, "avito:42")
+
+
+def test_cursor_without_date_round_trip():
+    prop = PropertyCreate(source="avito", external_id="1", title="Квартира", price=1)
+    cursor = decode_cursor(make_cursor(prop, "first_seen", "desc"), "first_seen", "desc")
+
+    assert cursor.value == float("-inf")
+
+
+def test_cursor_rejects_other_sort():
+    token = encode_cursor(PageCursor("price", "asc", 1.0, "avito:1"))
+
+    with pytest.raises(CursorError):
+        decode_cursor(token, "area", "asc")
+    with pytest.raises(CursorError):
+        decode_cursor(token, "price", "desc")
+
+
+def test_cursor_rejects_garbage():
+    with pytest.raises(CursorError):
+        decode_cursor("not-a-cursor", "price", "asc")
@@ -0,0 +1,187 @@
+"""Тесты конкурентной пагинации страниц выдачи."""
+
+import asyncio
+import time
+from typing import List
+
+import pytest
+
+from app.parsers.paginator import Paginator
+from app.utils.circuit_breaker import CircuitBreaker, CircuitBreakerConfig, CircuitState
+
+
+def make_page(page: int, size: int = 2) -> List[dict]:
+    return [{"external_id": f"{page}-{i}"} for i in range(size)]
+
+
+@pytest.mark.asyncio
+async def test_pages_are_fetched_concurrently():
+    in_flight = 0
+    peak = 0
+
+    async def fetch_page(page):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return make_page(page)
+
+    items = await Paginator(fetch_page, "test", max_pages=4, concurrency=4).collect()
+
+    assert peak == 4
+    assert [item["external_id"] for item in items] == [
+        f"{page}-{i}" for page in range(1, 5) for i in range(2)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded():
+    in_flight = 0
+    peak = 0
+
+    async def fetch_page(page):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.005)
+        in_flight -= 1
+        return make_page(page)
+
+    items = await Paginator(fetch_page, "test", max_pages=6, concurrency=2).collect()
+
+    assert peak == 2
+    assert len(items) == 12
+
+
+@pytest.mark.asyncio
+async def test_stops_on_page_without_new_ids():
+    requested = []
+
+    async def fetch_page(page):
+        requested.append(page)
+        # Третья страница повторяет первую — выдача пошла по кругу
+        return make_page(1 if page == 3 else page)
+
+    items = await Paginator(fetch_page, "test", max_pages=10, concurrency=1).collect()
+
+    assert requested == [1, 2, 3]
+    assert len(items) == 4
+
+
+@pytest.mark.asyncio
+async def test_duplicates_across_pages_are_dropped():
+    async def fetch_page(page):
+        return make_page(page) + [{"external_id": "promoted"}]
+
+    items = await Paginator(fetch_page, "test", max_pages=3).collect()
+    ids = [item["external_id"] for item in items]
+
+    assert ids.count("promoted") == 1
+    assert len(ids) == 7
+
+
+@pytest.mark.asyncio
+async def test_yields_items_as_pages_arrive():
+    async def fetch_page(page):
+        await asyncio.sleep(0.05 if page == 1 else 0)
+        return make_page(page, size=1)
+
+    paginator = Paginator(fetch_page, "test", max_pages=2, concurrency=2)
+    first = [item async for item in paginator]
+
+    # Вторая страница готова раньше первой и отдаётся не дожидаясь её
+    assert [item["external_id"] for item in first] == ["2-0", "1-0"]
+
+
+@pytest.mark.asyncio
+async def test_first_page_error_is_raised():
+    async def fetch_page(page):
+        raise RuntimeError("blocked")
+
+    with pytest.raises(RuntimeError):
+        await Paginator(fetch_page, "test", max_pages=3).collect()
+
+
+@pytest.mark.asyncio
+async def test_later_page_error_keeps_collected_items():
+    async def fetch_page(page):
+        if page == 2:
+            raise RuntimeError("timeout")
+        return make_page(page)
+
+    items = await Paginator(fetch_page, "test", max_pages=4, concurrency=1).collect()
+
+    assert [item["external_id"] for item in items] == ["1-0", "1-1"]
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_awaited_per_page():
+    waits = 0
+
+    async def rate_limit():
+        nonlocal waits
+        waits += 1
+
+    async def fetch_page(page):
+        return make_page(page)
+
+    await Paginator(fetch_page, "test", max_pages=3, rate_limit=rate_limit).collect()
+
+    assert waits == 3
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_breaker_stops_pagination():
+    breaker = CircuitBreaker("paginator-test", CircuitBreakerConfig(timeout=60))
+    requested = []
+
+    async def fetch_page(page):
+        requested.append(page)
+        # Источник начал отказывать, пока грузилась первая страница
+        breaker.state = CircuitState.OPEN
+        breaker._failure_time = time.time()
+        return make_page(page)
+
+    items = await Paginator(
+        fetch_page, "test", max_pages=5, concurrency=1, circuit_breaker=breaker
+    ).collect()
+
+    assert requested == [1]
+    assert len(items) == 2
+
+
+@pytest.mark.asyncio
+async def test_parser_stream_pages_uses_source_breaker():
+    from app.parsers.base_parser import BaseParser
+
+    class Response:
+        status_code = 200
+
+        def __init__(self, page: str):
+            self.text = page
+
+        def raise_for_status(self):
+            return None
+
+    class Transport:
+        async def get(self, url, params=None):
+            return Response((params or {}).get("p", "1"))
+
+    class PagedParser(BaseParser):
+        page_param = "p"
+
+        async def parse(self, location, params=None):
+            return await self.fetch_pages("https://example.com")
+
+        async def parse_html(self, html):
+            # Третья страница повторяет первую: выдача закончилась
+            return make_page(int(html) if html in ("1", "2") else 1, size=1)
+
+    parser = PagedParser(transport=Transport())
+
+    paginator = await parser.paginator("https://example.com", max_pages=3)
+    items = [item["external_id"] async for item in parser.stream_pages("https://example.com", max_pages=3)]
+
+    assert paginator.circuit_breaker is CircuitBreaker.get_all_breakers()["PagedParser.pages"]
+    assert sorted(items) == ["1-0", "2-0"]
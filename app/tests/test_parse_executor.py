@@ -0,0 +1,118 @@
+"""Тесты разбора HTML вне event loop."""
+
+import asyncio
+
+import pytest
+
+from app.models.schemas import PropertyCreate
+from app.parsers.cian.parser import CianParser
+from app.parsers.etagi.parser import EtagiParser
+from app.parsers.parse_executor import ParseExecutor, build_properties
+
+CIAN_PAGE = """
+<html><body>
+  <article data-name="CardComponent">
+    <a href="/rent/flat/123456789/"><span data-name="Title">2-комн. квартира, 45 м², ЦАО</span></a>
+    <span data-name="Price">120 000 ₽/мес.</span>
+    <div data-name="AddressLine">ул. Тверская, 10</div>
+  </article>
+</body></html>
+"""
+
+ETAGI_PAGE = """
+<html><body>
+  <article class="card">
+    <a class="listing-title" href="/arenda/kvartiry/777/">1-комн. квартира</a>
+    <div class="listing-price">35 000 ₽</div>
+    <div class="listing-params"><div class="param-item" data-param="floor">3 / 9</div></div>
+  </article>
+</body></html>
+"""
+
+
+def test_extract_listings_returns_plain_dicts():
+    rows = CianParser()._extract_listings(CIAN_PAGE)
+
+    assert rows == [{
+        "source": "cian",
+        "external_id": "123456789",
+        "title": "2-комн. квартира, 45 м², ЦАО",
+        "price": 120000.0,
+        "link": "https://www.cian.ru/rent/flat/123456789/",
+        "rooms": 2,
+        "area": 45.0,
+        "floor": None,
+        "total_floors": None,
+        "photos": [],
+        "address": "ул. Тверская, 10",
+        "district": "цао",
+        "location": {"district": "цао", "address": "ул. Тверская, 10"},
+        "description": None,
+    }]
+
+
+def test_optimized_parsers_extract_with_extra_arguments():
+    rows = EtagiParser()._extract_listings(ETAGI_PAGE, "Казань")
+
+    assert [(row["external_id"], row["price"], row["city"], row["floor"]) for row in rows] == [
+        ("777", 35000, "Казань", 3)
+    ]
+
+
+def test_build_properties_skips_invalid_rows():
+    rows = [
+        {"source": "cian", "external_id": "1", "title": "Квартира", "price": 1000},
+        {"source": "cian", "external_id": "2", "title": "Квартира", "price": "дорого"},
+    ]
+
+    properties = build_properties(rows, "CianParser")
+
+    assert [prop.external_id for prop in properties] == ["1"]
+
+
+@pytest.mark.asyncio
+async def test_small_pages_are_parsed_inline(monkeypatch):
+    executor = ParseExecutor(mode="process", max_workers=1, inline_bytes=len(CIAN_PAGE) + 1)
+    monkeypatch.setattr(executor, "_get_pool", lambda: pytest.fail("pool must not be used"))
+
+    results = await executor.parse(CianParser(), CIAN_PAGE)
+
+    assert [prop.external_id for prop in results] == ["123456789"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["thread", "process"])
+async def test_pool_modes_return_properties(mode):
+    executor = ParseExecutor(mode=mode, max_workers=1, inline_bytes=0)
+    try:
+        results = await executor.parse(EtagiParser(), ETAGI_PAGE, "Казань")
+    finally:
+        executor.shutdown()
+
+    assert len(results) == 1
+    assert isinstance(results[0], PropertyCreate)
+    assert results[0].city == "Казань"
+
+
+def test_executor_survives_new_event_loops():
+    # Celery выполняет каждую задачу в своём asyncio.run; семафор слотов
+    # привязывается к loop, как только страницы встают в очередь
+    executor = ParseExecutor(mode="thread", max_workers=1, inline_bytes=0)
+
+    async def parse_batch():
+        return await asyncio.gather(*(executor.parse(EtagiParser(), ETAGI_PAGE, "Казань") for _ in range(4)))
+
+    try:
+        for _ in range(2):
+            batches = asyncio.run(parse_batch())
+            assert [[prop.external_id for prop in results] for results in batches] == [["777"]] * 4
+    finally:
+        executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_parser_parse_html_uses_shared_executor():
+    results = await CianParser().parse_html(CIAN_PAGE)
+
+    assert results[0].price == 120000.0
+    assert CianParser()._parse_html(CIAN_PAGE)[0].external_id == "123456789"
@@ -0,0 +1,189 @@
+import asyncio
+import threading
+from typing import Any, Dict, List
+from unittest.mock import MagicMock
+
+import httpx
+import pytest
+
+from app.parsers.avito.parser import AvitoParser
+from app.parsers.transport import HostLimits, ParserTransport
+from app.utils.http_pool import http_pool
+from app.utils.proxy import ProxyConfig
+
+
+class RecordingPool:
+    """Пул клиентов поверх httpx.MockTransport, запоминающий параметры клиентов."""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.clients: Dict[str, httpx.AsyncClient] = {}
+        self.client_kwargs: Dict[str, Dict[str, Any]] = {}
+        self.requests: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+
+    async def get_client(self, name: str, **kwargs) -> httpx.AsyncClient:
+        if name not in self.clients:
+            kwargs.pop("http2", None)
+            self.client_kwargs[name] = dict(kwargs)
+            kwargs.pop("proxy", None)
+            self.clients[name] = httpx.AsyncClient(transport=httpx.MockTransport(self.handler), **kwargs)
+        return self.clients[name]
+
+    def record_request(self, name: str) -> None:
+        self.requests[name] = self.requests.get(name, 0) + 1
+
+    def record_error(self, name: str) -> None:
+        self.errors[name] = self.errors.get(name, 0) + 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "client_names": list(self.clients),
+            "request_count": dict(self.requests),
+            "error_count": dict(self.errors),
+        }
+
+
+def _ok_handler(seen: List[httpx.Request]):
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return httpx.Response(200, text="<html></html>")
+
+    return handler
+
+
+@pytest.mark.asyncio
+async def test_one_client_per_host():
+    seen: List[httpx.Request] = []
+    pool = RecordingPool(_ok_handler(seen))
+    transport = ParserTransport(pool=pool, use_proxies=False)
+
+    for _ in range(3):
+        await transport.get("https://www.avito.ru/moskva")
+    await transport.get("https://www.cian.ru/cat.php", params={"p": 1})
+
+    assert set(pool.clients) == {"parser:www.avito.ru", "parser:www.cian.ru"}
+    assert pool.requests == {"parser:www.avito.ru": 3, "parser:www.cian.ru": 1}
+    assert seen[-1].url.params["p"] == "1"
+    assert transport.get_stats()["clients"] == ["parser:www.avito.ru", "parser:www.cian.ru"]
+
+
+@pytest.mark.asyncio
+async def test_host_limits_are_applied():
+    pool = RecordingPool(_ok_handler([]))
+    transport = ParserTransport(pool=pool, use_proxies=False, default_limits=HostLimits(max_connections=4))
+    transport.set_host_limits("www.avito.ru", HostLimits(max_connections=2, max_keepalive_connections=2))
+
+    await transport.get("https://www.avito.ru/")
+    await transport.get("https://domclick.ru/")
+
+    assert pool.client_kwargs["parser:www.avito.ru"]["limits"].max_connections == 2
+    assert pool.client_kwargs["parser:domclick.ru"]["limits"].max_connections == 4
+
+
+@pytest.mark.asyncio
+async def test_hop_by_hop_headers_are_stripped():
+    seen: List[httpx.Request] = []
+    transport = ParserTransport(pool=RecordingPool(_ok_handler(seen)), use_proxies=False)
+
+    async with transport.session(headers={"Keep-Alive": "timeout=5", "Accept": "text/html"}) as client:
+        await client.get("https://etagi.com/", headers={"Upgrade-Insecure-Requests": "1"})
+
+    request = seen[0]
+    assert request.headers["accept"] == "text/html"
+    assert request.headers["upgrade-insecure-requests"] == "1"
+    assert "keep-alive" not in request.headers
+
+
+@pytest.mark.asyncio
+async def test_clients_are_keyed_by_proxy_and_failed_proxy_is_marked():
+    proxy = ProxyConfig(protocol="http", host="10.0.0.1", port=3128)
+    proxies = MagicMock()
+    proxies.get_random_proxy.return_value = proxy
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ProxyError("proxy down", request=request)
+
+    pool = RecordingPool(handler)
+    transport = ParserTransport(pool=pool, proxies=proxies, use_proxies=True)
+
+    with pytest.raises(httpx.ProxyError):
+        await transport.get("https://www.avito.ru/")
+
+    name = "parser:www.avito.ru|10.0.0.1:3128"
+    assert pool.client_kwargs[name]["proxy"] == "http://10.0.0.1:3128"
+    assert pool.errors == {name: 1}
+    proxies.mark_as_failed.assert_called_once_with(proxy)
+
+
+def test_pool_recreates_client_for_new_event_loop():
+    async def get():
+        return await http_pool.get_client("test-loop-bound", http2=False)
+
+    async def get_and_close():
+        client = await get()
+        await http_pool.close_client("test-loop-bound")
+        return client
+
+    first = asyncio.run(get())
+    second = asyncio.run(get_and_close())
+
+    assert first is not second and second.is_closed
+    # Клиент первого loop забыт при создании второго: его loop уже закрыт
+    assert "test-loop-bound" not in http_pool.get_stats()["client_names"]
+
+
+def test_live_event_loops_do_not_close_each_others_clients():
+    async def get_many():
+        # Конкурентные вызовы в каждом loop берут блокировку пула
+        clients = await asyncio.gather(*(http_pool.get_client("test-loop-live", http2=False) for _ in range(3)))
+        assert len({id(client) for client in clients}) == 1
+        return clients[0]
+
+    # Второй живой loop в другом потоке, как loop задачи рядом с loop API
+    other_loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=other_loop.run_forever, daemon=True)
+    thread.start()
+    main_loop = asyncio.new_event_loop()
+    try:
+        main_client = main_loop.run_until_complete(get_many())
+        other_client = asyncio.run_coroutine_threadsafe(get_many(), other_loop).result(5)
+
+        assert main_client is not other_client
+        assert main_loop.run_until_complete(get_many()) is main_client
+        assert not main_client.is_closed and not other_client.is_closed
+
+        # Клиент закрывается только своим loop
+        asyncio.run_coroutine_threadsafe(http_pool.close_all(), other_loop).result(5)
+        assert other_client.is_closed and not main_client.is_closed
+        main_loop.run_until_complete(http_pool.close_all())
+        assert main_client.is_closed
+    finally:
+        other_loop.call_soon_threadsafe(other_loop.stop)
+        thread.join(5)
+        other_loop.close()
+        main_loop.close()
+
+    assert "test-loop-live" not in http_pool.get_stats()["client_names"]
+
+
+@pytest.mark.asyncio
+async def test_pool_reuses_client_within_loop():
+    try:
+        first = await http_pool.get_client("test-loop-reuse", http2=False)
+        second = await http_pool.get_client("test-loop-reuse", http2=False)
+        assert first is second
+    finally:
+        await http_pool.close_client("test-loop-reuse")
+
+
+@pytest.mark.asyncio
+async def test_parser_uses_injected_transport():
+    seen: List[httpx.Request] = []
+    transport = ParserTransport(pool=RecordingPool(_ok_handler(seen)), use_proxies=False)
+    parser = AvitoParser(transport=transport)
+
+    results = await parser._parse_internal("moskva", {})
+
+    assert results == []
+    assert str(seen[0].url) == "https://www.avito.ru/moskva/sdam/na_sutki"
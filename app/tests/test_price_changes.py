@@ -0,0 +1,109 @@
+"""Тесты публикации снижений цен после массового upsert."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from app.db.batch_insert import PriceChange
+from app.services.notifications import NotificationService, _alert_matches
+from app.services.price_changes import PriceChangePublisher
+
+
+def _change(property_id, old_price, new_price, city="Москва", rooms=2, area=50.0):
+    return PriceChange(property_id, "avito", str(property_id), old_price, new_price, city, rooms, area)
+
+
+@pytest.mark.asyncio
+async def test_drops_are_published_once_per_batch():
+    publisher = PriceChangePublisher()
+    batches = []
+
+    async def handler(drops):
+        batches.append([drop.property_id for drop in drops])
+
+    publisher.subscribe(handler)
+    publisher.subscribe(handler)
+
+    published = await publisher.publish([_change(1, 100, 90), _change(2, 100, 110), _change(3, 100, 50)])
+
+    assert published == 2
+    assert batches == [[1, 3]]
+
+
+@pytest.mark.asyncio
+async def test_batch_without_drops_is_not_published():
+    publisher = PriceChangePublisher()
+    calls = []
+
+    async def handler(drops):
+        calls.append(drops)
+
+    publisher.subscribe(handler)
+
+    assert await publisher.publish([_change(1, 100, 120)]) == 0
+    assert await publisher.publish([]) == 0
+    assert calls == []
+
+
+@pytest.mark.asyncio
+async def test_failing_subscriber_does_not_block_others():
+    publisher = PriceChangePublisher()
+    delivered = []
+
+    async def broken(drops):
+        raise RuntimeError("boom")
+
+    async def working(drops):
+        delivered.append(len(drops))
+
+    publisher.subscribe(broken)
+    publisher.subscribe(working)
+
+    assert await publisher.publish([_change(1, 100, 90)]) == 1
+    assert delivered == [1]
+
+
+@pytest.mark.asyncio
+async def test_websocket_gets_one_message_per_topic():
+    service = NotificationService()
+    sent = []
+
+    async def broadcast(message, topic="general"):
+        sent.append((topic, message.data["count"]))
+
+    service.ws_manager.broadcast = broadcast
+
+    await service.notify_price_drops([
+        _change(1, 100, 90, city="Москва"),
+        _change(2, 100, 80, city="Москва"),
+        _change(3, 100, 70, city="Казань"),
+    ])
+
+    assert sent == [("price_drops", 3), ("city:москва", 2), ("city:казань", 1)]
+
+
+def test_alert_matching_uses_city_price_rooms_and_area():
+    alert = SimpleNamespace(city="Москва", min_price=None, max_price=95, rooms=2, min_area=40, max_area=None)
+
+    assert _alert_matches(alert, _change(1, 100, 90))
+    assert not _alert_matches(alert, _change(1, 100, 99))
+    assert not _alert_matches(alert, _change(1, 100, 90, city="Казань"))
+    assert not _alert_matches(alert, _change(1, 100, 90, rooms=3))
+    assert not _alert_matches(alert, _change(1, 100, 90, area=None))
+
+
+def test_subscribers_are_registered_explicitly_in_celery_workers():
+    from celery.signals import worker_process_init
+
+    from app.services.notifications import notification_service
+    from app.services.price_changes import price_change_publisher
+    import app.tasks.celery  # noqa: F401  (подключает обработчики сигналов)
+
+    handlers = [notification_service.notify_price_drops, notification_service.notify_alerts_for_price_drops]
+    for handler in handlers:
+        price_change_publisher.unsubscribe(handler)
+
+    worker_process_init.send(sender=None)
+    worker_process_init.send(sender=None)
+
+    assert [h for h in price_change_publisher._handlers if h in handlers] == handlers
@@ -286,3 +286,31 @@ async def test_get_property_statistics(db_session: AsyncSession):
     assert stats["avg_price"] == 60000.0
     assert stats["min_price"] == 40000.0
     assert stats["max_price"] == 80000.0
+
+
+@pytest.mark.asyncio
+async def test_batch_lookups_by_property_ids(db_session: AsyncSession):
+    """Test batched lookups used by GraphQL DataLoaders."""
+    ids = []
+    for i in range(3):
+        prop = await property_repo.create_property(db_session, PropertyCreate(
+            source="test", external_id=f"batch{i}", title=f"Flat {i}", price=40000.0 + i,
+        ))
+        ids.append(prop.id)
+    for price in (41000.0, 42000.0, 43000.0):
+        await property_repo.track_price_change(db_session, ids[0], price - 1000, price)
+    await property_repo.track_price_change(db_session, ids[1], 40000.0, 39000.0)
+    for _ in range(2):
+        await property_repo.track_property_view(db_session, ids[0])
+
+    properties = await property_repo.get_properties_by_ids(db_session, ids + [999999])
+    history = await property_repo.get_price_history_by_property_ids(db_session, ids, limit=2)
+    views = await property_repo.get_view_counts_by_property_ids(db_session, ids)
+
+    assert sorted(properties) == sorted(ids)
+    assert properties[ids[2]].title == "Flat 2"
+    assert [change.new_price for change in history[ids[0]]] == [43000.0, 42000.0]
+    assert len(history[ids[1]]) == 1
+    assert ids[2] not in history
+    assert views == {ids[0]: 2}
+    assert await property_repo.get_properties_by_ids(db_session, []) == {}
@@ -31,12 +31,12 @@ def test_rate_limiter_blocking():
     asyncio.run(limiter.acquire("test"))
     asyncio.run(limiter.acquire("test"))
 
-    # This should block for about 1 second
+    # The bucket refills 2 tokens per second: this should block for about 0.5 seconds
     asyncio.run(limiter.acquire("test"))
     end_time = time.time()
 
-    # Should have taken at least 1 second (minus a small margin for timing inaccuracies)
-    assert end_time - start_time >= 0.9
+    # Should have taken at least 0.5 seconds (minus a small margin for timing inaccuracies)
+    assert end_time - start_time >= 0.45
 
 
 def test_rate_limiter_different_keys():
@@ -101,3 +101,74 @@ def test_rate_limiter_reset():
 
     # Should be almost instant (well under 0.1 seconds)
     assert end_time - start_time < 0.1
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_concurrent_acquire_respects_capacity():
+    """Concurrent coroutines must not all pass the check at once."""
+    limiter = RateLimiter(max_requests=2, time_window=1)
+
+    start_time = time.monotonic()
+    await asyncio.gather(*(limiter.acquire("test") for _ in range(4)))
+    elapsed = time.monotonic() - start_time
+
+    # 2 tokens up front, 2 more refilled at 2 tokens per second
+    assert elapsed >= 0.9
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_releases_waiters_in_fifo_order():
+    """Waiting coroutines get tokens in arrival order."""
+    limiter = RateLimiter(max_requests=1, time_window=0.05)
+    order = []
+
+    async def worker(i):
+        await limiter.acquire("test")
+        order.append(i)
+
+    await asyncio.gather(*(worker(i) for i in range(5)))
+
+    assert order == list(range(5))
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_cancelled_waiter_does_not_block_queue():
+    """A cancelled waiter hands its place to the next one."""
+    limiter = RateLimiter(max_requests=1, time_window=0.1)
+    await limiter.acquire("test")
+
+    stuck = asyncio.ensure_future(limiter.acquire("test"))
+    waiting = asyncio.ensure_future(limiter.acquire("test"))
+    await asyncio.sleep(0.01)
+    stuck.cancel()
+
+    await asyncio.wait_for(waiting, timeout=1)
+    assert not limiter._waiters["test"]
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_429_shrinks_rate():
+    """429 responses slow the bucket down via AdaptiveRateLimiter."""
+    limiter = RateLimiter(max_requests=10, time_window=1)
+    key = "test-429"
+
+    scale = await limiter.record_response(key, 429)
+
+    assert scale < 1.0
+    assert limiter._bucket(key).scale == scale
+
+
+class FailingRedis:
+    """Redis, недоступный на момент вызова скрипта."""
+
+    async def eval(self, *args):
+        raise ConnectionError("redis is down")
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_falls_back_to_local_bucket_without_redis():
+    """If Redis is unavailable the local bucket is used."""
+    limiter = RateLimiter(max_requests=1, time_window=60, redis_getter=FailingRedis)
+
+    assert await limiter._take("test") == 0.0
+    assert await limiter._take("test") > 0
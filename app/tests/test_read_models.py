@@ -0,0 +1,50 @@
+"""Тесты read-моделей списков объявлений."""
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.read_models import LIST_COLUMNS, PropertyListItem
+from app.db.repositories import property as property_repo
+from app.models.schemas import Property as PropertySchema, PropertyCreate
+
+
+def test_list_columns_cover_response_schema():
+    assert set(PropertySchema.model_fields) <= set(LIST_COLUMNS)
+
+
+def test_property_list_item_has_no_dict():
+    item = PropertyListItem(id=1, title="Квартира", price=50000.0)
+
+    assert item.price == 50000.0
+    assert item.city is None
+    with pytest.raises(AttributeError):
+        item.__dict__
+
+
+@pytest.mark.asyncio
+async def test_search_returns_lean_items(db_session: AsyncSession):
+    await property_repo.create_property(db_session, PropertyCreate(
+        source="test", external_id="lean1", title="Moscow Property",
+        price=50000.0, rooms=2, location={"city": "Moscow"},
+    ))
+
+    results = await property_repo.search_properties(db_session, city="Moscow")
+
+    assert len(results) == 1
+    assert isinstance(results[0], PropertyListItem)
+    schema = PropertySchema.model_validate(results[0])
+    assert schema.title == "Moscow Property"
+    assert schema.id == results[0].id
+
+
+@pytest.mark.asyncio
+async def test_search_by_price_per_sqm_returns_lean_items(db_session: AsyncSession):
+    await property_repo.create_property(db_session, PropertyCreate(
+        source="test", external_id="lean2", title="Cheap", price=30000.0, area=60.0,
+        location={"city": "Moscow"},
+    ))
+
+    results = await property_repo.search_properties_by_price_per_sqm(db_session, city="Moscow", max_price_per_sqm=600)
+
+    assert [item.title for item in results] == ["Cheap"]
+    assert isinstance(results[0], PropertyListItem)
@@ -1,3 +1,5 @@
+import asyncio
+
 import pytest
 from unittest.mock import AsyncMock, patch
 
@@ -39,14 +41,16 @@ def sample_properties():
 def test_search_service_initialization():
     """Тест инициализации сервиса поиска."""
     service = SearchService()
-    # Now we have five parsers: Avito, Cian, Domofond, YandexRealty, and Domclick
-    assert len(service.parsers) == 5
     parser_names = [parser.__class__.__name__ for parser in service.parsers]
-    assert "AvitoParser" in parser_names
-    assert "CianParser" in parser_names
-    assert "DomofondParser" in parser_names
-    assert "YandexRealtyParser" in parser_names
-    assert "DomclickParser" in parser_names
+    assert parser_names == [
+        "AvitoParser",
+        "CianParser",
+        "DomofondParser",
+        "YandexRealtyParser",
+        "DomclickParser",
+        "EtagiParser",
+        "CianCommercialParser",
+    ]
 
 
 @pytest.mark.asyncio
@@ -231,3 +235,112 @@ async def test_search_service_search_multiple_sources():
         assert "domofond" in sources
         assert "yandex_realty" in sources
         assert "domclick" in sources
+
+
+class _DelayedParser:
+    """Парсер, отвечающий через заданную задержку."""
+
+    def __init__(self, delay: float, properties):
+        self.delay = delay
+        self.properties = properties
+
+    async def validate_params(self, params):
+        return True
+
+    async def preprocess_params(self, params):
+        return params
+
+    async def parse(self, city, params=None):
+        await asyncio.sleep(self.delay)
+        return self.properties
+
+
+class FastParser(_DelayedParser):
+    pass
+
+
+class SlowParser(_DelayedParser):
+    pass
+
+
+def _streaming_service(sample_properties, slow_delay=0.5):
+    service = SearchService()
+    service.parsers = [
+        SlowParser(slow_delay, [sample_properties[1]]),
+        FastParser(0.0, [sample_properties[0]]),
+    ]
+    return service
+
+
+@pytest.mark.asyncio
+async def test_search_keeps_finished_sources_on_overall_timeout(sample_properties):
+    """Тест: общий таймаут не выбрасывает уже готовые результаты."""
+    service = _streaming_service(sample_properties, slow_delay=5.0)
+
+    with patch('app.services.search.save_properties', new=AsyncMock()), \
+            patch.object(SearchService, '_overall_timeout', return_value=0.2):
+        results = await service.search("Москва", "Квартира")
+
+    assert [prop.source for prop in results] == ["avito"]
+
+
+@pytest.mark.asyncio
+async def test_search_stream_yields_fast_source_first(sample_properties):
+    """Тест: пакеты приходят в порядке готовности источников."""
+    service = _streaming_service(sample_properties, slow_delay=0.1)
+
+    with patch('app.services.search.metrics_collector') as metrics, \
+            patch('app.services.search.save_properties', new=AsyncMock()):
+        batches = [batch async for batch in service.search_stream("Москва", "Квартира", timeout=2)]
+
+    assert [batch.parser_name for batch in batches] == ["FastParser", "SlowParser"]
+    assert batches[0].elapsed <= batches[1].elapsed
+    metrics.record_time_to_first_result.assert_called_once()
+    assert metrics.record_time_to_first_result.call_args[0][0] == "FastParser"
+
+
+@pytest.mark.asyncio
+async def test_search_until_returns_by_deadline_and_finishes_in_background(sample_properties):
+    """Тест: к дедлайну возвращается быстрый источник, медленный дописывается в фоне."""
+    service = _streaming_service(sample_properties, slow_delay=0.2)
+    late = []
+
+    async def on_late_batch(batch):
+        late.append(batch)
+
+    with patch('app.services.search.save_properties', new=AsyncMock()) as save:
+        result = await service.search_until("Москва", "Квартира", deadline=0.05, on_late_batch=on_late_batch)
+
+        assert [prop.source for prop in result.properties] == ["avito"]
+        assert result.pending == ["SlowParser"]
+        assert not result.complete
+
+        await result.background
+
+    assert [batch.parser_name for batch in late] == ["SlowParser"]
+    assert late[0].properties[0].source == "cian"
+    assert save.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_stream_saves_and_caches_after_client_disconnect(sample_properties):
+    """Тест: потоковый поиск сохраняет пакеты и кэш, даже если клиент ушёл после первого."""
+    from app.services.optimized_search import OptimizedSearchService
+
+    service = OptimizedSearchService()
+    service.base_search = _streaming_service(sample_properties, slow_delay=0.1)
+    city = "Стрим-дисконнект"
+
+    with patch('app.services.search.save_properties', new=AsyncMock()) as save:
+        stream = service.search_stream(city, "Квартира", timeout=2)
+        first = await stream.__anext__()
+        await stream.aclose()
+
+        # Повторный запрос объединяется с незавершённым поиском или читает его кэш
+        again = [batch async for batch in service.search_stream(city, "Квартира", timeout=2)]
+
+    assert first.parser_name == "FastParser"
+    assert [batch.parser_name for batch in again] == ["cache"]
+    assert {prop.source for prop in again[0].properties} == {"avito", "cian"}
+    saved = [prop.source for call in save.await_args_list for prop in call.args[0]]
+    assert sorted(saved) == ["avito", "cian"]
@@ -0,0 +1,221 @@
+"""Тесты объединения одинаковых одновременных вычислений (single-flight)."""
+
+import asyncio
+from typing import Any, Dict, List
+
+import pytest
+
+from app.services.advanced_cache import advanced_cache_manager, cached_parser
+from app.services.single_flight import SingleFlight
+
+
+class FakeRedis:
+    """Минимальный Redis с SET NX/EXISTS/EVAL для распределённой блокировки."""
+
+    def __init__(self):
+        self.store: Dict[str, Any] = {}
+
+    async def set(self, key, value, nx=False, px=None):
+        if nx and key in self.store:
+            return None
+        self.store[key] = value
+        return True
+
+    async def exists(self, key):
+        return int(key in self.store)
+
+    async def eval(self, script, numkeys, key, token):
+        if self.store.get(key) == token:
+            del self.store[key]
+            return 1
+        return 0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_computation():
+    flight = SingleFlight("test")
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return ["result"]
+
+    results = await asyncio.gather(*(flight.do("key", compute) for _ in range(10)))
+
+    assert calls == 1
+    assert all(result is results[0] for result in results)
+    assert flight.get_stats() == {
+        "group": "test",
+        "in_flight": 0,
+        "leaders": 1,
+        "coalesced": 9,
+        "remote_waits": 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_error_reaches_all_waiters_and_frees_key():
+    flight = SingleFlight("test")
+    calls = 0
+
+    async def failing():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    results = await asyncio.gather(*(flight.do("key", failing) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert calls == 1
+
+    async def ok():
+        return 42
+
+    assert await flight.do("key", ok) == 42
+
+
+@pytest.mark.asyncio
+async def test_cancelled_leader_does_not_cancel_followers():
+    flight = SingleFlight("test")
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        return "value"
+
+    leader = asyncio.ensure_future(flight.do("key", compute))
+    await asyncio.sleep(0)
+    follower = asyncio.ensure_future(flight.do("key", compute))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await follower == "value"
+
+
+@pytest.mark.asyncio
+async def test_distributed_waits_for_value_from_other_worker():
+    redis = FakeRedis()
+    flight = SingleFlight("search", redis_getter=lambda: redis)
+    # Блокировку держит другой воркер
+    redis.store["singleflight:search:key"] = "other-worker"
+    shared: List[Any] = []
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        return "local"
+
+    async def load():
+        return shared[0] if shared else None
+
+    async def other_worker_finishes():
+        await asyncio.sleep(0.1)
+        shared.append("remote")
+        del redis.store["singleflight:search:key"]
+
+    finisher = asyncio.ensure_future(other_worker_finishes())
+    result = await flight.do("key", compute, load=load, distributed=True)
+    await finisher
+
+    assert result == "remote"
+    assert calls == 0
+    assert flight.remote_waits == 1
+
+
+@pytest.mark.asyncio
+async def test_distributed_leader_releases_lock():
+    redis = FakeRedis()
+    flight = SingleFlight("search", redis_getter=lambda: redis)
+
+    async def compute():
+        assert "singleflight:search:key" in redis.store
+        return "value"
+
+    async def load():
+        return None
+
+    assert await flight.do("key", compute, load=load, distributed=True) == "value"
+    assert redis.store == {}
+
+
+@pytest.mark.asyncio
+async def test_cached_parser_coalesces_across_parser_instances():
+    await advanced_cache_manager.connect()
+    calls = 0
+
+    class SlowParser:
+        @cached_parser(expire=60, source="single_flight_test")
+        async def parse(self, location, params=None):
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return [location]
+
+    results = await asyncio.gather(*(SlowParser().parse("Тверь") for _ in range(5)))
+
+    assert calls == 1
+    assert results == [["Тверь"]] * 5
+
+
+@pytest.mark.asyncio
+async def test_search_cached_coalesces_concurrent_misses():
+    from app.services.optimized_search import OptimizedSearchService, search_flight
+
+    calls = 0
+
+    async def slow_search(*args, **kwargs):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return []
+
+    services = [OptimizedSearchService() for _ in range(3)]
+    for service in services:
+        service.base_search.search = slow_search
+    coalesced_before = search_flight.coalesced
+
+    await asyncio.gather(
+        *(service.search_cached("", "Single-flight city", {"property_type": "Квартира"}) for service in services)
+    )
+
+    assert calls == 1
+    assert search_flight.coalesced - coalesced_before == 2
+
+
+@pytest.mark.asyncio
+async def test_stream_and_partial_misses_share_one_run():
+    from app.services.optimized_search import OptimizedSearchService, search_flight
+    from app.services.search import SourceBatch
+
+    calls = 0
+
+    async def slow_stream(*args, **kwargs):
+        nonlocal calls
+        calls += 1
+        for source in ("avito", "cian"):
+            await asyncio.sleep(0.02)
+            yield SourceBatch(parser_name=source, properties=[source])
+
+    services = [OptimizedSearchService() for _ in range(3)]
+    for service in services:
+        service.base_search.search_stream = slow_stream
+        service.base_search.search_until = lambda *args, **kwargs: pytest.fail("partial search must be coalesced")
+    coalesced_before = search_flight.coalesced
+
+    async def consume(service):
+        return [batch async for batch in service.search_stream("Stream flight city", "Квартира")]
+
+    leader = asyncio.ensure_future(consume(services[0]))
+    await asyncio.sleep(0)
+    follower, (partial, _, partial_result) = await asyncio.gather(
+        consume(services[1]),
+        services[2].search_partial("Stream flight city", "Квартира"),
+    )
+
+    assert [batch.parser_name for batch in await leader] == ["avito", "cian"]
+    assert [(batch.parser_name, batch.properties) for batch in follower] == [("cache", ["avito", "cian"])]
+    assert partial == ["avito", "cian"] and partial_result is None
+    assert calls == 1
+    assert search_flight.coalesced - coalesced_before == 2
@@ -0,0 +1,188 @@
+"""Тесты stale-while-revalidate для кэшей поиска и парсеров."""
+
+import asyncio
+import time
+
+import pytest
+
+from app.models.schemas import PropertyCreate
+from app.services.advanced_cache import (
+    InMemoryAsyncRedis,
+    advanced_cache_manager,
+    cached,
+    cached_parser,
+    parser_swr,
+)
+from app.services.single_flight import SingleFlight
+from app.services.stale_cache import (
+    FRESH,
+    MISS,
+    STALE,
+    CacheEnvelope,
+    StaleWhileRevalidate,
+    hard_ttl,
+    unwrap,
+    wrap,
+)
+
+
+class DictCache:
+    """Кэш-словарь с управляемым «устареванием» записей."""
+
+    def __init__(self):
+        self.store = {}
+
+    async def load(self, key):
+        return self.store.get(key)
+
+    def make_stale(self, key):
+        self.store[key].fresh_until = time.time() - 1
+
+
+def _memory_store():
+    client = advanced_cache_manager.redis_client
+    if not isinstance(client, InMemoryAsyncRedis):
+        pytest.skip("requires the in-memory cache backend")
+    return client.store
+
+
+def test_unwrap_envelope_and_legacy_value():
+    assert unwrap(wrap([1], 60)) == ([1], False)
+    assert unwrap(CacheEnvelope(value="old", fresh_until=0)) == ("old", True)
+    # Значения, записанные до конвертов, считаются свежими
+    assert unwrap({"legacy": True}) == ({"legacy": True}, False)
+
+
+def test_hard_ttl_adds_stale_window():
+    assert hard_ttl(300, 600) == 900
+    assert hard_ttl(300, 0) == 300
+
+
+@pytest.mark.asyncio
+async def test_stale_value_is_served_and_refreshed_once():
+    cache = DictCache()
+    swr = StaleWhileRevalidate("test", SingleFlight("test"))
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        cache.store["key"] = wrap(f"v{calls}", 60)
+        return f"v{calls}"
+
+    assert await swr.fetch("key", lambda: cache.load("key"), compute) == ("v1", MISS)
+    assert await swr.fetch("key", lambda: cache.load("key"), compute) == ("v1", FRESH)
+
+    cache.make_stale("key")
+    results = await asyncio.gather(*(swr.fetch("key", lambda: cache.load("key"), compute) for _ in range(5)))
+
+    # Все получили устаревшее значение сразу, обновление запущено один раз
+    assert results == [("v1", STALE)] * 5
+    await swr.wait_refreshes()
+    assert calls == 2
+    assert await swr.fetch("key", lambda: cache.load("key"), compute) == ("v2", FRESH)
+
+    stats = swr.get_stats()
+    assert stats["stale"] == 5
+    assert stats["refresh"] == 1
+    assert stats["refresh_skipped"] == 4
+    assert stats["refreshing"] == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_refresh_keeps_stale_value():
+    cache = DictCache()
+    cache.store["key"] = CacheEnvelope(value="old", fresh_until=0)
+    swr = StaleWhileRevalidate("test", SingleFlight("test"))
+
+    async def failing():
+        raise RuntimeError("source down")
+
+    assert await swr.fetch("key", lambda: cache.load("key"), failing) == ("old", STALE)
+    await swr.wait_refreshes()
+
+    assert swr.get_stats()["refresh_error"] == 1
+    assert unwrap(cache.store["key"])[0] == "old"
+
+
+@pytest.mark.asyncio
+async def test_cached_parser_serves_stale_between_soft_and_hard_ttl():
+    await advanced_cache_manager.connect()
+    calls = 0
+
+    class Parser:
+        @cached_parser(expire=60, source="swr_test", stale_ttl=120)
+        async def parse(self, location):
+            nonlocal calls
+            calls += 1
+            return [f"{location}-{calls}"]
+
+    assert await Parser().parse("Казань") == ["Казань-1"]
+
+    # Запись лежит в кеше с жёстким TTL (мягкий + окно) внутри конверта
+    store = _memory_store()
+    key = next(k for k in store if k.startswith("parser:swr_test:"))
+    envelope = await advanced_cache_manager.get(key)
+    assert isinstance(envelope, CacheEnvelope)
+    assert store[key][1] - time.time() == pytest.approx(180, abs=5)
+    envelope.fresh_until = 0
+    await advanced_cache_manager.set(key, envelope, 180)
+
+    assert await Parser().parse("Казань") == ["Казань-1"]
+    await parser_swr.wait_refreshes()
+    assert calls == 2
+    assert await Parser().parse("Казань") == ["Казань-2"]
+
+
+@pytest.mark.asyncio
+async def test_cached_decorator_reads_legacy_plain_value():
+    await advanced_cache_manager.connect()
+    calls = 0
+
+    @cached(expire=60, prefix="swr_legacy")
+    async def compute(x):
+        nonlocal calls
+        calls += 1
+        return x * 2
+
+    assert await compute(2) == 4
+    key = next(k for k in _memory_store() if k.startswith("swr_legacy:"))
+    # Значение в старом формате (без конверта)
+    await advanced_cache_manager.set(key, 100, 60)
+
+    assert await compute(2) == 100
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_search_cached_serves_stale_and_refreshes_in_background():
+    from app.services.multi_level_cache import multi_level_cache
+    from app.services.optimized_search import OptimizedSearchService, search_swr
+
+    calls = 0
+
+    async def search(city, property_type="Квартира"):
+        nonlocal calls
+        calls += 1
+        return [PropertyCreate(source="avito", external_id=str(calls), title=property_type, price=1000.0 * calls)]
+
+    service = OptimizedSearchService(cache_ttl=60, stale_ttl=60)
+    service.base_search.search = search
+    filters = {"property_type": "Комната"}
+
+    results, is_cached, _ = await service.search_cached("", "SWR city", filters)
+    assert ([p.external_id for p in results], is_cached) == (["1"], False)
+
+    cache_key = service._generate_cache_key("", "SWR city", filters)
+    envelope = await multi_level_cache.get(cache_key)
+    envelope.fresh_until = 0
+
+    results, is_cached, _ = await service.search_cached("", "SWR city", filters)
+    assert ([p.external_id for p in results], is_cached) == (["1"], True)
+
+    await search_swr.wait_refreshes()
+    results, is_cached, _ = await service.search_cached("", "SWR city", filters)
+    assert ([p.external_id for p in results], is_cached) == (["2"], True)
+    assert results[0].title == "Комната"
+    assert calls == 2
@@ -9,12 +9,76 @@ Bloom filter - вероятностная структура данных для
 - Ложноположительные срабатывания возможны (но редко)
 - Ложноотрицательные срабатывания невозможны
 - Идеально для дедупликации URL, external_id и т.д.
+
+``WindowedDuplicateFilter`` хранит фильтры поколениями по времени и городам
+и может держать биты в Redis, чтобы API- и Celery-воркеры видели одни и те же
+уже встреченные объявления.
 """
 
+import hashlib
+import importlib.util
 import math
-from typing import Any, Optional, List, Union
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
 from bitarray import bitarray
-import hashlib
+
+from app.utils.logger import logger
+from app.utils.metrics import metrics_collector
+
+XXHASH_AVAILABLE = importlib.util.find_spec("xxhash") is not None
+
+if XXHASH_AVAILABLE:
+    import xxhash
+
+_MASK64 = (1 << 64) - 1
+
+
+def hash128(item: Any) -> Tuple[int, int]:
+    """
+    Один 128-битный хеш элемента, разделённый на две 64-битные половины.
+    
+    Используется xxh3-128, если установлен ``xxhash``, иначе blake2b с
+    16-байтным дайджестом. Вторая половина нечётная, чтобы шаг double
+    hashing не вырождался.
+    
+    Args:
+        item: Элемент (bytes или любое значение, приводимое к str)
+        
+    Returns:
+        (h1, h2)
+    """
+    item_bytes = item if isinstance(item, bytes) else str(item).encode('utf-8')
+    if XXHASH_AVAILABLE:
+        value = xxhash.xxh3_128_intdigest(item_bytes)
+    else:
+        value = int.from_bytes(hashlib.blake2b(item_bytes, digest_size=16).digest(), 'little')
+    return value & _MASK64, (value >> 64) | 1
+
+
+def bit_indexes(item: Any, hash_count: int, size: int) -> List[int]:
+    """
+    Индексы битов элемента в фильтре размером ``size``.
+    
+    Double hashing по модулю 2^64: h(i) = ((h1 + i * h2) mod 2^64) % size.
+    """
+    h1, h2 = hash128(item)
+    return [((h1 + i * h2) & _MASK64) % size for i in range(hash_count)]
+
+
+def batch_bit_indexes(items: Sequence[Any], hash_count: int, size: int) -> np.ndarray:
+    """
+    Индексы битов батча элементов, те же, что у ``bit_indexes``.
+    
+    Returns:
+        Массив uint64 формы ``(len(items), hash_count)``
+    """
+    halves = np.array([hash128(item) for item in items], dtype=np.uint64).reshape(-1, 2)
+    steps = np.arange(hash_count, dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        combined = halves[:, :1] + steps * halves[:, 1:]
+    return combined % np.uint64(size)
 
 
 class BloomFilter:
@@ -96,7 +160,7 @@ class BloomFilter:
         """
         Генерирует несколько хешей для элемента.
         
-        Использует double hashing для эффективности:
+        Использует double hashing по двум половинам одного 128-битного хеша:
         h(i) = (h1 + i * h2) % size
         
         Args:
@@ -105,23 +169,7 @@ class BloomFilter:
         Returns:
             Список индексов битов
         """
-        # Преобразуем элемент в байты
-        if isinstance(item, bytes):
-            item_bytes = item
-        else:
-            item_bytes = str(item).encode('utf-8')
-        
-        # Два базовых хеша
-        h1 = int(hashlib.md5(item_bytes).hexdigest(), 16)
-        h2 = int(hashlib.sha256(item_bytes).hexdigest(), 16)
-        
-        # Генерируем k хешей
-        hashes = []
-        for i in range(self.hash_count):
-            h = (h1 + i * h2) % self.size
-            hashes.append(h)
-        
-        return hashes
+        return bit_indexes(item, self.hash_count, self.size)
     
     def add(self, item: Any) -> None:
         """
@@ -172,6 +220,11 @@ class BloomFilter:
         fill_ratio = self.bit_array.count(1) / self.size
         return fill_ratio > 0.5
     
+    @property
+    def memory_bytes(self) -> int:
+        """Размер битового массива в байтах."""
+        return self.bit_array.nbytes
+    
     def get_stats(self) -> dict:
         """Получить статистику фильтра."""
         fill_ratio = self.bit_array.count(1) / self.size
@@ -289,6 +342,240 @@ class DuplicateFilter:
         return stats
 
 
+class WindowedDuplicateFilter:
+    """
+    Фильтр дубликатов со скользящим окном и поколениями по городам.
+    
+    Время делится на слоты по ``window_seconds / generations`` секунд, каждый
+    слот каждого города — отдельный Bloom filter (поколение). Ключ считается
+    дубликатом, если он есть в одном из поколений окна; новый ключ пишется в
+    текущее поколение. Старые поколения выбрасываются целиком, поэтому
+    объявление снова проходит фильтр (и снова сохраняется) не позже чем через
+    ``window_seconds`` после первого появления.
+    
+    Номер поколения вычисляется из времени, а не хранится, поэтому воркеры с
+    общим Redis видят одни и те же поколения без координации. В Redis
+    поколение — битовая строка ``{prefix}:{scope}:{номер}`` с TTL окна;
+    проверка и запись батча — по одному BITFIELD на поколение за один round-trip.
+    Если Redis недоступен, используется локальный фильтр процесса.
+    
+    Пример использования:
+        dedup = WindowedDuplicateFilter(window_seconds=900, generations=3)
+        flags = await dedup.check_and_add(["avito:1", "cian:2"], scope="Москва")
+    """
+    
+    def __init__(
+        self,
+        window_seconds: float = 900,
+        generations: int = 3,
+        expected_items: int = 100000,
+        false_positive_rate: float = 0.001,
+        redis_getter: Optional[Callable[[], Any]] = None,
+        key_prefix: str = "dedup",
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Инициализация фильтра.
+        
+        Args:
+            window_seconds: Сколько секунд ключ считается уже виденным
+            generations: На сколько поколений делится окно
+            expected_items: Ожидаемое количество ключей в одном поколении города
+            false_positive_rate: Допустимая вероятность ложных срабатываний поколения
+            redis_getter: Функция, возвращающая текущий клиент Redis (None — только локально)
+            key_prefix: Префикс ключей Redis
+            clock: Источник времени (для тестов)
+        """
+        if window_seconds <= 0 or generations < 1:
+            raise ValueError("window_seconds must be positive and generations at least 1")
+        self.window_seconds = window_seconds
+        self.generations = generations
+        self.slot_seconds = window_seconds / generations
+        self.expected_items = expected_items
+        self.false_positive_rate = false_positive_rate
+        self.size = BloomFilter._calculate_size(expected_items, false_positive_rate)
+        self.hash_count = BloomFilter._calculate_hash_count(self.size, expected_items)
+        self.key_prefix = key_prefix
+        self._redis_getter = redis_getter
+        self._clock = clock
+        # scope -> {номер поколения: фильтр}
+        self._local: Dict[str, Dict[int, BloomFilter]] = {}
+    
+    def current_generation(self) -> int:
+        """Номер текущего поколения."""
+        return int(self._clock() // self.slot_seconds)
+    
+    def redis_client(self) -> Optional[Any]:
+        """Клиент Redis или ``None``, если биты хранятся только в процессе."""
+        client = self._redis_getter() if self._redis_getter is not None else None
+        # In-memory fallback кэша не умеет BITFIELD
+        if client is None or not hasattr(client, "pipeline"):
+            return None
+        return client
+    
+    async def check_and_add(self, keys: Sequence[str], scope: str = "") -> List[bool]:
+        """
+        Проверяет батч ключей и запоминает новые.
+        
+        Повтор ключа внутри батча тоже считается дубликатом.
+        
+        Args:
+            keys: Ключи элементов (например, ``source:external_id``)
+            scope: Область дедупликации (город)
+            
+        Returns:
+            Флаг «дубликат» для каждого ключа
+        """
+        return await self._check(keys, scope, add=True)
+    
+    async def contains(self, keys: Sequence[str], scope: str = "") -> List[bool]:
+        """
+        Проверяет батч ключей, не запоминая их.
+        
+        Для случаев, когда ключ можно запомнить только после успешной обработки
+        (см. ``add``). Повтор ключа внутри батча тоже считается дубликатом.
+        
+        Returns:
+            Флаг «дубликат» для каждого ключа
+        """
+        return await self._check(keys, scope, add=False)
+    
+    async def add(self, keys: Sequence[str], scope: str = "") -> None:
+        """Запоминает ключи в текущем поколении."""
+        if not keys:
+            return
+        generation = self.current_generation()
+        indexes = batch_bit_indexes(keys, self.hash_count, self.size)
+        client = self.redis_client()
+        if client is not None:
+            try:
+                await self._add_redis(client, scope, indexes, generation)
+                return
+            except Exception as e:
+                logger.warning(f"Duplicate filter Redis unavailable, using local filter: {e}")
+        self._add_local(scope, indexes, generation)
+    
+    async def _check(self, keys: Sequence[str], scope: str, add: bool) -> List[bool]:
+        if not keys:
+            return []
+        generation = self.current_generation()
+        indexes = batch_bit_indexes(keys, self.hash_count, self.size)
+        # Повтор ключа внутри батча проверяется точно, а не по битам
+        seen = set()
+        repeated = np.zeros(len(keys), dtype=bool)
+        for position, key in enumerate(keys):
+            if key in seen:
+                repeated[position] = True
+            seen.add(key)
+        
+        client = self.redis_client()
+        if client is not None:
+            try:
+                present = await self._check_redis(client, scope, indexes, generation)
+                new = ~(present | repeated)
+                if add and new.any():
+                    await self._add_redis(client, scope, indexes[new], generation)
+                backend = "redis"
+            except Exception as e:
+                logger.warning(f"Duplicate filter Redis unavailable, using local filter: {e}")
+                client = None
+        if client is None:
+            present = self._check_local(scope, indexes, generation)
+            new = ~(present | repeated)
+            if add and new.any():
+                self._add_local(scope, indexes[new], generation)
+            backend = "local"
+        
+        flags = (present | repeated).tolist()
+        duplicates = sum(flags)
+        metrics_collector.record_duplicate_filter(backend, len(flags) - duplicates, duplicates)
+        return flags
+    
+    def _live_generations(self, scope: str, generation: int) -> Dict[int, BloomFilter]:
+        live = self._local.setdefault(scope, {})
+        for expired in [number for number in live if number <= generation - self.generations]:
+            del live[expired]
+        return live
+    
+    @staticmethod
+    def _bit_masks(indexes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # bitarray (big-endian) отдаёт свой буфер numpy без копирования
+        byte_index = indexes >> np.uint64(3)
+        masks = (np.uint8(0x80) >> (indexes & np.uint64(7)).astype(np.uint8))
+        return byte_index, masks
+    
+    def _check_local(self, scope: str, indexes: np.ndarray, generation: int) -> np.ndarray:
+        byte_index, masks = self._bit_masks(indexes)
+        present = np.zeros(len(indexes), dtype=bool)
+        for bloom in self._live_generations(scope, generation).values():
+            bits = np.frombuffer(bloom.bit_array, dtype=np.uint8)
+            present |= ((bits[byte_index] & masks) != 0).all(axis=1)
+        return present
+    
+    def _add_local(self, scope: str, indexes: np.ndarray, generation: int) -> None:
+        live = self._live_generations(scope, generation)
+        current = live.get(generation)
+        if current is None:
+            current = live[generation] = BloomFilter(self.expected_items, self.false_positive_rate)
+        byte_index, masks = self._bit_masks(indexes)
+        np.bitwise_or.at(np.frombuffer(current.bit_array, dtype=np.uint8), byte_index, masks)
+        current.elements_added += len(indexes)
+    
+    async def _check_redis(self, client: Any, scope: str, indexes: np.ndarray, generation: int) -> np.ndarray:
+        names = [self._redis_key(scope, generation - age) for age in range(self.generations)]
+        get_args: List[Any] = []
+        for offset in indexes.ravel().tolist():
+            get_args.extend(("GET", "u1", offset))
+        
+        pipe = client.pipeline(transaction=False)
+        for name in names:
+            pipe.execute_command("BITFIELD", name, *get_args)
+        replies = await pipe.execute()
+        
+        present = np.zeros(len(indexes), dtype=bool)
+        for reply in replies:
+            present |= np.asarray(reply, dtype=bool).reshape(indexes.shape).all(axis=1)
+        return present
+    
+    async def _add_redis(self, client: Any, scope: str, indexes: np.ndarray, generation: int) -> None:
+        name = self._redis_key(scope, generation)
+        set_args: List[Any] = []
+        for offset in indexes.ravel().tolist():
+            set_args.extend(("SET", "u1", offset, 1))
+        pipe = client.pipeline(transaction=False)
+        pipe.execute_command("BITFIELD", name, *set_args)
+        pipe.expire(name, int(math.ceil(self.window_seconds + self.slot_seconds)))
+        await pipe.execute()
+    
+    def _redis_key(self, scope: str, generation: int) -> str:
+        return f"{self.key_prefix}:{scope.lower()}:{generation}"
+    
+    def clear(self, scope: Optional[str] = None) -> None:
+        """Очистить локальные поколения (всех городов или одного)."""
+        if scope is None:
+            self._local.clear()
+        else:
+            self._local.pop(scope, None)
+    
+    def get_stats(self) -> dict:
+        """Получить статистику фильтра."""
+        generation = self.current_generation()
+        scopes = {
+            scope: sum(f.elements_added for number, f in live.items() if number > generation - self.generations)
+            for scope, live in self._local.items()
+        }
+        return {
+            'backend': 'redis' if self.redis_client() is not None else 'local',
+            'window_seconds': self.window_seconds,
+            'generations': self.generations,
+            'size_bits': self.size,
+            'hash_count': self.hash_count,
+            'generation_bytes': (self.size + 7) // 8,
+            'local_memory_bytes': sum(f.memory_bytes for live in self._local.values() for f in live.values()),
+            'local_items_by_scope': scopes,
+        }
+
+
 # ============================================================================
 # Декоратор для дедупликации
 # ============================================================================
@@ -335,5 +622,9 @@ def deduplicate(
 __all__ = [
     "BloomFilter",
     "DuplicateFilter",
+    "WindowedDuplicateFilter",
+    "batch_bit_indexes",
+    "bit_indexes",
     "deduplicate",
+    "hash128",
 ]
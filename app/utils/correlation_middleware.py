@@ -1,83 +1,68 @@
 """Middleware для correlation IDs и логирования запросов."""
 
-import time
 import uuid
-from typing import Callable
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
+from typing import Any, Dict, Optional
 
+from starlette.datastructures import Headers, MutableHeaders, QueryParams
+from starlette.responses import Response
+from starlette.types import Scope
+
+from app.middleware.pipeline import PipelineStage
 from app.utils.structured_logger import set_correlation_id, clear_correlation_id, logger
 
 
-class CorrelationIDMiddleware(BaseHTTPMiddleware):
+class CorrelationIDMiddleware(PipelineStage):
     """Middleware для добавления correlation ID к каждому запросу."""
 
-    def __init__(self, app: ASGIApp):
-        super().__init__(app)
-
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        """
-        Обработка запроса с correlation ID.
-        
-        Args:
-            request: Входящий запрос
-            call_next: Следующий обработчик
-            
-        Returns:
-            Ответ с correlation ID в заголовках
-        """
-        # Получаем или генерируем correlation ID
-        corr_id = request.headers.get("X-Correlation-ID")
+    async def on_request(self, scope: Scope, state: Dict[str, Any]) -> Optional[Response]:
+        """Получает или генерирует correlation ID и кладёт его в контекст логов."""
+        corr_id = Headers(scope=scope).get("X-Correlation-ID")
         if not corr_id:
             corr_id = str(uuid.uuid4())
 
         # Устанавливаем correlation ID в контекст
+        state["correlation_id"] = corr_id
         set_correlation_id(corr_id)
 
-        # Засекаем время начала
-        start_time = time.time()
-
+        # Логируем начало запроса
+        logger.debug(
+            f"Request started: {scope['method']} {scope['path']}",
+            method=scope["method"],
+            path=scope["path"],
+            query_params=dict(QueryParams(scope.get("query_string", b""))),
+        )
+        return None
+
+    def on_response_start(self, scope: Scope, state: Dict[str, Any], status: int, headers: MutableHeaders) -> None:
+        # Добавляем correlation ID в заголовки ответа
+        headers["X-Correlation-ID"] = state["correlation_id"]
+
+    def on_complete(
+        self,
+        scope: Scope,
+        state: Dict[str, Any],
+        status: Optional[int],
+        error: Optional[BaseException],
+        duration: float,
+    ) -> None:
         try:
-            # Логируем начало запроса
-            logger.debug(
-                f"Request started: {request.method} {request.url.path}",
-                method=request.method,
-                path=str(request.url.path),
-                query_params=dict(request.query_params),
-            )
-
-            # Обрабатываем запрос
-            response = await call_next(request)
-
-            # Вычисляем длительность
-            duration = time.time() - start_time
-
-            # Добавляем correlation ID в заголовки ответа
-            response.headers["X-Correlation-ID"] = corr_id
-
-            # Логируем завершение запроса
-            logger.log_request(
-                method=request.method,
-                path=str(request.url.path),
-                status_code=response.status_code,
-                duration=duration,
-            )
-
-            return response
-
-        except Exception as e:
-            # Логируем ошибку
-            duration = time.time() - start_time
-            logger.error(
-                f"Request failed: {request.method} {request.url.path} - {str(e)}",
-                method=request.method,
-                path=str(request.url.path),
-                duration=duration,
-                exc_info=True,
-            )
-            raise
-
+            if error is not None:
+                # Логируем ошибку
+                logger.error(
+                    f"Request failed: {scope['method']} {scope['path']} - {str(error)}",
+                    method=scope["method"],
+                    path=scope["path"],
+                    duration=duration,
+                    exc_info=error,
+                )
+            else:
+                # Логируем завершение запроса
+                logger.log_request(
+                    method=scope["method"],
+                    path=scope["path"],
+                    status_code=status,
+                    duration=duration,
+                )
         finally:
             # Очищаем correlation ID из контекста
             clear_correlation_id()
@@ -3,7 +3,8 @@ Duplicate detection and analytics.
 
 Provides comprehensive duplicate detection and analysis with:
 - Multiple deduplication strategies
-- Fuzzy matching for similar listings
+- Fuzzy matching for similar listings (blocking + MinHash/LSH candidates)
+- Cluster ids for the same flat listed on several sources
 - Duplicate analytics and statistics
 - Deduplication recommendations
 """
@@ -15,8 +16,14 @@ from enum import Enum
 from difflib import SequenceMatcher
 import hashlib
 import json
+import math
+import re
+import zlib
+
+import numpy as np
 
 from app.models.schemas import PropertyCreate
+from app.utils import geohash
 from app.utils.logger import logger
 from app.utils.advanced_metrics import metrics_reporter
 
@@ -54,13 +61,156 @@ class DuplicateMatch:
         }
 
 
+@dataclass
+class DedupResult:
+    """Outcome of clustering a batch of listings."""
+    unique: List[PropertyCreate]
+    matches: List[DuplicateMatch]
+    cluster_ids: List[str]  # Aligned with the input items
+    candidate_pairs: int = 0
+    
+    @property
+    def clusters(self) -> Dict[str, List[int]]:
+        """Input indices grouped by cluster id."""
+        groups: Dict[str, List[int]] = {}
+        for index, cluster_id in enumerate(self.cluster_ids):
+            groups.setdefault(cluster_id, []).append(index)
+        return groups
+
+
+_ADDRESS_NOISE = re.compile(
+    r"\b(?:россия|рф|г|город|ул|улица|д|дом|кв|квартира|корп|корпус|к|стр|строение|лит|литера|"
+    r"пр|пр-т|просп|проспект|пер|переулок|ш|шоссе|б-р|бульвар|наб|набережная|пл|площадь|"
+    r"мкр|микрорайон|р-н|район|пос|поселок)\b\.?"
+)
+_NON_WORD = re.compile(r"[^0-9a-zа-я]+")
+
+# Mersenne prime for the universal hash family (a * x + b) mod p
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_BAND_HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+_DIGITS = re.compile(r"\d+")
+
+
+def normalize_address(address: str) -> str:
+    """
+    Normalize an address for shingling.
+    
+    Lowercases, folds ё, drops street-type and house/flat markers and
+    punctuation, so that "ул. Ленина, д. 5" and "Ленина улица 5" agree.
+    """
+    text = address.lower().replace("ё", "е")
+    text = _ADDRESS_NOISE.sub(" ", text)
+    return " ".join(_NON_WORD.sub(" ", text).split())
+
+
+def shingles(text: str, size: int = 3) -> Set[int]:
+    """Character shingles of ``text`` as deterministic 32-bit hashes."""
+    if len(text) <= size:
+        return {zlib.crc32(text.encode())} if text else set()
+    return {zlib.crc32(text[i:i + size].encode()) for i in range(len(text) - size + 1)}
+
+
+class MinHasher:
+    """MinHash signatures with LSH banding, vectorized over a whole batch."""
+    
+    def __init__(self, num_perm: int = 32, bands: int = 16, seed: int = 1):
+        """
+        Initialize the hasher.
+        
+        Args:
+            num_perm: Signature length (number of hash permutations)
+            bands: LSH bands; ``num_perm`` must be divisible by it. Pairs with
+                Jaccard similarity s collide in some band with probability
+                1 - (1 - s^r)^b where r = num_perm / bands.
+            seed: Seed of the permutation coefficients
+        """
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = np.random.default_rng(seed)
+        # Coefficients below 2**31 keep a * x + b (x < 2**32) inside uint64
+        self._a = rng.integers(1, 1 << 31, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 31, size=(num_perm, 1), dtype=np.uint64)
+    
+    def signatures(self, shingle_sets: List[Set[int]], chunk_shingles: int = 1 << 18) -> np.ndarray:
+        """
+        Compute signatures for non-empty shingle sets.
+        
+        Args:
+            shingle_sets: One set of 32-bit shingle hashes per item (non-empty)
+            chunk_shingles: Shingles hashed per numpy pass (bounds memory)
+        
+        Returns:
+            ``(len(shingle_sets), num_perm)`` uint64 array
+        """
+        result = np.empty((len(shingle_sets), self.num_perm), dtype=np.uint64)
+        start = 0
+        while start < len(shingle_sets):
+            # Take items until the chunk holds about chunk_shingles hashes
+            end = start
+            total = 0
+            while end < len(shingle_sets) and (total == 0 or total + len(shingle_sets[end]) <= chunk_shingles):
+                total += len(shingle_sets[end])
+                end += 1
+            chunk = shingle_sets[start:end]
+            lengths = np.fromiter((len(s) for s in chunk), dtype=np.int64, count=len(chunk))
+            values = np.fromiter(
+                (h for s in chunk for h in s), dtype=np.uint64, count=int(lengths.sum())
+            )
+            hashed = (self._a * values + self._b) % _MERSENNE_PRIME
+            offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+            result[start:end] = np.minimum.reduceat(hashed, offsets, axis=1).T
+            start = end
+        return result
+    
+    def band_hashes(self, signatures: np.ndarray) -> np.ndarray:
+        """
+        LSH bucket hash of every band.
+        
+        Args:
+            signatures: ``(n, num_perm)`` array from ``signatures``
+        
+        Returns:
+            ``(n, bands)`` uint64 array; equal bands give equal hashes
+        """
+        bands = signatures.reshape(len(signatures), self.bands, self.rows)
+        result = np.zeros((len(signatures), self.bands), dtype=np.uint64)
+        with np.errstate(over='ignore'):
+            for row in range(self.rows):
+                result = result * _BAND_HASH_MULTIPLIER + bands[:, :, row]
+        return result
+
+
 class DuplicateDetector:
-    """Detect duplicates in property listings."""
+    """
+    Detect duplicates in property listings.
+    
+    Exact duplicates are found by hashing key fields. Fuzzy duplicates are
+    found without comparing every pair: listings are first grouped by
+    blocking keys and MinHash/LSH buckets over address shingles, and the
+    weighted score of ``_fuzzy_match`` runs only on pairs that share a
+    bucket. As before, a listing joins the cluster of the first unique
+    listing it matches (no transitive chaining); cluster ids are stable for
+    the same set of listings.
+    
+    Blocking only uses fields the score cannot do without: with the default
+    threshold a match needs a similar address, equal rooms and a price within
+    tolerance, so buckets are keyed by city, rooms and price band. Area is
+    not required by the score and is not a blocking key. Address buckets also
+    require equal house numbers, which the character-level score alone does
+    not tell apart.
+    """
     
     def __init__(
         self,
         fuzzy_threshold: float = 0.85,
-        price_tolerance_percent: float = 5.0
+        price_tolerance_percent: float = 5.0,
+        num_perm: int = 36,
+        lsh_bands: int = 12,
+        geohash_precision: int = 7,
+        max_block_size: int = 200
     ):
         """
         Initialize duplicate detector.
@@ -68,11 +218,28 @@ class DuplicateDetector:
         Args:
             fuzzy_threshold: Similarity threshold for fuzzy matching (0-1)
             price_tolerance_percent: Price difference tolerance (%)
+            num_perm: MinHash signature length
+            lsh_bands: LSH bands (more bands find less similar addresses)
+            geohash_precision: Geohash length of the spatial blocking key
+            max_block_size: Larger buckets only pair listings that are
+                neighbours by price, which bounds the work per bucket
         """
         self.fuzzy_threshold = fuzzy_threshold
         self.price_tolerance_percent = price_tolerance_percent
+        self.geohash_precision = geohash_precision
+        self.max_block_size = max_block_size
+        self.min_hasher = MinHasher(num_perm=num_perm, bands=lsh_bands)
         self.detected_duplicates: List[DuplicateMatch] = []
         self._processed_hashes: Set[str] = set()
+        
+        # Score components a match cannot do without (weights: address 0.4,
+        # price 0.3, rooms 0.2, area 0.1); only those may split blocks
+        self._block_on_rooms = fuzzy_threshold > 0.8
+        self._block_on_price = fuzzy_threshold > 0.7
+        # Two price grids shifted by half a band: any two prices within
+        # tolerance share a band in at least one of them
+        tolerance = min(max(price_tolerance_percent, 0.01), 99.0) / 100
+        self._price_band_width = 2 * math.log(1 / (1 - tolerance))
     
     def detect_duplicates(
         self,
@@ -89,53 +256,75 @@ class DuplicateDetector:
         Returns:
             Tuple of (unique items, duplicate matches)
         """
-        unique_items = []
-        duplicates = []
-        seen_hashes: Dict[str, PropertyCreate] = {}
+        result = self.cluster(items, strategy)
+        return result.unique, result.matches
+    
+    def cluster(
+        self,
+        items: List[PropertyCreate],
+        strategy: DeduplicationStrategy = DeduplicationStrategy.HYBRID
+    ) -> DedupResult:
+        """
+        Group listings that describe the same flat.
         
-        for item in items:
-            # Calculate hash
-            item_hash = self._calculate_hash(item)
-            
-            # Exact match detection
-            if item_hash in seen_hashes:
-                existing = seen_hashes[item_hash]
-                match = DuplicateMatch(
-                    item1_id=str(existing.id) if hasattr(existing, 'id') else "unknown",
-                    item2_id=str(item.id) if hasattr(item, 'id') else "unknown",
-                    source1=existing.source,
-                    source2=item.source,
-                    similarity_score=1.0,
-                    matched_fields=['all'],
-                    match_reason='Exact match (same hash)'
-                )
-                duplicates.append(match)
-                self.detected_duplicates.append(match)
+        Args:
+            items: List of properties
+            strategy: Deduplication strategy
+        
+        Returns:
+            Unique items (first listing of each cluster), matches and a
+            cluster id per input item
+        """
+        duplicates: List[DuplicateMatch] = []
+        # Representative (first listing) of each item's cluster
+        representative = list(range(len(items)))
+        is_unique = [False] * len(items)
+        unique_hashes: Dict[str, int] = {}
+        use_exact = strategy in (DeduplicationStrategy.EXACT, DeduplicationStrategy.HYBRID)
+        use_fuzzy = strategy in (DeduplicationStrategy.FUZZY, DeduplicationStrategy.HYBRID)
+        
+        earlier: Dict[int, List[int]] = {}
+        candidate_pairs = 0
+        if use_fuzzy:
+            pairs = self._candidate_pairs(items)
+            candidate_pairs = len(pairs)
+            for first, second in pairs:
+                earlier.setdefault(second, []).append(first)
+        
+        # Same rule as before (first matching unique item wins), but only
+        # unique items sharing a bucket with the listing are scored
+        for index, item in enumerate(items):
+            item_hash = self._calculate_hash(item) if use_exact else None
+            if item_hash is not None and item_hash in unique_hashes:
+                existing = unique_hashes[item_hash]
+                representative[index] = existing
+                duplicates.append(self._make_match(
+                    items[existing], item, 1.0, ['all'], 'Exact match (same hash)'
+                ))
                 continue
             
-            # Fuzzy match detection
-            is_duplicate = False
-            if strategy in (DeduplicationStrategy.FUZZY, DeduplicationStrategy.HYBRID):
-                for existing in unique_items:
-                    score, matched_fields = self._fuzzy_match(item, existing)
-                    if score >= self.fuzzy_threshold:
-                        match = DuplicateMatch(
-                            item1_id=str(existing.id) if hasattr(existing, 'id') else "unknown",
-                            item2_id=str(item.id) if hasattr(item, 'id') else "unknown",
-                            source1=existing.source,
-                            source2=item.source,
-                            similarity_score=score,
-                            matched_fields=matched_fields,
-                            match_reason=f'Fuzzy match ({score:.1%} similar)'
-                        )
-                        duplicates.append(match)
-                        self.detected_duplicates.append(match)
-                        is_duplicate = True
-                        break
+            matched = False
+            for existing in sorted(earlier.get(index, ())):
+                if not is_unique[existing]:
+                    continue
+                score, matched_fields = self._fuzzy_match(item, items[existing], self.fuzzy_threshold)
+                if score >= self.fuzzy_threshold:
+                    representative[index] = existing
+                    duplicates.append(self._make_match(
+                        items[existing], item, score, matched_fields,
+                        f'Fuzzy match ({score:.1%} similar)'
+                    ))
+                    matched = True
+                    break
             
-            if not is_duplicate:
-                unique_items.append(item)
-                seen_hashes[item_hash] = item
+            if not matched:
+                is_unique[index] = True
+                if item_hash is not None:
+                    unique_hashes[item_hash] = index
+        
+        unique_items = [item for index, item in enumerate(items) if is_unique[index]]
+        cluster_ids = self._cluster_ids(items, representative)
+        self.detected_duplicates.extend(duplicates)
         
         # Report metrics
         if duplicates:
@@ -147,10 +336,137 @@ class DuplicateDetector:
         logger.info(
             f"Duplicate detection: {len(items)} items → "
             f"{len(unique_items)} unique, "
-            f"{len(duplicates)} duplicates removed"
+            f"{len(duplicates)} duplicates removed, "
+            f"{candidate_pairs} candidate pairs scored"
         )
         
-        return unique_items, duplicates
+        return DedupResult(
+            unique=unique_items,
+            matches=duplicates,
+            cluster_ids=cluster_ids,
+            candidate_pairs=candidate_pairs,
+        )
+    
+    def _candidate_pairs(self, items: List[PropertyCreate]) -> Set[Tuple[int, int]]:
+        """
+        Pairs of item indices that share at least one blocking bucket.
+        
+        Args:
+            items: List of properties
+        
+        Returns:
+            Set of ``(earlier, later)`` index pairs
+        """
+        buckets: Dict[Tuple[Any, ...], List[int]] = {}
+        shingled: List[int] = []
+        shingle_sets: List[Set[int]] = []
+        house_numbers: List[Tuple[str, ...]] = []
+        blocks_by_item: List[List[Tuple[Any, ...]]] = []
+        
+        for index, item in enumerate(items):
+            blocks = self._attribute_blocks(item)
+            blocks_by_item.append(blocks)
+            text = self._shingle_text(item)
+            address_shingles = shingles(text)
+            if address_shingles:
+                shingled.append(index)
+                shingle_sets.append(address_shingles)
+                # "Ленина 5" and "Ленина 15" are near-identical as text, so the
+                # house/building numbers must agree exactly
+                house_numbers.append(tuple(sorted(_DIGITS.findall(text))))
+            else:
+                # No address: only listings with the same attributes can match
+                area_bucket = round(item.area) if item.area else None
+                for block in blocks:
+                    buckets.setdefault(('attrs', area_bucket) + block, []).append(index)
+            
+            geohash = self._geohash(item)
+            if geohash:
+                for block in blocks:
+                    buckets.setdefault(('geo', geohash) + block[1:], []).append(index)
+        
+        if shingle_sets:
+            band_hashes = self.min_hasher.band_hashes(self.min_hasher.signatures(shingle_sets)).tolist()
+            for index, house, hashes in zip(shingled, house_numbers, band_hashes):
+                for block in blocks_by_item[index]:
+                    for band, value in enumerate(hashes):
+                        buckets.setdefault(('lsh', band, value, house) + block, []).append(index)
+        
+        pairs: Set[Tuple[int, int]] = set()
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            if len(members) <= self.max_block_size:
+                for position, first in enumerate(members):
+                    for second in members[position + 1:]:
+                        pairs.add((first, second))
+                continue
+            # Oversized bucket (e.g. one large residential complex): pair
+            # each listing with its neighbours by price only
+            by_price = sorted(members, key=lambda index: items[index].price)
+            window = self.max_block_size
+            for position, first in enumerate(by_price):
+                for second in by_price[position + 1:position + window]:
+                    pairs.add((min(first, second), max(first, second)))
+        return pairs
+    
+    @staticmethod
+    def _shingle_text(item: PropertyCreate) -> str:
+        """Normalized address without the city, which is already a blocking key."""
+        address = normalize_address(_address(item))
+        city = normalize_address(_city(item))
+        if city:
+            address = " ".join(token for token in address.split() if token not in city.split())
+        return address
+    
+    def _attribute_blocks(self, item: PropertyCreate) -> List[Tuple[Any, ...]]:
+        """Blocking prefixes ``(city, rooms, price band)`` for both price grids."""
+        city = _city(item).lower()
+        rooms = item.rooms if self._block_on_rooms else None
+        if not self._block_on_price or not item.price or item.price <= 0:
+            return [(city, rooms, None)]
+        position = math.log(item.price) / self._price_band_width
+        return [(city, rooms, ('a', math.floor(position))), (city, rooms, ('b', math.floor(position + 0.5)))]
+    
+    def _geohash(self, item: PropertyCreate) -> Optional[str]:
+        location = item.location or {}
+        latitude = item.latitude if item.latitude is not None else location.get('latitude')
+        longitude = item.longitude if item.longitude is not None else location.get('longitude')
+        if latitude is None or longitude is None:
+            return None
+        try:
+            return geohash.encode(float(latitude), float(longitude), self.geohash_precision)
+        except (TypeError, ValueError):
+            return None
+    
+    @staticmethod
+    def _make_match(
+        existing: PropertyCreate,
+        item: PropertyCreate,
+        score: float,
+        matched_fields: List[str],
+        reason: str
+    ) -> DuplicateMatch:
+        return DuplicateMatch(
+            item1_id=_item_id(existing),
+            item2_id=_item_id(item),
+            source1=existing.source,
+            source2=item.source,
+            similarity_score=score,
+            matched_fields=matched_fields,
+            match_reason=reason
+        )
+    
+    @staticmethod
+    def _cluster_ids(items: List[PropertyCreate], representatives: List[int]) -> List[str]:
+        """Cluster id per item, derived from the smallest member key of its cluster."""
+        smallest: Dict[int, str] = {}
+        for index, representative in enumerate(representatives):
+            key = f"{items[index].source}:{items[index].external_id}"
+            if representative not in smallest or key < smallest[representative]:
+                smallest[representative] = key
+        ids = {rep: hashlib.sha1(key.encode()).hexdigest()[:16] for rep, key in smallest.items()}
+        return [ids[representative] for representative in representatives]
     
     def _calculate_hash(self, item: PropertyCreate) -> str:
         """
@@ -164,7 +480,7 @@ class DuplicateDetector:
         """
         # Key fields for hashing
         key_fields = {
-            'address': getattr(item, 'address', ''),
+            'address': _address(item),
             'price': getattr(item, 'price', 0),
             'rooms': getattr(item, 'rooms', 0),
             'area': getattr(item, 'area', 0),
@@ -177,7 +493,8 @@ class DuplicateDetector:
     def _fuzzy_match(
         self,
         item1: PropertyCreate,
-        item2: PropertyCreate
+        item2: PropertyCreate,
+        min_score: float = 0.0
     ) -> Tuple[float, List[str]]:
         """
         Perform fuzzy matching between two items.
@@ -185,6 +502,8 @@ class DuplicateDetector:
         Args:
             item1: First property
             item2: Second property
+            min_score: Skip the address comparison when the score cannot
+                reach this value even with a perfect address match
         
         Returns:
             Tuple of (similarity_score, matched_fields)
@@ -192,15 +511,6 @@ class DuplicateDetector:
         matched_fields = []
         scores = []
         
-        # Address similarity
-        addr1 = getattr(item1, 'address', '').lower()
-        addr2 = getattr(item2, 'address', '').lower()
-        if addr1 and addr2:
-            addr_score = SequenceMatcher(None, addr1, addr2).ratio()
-            if addr_score > 0.8:
-                matched_fields.append('address')
-                scores.append(addr_score * 0.4)  # Weight 40%
-        
         # Price similarity
         price1 = getattr(item1, 'price', None)
         price2 = getattr(item2, 'price', None)
@@ -227,6 +537,18 @@ class DuplicateDetector:
                 matched_fields.append('area')
                 scores.append((1 - area_diff / 100) * 0.1)  # Weight 10%
         
+        # Address similarity (the expensive part, so it goes last)
+        addr1 = _address(item1).lower()
+        addr2 = _address(item2).lower()
+        if addr1 and addr2 and sum(scores) + 0.4 >= min_score:
+            matcher = SequenceMatcher(None, addr1, addr2)
+            # quick_ratio() is an upper bound of ratio()
+            if matcher.quick_ratio() > 0.8:
+                addr_score = matcher.ratio()
+                if addr_score > 0.8:
+                    matched_fields.insert(0, 'address')
+                    scores.insert(0, addr_score * 0.4)  # Weight 40%
+        
         overall_score = sum(scores) if scores else 0
         return overall_score, matched_fields
     
@@ -351,6 +673,20 @@ class DeduplicationAnalyzer:
         return recommendations
 
 
+def _address(item: PropertyCreate) -> str:
+    """Address of a listing, falling back to the location payload."""
+    return getattr(item, 'address', None) or (getattr(item, 'location', None) or {}).get('address') or ''
+
+
+def _city(item: PropertyCreate) -> str:
+    return getattr(item, 'city', None) or (getattr(item, 'location', None) or {}).get('city') or ''
+
+
+def _item_id(item: PropertyCreate) -> str:
+    item_id = getattr(item, 'id', None) or getattr(item, 'external_id', None)
+    return str(item_id) if item_id is not None else "unknown"
+
+
 # Global instances
 duplicate_detector = DuplicateDetector()
 dedup_analyzer = DeduplicationAnalyzer()
@@ -35,16 +35,16 @@ class EnhancedHTTPClient:
     
     async def create_session(self):
         """Создает новую HTTP сессию с настройками"""
-        proxies = None
+        proxy_url = None
         
         if settings.PROXY_ENABLED:
             proxy = proxy_manager.get_random_proxy()
             if proxy:
-                proxies = proxy.to_httpx_proxy()
+                proxy_url = proxy.to_url()
                 logger.info(f"Using proxy: {proxy.host}:{proxy.port}")
         
         self.session = httpx.AsyncClient(
-            proxies=proxies,
+            proxy=proxy_url,
             timeout=httpx.Timeout(settings.REQUEST_TIMEOUT),
             follow_redirects=False,  # Не следуем редиректам автоматически
             limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
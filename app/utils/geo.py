@@ -0,0 +1,137 @@
+"""
+Геопространственные запросы: сетка ячеек, bounding box и векторный haversine.
+
+Поиск ближайших объявлений идёт в три шага:
+
+1. Ячейки сетки ``GEO_CELL_DEGREES`` (0.01° ≈ 1.1 км по широте), покрывающие
+   bounding box круга. Номер ячейки —
+   ``floor((lat + 90) * 100) * GEO_CELL_ROW + floor((lon + 180) * 100)``, так что
+   каждый ряд ячеек box'а — непрерывный диапазон номеров; в Postgres по этому
+   выражению построен индекс (миграция ``2026_10_16_geo_spatial_index``) и
+   каждый ряд читается одним range scan.
+2. Точный bounding box по ``latitude``/``longitude`` в SQL.
+3. Haversine по массивам NumPy для кандидатов, отбор top-k через
+   ``argpartition``.
+"""
+
+import math
+from dataclasses import dataclass
+from typing import List, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE_LAT = math.pi * EARTH_RADIUS_KM / 180
+
+# Ячейка сетки: 0.01° по широте и долготе
+GEO_CELL_DEGREES = 0.01
+GEO_CELL_SCALE = 100
+# Ячеек в одном ряду по долготе (360° / 0.01° + 1)
+GEO_CELL_ROW = 36001
+# Больше рядов — выгоднее один bounding box по (latitude, longitude)
+MAX_CELL_ROWS = 128
+
+# Размеры сетки heatmap, предрассчитанные в mv_geo_heatmap_grid
+HEATMAP_GRID_SIZES = (0.005, 0.01, 0.02, 0.05)
+
+# То же выражение, что и в индексе ix_properties_geo_cell (Postgres)
+GEO_CELL_SQL = (
+    "(floor((latitude + 90) * 100)::bigint * 36001 + floor((longitude + 180) * 100)::bigint)"
+)
+
+
+@dataclass(frozen=True)
+class BoundingBox:
+    """Прямоугольник в градусах."""
+
+    south: float
+    west: float
+    north: float
+    east: float
+
+    def cell_ranges(self, max_rows: int = MAX_CELL_ROWS) -> List[Tuple[int, int]]:
+        """
+        Диапазоны номеров ячеек, покрывающих прямоугольник (по одному на ряд).
+
+        Returns:
+            ``[(first, last), ...]`` или пустой список, если рядов больше ``max_rows``
+        """
+        lat_lo = math.floor((self.south + 90) * GEO_CELL_SCALE)
+        lat_hi = math.floor((self.north + 90) * GEO_CELL_SCALE)
+        lon_lo = math.floor((self.west + 180) * GEO_CELL_SCALE)
+        lon_hi = math.floor((self.east + 180) * GEO_CELL_SCALE)
+        if lat_hi - lat_lo + 1 > max_rows:
+            return []
+        return [(row * GEO_CELL_ROW + lon_lo, row * GEO_CELL_ROW + lon_hi) for row in range(lat_lo, lat_hi + 1)]
+
+
+def bounding_box(latitude: float, longitude: float, radius_km: float) -> BoundingBox:
+    """Прямоугольник, содержащий круг радиуса ``radius_km`` (без перехода через 180-й меридиан)."""
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    cos_lat = math.cos(math.radians(latitude))
+    dlon = 180.0 if cos_lat < 1e-9 else min(180.0, dlat / cos_lat)
+    return BoundingBox(
+        south=max(-90.0, latitude - dlat),
+        west=max(-180.0, longitude - dlon),
+        north=min(90.0, latitude + dlat),
+        east=min(180.0, longitude + dlon),
+    )
+
+
+def cell_id(latitude: float, longitude: float) -> int:
+    """Номер ячейки сетки точки."""
+    return (
+        math.floor((latitude + 90) * GEO_CELL_SCALE) * GEO_CELL_ROW
+        + math.floor((longitude + 180) * GEO_CELL_SCALE)
+    )
+
+
+def haversine_km(latitude: float, longitude: float, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """
+    Расстояния от точки до массива точек по формуле Haversine.
+
+    Returns:
+        Массив расстояний в километрах
+    """
+    lat1 = math.radians(latitude)
+    lat2 = np.radians(latitudes)
+    dlat = lat2 - lat1
+    dlon = np.radians(longitudes) - math.radians(longitude)
+    a = np.sin(dlat / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def nearest_within(
+    distances: np.ndarray,
+    radius_km: float,
+    limit: int,
+) -> Tuple[np.ndarray, int]:
+    """
+    Индексы ближайших точек в радиусе.
+
+    Args:
+        distances: Расстояния до кандидатов
+        radius_km: Радиус
+        limit: Сколько ближайших вернуть
+
+    Returns:
+        (индексы по возрастанию расстояния, сколько всего точек в радиусе)
+    """
+    inside = np.flatnonzero(distances <= radius_km)
+    total = int(inside.size)
+    if total > limit:
+        inside = inside[np.argpartition(distances[inside], limit - 1)[:limit]]
+    return inside[np.argsort(distances[inside], kind="stable")], total
+
+
+__all__ = [
+    "BoundingBox",
+    "EARTH_RADIUS_KM",
+    "GEO_CELL_DEGREES",
+    "GEO_CELL_SQL",
+    "HEATMAP_GRID_SIZES",
+    "bounding_box",
+    "cell_id",
+    "haversine_km",
+    "nearest_within",
+]
@@ -3,7 +3,9 @@
 Переиспользует соединения и реализует лучшие практики для асинхронных HTTP клиентов.
 """
 import asyncio
-from typing import Optional, Dict, Any
+import importlib.util
+import weakref
+from typing import Optional, Dict, Any, Tuple
 from contextlib import asynccontextmanager
 
 import httpx
@@ -12,6 +14,9 @@ from tenacity import retry, stop_after_attempt, wait_exponential
 from app.core.config import settings
 from app.utils.logger import logger
 
+# HTTP/2 в httpx требует пакет h2 (httpx[http2])
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
 
 class HTTPClientPool:
     """
@@ -20,7 +25,6 @@ class HTTPClientPool:
     """
     
     _instance: Optional['HTTPClientPool'] = None
-    _lock = asyncio.Lock()
     
     def __new__(cls):
         if cls._instance is None:
@@ -29,7 +33,13 @@ class HTTPClientPool:
     
     def __init__(self):
         if not hasattr(self, '_initialized'):
-            self.clients: Dict[str, httpx.AsyncClient] = {}
+            # Соединения httpx привязаны к event loop, поэтому клиент свой у каждого
+            # (имя, loop): живые loop'ы (поток API и asyncio.run в Celery) не мешают друг другу
+            self.clients: Dict[Tuple[str, asyncio.AbstractEventLoop], httpx.AsyncClient] = {}
+            # asyncio.Lock привязывается к event loop, поэтому блокировка своя на каждый loop
+            self._locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = (
+                weakref.WeakKeyDictionary()
+            )
             self._request_count: Dict[str, int] = {}
             self._error_count: Dict[str, int] = {}
             self._initialized = True
@@ -39,10 +49,34 @@ class HTTPClientPool:
         """Получить статистику использования пула."""
         return {
             "active_clients": len(self.clients),
-            "client_names": list(self.clients.keys()),
+            "client_names": sorted({name for name, _ in self.clients}),
             "request_count": dict(self._request_count),
             "error_count": dict(self._error_count),
         }
+
+    def record_request(self, name: str) -> None:
+        """Учесть запрос, выполненный клиентом."""
+        self._request_count[name] = self._request_count.get(name, 0) + 1
+
+    def record_error(self, name: str) -> None:
+        """Учесть ошибку запроса клиента."""
+        self._error_count[name] = self._error_count.get(name, 0) + 1
+
+    @property
+    def _lock(self) -> asyncio.Lock:
+        """Блокировка текущего event loop."""
+        loop = asyncio.get_running_loop()
+        lock = self._locks.get(loop)
+        if lock is None:
+            lock = self._locks[loop] = asyncio.Lock()
+        return lock
+
+    def _drop_closed_loops(self) -> None:
+        """Забыть клиенты event loop'ов, закрытых без ``close_all``."""
+        for key in [key for key in self.clients if key[1].is_closed()]:
+            del self.clients[key]
+            # Транспорты принадлежали закрытому loop: корректно закрыть их уже нельзя
+            logger.warning(f"Event loop of HTTP client '{key[0]}' was closed before close_all(), dropping the client")
     
     async def get_client(
         self,
@@ -52,6 +86,8 @@ class HTTPClientPool:
         """
         Получить или создать HTTP клиент с пулом соединений.
         
+        Клиент принадлежит текущему event loop; другой loop получает свой.
+        
         Args:
             name: Идентификатор клиента
             **kwargs: Дополнительные параметры httpx.AsyncClient
@@ -59,8 +95,16 @@ class HTTPClientPool:
         Returns:
             Настроенный асинхронный HTTP клиент
         """
+        key = (name, asyncio.get_running_loop())
+        client = self.clients.get(key)
+        # Быстрый путь без блокировки: клиент уже создан в этом event loop
+        if client is not None:
+            return client
+
         async with self._lock:
-            if name not in self.clients:
+            self._drop_closed_loops()
+
+            if key not in self.clients:
                 # Default limits optimized for web scraping
                 default_limits = httpx.Limits(
                     max_keepalive_connections=20,
@@ -79,41 +123,49 @@ class HTTPClientPool:
                 # Merge with custom parameters
                 limits = kwargs.pop('limits', default_limits)
                 timeout = kwargs.pop('timeout', default_timeout)
+                http2 = kwargs.pop('http2', True) and HTTP2_AVAILABLE
+                kwargs.setdefault('follow_redirects', True)
                 
                 # Create client with best practices
-                self.clients[name] = httpx.AsyncClient(
+                self.clients[key] = httpx.AsyncClient(
                     limits=limits,
                     timeout=timeout,
-                    http2=True,  # Enable HTTP/2
-                    follow_redirects=True,
+                    http2=http2,
                     verify=True,
                     **kwargs
                 )
                 
-                logger.info(f"Created HTTP client '{name}' with connection pool")
+                logger.info(f"Created HTTP client '{name}' with connection pool (http2={http2})")
             
-            return self.clients[name]
+            return self.clients[key]
     
     async def close_client(self, name: str) -> None:
-        """Закрыть конкретный клиент."""
+        """Закрыть клиент текущего event loop."""
         async with self._lock:
-            if name in self.clients:
-                await self.clients[name].aclose()
-                del self.clients[name]
+            client = self.clients.pop((name, asyncio.get_running_loop()), None)
+            if client is not None:
+                await client.aclose()
                 logger.info(f"Closed HTTP client '{name}'")
     
     async def close_all(self) -> None:
-        """Закрыть все клиенты."""
+        """
+        Закрыть все клиенты текущего event loop.
+        
+        Вызывается перед закрытием loop (shutdown приложения, конец задачи
+        Celery); клиенты других живых loop'ов не трогаются.
+        """
+        loop = asyncio.get_running_loop()
         async with self._lock:
             stats = self.get_stats()
             logger.info(f"Closing HTTP pool. Final stats: {stats}")
             
-            for name, client in self.clients.items():
-                await client.aclose()
-                logger.info(f"Closed HTTP client '{name}'")
-            self.clients.clear()
-            self._request_count.clear()
-            self._error_count.clear()
+            for key in [key for key in self.clients if key[1] is loop]:
+                await self.clients.pop(key).aclose()
+                logger.info(f"Closed HTTP client '{key[0]}'")
+            self._drop_closed_loops()
+            if not self.clients:
+                self._request_count.clear()
+                self._error_count.clear()
 
 
 # Global pool instance
@@ -185,12 +237,12 @@ class OptimizedHTTPClient:
             raise RuntimeError("Client not initialized. Use async context manager.")
         
         try:
-            http_pool._request_count[self.name] = http_pool._request_count.get(self.name, 0) + 1
+            http_pool.record_request(self.name)
             response = await self._client.get(url, params=params, **kwargs)
             response.raise_for_status()
             return response
         except (httpx.HTTPStatusError, httpx.RequestError) as e:
-            http_pool._error_count[self.name] = http_pool._error_count.get(self.name, 0) + 1
+            http_pool.record_error(self.name)
             if isinstance(e, httpx.HTTPStatusError):
                 logger.warning(f"HTTP error {e.response.status_code} for {url}")
             else:
@@ -225,12 +277,12 @@ class OptimizedHTTPClient:
             raise RuntimeError("Client not initialized. Use async context manager.")
         
         try:
-            http_pool._request_count[self.name] = http_pool._request_count.get(self.name, 0) + 1
+            http_pool.record_request(self.name)
             response = await self._client.post(url, data=data, json=json, **kwargs)
             response.raise_for_status()
             return response
         except (httpx.HTTPStatusError, httpx.RequestError) as e:
-            http_pool._error_count[self.name] = http_pool._error_count.get(self.name, 0) + 1
+            http_pool.record_error(self.name)
             if isinstance(e, httpx.HTTPStatusError):
                 logger.warning(f"HTTP error {e.response.status_code} for {url}")
             else:
@@ -1,14 +1,15 @@
 """Rate limiting по IP адресу для API endpoints."""
 
 import time
-from typing import Dict, List, Tuple
-from fastapi import HTTPException, Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
+from typing import Any, Dict, List, Optional, Tuple
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Scope
 from collections import defaultdict
 import asyncio
 
 from app.core.config import settings
+from app.middleware.pipeline import PipelineStage
 from app.utils.structured_logger import logger
 from app.utils.metrics import metrics_collector
 
@@ -171,12 +172,12 @@ ip_rate_limiter = IPRateLimiter(
 )
 
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
+class RateLimitMiddleware(PipelineStage):
     """Middleware для rate limiting по IP."""
 
     def __init__(
         self,
-        app: ASGIApp,
+        app: Optional[ASGIApp] = None,
         limiter: IPRateLimiter = ip_rate_limiter,
         exclude_paths: List[str] = None,
     ):
@@ -192,34 +193,36 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         self.limiter = limiter
         self.exclude_paths = exclude_paths or ["/api/health", "/docs", "/openapi.json", "/metrics"]
 
-    def _get_client_ip(self, request: Request) -> str:
+    def _get_client_ip(self, scope: Scope) -> str:
         """Извлечение IP адреса клиента."""
+        headers = Headers(scope=scope)
         # Проверяем заголовки для forwarded IP (если за прокси)
-        forwarded = request.headers.get("X-Forwarded-For")
+        forwarded = headers.get("X-Forwarded-For")
         if forwarded:
             # Берем первый IP из списка
             return forwarded.split(",")[0].strip()
 
-        real_ip = request.headers.get("X-Real-IP")
+        real_ip = headers.get("X-Real-IP")
         if real_ip:
             return real_ip
 
         # Fallback на client host
-        if request.client:
-            return request.client.host
+        client = scope.get("client")
+        if client:
+            return client[0]
 
         return "unknown"
 
-    async def dispatch(self, request: Request, call_next) -> Response:
-        """Обработка запроса с rate limiting."""
-        path = request.url.path
+    async def on_request(self, scope: Scope, state: Dict[str, Any]) -> Optional[Response]:
+        """Проверка rate limit до обработки запроса."""
+        path = scope["path"]
 
         # Пропускаем исключенные пути
         if any(path.startswith(excluded) for excluded in self.exclude_paths):
-            return await call_next(request)
+            return None
 
         # Получаем IP клиента
-        client_ip = self._get_client_ip(request)
+        client_ip = self._get_client_ip(scope)
 
         # Проверяем rate limit
         is_allowed, rate_info = await self.limiter.check_rate_limit(client_ip, path)
@@ -236,13 +239,15 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
                 },
             )
 
-            # Возвращаем 429 Too Many Requests
-            raise HTTPException(
+            # Возвращаем 429 Too Many Requests (в формате HTTPException)
+            return JSONResponse(
                 status_code=429,
-                detail={
-                    "error": rate_info.get("error", "Rate limit exceeded"),
-                    "retry_after": rate_info.get("retry_after"),
-                    "limit": rate_info.get("limit"),
+                content={
+                    "detail": {
+                        "error": rate_info.get("error", "Rate limit exceeded"),
+                        "retry_after": rate_info.get("retry_after"),
+                        "limit": rate_info.get("limit"),
+                    }
                 },
                 headers={
                     "Retry-After": str(rate_info.get("retry_after", 60)),
@@ -250,13 +255,13 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
                 },
             )
 
-        # Обрабатываем запрос
-        response = await call_next(request)
+        state["rate_limit_info"] = rate_info
+        return None
 
+    def on_response_start(self, scope: Scope, state: Dict[str, Any], status: int, headers: MutableHeaders) -> None:
         # Добавляем заголовки rate limit в ответ
-        if not rate_info.get("whitelisted"):
-            response.headers["X-RateLimit-Limit"] = str(rate_info.get("limit", self.limiter.max_requests))
-            response.headers["X-RateLimit-Remaining"] = str(rate_info.get("remaining", 0))
-            response.headers["X-RateLimit-Reset"] = str(rate_info.get("reset", 0))
-
-        return response
+        rate_info = state.get("rate_limit_info")
+        if rate_info is not None and not rate_info.get("whitelisted"):
+            headers["X-RateLimit-Limit"] = str(rate_info.get("limit", self.limiter.max_requests))
+            headers["X-RateLimit-Remaining"] = str(rate_info.get("remaining", 0))
+            headers["X-RateLimit-Reset"] = str(rate_info.get("reset", 0))
@@ -33,6 +33,19 @@ PARSER_DURATION = Histogram('parser_duration_seconds', 'Parser execution duratio
 
 PARSER_ERRORS = Counter('parser_errors_total', 'Total parser errors', ['parser_name', 'error_type'])
 
+SEARCH_TIME_TO_FIRST_RESULT = Histogram(
+    'search_time_to_first_result_seconds',
+    'Time from search start to the first non-empty source batch',
+    ['parser_name'],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10, 15, 30, 45)
+)
+
+SEARCH_SOURCES_PENDING = Counter(
+    'search_sources_pending_total',
+    'Sources that had not finished by the search deadline',
+    ['parser_name']
+)
+
 # Database metrics
 DB_QUERIES = Counter('db_queries_total', 'Total database queries', ['query_type', 'table'])
 
@@ -89,6 +102,49 @@ PAGINATION_REQUESTS = Counter('pagination_requests_total', 'Total pagination req
 
 PAGINATION_PAGES_ACCESSED = Histogram('pagination_pages_accessed', 'Pages accessed via pagination')
 
+SINGLE_FLIGHT_CALLS = Counter(
+    'single_flight_calls_total',
+    'Cache-miss computations by role (leader runs it, coalesced awaits the leader)',
+    ['group', 'role']
+)
+
+CACHE_SWR_EVENTS = Counter(
+    'cache_swr_events_total',
+    'Stale-while-revalidate reads (hit, stale, miss) and background refreshes',
+    ['cache', 'event']
+)
+
+PRICE_CHANGES = Counter(
+    'property_price_changes_total',
+    'Price changes captured during bulk upserts',
+    ['direction']
+)
+
+PRICE_DROP_EVENTS = Counter(
+    'price_drop_events_total',
+    'Price-drop batches delivered to subscribers',
+    ['subscriber', 'status']
+)
+
+DUPLICATE_FILTER_KEYS = Counter(
+    'duplicate_filter_keys_total',
+    'Keys checked by the windowed duplicate filter',
+    ['backend', 'result']
+)
+
+PARSER_PAGES = Counter(
+    'parser_pages_total',
+    'Search result pages requested by the paginator',
+    ['parser_name', 'outcome']
+)
+
+HTML_PARSE_DURATION = Histogram(
+    'parser_html_parse_seconds',
+    'Time to extract listings from one page (process/thread: including the pool round-trip)',
+    ['parser_name', 'mode'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+
 
 class MetricsCollector:
     """Коллектор метрик для мониторинга производительности."""
@@ -188,6 +244,49 @@ class MetricsCollector:
         PARSER_DURATION.labels(parser_name="search_service").observe(duration)
         logger.info(f"Search operation for {city}: {result_count} results in {duration:.4f}s")
 
+    def record_time_to_first_result(self, parser_name: str, duration: float):
+        """Запись времени до первого непустого результата поиска."""
+        SEARCH_TIME_TO_FIRST_RESULT.labels(parser_name=parser_name).observe(duration)
+        logger.debug(f"First search results from {parser_name} after {duration:.4f}s")
+
+    def record_search_source_pending(self, parser_name: str):
+        """Запись источника, не успевшего ответить к дедлайну поиска."""
+        SEARCH_SOURCES_PENDING.labels(parser_name=parser_name).inc()
+
+    def record_single_flight(self, group: str, role: str):
+        """Запись вызова single-flight (role: leader, coalesced, remote)."""
+        SINGLE_FLIGHT_CALLS.labels(group=group, role=role).inc()
+
+    def record_cache_swr(self, cache: str, event: str):
+        """Запись события stale-while-revalidate (hit, stale, miss, refresh, refresh_skipped, refresh_error)."""
+        CACHE_SWR_EVENTS.labels(cache=cache, event=event).inc()
+
+    def record_price_changes(self, drops: int, rises: int):
+        """Запись изменений цен, найденных при массовом upsert."""
+        if drops:
+            PRICE_CHANGES.labels(direction="drop").inc(drops)
+        if rises:
+            PRICE_CHANGES.labels(direction="rise").inc(rises)
+
+    def record_price_drop_event(self, subscriber: str, status: str):
+        """Запись доставки батча снижений цен подписчику (success/error)."""
+        PRICE_DROP_EVENTS.labels(subscriber=subscriber, status=status).inc()
+
+    def record_duplicate_filter(self, backend: str, new: int, duplicates: int):
+        """Запись проверки ключей фильтром дубликатов (backend: redis/local)."""
+        if new:
+            DUPLICATE_FILTER_KEYS.labels(backend=backend, result="new").inc(new)
+        if duplicates:
+            DUPLICATE_FILTER_KEYS.labels(backend=backend, result="duplicate").inc(duplicates)
+
+    def record_parser_page(self, parser_name: str, outcome: str):
+        """Запись страницы выдачи (outcome: new/exhausted/error/cancelled)."""
+        PARSER_PAGES.labels(parser_name=parser_name, outcome=outcome).inc()
+
+    def record_html_parse(self, parser_name: str, mode: str, duration: float):
+        """Запись времени разбора страницы (mode: process/thread/inline)."""
+        HTML_PARSE_DURATION.labels(parser_name=parser_name, mode=mode).observe(duration)
+
     def record_parser_success(self, parser_name: str, property_count: int):
         """Запись метрики успешного парсинга."""
         PARSER_CALLS.labels(parser_name=parser_name, status="success").inc()
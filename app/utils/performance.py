@@ -35,7 +35,7 @@ SLOW_QUERIES = Counter(
 )
 
 MEMORY_USAGE = Gauge(
-    'memory_usage_bytes',
+    'performance_memory_usage_bytes',
     'Current memory usage in bytes'
 )
 
@@ -101,6 +101,9 @@ class ProxyManager:
                                     username=username,
                                     password=password
                                 ))
+                            except ValueError:
+                                logger.warning(f"Skipping malformed proxy entry: {entry}")
+                                continue
                     logger.info(f"Loaded {len(self.proxies)} proxies from {path}")
                 else:
                     logger.warning(f"Proxy file not found: {path}")
@@ -134,7 +137,7 @@ class ProxyManager:
             True если прокси работает
         """
         try:
-            async with httpx.AsyncClient(proxies=proxy.to_httpx_proxy(), timeout=10.0) as client:
+            async with httpx.AsyncClient(proxy=proxy.to_url(), timeout=10.0) as client:
                 response = await client.get(test_url)
                 if response.status_code == 200:
                     logger.info(f"Proxy {proxy.host}:{proxy.port} is working")
@@ -1,54 +1,239 @@
+"""
+Rate limiter запросов парсеров к площадкам (вежливость к источнику).
+
+На каждый ключ (источник) — token bucket: ``max_requests`` токенов ёмкости,
+пополнение ``max_requests / time_window`` токенов в секунду. Состояние ведра —
+два числа (токены и время пополнения), без списка меток времени.
+
+Ожидающие корутины ключа стоят в FIFO-очереди: токен берёт только голова
+очереди, остальные ждут, пока она их разбудит, поэтому одновременные
+``acquire`` не проходят проверку разом и освобождаются в порядке прихода.
+
+С ``redis_getter`` ведро хранится в Redis и списывается Lua-скриптом, так
+что все API- и Celery-воркеры делят один бюджет на источник. Если Redis
+недоступен, используется локальное ведро процесса.
+
+``record_response`` передаёт статус ответа в ``AdaptiveRateLimiter``: после
+429/403/503 скорость пополнения уменьшается пропорционально его задержке
+(в Redis — для всех воркеров на ``cooldown_window`` секунд).
+"""
+
 import asyncio
 import time
-from collections import defaultdict
-from typing import Dict
+from collections import defaultdict, deque
+from typing import Any, Callable, Deque, Dict, Optional
 
 from app.core.config import settings
+from app.utils.adaptive_ratelimit import AdaptiveRateLimiter
+from app.utils.logger import logger
+
+# KEYS[1] — ведро (hash tokens/ts), KEYS[2] — множитель скорости от AdaptiveRateLimiter
+# ARGV: ёмкость, скорость (токенов/сек), сколько токенов списать
+# Возвращает секунды до появления токенов ("0" — токены списаны)
+_TAKE_SCRIPT = """
+redis.replicate_commands()
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2]) * tonumber(redis.call("get", KEYS[2]) or "1")
+local requested = tonumber(ARGV[3])
+local clock = redis.call("time")
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call("hmget", KEYS[1], "tokens", "ts")
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= requested then
+    tokens = tokens - requested
+else
+    wait = (requested - tokens) / rate
+end
+redis.call("hset", KEYS[1], "tokens", tostring(tokens), "ts", tostring(now))
+redis.call("pexpire", KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+
+class TokenBucket:
+    """Локальное ведро токенов с O(1) состоянием."""
+
+    def __init__(self, capacity: float, rate: float):
+        """
+        Args:
+            capacity: Ёмкость ведра (допустимый всплеск запросов)
+            rate: Пополнение, токенов в секунду
+        """
+        self.capacity = capacity
+        self.rate = rate
+        self.scale = 1.0
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate * self.scale)
+        self.updated = now
+
+    def take(self, tokens: float = 1.0) -> float:
+        """
+        Списать токены, если они есть.
+
+        Returns:
+            0 — токены списаны, иначе секунды до их появления
+        """
+        self._refill(time.monotonic())
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return 0.0
+        return (tokens - self.tokens) / (self.rate * self.scale)
+
+    def set_scale(self, scale: float) -> None:
+        """Изменить множитель скорости (уже накопленные токены сохраняются)."""
+        self._refill(time.monotonic())
+        self.scale = scale
 
 
 class RateLimiter:
-    def __init__(self, max_requests: int = settings.AVITO_RATE_LIMIT, time_window: int = settings.RATE_LIMIT_WINDOW):
+    def __init__(
+        self,
+        max_requests: int = settings.AVITO_RATE_LIMIT,
+        time_window: int = settings.RATE_LIMIT_WINDOW,
+        redis_getter: Optional[Callable[[], Any]] = None,
+        key_prefix: str = "ratelimit:parser",
+    ):
         """
         Initialize rate limiter.
 
         Args:
-            max_requests: Maximum number of requests allowed in the time window
-            time_window: Time window in seconds
+            max_requests: Maximum number of requests allowed in the time window (bucket capacity)
+            time_window: Time window in seconds to refill the whole bucket
+            redis_getter: Функция, возвращающая текущий клиент Redis (None — только локально)
+            key_prefix: Префикс ключей Redis
         """
         self.max_requests = max_requests
         self.time_window = time_window
-        self.requests: Dict[str, list] = defaultdict(list)
+        self.rate = max_requests / time_window
+        self.buckets: Dict[str, TokenBucket] = {}
+        self._waiters: Dict[str, Deque["asyncio.Future[None]"]] = defaultdict(deque)
+        self._scales: Dict[str, float] = {}
+        self._redis_getter = redis_getter
+        self.key_prefix = key_prefix
 
-    async def acquire(self, key: str = "default"):
+    def redis_client(self) -> Optional[Any]:
+        """Клиент Redis или ``None``, если ведро хранится только в процессе."""
+        client = self._redis_getter() if self._redis_getter is not None else None
+        return client if client is not None and hasattr(client, "eval") else None
+
+    async def acquire(self, key: str = "default") -> float:
         """
         Acquire permission to make a request.
 
         Args:
             key: Identifier for the rate limit bucket (e.g., IP address, parser name)
+
+        Returns:
+            Seconds spent waiting for a token
         """
-        now = time.time()
+        started = time.monotonic()
+        waiters = self._waiters[key]
+        waiter = asyncio.get_running_loop().create_future()
+        waiters.append(waiter)
+        try:
+            if waiters[0] is not waiter:
+                # Токен берёт только голова очереди; она разбудит следующего
+                await waiter
+            while True:
+                wait = await self._take(key)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+        finally:
+            if waiters and waiters[0] is waiter:
+                waiters.popleft()
+            else:
+                waiters.remove(waiter)
+            if waiters and not waiters[0].done():
+                waiters[0].set_result(None)
+        return time.monotonic() - started
+
+    async def _take(self, key: str) -> float:
+        client = self.redis_client()
+        if client is not None:
+            try:
+                wait = await client.eval(
+                    _TAKE_SCRIPT, 2, self._redis_key(key), self._redis_key(key, "scale"),
+                    self.max_requests, self.rate, 1,
+                )
+                return float(wait)
+            except Exception as e:
+                logger.warning(f"Rate limiter Redis unavailable, using local bucket: {e}")
+        return self._bucket(key).take()
 
-        # Clean up old requests outside the time window
-        self.requests[key] = [req_time for req_time in self.requests[key] if now - req_time < self.time_window]
+    def _bucket(self, key: str) -> TokenBucket:
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = TokenBucket(self.max_requests, self.rate)
+            bucket.set_scale(self._scales.get(key, 1.0))
+        return bucket
 
-        # Check if we're within the rate limit
-        if len(self.requests[key]) >= self.max_requests:
-            # Calculate sleep time until the oldest request expires
-            oldest_request = min(self.requests[key])
-            sleep_time = self.time_window - (now - oldest_request)
-            if sleep_time > 0:
-                await asyncio.sleep(sleep_time)
-                # Clean up again after sleeping
-                self.requests[key] = [req_time for req_time in self.requests[key] if now - req_time < self.time_window]
+    def _redis_key(self, key: str, suffix: str = "bucket") -> str:
+        return f"{self.key_prefix}:{key}:{suffix}"
+
+    async def record_response(self, key: str, status_code: int) -> float:
+        """
+        Передать статус ответа источника в ``AdaptiveRateLimiter``.
 
-        # Record this request
-        self.requests[key].append(now)
+        Множитель скорости ведра — ``base_delay / current_delay`` adaptive
+        limiter'а: 429 уменьшают скорость, серия успехов возвращает её.
+
+        Args:
+            key: Ключ ведра (источник)
+            status_code: HTTP статус-код ответа
+
+        Returns:
+            Текущий множитель скорости (1.0 — без ограничения)
+        """
+        adaptive = await AdaptiveRateLimiter.get_limiter(key)
+        await adaptive.record_response(status_code)
+        scale = min(1.0, adaptive.config.base_delay / adaptive.stats.current_delay)
+        if scale != self._scales.get(key, 1.0):
+            await self.set_rate_scale(key, scale, ttl=adaptive.config.cooldown_window)
+        return scale
+
+    async def set_rate_scale(self, key: str, scale: float, ttl: float = 60.0) -> None:
+        """
+        Изменить скорость пополнения ведра.
+
+        Args:
+            key: Ключ ведра
+            scale: Множитель скорости (0, 1]
+            ttl: Сколько секунд множитель действует в Redis
+        """
+        self._scales[key] = scale
+        if key in self.buckets:
+            self.buckets[key].set_scale(scale)
+        client = self.redis_client()
+        if client is None:
+            return
+        try:
+            if scale >= 1.0:
+                await client.delete(self._redis_key(key, "scale"))
+            else:
+                await client.set(self._redis_key(key, "scale"), repr(scale), px=int(ttl * 1000))
+        except Exception as e:
+            logger.warning(f"Rate limiter Redis unavailable, rate scale kept local: {e}")
 
     def reset(self, key: str = "default"):
-        """Reset the rate limit for a specific key."""
-        if key in self.requests:
-            del self.requests[key]
+        """Reset the rate limit for a specific key (local bucket only)."""
+        self.buckets.pop(key, None)
+        self._scales.pop(key, None)
+
+
+def _shared_redis() -> Optional[Any]:
+    from app.services.advanced_cache import advanced_cache_manager
+
+    return advanced_cache_manager.redis_client
 
 
 # Global rate limiter instance
-rate_limiter = RateLimiter()
+rate_limiter = RateLimiter(
+    redis_getter=_shared_redis if settings.PARSER_RATE_LIMIT_REDIS_SHARED else None,
+)
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Benchmark for Redis cache value codecs: legacy pickle+zlib vs registered serializers/compressors.
+
+Encodes and decodes a realistic search result (1k PropertyCreate listings with
+descriptions and photos) with every available codec and reports time and size.
+
+Usage:
+    python scripts/benchmark_cache_codec.py [--listings 1000] [--iterations 20]
+"""
+
+import argparse
+import os
+import pickle
+import random
+import statistics
+import sys
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Tuple
+
+# Add the app directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.models.schemas import PropertyCreate
+from app.services.cache_codec import CacheCodec, available_compressors, available_serializers
+
+SOURCES = ["avito", "cian", "domclick", "domofond", "yandex_realty", "etagi"]
+DISTRICTS = ["Центральный", "ЮЗАО", "Хамовники", "Арбат", "Пресненский", "Таганский"]
+PHRASES = [
+    "Светлая квартира с ремонтом.",
+    "Рядом метро, парк и школа.",
+    "Вся техника и мебель остаются.",
+    "Без комиссии, собственник.",
+    "Тихий двор, закрытая территория.",
+    "Панорамные окна, вид на реку.",
+]
+
+
+def make_listings(count: int, seed: int = 42) -> List[PropertyCreate]:
+    rng = random.Random(seed)
+    listings = []
+    for i in range(count):
+        rooms = rng.randint(0, 4)
+        area = round(rng.uniform(18, 140), 1)
+        price = float(rng.randrange(25000, 250000, 500))
+        listings.append(
+            PropertyCreate(
+                source=rng.choice(SOURCES),
+                external_id=str(10_000_000 + i),
+                title=f"{rooms}-к. квартира, {area} м², {rng.randint(1, 25)}/25 эт.",
+                description=" ".join(rng.choice(PHRASES) for _ in range(rng.randint(5, 25))),
+                link=f"https://www.avito.ru/moskva/kvartiry/{10_000_000 + i}",
+                price=price,
+                price_per_sqm=round(price / area, 2),
+                rooms=rooms,
+                area=area,
+                floor=rng.randint(1, 25),
+                total_floors=25,
+                city="Москва",
+                district=rng.choice(DISTRICTS),
+                address=f"ул. Тверская, д. {rng.randint(1, 200)}",
+                latitude=55.75 + rng.uniform(-0.2, 0.2),
+                longitude=37.61 + rng.uniform(-0.3, 0.3),
+                photos=[f"https://img.avito.st/image/1/{rng.getrandbits(64):x}.jpg" for _ in range(rng.randint(3, 15))],
+                features={"balcony": rng.random() < 0.5, "furniture": rng.random() < 0.7, "pets": rng.random() < 0.3},
+                contact_name="Собственник",
+                contact_phone=f"+7 9{rng.randint(10, 99)} {rng.randint(100, 999)}-{rng.randint(10, 99)}-{rng.randint(10, 99)}",
+            )
+        )
+    return listings
+
+
+def _legacy_encode(value: Any) -> bytes:
+    serialized = pickle.dumps(value)
+    if len(serialized) > 1024:
+        return b"COMPRESSED:" + zlib.compress(serialized)
+    return serialized
+
+
+def _legacy_decode(data: bytes) -> Any:
+    if data.startswith(b"COMPRESSED:"):
+        return pickle.loads(zlib.decompress(data[11:]))
+    return pickle.loads(data)
+
+
+def _time(func: Callable[[], Any], iterations: int) -> float:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def benchmark(count: int, iterations: int) -> Dict[str, Dict[str, float]]:
+    listings = make_listings(count)
+    codecs: List[Tuple[str, Callable[[Any], bytes], Callable[[bytes], Any]]] = [
+        ("legacy pickle+zlib", _legacy_encode, _legacy_decode),
+    ]
+    for serializer in available_serializers():
+        for compressor in available_compressors():
+            codec = CacheCodec(serializer, compressor)
+            codecs.append((codec.name, codec.encode, codec.decode))
+
+    results: Dict[str, Dict[str, float]] = {}
+    for name, encode, decode in codecs:
+        data = encode(listings)
+        assert decode(data) == listings, name
+        results[name] = {
+            "encode_ms": _time(lambda: encode(listings), iterations),
+            "decode_ms": _time(lambda: decode(data), iterations),
+            "bytes": len(data),
+        }
+    return results
+
+
+def print_results(results: Dict[str, Dict[str, float]], count: int) -> None:
+    print("\n" + "=" * 80)
+    print(f"CACHE CODEC BENCHMARK ({count} listings)")
+    print("=" * 80)
+    print(f"{'Codec':<22}{'Encode (ms)':>13}{'Decode (ms)':>13}{'Total (ms)':>12}{'Size (KB)':>12}")
+    print("-" * 80)
+    for name, result in results.items():
+        total = result["encode_ms"] + result["decode_ms"]
+        print(
+            f"{name:<22}{result['encode_ms']:>13.2f}{result['decode_ms']:>13.2f}"
+            f"{total:>12.2f}{result['bytes'] / 1024:>12.1f}"
+        )
+    installed = set(available_serializers()) | set(available_compressors())
+    missing = [name for name in ("msgpack", "orjson", "lz4", "zstd") if name not in installed]
+    print(f"\nNot installed (skipped): {', '.join(missing) or '-'}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--listings", type=int, default=1000)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    results = benchmark(args.listings, args.iterations)
+    print_results(results, args.listings)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Benchmark for response compression: legacy BaseHTTPMiddleware GZip vs pure ASGI CompressionMiddleware.
+
+Serves a ~1 MB search-like JSON response (and a streamed CSV export) from an
+in-process Starlette app through httpx.ASGITransport, so no server is needed.
+Reports throughput, p50/p99 latency and compressed size per encoding.
+
+Usage:
+    python scripts/benchmark_compression.py [--requests 200] [--concurrency 8] [--size-mb 1]
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+import httpx
+from starlette.applications import Starlette
+from starlette.datastructures import MutableHeaders
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+
+# Add the app directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.middleware.compression import CompressionMiddleware, available_encodings
+
+
+class LegacyGZipMiddleware(BaseHTTPMiddleware):
+    """The previous GZipMiddleware: body += chunk, one blocking gzip.compress, streaming skipped."""
+
+    def __init__(self, app, minimum_size: int = 1000, compression_level: int = 6):
+        super().__init__(app)
+        self.minimum_size = minimum_size
+        self.compression_level = compression_level
+
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        if "gzip" not in request.headers.get("accept-encoding", "").lower():
+            return await call_next(request)
+        response = await call_next(request)
+        if response.headers.get("content-encoding") or isinstance(response, StreamingResponse):
+            return response
+        body = b""
+        async for chunk in response.body_iterator:
+            body += chunk
+        if len(body) < self.minimum_size:
+            return Response(content=body, status_code=response.status_code,
+                            headers=dict(response.headers), media_type=response.media_type)
+        compressed_body = gzip.compress(body, compresslevel=self.compression_level)
+        headers = MutableHeaders(response.headers)
+        headers["content-encoding"] = "gzip"
+        headers["content-length"] = str(len(compressed_body))
+        headers.append("vary", "Accept-Encoding")
+        return Response(content=compressed_body, status_code=response.status_code,
+                        headers=dict(headers), media_type=response.media_type)
+
+
+def make_payload(size_mb: float) -> bytes:
+    """Search response of roughly ``size_mb`` megabytes."""
+    item = {
+        "id": 0,
+        "source": "avito",
+        "external_id": "",
+        "title": "2-к. квартира, 54 м², 7/12 эт.",
+        "price": 45000.0,
+        "rooms": 2,
+        "area": 54.0,
+        "location": {"city": "Москва", "address": "ул. Профсоюзная, 65к1"},
+        "photos": ["https://example.com/photo/1.jpg", "https://example.com/photo/2.jpg"],
+        "description": "Светлая квартира рядом с метро, мебель и техника, долгосрочно.",
+    }
+    items = []
+    while len(items) * 420 < size_mb * 1024 * 1024:
+        entry = dict(item, id=len(items), external_id=f"ext-{len(items)}", price=30000.0 + len(items) % 5000)
+        items.append(entry)
+    return json.dumps({"items": items, "total": len(items)}, ensure_ascii=False).encode()
+
+
+def build_app(payload: bytes, middleware: str) -> Starlette:
+    async def search(request: Request) -> Response:
+        return Response(payload, media_type="application/json")
+
+    async def export(request: Request) -> Response:
+        async def rows():
+            for start in range(0, len(payload), 8192):
+                yield payload[start:start + 8192]
+        return StreamingResponse(rows(), media_type="text/csv")
+
+    app = Starlette(routes=[Route("/search", search), Route("/export", export)])
+    if middleware == "legacy":
+        app.add_middleware(LegacyGZipMiddleware, minimum_size=1000, compression_level=6)
+    elif middleware == "asgi":
+        app.add_middleware(CompressionMiddleware, minimum_size=1000, compression_level=6)
+    return app
+
+
+async def bench(app: Starlette, path: str, encoding: str, requests: int, concurrency: int) -> Dict[str, float]:
+    transport = httpx.ASGITransport(app=app)
+    latencies: List[float] = []
+    wire_bytes = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one() -> None:
+            nonlocal wire_bytes
+            async with semaphore:
+                started = time.perf_counter()
+                async with client.stream("GET", path, headers={"accept-encoding": encoding}) as response:
+                    async for chunk in response.aiter_raw():
+                        wire_bytes += len(chunk)
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "rps": requests / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        "size": wire_bytes / requests,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--size-mb", type=float, default=1.0)
+    args = parser.parse_args()
+
+    payload = make_payload(args.size_mb)
+    print(f"payload: {len(payload) / 1024 / 1024:.2f} MiB, requests: {args.requests}, "
+          f"concurrency: {args.concurrency}, encodings: {', '.join(available_encodings())}")
+    print(f"{'middleware':<12} {'path':<8} {'encoding':<8} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'bytes':>10}")
+
+    cases: List[Tuple[str, str, str]] = [("none", "/search", "identity"), ("legacy", "/search", "gzip")]
+    cases += [("asgi", "/search", encoding) for encoding in available_encodings()]
+    cases += [("legacy", "/export", "gzip")]
+    cases += [("asgi", "/export", encoding) for encoding in available_encodings()]
+
+    for middleware, path, encoding in cases:
+        app = build_app(payload, middleware)
+        result = asyncio.run(bench(app, path, encoding, args.requests, args.concurrency))
+        print(f"{middleware:<12} {path:<8} {encoding:<8} {result['rps']:>8.1f} {result['p50']:>8.1f} "
+              f"{result['p99']:>8.1f} {result['size']:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
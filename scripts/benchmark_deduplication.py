@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Benchmark for cross-source fuzzy deduplication: all-pairs SequenceMatcher vs blocking + MinHash/LSH.
+
+Generates flats listed on one to three sources each, with reformatted
+addresses, jittered prices/areas and nearby coordinates, and reports run time,
+scored pairs and pairwise precision/recall against the generated truth.
+
+Usage:
+    python scripts/benchmark_deduplication.py [--sizes 1000 10000 100000] [--legacy-max 2000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from itertools import combinations
+from typing import Dict, List, Set, Tuple
+
+# Add the app directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.models.schemas import PropertyCreate
+from app.utils.deduplication import DuplicateDetector
+
+SOURCES = ["avito", "cian", "domofond", "yandex_realty", "domclick", "etagi", "cian_commercial"]
+CITIES = {"Москва": (55.75, 37.62), "Санкт-Петербург": (59.94, 30.31), "Казань": (55.79, 49.12)}
+STREETS = [
+    "Ленина", "Мира", "Гагарина", "Советская", "Садовая", "Пушкина", "Лесная", "Школьная",
+    "Победы", "Молодёжная", "Центральная", "Набережная", "Заречная", "Полевая", "Новая",
+    "Кирова", "Чехова", "Толстого", "Горького", "Некрасова", "Лермонтова", "Маяковского",
+    "Комсомольская", "Октябрьская", "Первомайская", "Строителей", "Энтузиастов", "Рабочая",
+    "Вокзальная", "Парковая", "Луговая", "Солнечная", "Северная", "Южная", "Зелёная",
+    "Космонавтов", "Дзержинского", "Фрунзе", "Калинина", "Суворова", "Кутузова", "Жукова",
+]
+ADDRESS_FORMATS = [
+    "{city}, ул. {street}, д. {house}",
+    "г. {city}, улица {street}, дом {house}",
+    "{street} ул., {house}, {city}",
+    "{city}, {street}, {house}",
+]
+
+
+def generate_listings(size: int, seed: int = 7) -> Tuple[List[PropertyCreate], List[int]]:
+    """Listings plus the ground-truth flat id of each listing."""
+    rng = random.Random(seed)
+    listings: List[PropertyCreate] = []
+    truth: List[int] = []
+    flat = 0
+    while len(listings) < size:
+        city = rng.choice(list(CITIES))
+        lat0, lon0 = CITIES[city]
+        street = rng.choice(STREETS) + ("" if rng.random() < 0.5 else f" {rng.randint(1, 40)}-я")
+        house = rng.randint(1, 250)
+        rooms = rng.randint(1, 4)
+        area = round(rng.uniform(25, 40) + rooms * 15, 1)
+        price = rng.randint(25, 60) * 1000 + rooms * 10000
+        lat = lat0 + rng.uniform(-0.15, 0.15)
+        lon = lon0 + rng.uniform(-0.25, 0.25)
+        copies = rng.choices([1, 2, 3], weights=[0.5, 0.35, 0.15])[0]
+        for source in rng.sample(SOURCES, copies):
+            if len(listings) >= size:
+                break
+            address = rng.choice(ADDRESS_FORMATS).format(city=city, street=street, house=house)
+            listings.append(PropertyCreate(
+                source=source,
+                external_id=f"{flat}-{source}",
+                title=f"{rooms}-к. квартира, {area} м²",
+                price=round(price * rng.uniform(0.985, 1.015)),
+                rooms=rooms,
+                area=round(area + rng.uniform(-0.5, 0.5), 1),
+                city=city,
+                address=address,
+                latitude=lat + rng.uniform(-0.0002, 0.0002),
+                longitude=lon + rng.uniform(-0.0002, 0.0002),
+            ))
+            truth.append(flat)
+        flat += 1
+    return listings, truth
+
+
+class LegacyDetector(DuplicateDetector):
+    """The previous algorithm: every item against every unique item so far."""
+
+    def cluster_ids(self, items: List[PropertyCreate]) -> List[int]:
+        representatives: List[int] = []
+        cluster: List[int] = []
+        for index, item in enumerate(items):
+            for rep in representatives:
+                score, _ = self._fuzzy_match(item, items[rep])
+                if score >= self.fuzzy_threshold:
+                    cluster.append(cluster[rep])
+                    break
+            else:
+                representatives.append(index)
+                cluster.append(index)
+        return cluster
+
+
+def _pairs(labels: List) -> Set[Tuple[int, int]]:
+    groups: Dict[object, List[int]] = {}
+    for index, label in enumerate(labels):
+        groups.setdefault(label, []).append(index)
+    return {pair for members in groups.values() for pair in combinations(members, 2)}
+
+
+def _quality(predicted: List, truth: List[int]) -> Tuple[float, float]:
+    predicted_pairs, true_pairs = _pairs(predicted), _pairs(truth)
+    hits = len(predicted_pairs & true_pairs)
+    precision = hits / len(predicted_pairs) if predicted_pairs else 1.0
+    recall = hits / len(true_pairs) if true_pairs else 1.0
+    return precision, recall
+
+
+def benchmark(sizes: List[int], legacy_max: int) -> List[Dict[str, object]]:
+    rows: List[Dict[str, object]] = []
+    for size in sizes:
+        listings, truth = generate_listings(size)
+
+        detector = DuplicateDetector()
+        start = time.perf_counter()
+        result = detector.cluster(listings)
+        elapsed = time.perf_counter() - start
+        precision, recall = _quality(result.cluster_ids, truth)
+        rows.append({
+            "size": size, "engine": "lsh", "seconds": elapsed, "pairs": result.candidate_pairs,
+            "clusters": len(result.unique), "precision": precision, "recall": recall,
+        })
+
+        if size <= legacy_max:
+            legacy = LegacyDetector()
+            start = time.perf_counter()
+            labels = legacy.cluster_ids(listings)
+            elapsed = time.perf_counter() - start
+            precision, recall = _quality(labels, truth)
+            rows.append({
+                "size": size, "engine": "legacy", "seconds": elapsed, "pairs": None,
+                "clusters": len(set(labels)), "precision": precision, "recall": recall,
+            })
+    return rows
+
+
+def print_results(rows: List[Dict[str, object]]) -> None:
+    print("\n" + "=" * 84)
+    print("FUZZY DEDUPLICATION BENCHMARK")
+    print("=" * 84)
+    print(f"{'Listings':>9}  {'Engine':<8}{'seconds':>10}{'scored pairs':>14}{'clusters':>10}{'precision':>11}{'recall':>9}")
+    print("-" * 84)
+    for row in rows:
+        pairs = "all" if row["pairs"] is None else str(row["pairs"])
+        print(
+            f"{row['size']:>9}  {row['engine']:<8}{row['seconds']:>10.2f}{pairs:>14}{row['clusters']:>10}"
+            f"{row['precision']:>11.3f}{row['recall']:>9.3f}"
+        )
+    print("-" * 84)
+    print("Precision/recall are pairwise against the generated flats; both engines share the same score,")
+    print("so recall is bounded by how often reformatted addresses still pass the 0.8 address ratio.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--legacy-max", type=int, default=2000, help="Skip the O(n^2) engine above this size")
+    args = parser.parse_args()
+
+    print_results(benchmark(args.sizes, args.legacy_max))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the search duplicate filter: md5+sha256 Bloom hashing vs one 128-bit hash, plus memory.
+
+Measures keys/second for Bloom add+contains with the previous hashing and the
+new one, keys/second of ``WindowedDuplicateFilter.check_and_add`` in batches
+(local, and Redis when ``--redis-url`` is given), and the memory of one
+generation compared with the exact ``set`` it replaces.
+
+Usage:
+    python scripts/benchmark_duplicate_filter.py [--sizes 100000 1000000] [--batch 500] \\
+        [--redis-url redis://localhost:6379/15]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# Add the app directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.utils.bloom_filter import XXHASH_AVAILABLE, BloomFilter, WindowedDuplicateFilter
+
+FALSE_POSITIVE_RATE = 0.001
+
+
+class LegacyBloomFilter(BloomFilter):
+    """The previous hashing: md5 and sha256 hex digests parsed as ints."""
+
+    def _hashes(self, item: Any) -> List[int]:
+        item_bytes = item if isinstance(item, bytes) else str(item).encode('utf-8')
+        h1 = int(hashlib.md5(item_bytes).hexdigest(), 16)
+        h2 = int(hashlib.sha256(item_bytes).hexdigest(), 16)
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+
+def _keys(size: int, offset: int = 0) -> List[str]:
+    return [f"avito:{offset + i}" for i in range(size)]
+
+
+def _bloom_rate(cls, keys: List[str]) -> Tuple[float, BloomFilter]:
+    bloom = cls(expected_items=len(keys), false_positive_rate=FALSE_POSITIVE_RATE)
+    start = time.perf_counter()
+    for key in keys:
+        if key not in bloom:
+            bloom.add(key)
+    return len(keys) / (time.perf_counter() - start), bloom
+
+
+async def _filter_rate(dedup: WindowedDuplicateFilter, keys: List[str], batch: int) -> float:
+    start = time.perf_counter()
+    for i in range(0, len(keys), batch):
+        await dedup.check_and_add(keys[i:i + batch], scope="benchmark")
+    return len(keys) / (time.perf_counter() - start)
+
+
+def _set_bytes(keys: List[str]) -> int:
+    exact = set(keys)
+    return sys.getsizeof(exact) + sum(sys.getsizeof(key) for key in exact)
+
+
+async def benchmark(sizes: List[int], batch: int, redis_url: Optional[str]) -> List[Dict[str, Any]]:
+    client = None
+    if redis_url:
+        import redis.asyncio as redis
+        client = redis.from_url(redis_url)
+    rows = []
+    try:
+        for size in sizes:
+            keys = _keys(size)
+            local = WindowedDuplicateFilter(expected_items=size, false_positive_rate=FALSE_POSITIVE_RATE)
+            legacy_rate, _ = _bloom_rate(LegacyBloomFilter, keys)
+            bloom_rate, bloom = _bloom_rate(BloomFilter, keys)
+            row = {
+                "size": size,
+                "legacy": legacy_rate,
+                "bloom": bloom_rate,
+                "windowed": await _filter_rate(local, keys, batch),
+                "redis": None,
+                "generation_bytes": local.get_stats()["generation_bytes"],
+                "set_bytes": _set_bytes(keys),
+            }
+            row["fp_rate"] = sum(key in bloom for key in _keys(size, offset=size)) / size
+            if client is not None:
+                shared = WindowedDuplicateFilter(
+                    expected_items=size, false_positive_rate=FALSE_POSITIVE_RATE,
+                    redis_getter=lambda: client, key_prefix="dedup-benchmark",
+                )
+                row["redis"] = await _filter_rate(shared, keys, batch)
+                await client.delete(*[key async for key in client.scan_iter("dedup-benchmark:*")])
+            rows.append(row)
+    finally:
+        if client is not None:
+            await client.close()
+    return rows
+
+
+def print_results(rows: List[Dict[str, Any]], batch: int) -> None:
+    print("\n" + "=" * 96)
+    print(f"DUPLICATE FILTER BENCHMARK (keys/s, fp target {FALSE_POSITIVE_RATE:.1%}, batch {batch}, "
+          f"hash {'xxh3-128' if XXHASH_AVAILABLE else 'blake2b-128'})")
+    print("=" * 96)
+    print(f"{'Keys':>9}{'md5+sha256':>12}{'128-bit':>10}{'speedup':>9}{'windowed':>10}{'redis':>9}"
+          f"{'gen MiB':>9}{'set MiB':>9}{'fp rate':>10}")
+    print("-" * 96)
+    for row in rows:
+        redis_rate = "n/a" if row["redis"] is None else f"{row['redis']:.0f}"
+        print(
+            f"{row['size']:>9}{row['legacy']:>12.0f}{row['bloom']:>10.0f}{row['bloom'] / row['legacy']:>8.1f}x"
+            f"{row['windowed']:>10.0f}{redis_rate:>9}"
+            f"{row['generation_bytes'] / 2**20:>9.2f}{row['set_bytes'] / 2**20:>9.2f}{row['fp_rate']:>10.4%}"
+        )
+    print("-" * 96)
+    print("gen MiB is one generation of one city (local bitarray or Redis string); set MiB is an exact set of the keys.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--batch", type=int, default=500, help="Keys per check_and_add call (one parser page)")
+    parser.add_argument("--redis-url", default=None, help="Also measure the Redis BITFIELD backend")
+    args = parser.parse_args()
+
+    print_results(asyncio.run(benchmark(args.sizes, args.batch, args.redis_url)), args.batch)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Benchmark for listing extraction: per-parser BeautifulSoup code vs compiled ListingSpec.
+
+For every source the previous extraction code (BeautifulSoup ``select_one``
+per field, title regexes recompiled per call) is reproduced below and run
+against the same pages as the parser's declarative ``listing_spec``. Pages
+are synthetic search results per source, or saved pages from ``--html-dir``
+(``<source>.html``, e.g. ``cian.html``). Reports ms per page, listings per
+second and whether both produce the same (external_id, price, rooms, area).
+
+Usage:
+    python scripts/benchmark_extraction.py [--cards 50 400] [--repeat 5] [--html-dir saved_pages/]
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+# Add the app directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from bs4 import BeautifulSoup
+
+from app.parsers.cian.parser import CianParser
+from app.parsers.domclick.parser import DomclickParser
+from app.parsers.domofond.parser import DomofondParser
+from app.parsers.etagi.parser import EtagiParser
+from app.parsers.yandex_realty.parser import YandexRealtyParser
+
+FILLER = "Светлая квартира рядом с метро, после ремонта, мебель и техника. " * 4
+
+CARDS = {
+    "cian": """
+<article data-name="CardComponent"><div class="wrap"><div class="media">
+  <img src="https://images.cdn-cian.ru/{id}-1.jpg"/><img src="https://images.cdn-cian.ru/{id}-2.jpg"/></div>
+  <div class="info"><a href="/rent/flat/{id}/"><span data-name="Title">{rooms}-комн. квартира, {area} м², ЦАО</span></a>
+  <span data-mark="MainPrice"><span>{price_text} ₽/мес.</span></span>
+  <div data-name="AddressLine">Москва, ул. Тверская, {house}</div>
+  <div data-name="Description"><p>{filler}</p></div></div></div>
+</article>""",
+    "domclick": """
+<div data-testid="search-results-item"><div class="gallery"><img src="/img/{id}.jpg"/></div>
+  <a href="/card/rent__flat__{id}/listing/{id}/"><span data-testid="item-title">{rooms}-к квартира, {area} м²</span></a>
+  <div data-testid="item-price">{price_text} ₽</div>
+  <div data-testid="item-address">Казань, ул. Баумана, {house}</div>
+  <div data-testid="item-description">{filler}</div>
+</div>""",
+    "domofond": """
+<div class="listing-item card"><a href="/arenda-kvartiry-{id}/{id}"><img src="/p/{id}.jpg"/></a>
+  <h2 class="listing-title">{rooms}-комн. квартира {area} кв. м</h2>
+  <div class="listing-price">{price_text} руб.</div>
+  <div class="listing-address">Москва, Люблино, д. {house}</div>
+  <div class="listing-description">{filler}</div>
+</div>""",
+    "yandex_realty": """
+<li data-name="OfferCard"><div class="OfferCard__media"><img src="//avatars.mds.yandex.net/{id}.jpg"/></div>
+  <a href="/offer/{id}/"><span data-mark="OfferTitle">{rooms}-комнатная, {area} м²</span></a>
+  <div data-mark="MainPrice">{price_text} ₽ в месяц</div>
+  <div data-mark="Address">Санкт-Петербург, Невский пр., {house}</div>
+  <p data-mark="Description">{filler}</p>
+</li>""",
+    "etagi": """
+<div class="listing-item"><a class="listing-title" href="/arenda/kvartiry/{id}/">{rooms}-комн. квартира</a>
+  <div class="listing-price">{price_text} ₽</div>
+  <div class="listing-params"><div class="param-item" data-param="rooms">{rooms}</div>
+    <div class="param-item" data-param="area">{area}</div>
+    <div class="param-item" data-param="floor">{floor} / 9</div></div>
+  <img class="listing-image" src="/photos/{id}.jpg"/>
+  <div class="listing-address">Тюмень, ул. Республики, {house}</div>
+  <div class="listing-description">{filler}</div>
+</div>""",
+}
+
+PARSERS: Dict[str, Callable[[], Any]] = {
+    "cian": CianParser,
+    "domclick": DomclickParser,
+    "domofond": DomofondParser,
+    "yandex_realty": YandexRealtyParser,
+    "etagi": EtagiParser,
+}
+
+# --- The previous per-parser extraction ------------------------------------
+
+LEGACY_SELECTORS = {
+    "cian": {
+        "card": "[data-name='CardComponent']", "title": ["[data-name='Title']"],
+        "price": ["[data-name='Price']", "[data-mark='MainPrice']"], "link": "a",
+        "address": ["[data-name='AddressLine']", "[data-mark='Address']"],
+        "description": ["[data-name='Description']", "[data-mark='Description']"], "id": r'/(\d+)/?$',
+    },
+    "domclick": {
+        "card": "[data-testid='search-results-item']", "title": ["[data-testid='item-title']"],
+        "price": ["[data-testid='item-price']"], "link": "a[href]", "address": ["[data-testid='item-address']"],
+        "description": ["[data-testid='item-description']"], "id": r'/listing/(\d+)/?$',
+    },
+    "domofond": {
+        "card": ".listing-item", "title": [".listing-title"], "price": [".listing-price"], "link": "a",
+        "address": [".listing-address"], "description": [".listing-description"], "id": r'/(\d+)/?$',
+    },
+    "yandex_realty": {
+        "card": "[data-name='OfferCard']", "title": ["[data-mark='OfferTitle']"], "price": ["[data-mark='MainPrice']"],
+        "link": "a", "address": ["[data-mark='Address']"], "description": ["[data-mark='Description']"],
+        "id": r'/offer/(\d+)/?$',
+    },
+}
+
+MOSCOW_DISTRICTS = [
+    "центр", "цао", "север", "сао", "северо-восток", "свао", "восток", "вао",
+    "юго-восток", "ювао", "юг", "юао", "юго-запад", "юзао", "запад", "зао",
+    "северо-запад", "сзао", "зеленоград", "таганский", "басманный", "арбат",
+    "якиманка", "хамовники", "кунцево", "перово", "люблино",
+]
+
+
+def _select_first(item, selectors: List[str]):
+    for selector in selectors:
+        found = item.select_one(selector)
+        if found:
+            return found
+    return None
+
+
+def _legacy_rooms(title: str) -> Optional[int]:
+    for pattern in [r'(\d+)[\-\s]*к', r'(\d+)\s*комнат', r'(\d+)\s*комн']:
+        match = re.search(pattern, title, re.IGNORECASE)
+        if match:
+            return int(match.group(1))
+    return None
+
+
+def _legacy_area(title: str) -> Optional[float]:
+    for pattern in [r'(\d+(?:[\.,]\d+)?)\s*м\s*[²2]', r'(\d+(?:[\.,]\d+)?)\s*кв\.?\s*м']:
+        match = re.search(pattern, title, re.IGNORECASE)
+        if match:
+            return float(match.group(1).replace(',', '.'))
+    return None
+
+
+def legacy_extract(source: str, base_url: str, html: str) -> List[Dict[str, Any]]:
+    """cian/domclick/domofond/yandex_realty ``_extract_listings`` before the extraction engine."""
+    sel = LEGACY_SELECTORS[source]
+    soup = BeautifulSoup(html, "lxml")
+    properties = []
+    for item in soup.select(sel["card"]):
+        title_elem = _select_first(item, sel["title"])
+        price_elem = _select_first(item, sel["price"])
+        if not all([title_elem, price_elem]):
+            continue
+        title = title_elem.get_text(strip=True)
+        price_digits = re.findall(r'[\d\s]+', price_elem.get_text(strip=True))
+        price = float(''.join(price_digits).replace(' ', '')) if price_digits else 0
+        link_elem = item.select_one(sel["link"])
+        link = link_elem.get("href", "") if link_elem else ""
+        if link and not link.startswith("http"):
+            link = base_url + link
+        photos = [img["src"] for img in item.select("img") if img.get("src")]
+        location = {}
+        for district in MOSCOW_DISTRICTS:
+            if district in title.lower():
+                location["district"] = district
+                break
+        address_elem = _select_first(item, sel["address"])
+        if address_elem:
+            location["address"] = address_elem.get_text(strip=True)
+        desc_elem = _select_first(item, sel["description"])
+        match = re.search(sel["id"], link)
+        properties.append({
+            "source": source,
+            "external_id": match.group(1) if match else "",
+            "title": title,
+            "price": price,
+            "link": link,
+            "rooms": _legacy_rooms(title),
+            "area": _legacy_area(title),
+            "photos": photos[:5],
+            "location": location or None,
+            "description": desc_elem.get_text(strip=True) if desc_elem else None,
+        })
+    return properties
+
+
+def legacy_extract_etagi(html: str, location: str) -> List[Dict[str, Any]]:
+    """``EtagiParser._extract_listings`` before the extraction engine."""
+    soup = BeautifulSoup(html, 'lxml')
+    listings = soup.find_all('div', class_='listing-item') or soup.find_all('article', class_='card')
+    results = []
+    for listing in listings:
+        title_elem = listing.find('a', class_='listing-title')
+        if not title_elem:
+            continue
+        link = title_elem.get('href', '')
+        if link and not link.startswith('http'):
+            link = f"https://etagi.com{link}"
+        price = 0
+        price_elem = listing.find('div', class_='listing-price')
+        if price_elem:
+            price_str = ''.join(filter(str.isdigit, price_elem.get_text(strip=True)))
+            price = int(price_str) if price_str else 0
+        rooms = area = floor = total_floors = None
+        params_elem = listing.find('div', class_='listing-params')
+        if params_elem:
+            for item in params_elem.find_all('div', class_='param-item'):
+                name, value = item.get('data-param', ''), item.get_text(strip=True)
+                if 'rooms' in name:
+                    rooms = int(''.join(filter(str.isdigit, value))) if value else None
+                elif 'area' in name:
+                    area_str = ''.join(filter(lambda c: c.isdigit() or c == '.', value))
+                    area = float(area_str) if area_str else None
+                elif 'floor' in name:
+                    parts = value.split('/')
+                    if len(parts) >= 2:
+                        floor, total_floors = int(parts[0].strip()), int(parts[1].strip())
+        img_elem = listing.find('img', class_='listing-image')
+        photos = []
+        if img_elem and (img_elem.get('src') or img_elem.get('data-src')):
+            src = img_elem.get('src') or img_elem.get('data-src')
+            photos.append(src if src.startswith('http') else f"https://etagi.com{src}")
+        description_elem = listing.find('div', class_='listing-description')
+        address_elem = listing.find('div', class_='listing-address')
+        results.append({
+            "source": "etagi",
+            "external_id": link.rstrip('/').split('/')[-1],
+            "title": title_elem.get_text(strip=True),
+            "description": description_elem.get_text(strip=True) if description_elem else None,
+            "link": link,
+            "price": price,
+            "rooms": rooms,
+            "area": area,
+            "floor": floor,
+            "total_floors": total_floors,
+            "city": location,
+            "address": address_elem.get_text(strip=True) if address_elem else None,
+            "photos": photos,
+        })
+    return results
+
+
+# --- Benchmark -------------------------------------------------------------
+
+def make_page(source: str, cards: int) -> str:
+    body = "".join(
+        CARDS[source].format(
+            id=100000 + i, rooms=i % 4 + 1, area=30 + i % 70, price_text=f"{40 + i % 90} {i % 10}00",
+            house=i % 200 + 1, floor=i % 9 + 1, filler=FILLER,
+        )
+        for i in range(cards)
+    )
+    return (
+        "<html><head><title>Search</title><script>window.__state = {}</script></head>"
+        f"<body><header><nav><a href='/'>Главная</a></nav></header><main><ul>{body}</ul></main>"
+        "<footer><p>© 2024</p></footer></body></html>"
+    )
+
+
+def _key(rows: List[Dict[str, Any]]) -> List[tuple]:
+    return [(row["external_id"], float(row["price"]), row["rooms"], row["area"]) for row in rows]
+
+
+def _timed(func: Callable[[], List[Dict[str, Any]]], repeat: int) -> tuple:
+    rows = func()  # warm-up
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = func()
+        best = min(best, time.perf_counter() - start)
+    return best, rows
+
+
+def benchmark(card_counts: List[int], repeat: int, html_dir: Optional[str]) -> List[Dict[str, Any]]:
+    pages = []
+    for source in PARSERS:
+        saved = os.path.join(html_dir, f"{source}.html") if html_dir else None
+        if saved and os.path.exists(saved):
+            with open(saved, encoding="utf-8") as f:
+                pages.append((source, "saved", f.read()))
+        else:
+            pages.extend((source, str(cards), make_page(source, cards)) for cards in card_counts)
+
+    rows = []
+    for source, label, html in pages:
+        parser = PARSERS[source]()
+        if source == "etagi":
+            legacy = lambda: legacy_extract_etagi(html, "Тюмень")  # noqa: E731
+            engine = lambda: parser._extract_listings(html, "Тюмень")  # noqa: E731
+        else:
+            legacy = lambda: legacy_extract(source, parser.BASE_URL, html)  # noqa: E731
+            engine = lambda: parser._extract_listings(html)  # noqa: E731
+        legacy_time, legacy_rows = _timed(legacy, repeat)
+        engine_time, engine_rows = _timed(engine, repeat)
+        rows.append({
+            "source": source,
+            "page": label,
+            "kib": len(html.encode()) / 1024,
+            "listings": len(engine_rows),
+            "legacy": legacy_time,
+            "engine": engine_time,
+            "same": _key(legacy_rows) == _key(engine_rows),
+        })
+    return rows
+
+
+def print_results(rows: List[Dict[str, Any]], repeat: int) -> None:
+    print("\n" + "=" * 92)
+    print(f"LISTING EXTRACTION BENCHMARK (best of {repeat}, ms per page)")
+    print("=" * 92)
+    print(f"{'Source':<15}{'Cards':>7}{'KiB':>7}{'Found':>7}{'BS4 per-field':>15}{'ListingSpec':>13}"
+          f"{'speedup':>9}{'listings/s':>12}{'same':>6}")
+    print("-" * 92)
+    for row in rows:
+        print(
+            f"{row['source']:<15}{row['page']:>7}{row['kib']:>7.0f}{row['listings']:>7}"
+            f"{row['legacy'] * 1000:>15.1f}{row['engine'] * 1000:>13.1f}"
+            f"{row['legacy'] / row['engine']:>8.1f}x{row['listings'] / row['engine']:>12.0f}"
+            f"{'yes' if row['same'] else 'NO':>6}"
+        )
+    print("-" * 92)
+    print("same = identical (external_id, price, rooms, area) from both implementations.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cards", type=int, nargs="+", default=[50, 400], help="Listings per synthetic page")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--html-dir", default=None, help="Directory with saved <source>.html search pages")
+    args = parser.parse_args()
+
+    print_results(benchmark(args.cards, args.repeat, args.html_dir), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark for PropertyFilter: row-by-row path vs columnar snapshot.
+
+Usage:
+    python scripts/benchmark_filter.py [--sizes 10000 100000 1000000] [--iterations 5]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+
+# Add the app directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.models.schemas import PropertyCreate
+from app.services.filter import PropertyFilter
+from app.services.listing_snapshot import ListingSnapshot
+
+
+SOURCES = ["avito", "cian", "domclick", "domofond", "yandex_realty", "etagi", "cian_commercial"]
+DISTRICTS = ["Центральный", "ЮЗАО", "Хамовники", "Арбат", "Пресненский", "Таганский"]
+
+FILTERS: Dict[str, Dict[str, Any]] = {
+    "price_range": {"min_price": 40000, "max_price": 90000},
+    "typical_request": {
+        "property_type": "квартира",
+        "min_rooms": 1,
+        "max_rooms": 3,
+        "min_area": 30,
+        "has_photos": True,
+    },
+    "district_sorted_desc": {"district": "хамовники", "sort_by": "area", "sort_order": "desc"},
+}
+
+
+def generate_properties(count: int, seed: int = 7) -> List[PropertyCreate]:
+    """Generate synthetic listings without pydantic validation overhead."""
+    rng = random.Random(seed)
+    properties = []
+    for i in range(count):
+        rooms = rng.randint(0, 4)
+        area = round(rng.uniform(18, 140), 1)
+        properties.append(
+            PropertyCreate.model_construct(
+                source=rng.choice(SOURCES),
+                external_id=str(i),
+                title=f"{rooms}-комн. квартира, {area} м²",
+                price=float(rng.randint(15000, 250000)),
+                rooms=rooms,
+                area=area,
+                floor=rng.randint(1, 25),
+                total_floors=25,
+                location={"district": rng.choice(DISTRICTS)},
+                photos=["photo.jpg"] if rng.random() < 0.7 else [],
+                features={"wifi": rng.random() < 0.5},
+                contact_name=None,
+                contact_phone=None,
+            )
+        )
+    return properties
+
+
+def _measure(func, iterations: int) -> Dict[str, float]:
+    times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {"mean": statistics.mean(times), "median": statistics.median(times), "min": min(times)}
+
+
+def benchmark_size(size: int, iterations: int) -> Dict[str, Any]:
+    """Run all filter scenarios on a dataset of the given size."""
+    properties = generate_properties(size)
+
+    start = time.perf_counter()
+    snapshot = ListingSnapshot.from_properties(properties)
+    build_time = time.perf_counter() - start
+
+    scenarios = {}
+    for name, criteria in FILTERS.items():
+        property_filter = PropertyFilter(**criteria)
+        row = _measure(lambda: property_filter.filter(properties, skip=0, limit=50), iterations)
+        columnar = _measure(
+            lambda: property_filter.filter(properties, skip=0, limit=50, snapshot=snapshot), iterations
+        )
+        scenarios[name] = {
+            "row_median": row["median"],
+            "columnar_median": columnar["median"],
+            "speedup": row["median"] / columnar["median"] if columnar["median"] > 0 else 0,
+        }
+    return {"size": size, "snapshot_build": build_time, "scenarios": scenarios}
+
+
+def print_results(results: List[Dict[str, Any]]) -> None:
+    print("\n" + "=" * 80)
+    print("PROPERTY FILTER BENCHMARK (row path vs columnar snapshot)")
+    print("=" * 80)
+    for result in results:
+        print(f"\nRows: {result['size']:,}  (snapshot build: {result['snapshot_build']:.3f}s)")
+        print("-" * 80)
+        print(f"  {'scenario':<24}{'row, ms':>14}{'columnar, ms':>16}{'speedup':>12}")
+        for name, metrics in result["scenarios"].items():
+            print(
+                f"  {name:<24}{metrics['row_median'] * 1000:>14.2f}"
+                f"{metrics['columnar_median'] * 1000:>16.2f}{metrics['speedup']:>11.1f}x"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--iterations", type=int, default=5)
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        print(f"Benchmarking {size:,} rows...")
+        results.append(benchmark_size(size, args.iterations))
+    print_results(results)
+
+
+if __name__ == "__main__":
+    main()
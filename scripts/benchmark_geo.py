@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Benchmark for /geo nearby queries: Python loop vs bounding box + NumPy vs grid cells.
+
+Generates synthetic listings around Moscow and answers radius and k-nearest
+queries three ways:
+
+* loop      — previous behaviour: haversine in Python over every listing;
+* bbox      — bounding box mask over all rows, NumPy haversine for candidates;
+* cells     — sorted grid-cell ids (emulates ix_properties_geo_cell), one
+              searchsorted range per cell row of the box, then bbox + NumPy.
+
+Usage:
+    python scripts/benchmark_geo.py [--listings 1000000] [--queries 50] [--radius 2]
+"""
+
+import argparse
+import math
+import os
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+# Add the app directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.utils.geo import GEO_CELL_ROW, GEO_CELL_SCALE, bounding_box, haversine_km, nearest_within
+
+CENTER = (55.75, 37.61)
+
+
+def haversine_scalar(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371.0 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+class Dataset:
+    def __init__(self, listings: int, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        # ~60 x 60 км вокруг центра
+        self.lats = rng.uniform(CENTER[0] - 0.27, CENTER[0] + 0.27, listings)
+        self.lons = rng.uniform(CENTER[1] - 0.48, CENTER[1] + 0.48, listings)
+        cells = (
+            np.floor((self.lats + 90) * GEO_CELL_SCALE).astype(np.int64) * GEO_CELL_ROW
+            + np.floor((self.lons + 180) * GEO_CELL_SCALE).astype(np.int64)
+        )
+        # Отсортированный массив ячеек играет роль B-tree индекса по выражению
+        self.order = np.argsort(cells, kind="stable")
+        self.cells = cells[self.order]
+
+    def loop(self, lat: float, lon: float, radius_km: float, limit: int) -> Tuple[List[int], int]:
+        found = []
+        for i, (plat, plon) in enumerate(zip(self.lats.tolist(), self.lons.tolist())):
+            distance = haversine_scalar(lat, lon, plat, plon)
+            if distance <= radius_km:
+                found.append((distance, i))
+        found.sort()
+        return [i for _, i in found[:limit]], len(found)
+
+    def bbox(self, lat: float, lon: float, radius_km: float, limit: int) -> Tuple[List[int], int]:
+        box = bounding_box(lat, lon, radius_km)
+        mask = (
+            (self.lats >= box.south) & (self.lats <= box.north)
+            & (self.lons >= box.west) & (self.lons <= box.east)
+        )
+        ids = np.flatnonzero(mask)
+        return self._rank(ids, lat, lon, radius_km, limit)
+
+    def cells_prefilter(self, lat: float, lon: float, radius_km: float, limit: int) -> Tuple[List[int], int]:
+        box = bounding_box(lat, lon, radius_km)
+        chunks = []
+        for first, last in box.cell_ranges():
+            lo = np.searchsorted(self.cells, first, side="left")
+            hi = np.searchsorted(self.cells, last, side="right")
+            chunks.append(self.order[lo:hi])
+        ids = np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int64)
+        lats, lons = self.lats[ids], self.lons[ids]
+        keep = (lats >= box.south) & (lats <= box.north) & (lons >= box.west) & (lons <= box.east)
+        return self._rank(ids[keep], lat, lon, radius_km, limit)
+
+    def _rank(self, ids: np.ndarray, lat: float, lon: float, radius_km: float, limit: int) -> Tuple[List[int], int]:
+        distances = haversine_km(lat, lon, self.lats[ids], self.lons[ids])
+        nearest, total = nearest_within(distances, radius_km, limit)
+        return ids[nearest].tolist(), total
+
+
+def timeit(fn: Callable, queries: List[Tuple[float, float]], radius_km: float, limit: int) -> Dict[str, float]:
+    timings = []
+    for lat, lon in queries:
+        started = time.perf_counter()
+        fn(lat, lon, radius_km, limit)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return {
+        "p50": statistics.median(timings) * 1e3,
+        "p99": timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1e3,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--listings", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--radius", type=float, default=2.0)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--skip-loop", action="store_true", help="skip the slow Python loop baseline")
+    args = parser.parse_args()
+
+    data = Dataset(args.listings)
+    rng = np.random.default_rng(1)
+    queries = list(zip(
+        rng.uniform(CENTER[0] - 0.2, CENTER[0] + 0.2, args.queries).tolist(),
+        rng.uniform(CENTER[1] - 0.4, CENTER[1] + 0.4, args.queries).tolist(),
+    ))
+
+    # Все стратегии должны давать одинаковый ответ
+    lat, lon = queries[0]
+    expected = data.bbox(lat, lon, args.radius, args.limit)
+    assert data.cells_prefilter(lat, lon, args.radius, args.limit) == expected
+
+    methods = [("bbox", data.bbox), ("cells", data.cells_prefilter)]
+    if not args.skip_loop:
+        methods.insert(0, ("loop", data.loop))
+
+    print(f"listings: {args.listings}, queries: {args.queries}, radius: {args.radius} km, k: {args.limit}")
+    print(f"{'method':<8} {'query':<8} {'p50 ms':>10} {'p99 ms':>10}")
+    for name, fn in methods:
+        # Python-цикл на миллионе строк медленный: хватит нескольких запросов
+        sample = queries[:3] if name == "loop" else queries
+        radius = timeit(fn, sample, args.radius, args.limit)
+        # k-nearest: радиус 50 км покрывает всю выборку, ранжирование решает
+        nearest = timeit(fn, sample[:5], 50.0, args.limit)
+        print(f"{name:<8} {'radius':<8} {radius['p50']:>10.2f} {radius['p99']:>10.2f}")
+        print(f"{name:<8} {'k-nn':<8} {nearest['p50']:>10.2f} {nearest['p99']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark for HTML parsing off the event loop: inline vs thread pool vs process pool.
+
+Parses synthetic Cian search pages concurrently while a ticker coroutine
+measures event-loop lag (how late a 5 ms sleep wakes up). Reports per-page
+parse time and lag percentiles for each ``ParseExecutor`` mode.
+
+Usage:
+    python scripts/benchmark_html_parsing.py [--cards 50 400] [--pages 16] [--workers 2]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+
+# Add the app directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.parsers.cian.parser import CianParser
+from app.parsers.parse_executor import ParseExecutor
+
+TICK = 0.005
+
+CARD = """
+<article data-name="CardComponent">
+  <a href="/rent/flat/{id}/"><span data-name="Title">{rooms}-комн. квартира, {area} м², ЦАО</span></a>
+  <span data-mark="MainPrice">{price} ₽/мес.</span>
+  <div data-name="AddressLine">Москва, ул. Тверская, {house}</div>
+  <div data-name="Description">Светлая квартира рядом с метро, после ремонта. {filler}</div>
+  <img src="https://images.cdn-cian.ru/{id}-1.jpg"/><img src="https://images.cdn-cian.ru/{id}-2.jpg"/>
+</article>
+"""
+
+
+def make_page(cards: int, seed: int = 0) -> str:
+    body = "".join(
+        CARD.format(
+            id=seed * 100000 + i, rooms=i % 4 + 1, area=30 + i % 70, price=40000 + i * 100,
+            house=i % 200 + 1, filler="Мебель и техника. " * 10,
+        )
+        for i in range(cards)
+    )
+    return f"<html><head><title>Cian</title></head><body><main>{body}</main></body></html>"
+
+
+async def _ticker(lags: List[float], stop: asyncio.Event) -> None:
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(TICK)
+        lags.append(loop.time() - start - TICK)
+
+
+def _percentile(values: List[float], share: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+
+async def _run_mode(mode: str, page: str, pages: int, workers: int) -> Dict[str, Any]:
+    executor = ParseExecutor(mode=mode, max_workers=workers, inline_bytes=0)
+    parser = CianParser()
+    # Warm-up: process workers import the app once
+    await asyncio.gather(*(executor.parse(parser, page) for _ in range(workers)))
+
+    parse_times: List[float] = []
+
+    async def parse_one() -> int:
+        start = time.perf_counter()
+        results = await executor.parse(parser, page)
+        parse_times.append(time.perf_counter() - start)
+        return len(results)
+
+    lags: List[float] = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_ticker(lags, stop))
+    await asyncio.sleep(TICK * 2)
+    start = time.perf_counter()
+    counts = await asyncio.gather(*(parse_one() for _ in range(pages)))
+    wall = time.perf_counter() - start
+    stop.set()
+    await ticker
+    executor.shutdown()
+    return {
+        "mode": mode,
+        "listings": counts[0],
+        "wall": wall,
+        "parse_median": statistics.median(parse_times),
+        "lag_p50": _percentile(lags, 0.5),
+        "lag_p99": _percentile(lags, 0.99),
+        "lag_max": max(lags),
+    }
+
+
+async def benchmark(card_counts: List[int], pages: int, workers: int) -> List[Dict[str, Any]]:
+    rows = []
+    for cards in card_counts:
+        page = make_page(cards)
+        for mode in ("inline", "thread", "process"):
+            row = await _run_mode(mode, page, pages, workers)
+            row.update(cards=cards, kib=len(page.encode()) / 1024)
+            rows.append(row)
+    return rows
+
+
+def print_results(rows: List[Dict[str, Any]], pages: int, workers: int) -> None:
+    print("\n" + "=" * 96)
+    print(f"HTML PARSING BENCHMARK ({pages} concurrent pages, {workers} workers, lag = 5 ms sleep overshoot)")
+    print("=" * 96)
+    print(f"{'Cards':>6}{'KiB':>7}  {'Mode':<9}{'wall s':>8}{'page ms (median)':>18}"
+          f"{'lag p50 ms':>12}{'lag p99 ms':>12}{'lag max ms':>12}")
+    print("-" * 96)
+    for row in rows:
+        print(
+            f"{row['cards']:>6}{row['kib']:>7.0f}  {row['mode']:<9}{row['wall']:>8.2f}"
+            f"{row['parse_median'] * 1000:>18.1f}{row['lag_p50'] * 1000:>12.1f}"
+            f"{row['lag_p99'] * 1000:>12.1f}{row['lag_max'] * 1000:>12.1f}"
+        )
+    print("-" * 96)
+    print("Page time under process/thread includes waiting for a free worker and the IPC round-trip.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cards", type=int, nargs="+", default=[50, 400], help="Listings per page")
+    parser.add_argument("--pages", type=int, default=16, help="Pages parsed concurrently")
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    print_results(asyncio.run(benchmark(args.cards, args.pages, args.workers)), args.pages, args.workers)
+
+
+if __name__ == "__main__":
+    main()
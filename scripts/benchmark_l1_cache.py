@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the L1 cache: legacy min()-scan LRU vs O(1) L1Cache (LRU and W-TinyLFU).
+
+Measures insert cost into a full cache, hit cost, and hit ratio on a Zipf
+workload interleaved with one-off scan keys (what cache warmers produce).
+
+Usage:
+    python scripts/benchmark_l1_cache.py [--sizes 1000 10000 100000] [--ops 20000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Add the app directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.l1_cache import L1Cache
+
+# The legacy engine costs O(n) per insert; cap its evicting inserts so 100k finishes
+LEGACY_MAX_EVICTING_OPS = 2000
+
+
+class LegacyL1:
+    """The previous MultiLevelCacheManager L1: dict + access-time dict + min() eviction."""
+
+    def __init__(self, max_entries: int, ttl: int = 300):
+        self.l1_cache: Dict[str, Tuple[Any, datetime]] = {}
+        self._access_times: Dict[str, float] = {}
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+    def get(self, key: str) -> Optional[Any]:
+        if key in self.l1_cache:
+            value, expiry = self.l1_cache[key]
+            if datetime.now() < expiry:
+                self._access_times[key] = datetime.now().timestamp()
+                return value
+            del self.l1_cache[key]
+            self._access_times.pop(key, None)
+        return None
+
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        expiry = datetime.now() + timedelta(seconds=ttl)
+        self.l1_cache[key] = (value, expiry)
+        self._access_times[key] = datetime.now().timestamp()
+        if len(self.l1_cache) > self.max_entries:
+            lru_key = min(self._access_times, key=self._access_times.get)
+            del self.l1_cache[lru_key]
+            del self._access_times[lru_key]
+
+
+def _factories() -> Dict[str, Callable[[int], Any]]:
+    return {
+        "legacy": lambda n: LegacyL1(n),
+        "lru": lambda n: L1Cache(max_entries=n, policy="lru"),
+        "tinylfu": lambda n: L1Cache(max_entries=n, policy="tinylfu"),
+    }
+
+
+def _fill(cache: Any, size: int) -> None:
+    for i in range(size):
+        cache.set(f"fill:{i}", i, 300)
+
+
+def bench_insert(factory: Callable[[int], Any], size: int, ops: int) -> float:
+    """Microseconds per insert of a new key into a full cache (every insert evicts)."""
+    cache = factory(size)
+    _fill(cache, size)
+    keys = [f"new:{i}" for i in range(ops)]
+    start = time.perf_counter()
+    for key in keys:
+        cache.set(key, key, 300)
+    return (time.perf_counter() - start) / ops * 1e6
+
+
+def bench_get(factory: Callable[[int], Any], size: int, ops: int) -> float:
+    """Microseconds per hit."""
+    cache = factory(size)
+    _fill(cache, size)
+    rng = random.Random(1)
+    keys = [f"fill:{rng.randrange(size)}" for _ in range(ops)]
+    start = time.perf_counter()
+    for key in keys:
+        cache.get(key)
+    return (time.perf_counter() - start) / ops * 1e6
+
+
+def bench_hit_ratio(factory: Callable[[int], Any], size: int, ops: int) -> float:
+    """Hit ratio for a Zipf(1.0) key distribution over 10x capacity with 30% scan keys."""
+    # The cache has to churn several times over for the policies to differ
+    ops = max(ops, size * 5)
+    rng = random.Random(42)
+    universe = size * 10
+    weights = [1.0 / (rank + 1) for rank in range(universe)]
+    popular = rng.choices(range(universe), weights=weights, k=ops)
+    cache = factory(size)
+    hits = lookups = 0
+    scan = 0
+    for key_id in popular:
+        if rng.random() < 0.3:
+            scan += 1
+            cache.set(f"scan:{scan}", scan, 300)
+            continue
+        key = f"key:{key_id}"
+        lookups += 1
+        if cache.get(key) is not None:
+            hits += 1
+        else:
+            cache.set(key, key_id, 300)
+    return hits / lookups if lookups else 0.0
+
+
+def benchmark(sizes: List[int], ops: int) -> Dict[int, Dict[str, Dict[str, float]]]:
+    results: Dict[int, Dict[str, Dict[str, float]]] = {}
+    for size in sizes:
+        results[size] = {}
+        for name, factory in _factories().items():
+            insert_ops = min(ops, LEGACY_MAX_EVICTING_OPS) if name == "legacy" else ops
+            results[size][name] = {
+                "insert_us": bench_insert(factory, size, insert_ops),
+                "get_us": bench_get(factory, size, ops),
+                # Legacy is the same LRU policy as "lru", only slower to evict
+                "hit_ratio": bench_hit_ratio(factory, size, ops) if name != "legacy" or size <= 1000 else float("nan"),
+            }
+    return results
+
+
+def print_results(results: Dict[int, Dict[str, Dict[str, float]]], ops: int) -> None:
+    print("\n" + "=" * 80)
+    print(f"L1 CACHE BENCHMARK ({ops} ops per measurement)")
+    print("=" * 80)
+    print(f"{'Entries':>10}  {'Engine':<10}{'insert µs/op':>15}{'get µs/op':>12}{'hit ratio':>12}{'insert speedup':>17}")
+    print("-" * 80)
+    for size, engines in results.items():
+        legacy_insert = engines["legacy"]["insert_us"]
+        for name, result in engines.items():
+            speedup = legacy_insert / result["insert_us"] if result["insert_us"] > 0 else 0.0
+            hit_ratio = "n/a" if result["hit_ratio"] != result["hit_ratio"] else f"{result['hit_ratio']:.3f}"
+            print(
+                f"{size:>10}  {name:<10}{result['insert_us']:>15.2f}{result['get_us']:>12.2f}"
+                f"{hit_ratio:>12}{speedup:>16.1f}x"
+            )
+        print("-" * 80)
+    print("Hit ratio: Zipf(1.0) over 10x capacity with 30% one-off scan inserts.")
+    print("Legacy hit ratio above 1k entries is skipped (same policy as lru, O(n) eviction).")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--ops", type=int, default=20000)
+    args = parser.parse_args()
+
+    results = benchmark(args.sizes, args.ops)
+    print_results(results, args.ops)
+
+
+if __name__ == "__main__":
+    main()
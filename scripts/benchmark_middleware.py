@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the HTTP middleware stack: BaseHTTPMiddleware layers vs pure ASGI pipeline.
+
+Runs a trivial JSON endpoint in-process through httpx.ASGITransport with the
+previous stack (correlation ID, security headers, HTTPS redirect, IP rate
+limit as BaseHTTPMiddleware) and with the same work done by
+HTTPPipelineMiddleware, plus a bare app as the floor. Reports req/s and
+p50/p99 per-request latency.
+
+Usage:
+    python scripts/benchmark_middleware.py [--requests 5000] [--concurrency 16]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+from typing import Callable, Dict, List
+
+import httpx
+from fastapi import FastAPI, Request, Response
+from starlette.middleware.base import BaseHTTPMiddleware
+
+# Add the app directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.middleware.pipeline import HTTPPipelineMiddleware
+from app.middleware.security import HTTPSRedirectMiddleware, SecurityHeadersMiddleware
+from app.utils.correlation_middleware import CorrelationIDMiddleware
+from app.utils.ip_ratelimiter import IPRateLimiter, RateLimitMiddleware
+
+SECURITY_HEADERS = {
+    "X-Content-Type-Options": "nosniff",
+    "X-Frame-Options": "DENY",
+    "X-XSS-Protection": "1; mode=block",
+    "Content-Security-Policy": "default-src 'self'; frame-ancestors 'none';",
+    "Referrer-Policy": "strict-origin-when-cross-origin",
+    "Permissions-Policy": "camera=(), geolocation=(), microphone=()",
+}
+
+
+def unlimited() -> IPRateLimiter:
+    """IP limiter that never rejects, so the benchmark measures overhead only."""
+    return IPRateLimiter(max_requests=10 ** 9, time_window=60, burst_requests=10 ** 9)
+
+
+class LegacyCorrelation(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        corr_id = request.headers.get("X-Correlation-ID") or str(uuid.uuid4())
+        response = await call_next(request)
+        response.headers["X-Correlation-ID"] = corr_id
+        return response
+
+
+class LegacySecurityHeaders(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        response = await call_next(request)
+        for name, value in SECURITY_HEADERS.items():
+            response.headers[name] = value
+        return response
+
+
+class LegacyHTTPSRedirect(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        # HTTPS_ENABLED=false по умолчанию: только проверка заголовков
+        request.headers.get("host", "")
+        request.headers.get("x-forwarded-proto", request.url.scheme)
+        return await call_next(request)
+
+
+class LegacyRateLimit(BaseHTTPMiddleware):
+    def __init__(self, app, limiter: IPRateLimiter):
+        super().__init__(app)
+        self.limiter = limiter
+
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        ip = request.client.host if request.client else "unknown"
+        _, rate_info = await self.limiter.check_rate_limit(ip, request.url.path)
+        response = await call_next(request)
+        response.headers["X-RateLimit-Limit"] = str(rate_info.get("limit"))
+        response.headers["X-RateLimit-Remaining"] = str(rate_info.get("remaining", 0))
+        response.headers["X-RateLimit-Reset"] = str(rate_info.get("reset", 0))
+        return response
+
+
+def build_app(stack: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    if stack == "legacy":
+        # add_middleware: последний добавленный — внешний
+        app.add_middleware(LegacyRateLimit, limiter=unlimited())
+        app.add_middleware(LegacyHTTPSRedirect)
+        app.add_middleware(LegacySecurityHeaders)
+        app.add_middleware(LegacyCorrelation)
+    elif stack == "asgi":
+        app.add_middleware(RateLimitMiddleware, limiter=unlimited())
+        app.add_middleware(HTTPSRedirectMiddleware)
+        app.add_middleware(SecurityHeadersMiddleware)
+        app.add_middleware(CorrelationIDMiddleware)
+    elif stack == "pipeline":
+        app.add_middleware(
+            HTTPPipelineMiddleware,
+            stages=[
+                CorrelationIDMiddleware(),
+                SecurityHeadersMiddleware(),
+                HTTPSRedirectMiddleware(),
+                RateLimitMiddleware(limiter=unlimited()),
+            ],
+        )
+    return app
+
+
+async def bench(app: FastAPI, requests: int, concurrency: int) -> Dict[str, float]:
+    transport = httpx.ASGITransport(app=app)
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Прогрев: создание роутов, первый вызов middleware
+        for _ in range(50):
+            await client.get("/ping")
+
+        async def one() -> None:
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get("/ping")
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "rps": requests / elapsed,
+        "p50": statistics.median(latencies) * 1e6,
+        "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1e6,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    print(f"requests: {args.requests}, concurrency: {args.concurrency}")
+    print(f"{'stack':<10} {'req/s':>10} {'p50 us':>10} {'p99 us':>10}")
+    for stack in ("bare", "legacy", "asgi", "pipeline"):
+        result = asyncio.run(bench(build_app(stack), args.requests, args.concurrency))
+        print(f"{stack:<10} {result['rps']:>10.0f} {result['p50']:>10.0f} {result['p99']:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
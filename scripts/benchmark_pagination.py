@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark for online search pagination: slice-after-sort vs top-k vs keyset cursor.
+
+Usage:
+    python scripts/benchmark_pagination.py [--sizes 10000 100000] [--iterations 5]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+
+# Add the app directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.filter import PropertyFilter
+from app.services.listing_snapshot import ListingSnapshot
+from app.services.pagination import decode_cursor, paginate_rows
+from scripts.benchmark_filter import generate_properties
+
+PAGE_SIZE = 50
+
+
+def _median(func, iterations: int) -> float:
+    times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def benchmark_size(size: int, iterations: int) -> Dict[str, Any]:
+    """Measure first-page and deep-page latency for one dataset size."""
+    properties = generate_properties(size)
+    snapshot = ListingSnapshot.from_properties(properties)
+    property_filter = PropertyFilter(sort_by="price", sort_order="asc")
+    deep_skip = size // 2
+
+    # Cursor pointing at the middle of the result set
+    middle = property_filter.filter_page(properties, skip=deep_skip - PAGE_SIZE, limit=PAGE_SIZE, snapshot=snapshot)
+    deep_cursor = decode_cursor(middle.next_cursor, "price", "asc")
+
+    def slice_after_sort(skip: int):
+        return sorted(properties, key=lambda x: x.price or 0)[skip : skip + PAGE_SIZE]
+
+    return {
+        "size": size,
+        "first_page": {
+            "slice_after_sort": _median(lambda: slice_after_sort(0), iterations),
+            "top_k_rows": _median(
+                lambda: paginate_rows(properties, "price", "asc", skip=0, limit=PAGE_SIZE), iterations
+            ),
+            "top_k_snapshot": _median(
+                lambda: property_filter.filter_page(properties, limit=PAGE_SIZE, snapshot=snapshot), iterations
+            ),
+        },
+        "deep_page": {
+            "slice_after_sort": _median(lambda: slice_after_sort(deep_skip), iterations),
+            "offset_snapshot": _median(
+                lambda: property_filter.filter_page(
+                    properties, skip=deep_skip, limit=PAGE_SIZE, snapshot=snapshot
+                ),
+                iterations,
+            ),
+            "cursor_snapshot": _median(
+                lambda: property_filter.filter_page(
+                    properties, limit=PAGE_SIZE, cursor=deep_cursor, snapshot=snapshot
+                ),
+                iterations,
+            ),
+        },
+    }
+
+
+def print_results(results: List[Dict[str, Any]]) -> None:
+    print("\n" + "=" * 80)
+    print("PAGINATION BENCHMARK (median latency, ms)")
+    print("=" * 80)
+    for result in results:
+        print(f"\nRows: {result['size']:,}")
+        print("-" * 80)
+        for section in ("first_page", "deep_page"):
+            baseline = result[section]["slice_after_sort"]
+            print(f"  {section}:")
+            for name, seconds in result[section].items():
+                speedup = baseline / seconds if seconds > 0 else 0
+                print(f"    {name:<22}{seconds * 1000:>10.2f} ms{speedup:>10.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--iterations", type=int, default=5)
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        print(f"Benchmarking {size:,} rows...")
+        results.append(benchmark_size(size, args.iterations))
+    print_results(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Benchmark for parser HTTP transport: client-per-call vs shared pooled ParserTransport.
+
+Runs a local keep-alive HTTP stub server and counts accepted TCP connections,
+so no external network access is needed.
+
+Usage:
+    python scripts/benchmark_parser_transport.py [--requests 500] [--concurrency 10]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+import httpx
+
+# Add the app directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.parsers.transport import HostLimits, ParserTransport
+from app.utils.http_pool import http_pool
+
+BODY = b"<html><body>" + b"<div data-marker='item'></div>" * 50 + b"</body></html>"
+RESPONSE = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"Content-Type: text/html; charset=utf-8\r\n"
+    b"Content-Length: " + str(len(BODY)).encode() + b"\r\n"
+    b"Connection: keep-alive\r\n\r\n" + BODY
+)
+
+
+class StubServer:
+    """Minimal HTTP/1.1 keep-alive server answering every GET with the same page."""
+
+    def __init__(self) -> None:
+        self.connections = 0
+        self.requests = 0
+        self.server: asyncio.AbstractServer = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                if not head:
+                    break
+                self.requests += 1
+                writer.write(RESPONSE)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/moskva/sdam"
+
+    async def stop(self) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+
+    def reset(self) -> None:
+        self.connections = 0
+        self.requests = 0
+
+
+async def _run(fetch: Callable[[], Awaitable[Any]], total: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with semaphore:
+            await fetch()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return time.perf_counter() - start
+
+
+async def benchmark(total: int, concurrency: int) -> Dict[str, Dict[str, float]]:
+    server = StubServer()
+    url = await server.start()
+    results: Dict[str, Dict[str, float]] = {}
+
+    async def client_per_call() -> None:
+        async with httpx.AsyncClient(timeout=30) as client:
+            response = await client.get(url)
+            response.raise_for_status()
+
+    transport = ParserTransport(
+        use_proxies=False,
+        http2=False,
+        default_limits=HostLimits(max_connections=concurrency, max_keepalive_connections=concurrency),
+    )
+
+    async def shared_transport() -> None:
+        response = await transport.get(url)
+        response.raise_for_status()
+
+    try:
+        for name, fetch in (("client_per_call", client_per_call), ("shared_transport", shared_transport)):
+            server.reset()
+            elapsed = await _run(fetch, total, concurrency)
+            results[name] = {
+                "seconds": elapsed,
+                "rps": total / elapsed if elapsed > 0 else 0.0,
+                "connections": server.connections,
+            }
+    finally:
+        await http_pool.close_all()
+        await server.stop()
+    return results
+
+
+def print_results(results: Dict[str, Dict[str, float]], total: int, concurrency: int) -> None:
+    print("\n" + "=" * 80)
+    print(f"PARSER TRANSPORT BENCHMARK ({total} requests, concurrency {concurrency})")
+    print("=" * 80)
+    print(f"{'Mode':<22}{'Time (s)':>12}{'Req/s':>12}{'TCP conns':>12}")
+    print("-" * 80)
+    for name, result in results.items():
+        print(
+            f"{name:<22}{result['seconds']:>12.3f}{result['rps']:>12.1f}{result['connections']:>12}"
+        )
+    baseline = results["client_per_call"]["seconds"]
+    shared = results["shared_transport"]["seconds"]
+    if shared > 0:
+        print(f"\nSpeedup: {baseline / shared:.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+
+    results = asyncio.run(benchmark(args.requests, args.concurrency))
+    print_results(results, args.requests, args.concurrency)
+
+
+if __name__ == "__main__":
+    main()
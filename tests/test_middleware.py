@@ -11,7 +11,10 @@ from app.middleware.security import (
     SecurityHeadersMiddleware,
     CORSMiddlewareConfig,
 )
-from app.middleware.compression import GZipMiddleware
+from app.middleware.compression import GZipMiddleware, negotiate_encoding
+from app.middleware.pipeline import HTTPPipelineMiddleware
+from app.utils.correlation_middleware import CorrelationIDMiddleware
+from app.utils.ip_ratelimiter import IPRateLimiter, RateLimitMiddleware
 from app.core.config import settings
 
 
@@ -220,3 +223,173 @@ class TestGZipMiddleware:
         assert response.headers.get("content-encoding") == "gzip"
         decompressed = gzip.decompress(response.content)
         assert len(decompressed) > len(response.content)
+
+    def test_streaming_response_is_compressed(self, test_app):
+        """StreamingResponse (экспорт) сжимается по чанкам."""
+        import gzip
+        from starlette.responses import StreamingResponse
+
+        rows = [f"{i},row {i}\n".encode() for i in range(5000)]
+
+        @test_app.get("/export")
+        async def export_endpoint():
+            async def generate():
+                for row in rows:
+                    yield row
+            return StreamingResponse(generate(), media_type="text/csv")
+
+        test_app.add_middleware(GZipMiddleware, minimum_size=100, encodings=["gzip"])
+        client = TestClient(test_app)
+
+        response = client.get("/export", headers={"accept-encoding": "gzip"})
+
+        assert response.headers.get("content-encoding") == "gzip"
+        assert "content-length" not in response.headers
+        assert response.content == b"".join(rows)
+
+    def test_already_encoded_response_is_not_recompressed(self, test_app):
+        """Ответ с Content-Encoding отдаётся как есть."""
+        @test_app.get("/encoded")
+        async def encoded_endpoint():
+            return Response(content=b"x" * 2000, headers={"content-encoding": "identity"})
+
+        test_app.add_middleware(GZipMiddleware, minimum_size=100)
+        client = TestClient(test_app)
+
+        response = client.get("/encoded", headers={"accept-encoding": "gzip"})
+
+        assert response.headers.get("content-encoding") == "identity"
+        assert response.content == b"x" * 2000
+
+    def test_precompressed_stream_is_not_recompressed(self, test_app):
+        """Parquet (уже сжат zstd) и изображения отдаются как есть."""
+        from starlette.responses import StreamingResponse
+
+        from app.middleware.compression import is_precompressed
+
+        chunks = [b"PAR1" + b"x" * 4000, b"y" * 4000]
+
+        @test_app.get("/parquet")
+        async def parquet_endpoint():
+            async def generate():
+                for chunk in chunks:
+                    yield chunk
+            return StreamingResponse(generate(), media_type="application/vnd.apache.parquet")
+
+        test_app.add_middleware(GZipMiddleware, minimum_size=100)
+        client = TestClient(test_app)
+
+        response = client.get("/parquet", headers={"accept-encoding": "gzip"})
+
+        assert "content-encoding" not in response.headers
+        assert response.content == b"".join(chunks)
+        assert is_precompressed("image/png")
+        assert not is_precompressed("image/svg+xml")
+        assert not is_precompressed("application/json; charset=utf-8")
+
+    @pytest.mark.asyncio
+    async def test_ndjson_stream_flushes_every_chunk(self):
+        """Каждый пакет NDJSON доходит до клиента сразу, а не в конце потока."""
+        import zlib
+
+        from app.middleware.compression import Compressor, CompressionMiddleware
+
+        lines = [b'{"source": "avito", "items": []}\n', b'{"done": true, "total": 0}\n']
+        sent = []
+
+        async def app(scope, receive, send):
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"application/x-ndjson")],
+            })
+            for line in lines:
+                await send({"type": "http.response.body", "body": line, "more_body": True})
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+        async def send(message):
+            sent.append(message)
+
+        middleware = CompressionMiddleware(app, minimum_size=10, encodings=["gzip"])
+        scope = {"type": "http", "path": "/properties/stream", "headers": [(b"accept-encoding", b"gzip")]}
+        await middleware(scope, None, send)
+
+        decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        bodies = [message["body"] for message in sent if message["type"] == "http.response.body"]
+        assert decoder.decompress(bodies[0]) == lines[0]
+        assert decoder.decompress(bodies[1]) == lines[1]
+        with pytest.raises(TypeError):
+            Compressor()
+
+    def test_negotiate_encoding(self):
+        """Выбор кодировки учитывает q и предпочтение сервера."""
+        supported = ["zstd", "br", "gzip"]
+
+        assert negotiate_encoding("gzip, deflate, br", supported) == "br"
+        assert negotiate_encoding("gzip, br;q=0.5", supported) == "gzip"
+        assert negotiate_encoding("zstd, br, gzip", supported) == "zstd"
+        assert negotiate_encoding("br;q=0, gzip;q=0", supported) is None
+        assert negotiate_encoding("*", ["gzip"]) == "gzip"
+        assert negotiate_encoding("", supported) is None
+
+
+class TestHTTPPipelineMiddleware:
+    """Тесты для конвейера ASGI-стадий."""
+
+    def test_stages_apply_headers(self, test_app):
+        """Все стадии конвейера правят заголовки одного ответа."""
+        test_app.add_middleware(
+            HTTPPipelineMiddleware,
+            stages=[CorrelationIDMiddleware(), SecurityHeadersMiddleware()],
+        )
+        client = TestClient(test_app)
+
+        response = client.get("/test", headers={"X-Correlation-ID": "abc"})
+
+        assert response.status_code == 200
+        assert response.json() == {"message": "test"}
+        assert response.headers.get("x-correlation-id") == "abc"
+        assert response.headers.get("x-frame-options") == "DENY"
+
+    def test_short_circuit_response_passes_outer_stages(self, test_app):
+        """429 от rate limiter проходит через внешние стадии."""
+        limiter = IPRateLimiter(max_requests=1, time_window=60, burst_requests=100)
+        test_app.add_middleware(
+            HTTPPipelineMiddleware,
+            stages=[
+                CorrelationIDMiddleware(),
+                RateLimitMiddleware(limiter=limiter),
+            ],
+        )
+        client = TestClient(test_app)
+
+        first = client.get("/test")
+        second = client.get("/test")
+
+        assert first.status_code == 200
+        assert "x-ratelimit-limit" in first.headers
+        assert second.status_code == 429
+        assert "retry-after" in second.headers
+        assert "x-correlation-id" in second.headers
+
+    def test_streaming_response_passes_through(self, test_app):
+        """StreamingResponse не буферизуется конвейером."""
+        from starlette.responses import StreamingResponse
+
+        @test_app.get("/stream")
+        async def stream_endpoint():
+            async def generate():
+                for i in range(3):
+                    yield f"chunk {i}\n".encode()
+            return StreamingResponse(generate(), media_type="text/plain")
+
+        test_app.add_middleware(
+            HTTPPipelineMiddleware,
+            stages=[CorrelationIDMiddleware(), SecurityHeadersMiddleware()],
+        )
+        client = TestClient(test_app)
+
+        response = client.get("/stream")
+
+        assert response.text == "chunk 0\nchunk 1\nchunk 2\n"
+        assert "x-correlation-id" in response.headers